@@ -14,10 +14,10 @@ QUERIES_50 = [
         "category": "אלמנטים קונסטרוקטיביים",
         "title": "כמה קירות יש בכל קומה?",
         "sql": """
-        SELECT bs.Name as storey_name, COUNT(w.ifc_id) as wall_count
+        SELECT bs.Name as storey_name, COUNT(l.ifc_id) as wall_count
         FROM ifcbuildingstorey bs
-        LEFT JOIN ifcrelcontainedinspatialstructure rel ON bs.ifc_id = rel.RelatingStructure
-        LEFT JOIN ifcwall w ON w.ifc_id = ANY(rel.RelatedElements)
+        LEFT JOIN element_location l
+            ON l.storey_id = bs.ifc_id AND l.ifc_class = 'IfcWall'
         GROUP BY bs.ifc_id, bs.Name
         ORDER BY wall_count DESC
         """,
@@ -48,7 +48,7 @@ QUERIES_50 = [
         JOIN id_map im ON p.ifc_id = im.ifc_id
         WHERE im.ifc_class = 'IfcColumn' 
         AND p.name = 'Height'
-        ORDER BY CAST(p.value AS DOUBLE) DESC
+        ORDER BY p.value_num DESC
         LIMIT 10
         """,
         "description": "רשימת 10 העמודים הגבוהים ביותר"
@@ -59,7 +59,7 @@ QUERIES_50 = [
         "category": "אלמנטים קונסטרוקטיביים",
         "title": "מהו השטח הכולל של כל הרצפות?",
         "sql": """
-        SELECT SUM(CAST(p.value AS DOUBLE)) as total_area
+        SELECT SUM(p.value_num) as total_area
         FROM psets p
         JOIN id_map im ON p.ifc_id = im.ifc_id
         WHERE im.ifc_class = 'IfcSlab' 
@@ -78,7 +78,7 @@ QUERIES_50 = [
         JOIN id_map im ON p.ifc_id = im.ifc_id
         WHERE im.ifc_class IN ('IfcWall', 'IfcWallStandardCase')
         AND p.name = 'Width'
-        ORDER BY CAST(p.value AS DOUBLE) DESC
+        ORDER BY p.value_num DESC
         """,
         "description": "מיון הקירות לפי עובי"
     },
@@ -105,8 +105,9 @@ QUERIES_50 = [
         "sql": """
         SELECT im.ifc_class, COUNT(*) as count
         FROM ifcmaterial m
-        JOIN ifcrelassociatesmaterial ram ON m.ifc_id = ram.RelatingMaterial
-        JOIN id_map im ON im.ifc_id = ANY(ram.RelatedObjects)
+        JOIN rel_edges e ON e.relating_id = m.ifc_id
+            AND e.rel_class = 'IfcRelAssociatesMaterial'
+        JOIN id_map im ON im.ifc_id = e.related_id
         WHERE m.Name LIKE '%Steel%' OR m.Name LIKE '%steel%'
         GROUP BY im.ifc_class
         ORDER BY count DESC
@@ -146,8 +147,9 @@ QUERIES_50 = [
         "sql": """
         SELECT im.ifc_class, im.ifc_id
         FROM ifcmaterial m
-        JOIN ifcrelassociatesmaterial ram ON m.ifc_id = ram.RelatingMaterial
-        JOIN id_map im ON im.ifc_id = ANY(ram.RelatedObjects)
+        JOIN rel_edges e ON e.relating_id = m.ifc_id
+            AND e.rel_class = 'IfcRelAssociatesMaterial'
+        JOIN id_map im ON im.ifc_id = e.related_id
         WHERE m.Name LIKE '%Concrete%' OR m.Name LIKE '%concrete%'
         """,
         "description": "זיהוי אלמנטי בטון בפרויקט"
@@ -159,7 +161,7 @@ QUERIES_50 = [
         "category": "מערכות MEP",
         "title": "מהו האורך הכולל של כל הצנרת?",
         "sql": """
-        SELECT SUM(CAST(p.value AS DOUBLE)) as total_pipe_length
+        SELECT SUM(p.value_num) as total_pipe_length
         FROM psets p
         WHERE p.pset_name = 'Pset_FlowSegmentPipeSegment' 
         AND p.name = 'Length'
@@ -196,7 +198,7 @@ QUERIES_50 = [
         "category": "מערכות MEP",
         "title": "מהן מערכות האוורור?",
         "sql": """
-        SELECT SUM(CAST(p.value AS DOUBLE)) as total_duct_length
+        SELECT SUM(p.value_num) as total_duct_length
         FROM psets p
         WHERE p.pset_name = 'Pset_FlowSegmentDuctSegment' 
         AND p.name = 'Length'
@@ -243,7 +245,7 @@ QUERIES_50 = [
         "category": "גיאומטריה ונפחים",
         "title": "מהו הנפח הכולל של האלמנטים?",
         "sql": """
-        SELECT SUM(CAST(p.value AS DOUBLE)) as total_volume
+        SELECT SUM(p.value_num) as total_volume
         FROM psets p
         WHERE p.name = 'Volume'
         """,
@@ -258,7 +260,7 @@ QUERIES_50 = [
         SELECT p.ifc_id, p.value as area
         FROM psets p
         WHERE p.name = 'Area'
-        ORDER BY CAST(p.value AS DOUBLE) DESC
+        ORDER BY p.value_num DESC
         LIMIT 10
         """,
         "description": "10 האלמנטים עם השטח הגדול ביותר"
@@ -387,9 +389,10 @@ QUERIES_50 = [
         "category": "מבנה הבניין",
         "title": "כמה אלמנטים יש בכל קומה?",
         "sql": """
-        SELECT bs.Name as storey_name, COUNT(rel.RelatedElements) as element_count
+        SELECT bs.Name as storey_name, COUNT(l.ifc_id) as element_count
         FROM ifcbuildingstorey bs
-        LEFT JOIN ifcrelcontainedinspatialstructure rel ON bs.ifc_id = rel.RelatingStructure
+        LEFT JOIN element_location l
+            ON l.storey_id = bs.ifc_id AND l.ifc_id <> bs.ifc_id
         GROUP BY bs.ifc_id, bs.Name
         ORDER BY element_count DESC
         """,
@@ -564,8 +567,11 @@ QUERIES_50 = [
         "sql": """
         SELECT im.ifc_class, COUNT(*) as no_material_count
         FROM id_map im
-        LEFT JOIN ifcrelassociatesmaterial ram ON im.ifc_id = ANY(ram.RelatedObjects)
-        WHERE ram.RelatingMaterial IS NULL
+        LEFT JOIN (
+            SELECT DISTINCT related_id FROM rel_edges
+            WHERE rel_class = 'IfcRelAssociatesMaterial'
+        ) ram ON im.ifc_id = ram.related_id
+        WHERE ram.related_id IS NULL
         GROUP BY im.ifc_class
         ORDER BY no_material_count DESC
         """,
@@ -627,9 +633,9 @@ QUERIES_50 = [
         "title": "מהם הממדים הממוצעים של הקורות?",
         "sql": """
         SELECT 
-            AVG(CAST(p1.value AS DOUBLE)) as avg_length,
-            AVG(CAST(p2.value AS DOUBLE)) as avg_width,
-            AVG(CAST(p3.value AS DOUBLE)) as avg_height
+            AVG(p1.value_num) as avg_length,
+            AVG(p2.value_num) as avg_width,
+            AVG(p3.value_num) as avg_height
         FROM psets p1
         JOIN psets p2 ON p1.ifc_id = p2.ifc_id
         JOIN psets p3 ON p1.ifc_id = p3.ifc_id
@@ -689,8 +695,11 @@ QUERIES_50 = [
             'אלמנטים ללא חומרים' as missing_info,
             COUNT(*) as count
         FROM id_map im
-        LEFT JOIN ifcrelassociatesmaterial ram ON im.ifc_id = ANY(ram.RelatedObjects)
-        WHERE ram.RelatingMaterial IS NULL
+        LEFT JOIN (
+            SELECT DISTINCT related_id FROM rel_edges
+            WHERE rel_class = 'IfcRelAssociatesMaterial'
+        ) ram ON im.ifc_id = ram.related_id
+        WHERE ram.related_id IS NULL
         AND im.ifc_class IN ('IfcWall', 'IfcBeam', 'IfcColumn', 'IfcSlab')
         
         UNION ALL
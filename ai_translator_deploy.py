@@ -26,14 +26,18 @@ class IFCQueryTranslator:
         
         # Get database schema for context
         self.schema_info = self._get_database_schema()
+        self.has_typed_psets = self._has_typed_psets()
         
     def _get_database_schema(self) -> str:
         """מקבל מידע על סכמת מסד הנתונים"""
         try:
             conn = duckdb.connect(self.database_path)
             
-            # Get table names and sample columns
-            tables = conn.execute("SHOW TABLES").fetchall()
+            # Get table names and sample columns, skipping the empty views of a
+            # lazy schema
+            tables = conn.execute(
+                "SELECT table_name FROM duckdb_tables() ORDER BY table_name"
+            ).fetchall()
             schema_info = "DATABASE SCHEMA INFORMATION:\\n\\n"
             
             for table in tables[:20]:  # Limit to first 20 tables
@@ -53,6 +57,21 @@ class IFCQueryTranslator:
             logging.error(f"Error getting schema: {e}")
             return "Database schema not available"
     
+    def _has_typed_psets(self) -> bool:
+        """האם לטבלת psets יש עמודת value_num (ifc2duckdb בגרסה עדכנית)"""
+        try:
+            conn = duckdb.connect(self.database_path)
+            try:
+                return bool(conn.execute(
+                    """SELECT count(*) FROM information_schema.columns
+                       WHERE table_name = 'psets' AND column_name = 'value_num'"""
+                ).fetchone()[0])
+            finally:
+                conn.close()
+        except Exception as e:
+            logging.error(f"Error checking psets columns: {e}")
+            return False
+
     def translate_query(self, natural_question: str) -> Dict[str, Any]:
         """
         מתרגם שאלה בשפה טבעית לשאילתת SQL
@@ -67,6 +86,18 @@ class IFCQueryTranslator:
         # Pre-process common patterns
         preprocessed = self._preprocess_common_patterns(natural_question)
         if preprocessed:
+            if 'value_num' in preprocessed['sql_query'] and not self.has_typed_psets:
+                # Converted by an older ifc2duckdb, without typed pset values
+                return {
+                    'sql_query': None,
+                    'confidence': 0.0,
+                    'explanation': (
+                        "The database has no psets.value_num column. It was "
+                        "converted by an older version of ifc2duckdb, convert "
+                        "the IFC file again to answer this question."
+                    ),
+                    'error': 'DATABASE_NEEDS_RECONVERSION'
+                }
             return preprocessed
         
         # Create context-aware prompt
@@ -91,7 +122,7 @@ IMPORTANT IFC CONCEPTS:
 - Quantities and measurements
 
 COMMON QUERIES EXAMPLES:
-- Floor area / שטח רצפה: "SELECT SUM(CAST(value AS DECIMAL)) FROM psets WHERE name LIKE '%Area%' OR name LIKE '%שטח%'"
+- Floor area / שטח רצפה: "SELECT SUM(value_num) FROM psets WHERE name LIKE '%Area%' OR name LIKE '%שטח%'"
 - Wall count / ספירת קירות: "SELECT COUNT(*) FROM ifcwall"
 - Material list / רשימת חומרים: "SELECT DISTINCT Name FROM ifcmaterial"
 - Space areas / שטחי חללים: "SELECT Name, area FROM ifcspace WHERE area IS NOT NULL"
@@ -155,10 +186,10 @@ Convert this to a SQL query for the IFC database."""
         # Floor area patterns / שטח רצפה
         if any(term in question_lower for term in ['שטח רצפה', 'שטח הרצפה', 'floor area', 'total area']):
             sql_query = """SELECT 
-                ROUND(SUM(CAST(JSON_EXTRACT(NominalValue, '$.value') AS DECIMAL)), 2) as total_area_sqm
-            FROM IfcPropertySingleValue 
-            WHERE Name IN ('TotalArea', 'ProjectedArea', 'Area')
-            AND NominalValue IS NOT NULL"""
+                ROUND(SUM(value_num), 2) as total_area_sqm
+            FROM psets 
+            WHERE name IN ('TotalArea', 'ProjectedArea', 'Area')
+            AND value_num IS NOT NULL"""
             
             return {
                 'sql_query': sql_query,
@@ -193,11 +224,11 @@ Convert this to a SQL query for the IFC database."""
         if any(term in question_lower for term in ['שטח חללים', 'שטחי חללים', 'space areas', 'room areas']):
             sql_query = """SELECT 
                 s.Name as space_name,
-                ROUND(CAST(JSON_EXTRACT(p.NominalValue, '$.value') AS DECIMAL), 2) as area_sqm
+                ROUND(p.value_num, 2) as area_sqm
             FROM IfcSpace s
-            LEFT JOIN IfcPropertySingleValue p ON p.Name = 'Area'
+            LEFT JOIN psets p ON p.ifc_id = s.ifc_id AND p.name = 'Area'
             WHERE s.Name IS NOT NULL
-            AND p.NominalValue IS NOT NULL
+            AND p.value_num IS NOT NULL
             ORDER BY area_sqm DESC"""
             
             return {
@@ -210,10 +241,10 @@ Convert this to a SQL query for the IFC database."""
         # Building height / גובה הבניין
         if any(term in question_lower for term in ['גובה בניין', 'גובה הבניין', 'building height', 'total height']):
             sql_query = """SELECT 
-                Name as building_name,
-                ROUND(CAST(JSON_EXTRACT(p.NominalValue, '$.value') AS DECIMAL), 2) as height_m
+                b.Name as building_name,
+                ROUND(p.value_num, 2) as height_m
             FROM IfcBuilding b
-            LEFT JOIN IfcPropertySingleValue p ON p.Name LIKE '%Height%'
+            LEFT JOIN psets p ON p.ifc_id = b.ifc_id AND p.name LIKE '%Height%'
             WHERE b.Name IS NOT NULL
             LIMIT 1"""
             
@@ -311,10 +342,10 @@ Convert this to a SQL query for the IFC database."""
         # Volume calculation / חישוב נפח
         if any(term in question_lower for term in ['נפח כולל', 'נפח הכולל', 'הנפח הכולל', 'נפח הבניין', 'total volume', 'building volume']):
             sql_query = """SELECT 
-                ROUND(SUM(CAST(JSON_EXTRACT(NominalValue, '$.value') AS DECIMAL)), 2) as total_volume_m3
-            FROM IfcPropertySingleValue 
-            WHERE Name LIKE '%Volume%'
-            AND NominalValue IS NOT NULL"""
+                ROUND(SUM(value_num), 2) as total_volume_m3
+            FROM psets 
+            WHERE name LIKE '%Volume%'
+            AND value_num IS NOT NULL"""
             
             return {
                 'sql_query': sql_query,
@@ -327,9 +358,8 @@ Convert this to a SQL query for the IFC database."""
         if any(term in question_lower for term in ['קומות', 'שמות קומות', 'floors', 'storeys', 'floor names']):
             sql_query = """SELECT 
                 Name as floor_name,
-                ROUND(CAST(JSON_EXTRACT(p.NominalValue, '$.value') AS DECIMAL), 2) as elevation
+                ROUND(bs.Elevation, 2) as elevation
             FROM IfcBuildingStorey bs
-            LEFT JOIN IfcPropertySingleValue p ON p.Name LIKE '%Elevation%'
             WHERE bs.Name IS NOT NULL
             ORDER BY elevation"""
             
@@ -381,9 +411,9 @@ Convert this to a SQL query for the IFC database."""
             sql_query = """SELECT 
                 s.Name as space_name,
                 s.ObjectType as space_type,
-                ROUND(CAST(JSON_EXTRACT(p.NominalValue, '$.value') AS DECIMAL), 2) as area_sqm
+                ROUND(p.value_num, 2) as area_sqm
             FROM IfcSpace s
-            LEFT JOIN IfcPropertySingleValue p ON p.Name LIKE '%Area%'
+            LEFT JOIN psets p ON p.ifc_id = s.ifc_id AND p.name LIKE '%Area%'
             WHERE s.Name IS NOT NULL
             ORDER BY area_sqm DESC"""
             
@@ -398,12 +428,12 @@ Convert this to a SQL query for the IFC database."""
         if any(term in question_lower for term in ['חדר הגדול', 'החדר הגדול ביותר', 'largest room', 'biggest room']):
             sql_query = """SELECT 
                 s.Name as space_name,
-                ROUND(CAST(JSON_EXTRACT(p.NominalValue, '$.value') AS DECIMAL), 2) as area_sqm
+                ROUND(p.value_num, 2) as area_sqm
             FROM IfcSpace s
-            LEFT JOIN IfcPropertySingleValue p ON p.Name LIKE '%Area%'
+            LEFT JOIN psets p ON p.ifc_id = s.ifc_id AND p.name LIKE '%Area%'
             WHERE s.Name IS NOT NULL
-            AND p.NominalValue IS NOT NULL
-            ORDER BY CAST(JSON_EXTRACT(p.NominalValue, '$.value') AS DECIMAL) DESC
+            AND p.value_num IS NOT NULL
+            ORDER BY p.value_num DESC
             LIMIT 1"""
             
             return {
@@ -456,9 +486,9 @@ Convert this to a SQL query for the IFC database."""
         if any(term in question_lower for term in ['כיוון', 'אוריינטציה', 'orientation', 'direction', 'north']):
             sql_query = """SELECT 
                 s.Name as site_name,
-                JSON_EXTRACT(p.NominalValue, '$.value') as orientation
+                p.value as orientation
             FROM IfcSite s
-            LEFT JOIN IfcPropertySingleValue p ON p.Name LIKE '%Orientation%' OR p.Name LIKE '%Direction%'
+            LEFT JOIN psets p ON p.ifc_id = s.ifc_id AND (p.name LIKE '%Orientation%' OR p.name LIKE '%Direction%')
             WHERE s.Name IS NOT NULL"""
             
             return {
@@ -493,14 +523,14 @@ Convert this to a SQL query for the IFC database."""
         # Energy efficiency / יעילות אנרגטית
         if any(term in question_lower for term in ['אנרגיה', 'יעילות', 'energy', 'efficiency', 'thermal']):
             sql_query = """SELECT 
-                p.Name as property_name,
-                JSON_EXTRACT(p.NominalValue, '$.value') as value,
-                p.Description
-            FROM IfcPropertySingleValue p
-            WHERE p.Name LIKE '%Energy%' 
-            OR p.Name LIKE '%Thermal%'
-            OR p.Name LIKE '%Insulation%'
-            OR p.Name LIKE '%U-Value%'"""
+                p.name as property_name,
+                p.value as value,
+                p.unit
+            FROM psets p
+            WHERE p.name LIKE '%Energy%' 
+            OR p.name LIKE '%Thermal%'
+            OR p.name LIKE '%Insulation%'
+            OR p.name LIKE '%U-Value%'"""
             
             return {
                 'sql_query': sql_query,
@@ -560,12 +590,12 @@ Convert this to a SQL query for the IFC database."""
             sql_query = """SELECT 
                 c.Name as column_name,
                 c.ObjectType as column_type,
-                JSON_EXTRACT(p.NominalValue, '$.value') as diameter_or_dimension,
-                p.Name as property_name
+                p.value_num as diameter_or_dimension,
+                p.name as property_name
             FROM IfcColumn c
-            LEFT JOIN IfcPropertySingleValue p ON p.Name LIKE '%Diameter%' OR p.Name LIKE '%Width%' OR p.Name LIKE '%Dimension%'
+            LEFT JOIN psets p ON p.ifc_id = c.ifc_id AND (p.name LIKE '%Diameter%' OR p.name LIKE '%Width%' OR p.name LIKE '%Dimension%')
             WHERE c.Name IS NOT NULL
-            ORDER BY CAST(JSON_EXTRACT(p.NominalValue, '$.value') AS DECIMAL) DESC"""
+            ORDER BY p.value_num DESC"""
             
             return {
                 'sql_query': sql_query,
@@ -579,12 +609,12 @@ Convert this to a SQL query for the IFC database."""
             sql_query = """SELECT 
                 b.Name as beam_name,
                 b.ObjectType as beam_type,
-                JSON_EXTRACT(p.NominalValue, '$.value') as dimension,
-                p.Name as property_name
+                p.value_num as dimension,
+                p.name as property_name
             FROM IfcBeam b
-            LEFT JOIN IfcPropertySingleValue p ON p.Name LIKE '%Height%' OR p.Name LIKE '%Width%' OR p.Name LIKE '%Length%'
+            LEFT JOIN psets p ON p.ifc_id = b.ifc_id AND (p.name LIKE '%Height%' OR p.name LIKE '%Width%' OR p.name LIKE '%Length%')
             WHERE b.Name IS NOT NULL
-            ORDER BY CAST(JSON_EXTRACT(p.NominalValue, '$.value') AS DECIMAL) DESC"""
+            ORDER BY p.value_num DESC"""
             
             return {
                 'sql_query': sql_query,
@@ -598,11 +628,11 @@ Convert this to a SQL query for the IFC database."""
             sql_query = """SELECT 
                 s.Name as slab_name,
                 s.ObjectType as slab_type,
-                ROUND(CAST(JSON_EXTRACT(p.NominalValue, '$.value') AS DECIMAL), 2) as thickness_mm
+                ROUND(p.value_num, 2) as thickness_mm
             FROM IfcSlab s
-            LEFT JOIN IfcPropertySingleValue p ON p.Name LIKE '%Thickness%'
+            LEFT JOIN psets p ON p.ifc_id = s.ifc_id AND p.name LIKE '%Thickness%'
             WHERE s.Name IS NOT NULL
-            AND p.NominalValue IS NOT NULL
+            AND p.value_num IS NOT NULL
             ORDER BY thickness_mm DESC"""
             
             return {
@@ -687,11 +717,11 @@ Convert this to a SQL query for the IFC database."""
         if any(term in question_lower for term in ['טון בטון', 'נפח בטון', 'concrete volume', 'concrete tons']):
             sql_query = """SELECT 
                 'Total Concrete Volume' as material_type,
-                ROUND(SUM(CAST(JSON_EXTRACT(p.NominalValue, '$.value') AS DECIMAL)), 2) as total_volume_m3,
-                ROUND(SUM(CAST(JSON_EXTRACT(p.NominalValue, '$.value') AS DECIMAL)) * 2.4, 2) as estimated_tons
-            FROM IfcPropertySingleValue p
-            WHERE p.Name LIKE '%Volume%' 
-            AND JSON_EXTRACT(p.NominalValue, '$.value') IS NOT NULL"""
+                ROUND(SUM(p.value_num), 2) as total_volume_m3,
+                ROUND(SUM(p.value_num) * 2.4, 2) as estimated_tons
+            FROM psets p
+            WHERE p.name LIKE '%Volume%' 
+            AND p.value_num IS NOT NULL"""
             
             return {
                 'sql_query': sql_query,
@@ -776,9 +806,9 @@ Convert this to a SQL query for the IFC database."""
         if any(term in question_lower for term in ['גודל פרויקט', 'גודל הפרויקט', 'project size']):
             sql_query = """SELECT 
                 'Total Floor Area (sqm)' as metric,
-                ROUND(SUM(CAST(JSON_EXTRACT(p.NominalValue, '$.value') AS DECIMAL)), 1) as value
-            FROM IfcPropertySingleValue p
-            WHERE p.Name LIKE '%Area%' AND p.NominalValue IS NOT NULL
+                ROUND(SUM(p.value_num), 1) as value
+            FROM psets p
+            WHERE p.name LIKE '%Area%' AND p.value_num IS NOT NULL
             UNION ALL
             SELECT 
                 'Number of Floors' as metric,
@@ -799,9 +829,9 @@ Convert this to a SQL query for the IFC database."""
             }
             sql_query = """SELECT 
                 'Total Floor Area (sqm)' as metric,
-                ROUND(SUM(CAST(JSON_EXTRACT(p.NominalValue, '$.value') AS DECIMAL)), 1) as value
-            FROM IfcPropertySingleValue p
-            WHERE p.Name LIKE '%Area%' AND p.NominalValue IS NOT NULL
+                ROUND(SUM(p.value_num), 1) as value
+            FROM psets p
+            WHERE p.name LIKE '%Area%' AND p.value_num IS NOT NULL
             UNION ALL
             SELECT 
                 'Number of Floors' as metric,
@@ -895,9 +925,9 @@ Convert this to a SQL query for the IFC database."""
                 ROUND(
                     (COUNT(*) * 1500.0) / 
                     GREATEST(
-                        (SELECT SUM(CAST(JSON_EXTRACT(p.NominalValue, '$.value') AS DECIMAL)) 
-                         FROM IfcPropertySingleValue p 
-                         WHERE p.Name LIKE '%Area%' AND p.NominalValue IS NOT NULL), 
+                        (SELECT SUM(p.value_num) 
+                         FROM psets p 
+                         WHERE p.name LIKE '%Area%' AND p.value_num IS NOT NULL), 
                         100
                     ), 0
                 ) as estimated_cost_per_sqm_nis
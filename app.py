@@ -12,6 +12,7 @@ import random
 from typing import List, Dict, Any
 import re
 import os
+import json
 try:
     from dotenv import load_dotenv
     load_dotenv()
@@ -148,10 +149,18 @@ PROFESSIONAL_QUESTIONS = {
     }
 }
 
+def get_database_version():
+    """גרסת מסד הנתונים, מתעדכנת כאשר ifc2duckdb watch מחליף אותו"""
+    try:
+        with open(DATABASE_PATH + ".version", encoding="utf-8") as f:
+            return json.load(f)["version"]
+    except (OSError, ValueError, KeyError):
+        return None
+
 # Initialize AI translator
 @st.cache_resource
-def get_ai_translator():
-    """אתחול המתרגם AI (cached)"""
+def get_ai_translator(database_version=None):
+    """אתחול המתרגם AI (cached, מחדש לכל גרסת מסד נתונים)"""
     if AI_ENABLED and IFCQueryTranslator:
         try:
             return IFCQueryTranslator(DATABASE_PATH)
@@ -164,10 +173,10 @@ def get_ai_translator():
 QUERIES_50 = [
     # ===== אלמנטים קונסטרוקטיביים =====
     Query(1, "אלמנטים קונסטרוקטיביים", "כמה קירות יש בכל קומה?", 
-          """SELECT bs.Name as storey_name, COUNT(w.ifc_id) as wall_count
+          """SELECT bs.Name as storey_name, COUNT(l.ifc_id) as wall_count
              FROM ifcbuildingstorey bs
-             LEFT JOIN ifcrelcontainedinspatialstructure rel ON bs.ifc_id = rel.RelatingStructure
-             LEFT JOIN ifcwall w ON w.ifc_id = ANY(rel.RelatedElements)
+             LEFT JOIN element_location l
+                 ON l.storey_id = bs.ifc_id AND l.ifc_class = 'IfcWall'
              GROUP BY bs.ifc_id, bs.Name
              ORDER BY wall_count DESC""",
           "מראה חלוקה של קירות לפי קומות"),
@@ -181,17 +190,17 @@ QUERIES_50 = [
           "חילוץ ממדי הקורות (אורך, רוחב, גובה)"),
     
     Query(3, "אלמנטים קונסטרוקטיביים", "איזה עמודים הכי גבוהים?",
-          """SELECT p.ifc_id, p.value as height
+          """SELECT p.ifc_id, p.value_num as height, p.unit
              FROM psets p
              JOIN id_map im ON p.ifc_id = im.ifc_id
              WHERE im.ifc_class = 'IfcColumn' 
              AND p.name = 'Height'
-             ORDER BY CAST(p.value AS DOUBLE) DESC
+             ORDER BY p.value_num DESC
              LIMIT 10""",
           "רשימת 10 העמודים הגבוהים ביותר"),
     
     Query(4, "אלמנטים קונסטרוקטיביים", "מהו השטח הכולל של כל הרצפות?",
-          """SELECT SUM(CAST(p.value AS DOUBLE)) as total_area
+          """SELECT SUM(p.value_num) as total_area
              FROM psets p
              JOIN id_map im ON p.ifc_id = im.ifc_id
              WHERE im.ifc_class = 'IfcSlab' 
@@ -199,12 +208,12 @@ QUERIES_50 = [
           "חישוב סך השטח של כל הרצפות"),
     
     Query(5, "אלמנטים קונסטרוקטיביים", "איזה קירות הכי עבים?",
-          """SELECT p.ifc_id, p.value as thickness
+          """SELECT p.ifc_id, p.value_num as thickness, p.unit
              FROM psets p
              JOIN id_map im ON p.ifc_id = im.ifc_id
              WHERE im.ifc_class IN ('IfcWall', 'IfcWallStandardCase')
              AND p.name = 'Width'
-             ORDER BY CAST(p.value AS DOUBLE) DESC""",
+             ORDER BY p.value_num DESC""",
           "מיון הקירות לפי עובי"),
     
     # ===== חומרים ומאפיינים =====
@@ -219,8 +228,9 @@ QUERIES_50 = [
     Query(7, "חומרים ומאפיינים", "איזה אלמנטים עשויים מפלדה?",
           """SELECT im.ifc_class, COUNT(*) as count
              FROM ifcmaterial m
-             JOIN ifcrelassociatesmaterial ram ON m.ifc_id = ram.RelatingMaterial
-             JOIN id_map im ON im.ifc_id = ANY(ram.RelatedObjects)
+             JOIN rel_edges e ON e.relating_id = m.ifc_id
+                 AND e.rel_class = 'IfcRelAssociatesMaterial'
+             JOIN id_map im ON im.ifc_id = e.related_id
              WHERE m.Name LIKE '%Steel%' OR m.Name LIKE '%steel%'
              GROUP BY im.ifc_class
              ORDER BY count DESC""",
@@ -242,14 +252,15 @@ QUERIES_50 = [
     Query(10, "חומרים ומאפיינים", "איזה אלמנטים עשויים מבטון?",
           """SELECT im.ifc_class, im.ifc_id
              FROM ifcmaterial m
-             JOIN ifcrelassociatesmaterial ram ON m.ifc_id = ram.RelatingMaterial
-             JOIN id_map im ON im.ifc_id = ANY(ram.RelatedObjects)
+             JOIN rel_edges e ON e.relating_id = m.ifc_id
+                 AND e.rel_class = 'IfcRelAssociatesMaterial'
+             JOIN id_map im ON im.ifc_id = e.related_id
              WHERE m.Name LIKE '%Concrete%' OR m.Name LIKE '%concrete%'""",
           "זיהוי אלמנטי בטון בפרויקט"),
     
     # ===== מערכות MEP =====
     Query(11, "מערכות MEP", "מהו האורך הכולל של כל הצנרת?",
-          """SELECT SUM(CAST(p.value AS DOUBLE)) as total_pipe_length
+          """SELECT SUM(p.value_num) as total_pipe_length
              FROM psets p
              WHERE p.pset_name = 'Pset_FlowSegmentPipeSegment' 
              AND p.name = 'Length'""",
@@ -268,7 +279,7 @@ QUERIES_50 = [
           "ספירת יציאות החיבור במערכות"),
     
     Query(14, "מערכות MEP", "מהן מערכות האוורור?",
-          """SELECT SUM(CAST(p.value AS DOUBLE)) as total_duct_length
+          """SELECT SUM(p.value_num) as total_duct_length
              FROM psets p
              WHERE p.pset_name = 'Pset_FlowSegmentDuctSegment' 
              AND p.name = 'Length'""",
@@ -291,16 +302,16 @@ QUERIES_50 = [
           "ספירת הצורות הגיאומטריות במודל"),
     
     Query(18, "גיאומטריה ונפחים", "מהו הנפח הכולל של האלמנטים?",
-          """SELECT SUM(CAST(p.value AS DOUBLE)) as total_volume
+          """SELECT SUM(p.value_num) as total_volume
              FROM psets p
              WHERE p.name = 'Volume'""",
           "חישוב סך הנפח של כל האלמנטים"),
     
     Query(19, "גיאומטריה ונפחים", "איזה אלמנטים הכי גדולים בשטח?",
-          """SELECT p.ifc_id, p.value as area
+          """SELECT p.ifc_id, p.value_num as area, p.unit
              FROM psets p
              WHERE p.name = 'Area'
-             ORDER BY CAST(p.value AS DOUBLE) DESC
+             ORDER BY p.value_num DESC
              LIMIT 10""",
           "10 האלמנטים עם השטח הגדול ביותר"),
     
@@ -337,11 +348,11 @@ QUERIES_50 = [
           "20 התכונות השכיחות ביותר"),
     
     Query(24, "Property Sets ותכונות", "איזה אלמנטים יש להם תכונת LoadBearing?",
-          """SELECT im.ifc_class, p.value as load_bearing, COUNT(*) as count
+          """SELECT im.ifc_class, p.value_bool as load_bearing, COUNT(*) as count
              FROM psets p
              JOIN id_map im ON p.ifc_id = im.ifc_id
              WHERE p.name = 'LoadBearing'
-             GROUP BY im.ifc_class, p.value
+             GROUP BY im.ifc_class, p.value_bool
              ORDER BY count DESC""",
           "אלמנטים נושאי משקל"),
     
@@ -359,9 +370,10 @@ QUERIES_50 = [
           "רשימת קומות וגובהן"),
     
     Query(27, "מבנה הבניין", "כמה אלמנטים יש בכל קומה?",
-          """SELECT bs.Name as storey_name, COUNT(rel.RelatedElements) as element_count
+          """SELECT bs.Name as storey_name, COUNT(l.ifc_id) as element_count
              FROM ifcbuildingstorey bs
-             LEFT JOIN ifcrelcontainedinspatialstructure rel ON bs.ifc_id = rel.RelatingStructure
+             LEFT JOIN element_location l
+                 ON l.storey_id = bs.ifc_id AND l.ifc_id <> bs.ifc_id
              GROUP BY bs.ifc_id, bs.Name
              ORDER BY element_count DESC""",
           "חלוקת אלמנטים לפי קומות"),
@@ -443,7 +455,7 @@ def is_safe_query(query: str) -> bool:
 
 def translate_natural_query(natural_question: str) -> Dict[str, Any]:
     """תרגום שאלה בשפה טבעית לשאילתת SQL"""
-    translator = get_ai_translator()
+    translator = get_ai_translator(get_database_version())
     
     if not translator:
         return {
@@ -455,6 +467,34 @@ def translate_natural_query(natural_question: str) -> Dict[str, Any]:
     
     return translator.translate_query(natural_question)
 
+# Tables and columns of the queries that databases converted by older versions
+# of ifc2duckdb, or with --no-rel-edges or --no-element-location, do not have
+REQUIRED_SCHEMA = [
+    ("element_location", None),
+    ("rel_edges", None),
+    ("psets", "value_num"),
+]
+
+def get_missing_schema(conn, query: str) -> List[str]:
+    """הטבלאות והעמודות שהשאילתה משתמשת בהן וחסרות במסד הנתונים"""
+    tables = sorted({table for table, _ in REQUIRED_SCHEMA})
+    existing = set(conn.execute(
+        f"""SELECT table_name, column_name FROM information_schema.columns
+            WHERE table_name IN ({', '.join('?' for _ in tables)})""",
+        tables,
+    ).fetchall())
+    tables = {table for table, _ in existing}
+    missing = []
+    for table, column in REQUIRED_SCHEMA:
+        name = column or table
+        if not re.search(rf"\b{name}\b", query, re.IGNORECASE):
+            continue
+        if (column is None and table not in tables) or (
+            column is not None and (table, column) not in existing
+        ):
+            missing.append(f"{table}.{column}" if column else table)
+    return missing
+
 def execute_query(query: str) -> tuple[bool, Any]:
     """הרץ שאילתה על מסד הנתונים"""
     try:
@@ -462,6 +502,14 @@ def execute_query(query: str) -> tuple[bool, Any]:
             return False, "❌ שגיאת בטחון: רק שאילתות SELECT, SHOW ו-DESCRIBE מותרות"
         
         conn = duckdb.connect(DATABASE_PATH)
+        missing = get_missing_schema(conn, query)
+        if missing:
+            conn.close()
+            return False, (
+                f"❌ במסד הנתונים חסרים {', '.join(missing)}: הוא הומר בגרסה ישנה של "
+                "ifc2duckdb או עם --no-rel-edges / --no-element-location. "
+                "יש להמיר את קובץ ה-IFC מחדש כדי להריץ שאילתה זו."
+            )
         result = conn.execute(query).fetchdf()
         conn.close()
         
@@ -514,7 +562,7 @@ def display_query_result(result_df: pd.DataFrame, query: str, original_question:
         # AI Interpretation if available and original question provided
         if AI_ENABLED and original_question:
             try:
-                translator = get_ai_translator()
+                translator = get_ai_translator(get_database_version())
                 if translator:
                     with st.spinner("🤖 מפרש תוצאות..."):
                         interpretation = translator.interpret_results(
@@ -570,7 +618,7 @@ def render_chat_messages():
                 # Show AI interpretation if available
                 if AI_ENABLED and "query_title" in message:
                     try:
-                        translator = get_ai_translator()
+                        translator = get_ai_translator(get_database_version())
                         if translator:
                             with st.spinner("🤖 מפרש תוצאות..."):
                                 interpretation = translator.interpret_results(
@@ -636,7 +684,7 @@ def render_chat_input():
         
         if AI_ENABLED:
             # Use AI to translate and execute
-            translator = get_ai_translator()
+            translator = get_ai_translator(get_database_version())
             if translator:
                 try:
                     with st.spinner("🤖 מעבד שאלה..."):
@@ -990,7 +1038,7 @@ def handle_question(question: str, context: str):
     
     if AI_ENABLED:
         # Use AI translation
-        translator = get_ai_translator()
+        translator = get_ai_translator(get_database_version())
         if translator:
             try:
                 with st.spinner("🤖 מתרגם שאלה..."):
@@ -1061,9 +1109,12 @@ def handle_question(question: str, context: str):
                         session_id=st.session_state.session_id
                     )
                     
+                    message = f"❌ לא הצלחתי לתרגם את השאלה: {question}"
+                    if isinstance(result, dict) and result.get('error') == 'DATABASE_NEEDS_RECONVERSION':
+                        message += f"\n\n{result['explanation']}"
                     st.session_state.messages.append({
                         "role": "assistant",
-                        "content": f"❌ לא הצלחתי לתרגם את השאלה: {question}"
+                        "content": message
                     })
                     
             except Exception as e:
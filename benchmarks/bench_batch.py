@@ -0,0 +1,81 @@
+"""Compare a shell loop of conversions against the batch command.
+
+Synthetic buildings of increasing size are written to a directory, then
+converted by running ``ifc2duckdb`` once per file, as a shell script would,
+and by ``ifc2duckdb batch`` with one and ``--jobs`` jobs. The batch is then
+run again, with every file unchanged and skipped.
+
+Usage::
+
+    python -m benchmarks.bench_batch --files 8 --walls 20 --jobs 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from ifc2duckdb.batch import BatchConverter
+
+from .synthetic import create_storey_model
+
+OPTIONS = {"full_schema": False}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=8)
+    parser.add_argument("--walls", type=int, default=20)
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = Path(tmp) / "exports"
+        source.mkdir()
+        for i in range(args.files):
+            model = create_storey_model(2, args.walls * (i + 1), doors=i + 1)
+            model.write(str(source / f"building_{i}.ifc"))
+
+        start = time.perf_counter()
+        for path in sorted(source.iterdir()):
+            subprocess.run(
+                [
+                    sys.executable,
+                    "-m",
+                    "ifc2duckdb.cli",
+                    str(path),
+                    "--database",
+                    str(Path(tmp) / "loop" / path.with_suffix(".duckdb").name),
+                    "--no-full-schema",
+                ],
+                check=True,
+                capture_output=True,
+            )
+        print(f"shell loop: {time.perf_counter() - start:6.2f}s")
+
+        for jobs in sorted({1, args.jobs}):
+            converter = BatchConverter(
+                Path(tmp) / f"batch_{jobs}", jobs=jobs, options=OPTIONS
+            )
+            summary = converter.run(str(source))
+            job_seconds = sum(
+                sum(entry["seconds"]) for entry in summary["files"].values()
+            )
+            print(
+                f"batch, {jobs:>2} jobs: {summary['seconds']:6.2f}s "
+                f"({job_seconds:.2f}s in jobs)"
+            )
+        summary = converter.run(str(source))
+        print(
+            f"batch, unchanged: {summary['seconds']:6.2f}s, "
+            f"{summary['totals']['skipped']} files skipped"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Time clash detection on a large model of beams and ducts.
+
+A model of crossing beams and ducts is converted, then clashes are detected
+with each number of workers. The sweep and prune over ``shape_bounds`` is
+compared with testing every pair of boxes, extrapolated from a sample, as a
+naive query over the shape tables would.
+
+Usage::
+
+    python -m benchmarks.bench_clash --elements 100000 --workers 1 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import duckdb
+import numpy as np
+
+from ifc2duckdb import Patcher
+from ifc2duckdb.clash import ClashDetector, find_overlapping_pairs
+
+from .synthetic import create_clash_model
+
+CLEARANCE = 0.2
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--elements", type=int, default=100000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4])
+    parser.add_argument(
+        "--sample", type=int, default=1000, help="Boxes tested against all others"
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database = str(Path(tmp) / "clash.duckdb")
+        start = time.perf_counter()
+        Patcher(
+            create_clash_model(args.elements),
+            database=database,
+            full_schema=False,
+            should_get_inverses=False,
+            should_get_psets=False,
+            should_get_rel_edges=False,
+            should_get_element_location=False,
+        ).patch()
+        print(f"Converted {args.elements} elements: {time.perf_counter() - start:.1f}s")
+
+        db = duckdb.connect(database, read_only=True)
+        boxes = np.array(
+            db.execute(
+                "SELECT minx, miny, minz, maxx, maxy, maxz FROM shape_bounds"
+            ).fetchall()
+        )
+        db.close()
+        lower, upper = boxes[:, :3], boxes[:, 3:]
+
+        start = time.perf_counter()
+        first, _ = find_overlapping_pairs(lower, upper, CLEARANCE)
+        sweep = time.perf_counter() - start
+        start = time.perf_counter()
+        sample = min(args.sample, len(boxes))
+        for i in range(sample):
+            near = (lower[i] - CLEARANCE <= upper) & (lower - CLEARANCE <= upper[i])
+            np.all(near, axis=1)
+        naive = (time.perf_counter() - start) / sample * len(boxes) / 2
+        print(
+            f"Broad phase: {len(first)} candidate pairs in {sweep:.2f}s, "
+            f"every pair of boxes ~{naive:.1f}s ({naive / sweep:,.0f}x slower)"
+        )
+
+        for workers in args.workers:
+            detector = ClashDetector(database, clearance=CLEARANCE, workers=workers)
+            start = time.perf_counter()
+            count = detector.run(["IfcDuctSegment"], ["IfcBeam"])
+            elapsed = time.perf_counter() - start
+            print(
+                f"{workers:>3} workers: {count} clashes in {elapsed:.1f}s "
+                f"({len(first) / elapsed:,.0f} candidate pairs/s)"
+            )
+
+        db = duckdb.connect(database, read_only=True)
+        for kind, clashes in db.execute(
+            "SELECT kind, count(*) FROM clashes GROUP BY kind ORDER BY kind"
+        ).fetchall():
+            print(f"{kind:>12}: {clashes}")
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
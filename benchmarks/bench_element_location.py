@@ -0,0 +1,127 @@
+"""Compare per-storey queries over element_location against relationship joins.
+
+Usage::
+
+    python -m benchmarks.bench_element_location --elements 500000
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import duckdb
+
+from ifc2duckdb import Patcher
+
+from .synthetic import create_building_model
+
+QUERIES = {
+    "walls per storey": {
+        "rel_edges": """
+            SELECT bs.Name, COUNT(w.ifc_id)
+            FROM ifcbuildingstorey bs
+            LEFT JOIN rel_edges e ON e.relating_id = bs.ifc_id
+                AND e.rel_class = 'IfcRelContainedInSpatialStructure'
+            LEFT JOIN ifcwall w ON w.ifc_id = e.related_id
+            GROUP BY bs.ifc_id, bs.Name ORDER BY bs.Name
+        """,
+        "element_location": """
+            SELECT bs.Name, COUNT(l.ifc_id)
+            FROM ifcbuildingstorey bs
+            LEFT JOIN element_location l
+                ON l.storey_id = bs.ifc_id AND l.ifc_class = 'IfcWall'
+            GROUP BY bs.ifc_id, bs.Name ORDER BY bs.Name
+        """,
+    },
+    # Doors are only located through the opening they fill and its wall
+    "doors per storey": {
+        "rel_edges": """
+            SELECT bs.Name, COUNT(fills.related_id)
+            FROM ifcbuildingstorey bs
+            LEFT JOIN rel_edges contained ON contained.relating_id = bs.ifc_id
+                AND contained.rel_class = 'IfcRelContainedInSpatialStructure'
+            LEFT JOIN rel_edges voids ON voids.relating_id = contained.related_id
+                AND voids.rel_class = 'IfcRelVoidsElement'
+            LEFT JOIN rel_edges fills ON fills.relating_id = voids.related_id
+                AND fills.rel_class = 'IfcRelFillsElement'
+            GROUP BY bs.ifc_id, bs.Name ORDER BY bs.Name
+        """,
+        "element_location": """
+            SELECT bs.Name, COUNT(l.ifc_id)
+            FROM ifcbuildingstorey bs
+            LEFT JOIN element_location l
+                ON l.storey_id = bs.ifc_id AND l.ifc_class = 'IfcDoor'
+            GROUP BY bs.ifc_id, bs.Name ORDER BY bs.Name
+        """,
+    },
+    "storey of each wall": {
+        "rel_edges": """
+            SELECT SUM(bs.Elevation)
+            FROM ifcwall w
+            JOIN rel_edges e ON e.related_id = w.ifc_id
+                AND e.rel_class = 'IfcRelContainedInSpatialStructure'
+            JOIN ifcbuildingstorey bs ON bs.ifc_id = e.relating_id
+        """,
+        "element_location": """
+            SELECT SUM(storey_elevation) FROM element_location
+            WHERE ifc_class = 'IfcWall'
+        """,
+    },
+}
+
+
+def timed(cursor: duckdb.DuckDBPyConnection, sql: str) -> float:
+    start = time.perf_counter()
+    cursor.execute(sql).fetchall()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--elements", type=int, default=500_000)
+    parser.add_argument("--storeys", type=int, default=50)
+    parser.add_argument("--doors", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    ifc_file = create_building_model(args.elements, args.storeys, args.doors)
+    print(f"Synthetic model: {len(list(ifc_file))} entities")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for element_location in (False, True):
+            start = time.perf_counter()
+            Patcher(
+                ifc_file,
+                database=str(Path(tmp) / f"location_{element_location}.duckdb"),
+                full_schema=False,
+                should_get_inverses=False,
+                should_get_psets=False,
+                should_get_geometry=False,
+                should_get_element_location=element_location,
+            ).patch()
+            print(
+                f"Conversion (element_location={element_location}): "
+                f"{time.perf_counter() - start:.2f}s"
+            )
+
+        cursor = duckdb.connect(str(Path(tmp) / "location_True.duckdb"), read_only=True)
+        for label, variants in QUERIES.items():
+            results = {k: cursor.execute(sql).fetchall() for k, sql in variants.items()}
+            assert results["rel_edges"] == results["element_location"], label
+            best = {
+                k: min(timed(cursor, sql) for _ in range(args.repeat))
+                for k, sql in variants.items()
+            }
+            print(
+                f"{label:>20}: rel_edges {best['rel_edges'] * 1000:7.1f}ms  "
+                f"element_location {best['element_location'] * 1000:7.1f}ms  "
+                f"({best['rel_edges'] / best['element_location']:.1f}x)"
+            )
+        cursor.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""Compare expanding entity lists into permutations against link tables.
+
+A building with a few very long containment lists is converted, along with a
+presentation layer holding two lists, whose permutations multiply. Each mode
+runs in a fresh process so that its peak RSS is not inflated by the others.
+The rows, Arrow bytes and time of extracting and loading the two list classes
+are read back from ``conversion_stats``.
+
+Usage::
+
+    python -m benchmarks.bench_expand --elements 100000 --layer-items 5000
+"""
+
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import duckdb
+import ifcopenshell
+
+from ifc2duckdb import Patcher
+
+from .synthetic import create_building_model
+
+MODES = {
+    "JSON lists": {},
+    "permutations": {"should_expand": True},
+    "link tables": {"should_expand_links": True},
+}
+
+
+LIST_CLASSES = ["IfcRelContainedInSpatialStructure", "IfcPresentationLayerWithStyle"]
+
+
+def convert(model: str, database: str, mode: str) -> tuple[float, int]:
+    ifc_file = ifcopenshell.open(model)
+    patcher = Patcher(
+        ifc_file,
+        database=database,
+        full_schema=False,
+        should_get_geometry=False,
+        should_get_psets=False,
+        should_get_element_location=False,
+        **MODES[mode],
+    )
+    start = time.perf_counter()
+    patcher.patch()
+    return time.perf_counter() - start, patcher.peak_rss or 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--elements", type=int, default=100_000)
+    parser.add_argument("--storeys", type=int, default=10)
+    parser.add_argument("--layer-items", type=int, default=5000)
+    parser.add_argument("--layer-styles", type=int, default=100)
+    args = parser.parse_args()
+
+    ifc_file = create_building_model(args.elements, args.storeys)
+    shading = ifc_file.createIfcSurfaceStyleShading(
+        ifc_file.createIfcColourRgb(None, 0.5, 0.5, 0.5)
+    )
+    ifc_file.createIfcPresentationLayerWithStyle(
+        "Layer",
+        None,
+        [
+            ifc_file.createIfcCartesianPoint((float(i), 0.0, 0.0))
+            for i in range(args.layer_items)
+        ],
+        None,
+        True,
+        False,
+        False,
+        [
+            ifc_file.createIfcSurfaceStyle(f"Style{i}", "BOTH", [shading])
+            for i in range(args.layer_styles)
+        ],
+    )
+
+    with tempfile.TemporaryDirectory() as tmp:
+        model = str(Path(tmp) / "building.ifc")
+        ifc_file.write(model)
+        context = multiprocessing.get_context("spawn")
+        for mode in MODES:
+            database = str(Path(tmp) / f"{mode.replace(' ', '_')}.duckdb")
+            with ProcessPoolExecutor(1, mp_context=context) as executor:
+                elapsed, peak_rss = executor.submit(
+                    convert, model, database, mode
+                ).result()
+            db = duckdb.connect(database, read_only=True)
+            tables = db.execute(
+                """
+                SELECT table_name FROM duckdb_tables()
+                WHERE list_contains(?, split_part(table_name, '_', 1))
+                ORDER BY table_name
+                """,
+                [LIST_CLASSES],
+            ).fetchall()
+            rows = {
+                name: db.execute(f'SELECT count(*) FROM "{name}"').fetchone()[0]
+                for (name,) in tables
+            }
+            # The load phase also counts the inverse and rel_edges rows
+            stats = db.execute(
+                """
+                SELECT ifc_class, sum(wall_time), sum(bytes) FILTER (phase = 'load')
+                FROM conversion_stats
+                WHERE phase IN ('extract', 'load') AND list_contains(?, ifc_class)
+                GROUP BY ifc_class ORDER BY ifc_class
+                """,
+                [LIST_CLASSES],
+            ).fetchall()
+            db.close()
+            size = Path(database).stat().st_size
+            print(
+                f"{mode:>12}: {elapsed:6.2f}s  peak RSS {peak_rss / 1024**2:7.1f} MB  "
+                f"database {size / 1024**2:5.1f} MB"
+            )
+            for ifc_class, wall_time, loaded in stats:
+                print(
+                    f"{'':>14}{ifc_class}: {wall_time:.2f}s, "
+                    f"{loaded / 1024**2:.1f} MB loaded"
+                )
+            for name, count in rows.items():
+                print(f"{'':>16}{name}: {count:,} rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Compare Parquet exports, and queries on their views against the database.
+
+A synthetic building is converted, then exported with each compression
+codec and ``--workers`` setting into a fresh directory. The QUERIES_50 of
+the Streamlit app are run, best of ``--repeat``, on the database and on
+views restricted to its project, and their results checked to match.
+Queries on tables the model does not have are skipped.
+
+Usage::
+
+    python -m benchmarks.bench_export --storeys 10 --walls 200 --doors 40
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import duckdb
+
+from ifc2duckdb import Patcher
+from ifc2duckdb.export import PARQUET_COMPRESSIONS, create_parquet_views, export_parquet
+
+from .bench_optimize import best_of, load_queries
+from .synthetic import create_storey_model
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--storeys", type=int, default=10)
+    parser.add_argument("--walls", type=int, default=200)
+    parser.add_argument("--doors", type=int, default=40)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database = str(Path(tmp) / "tower.duckdb")
+        Patcher(
+            create_storey_model(args.storeys, args.walls, args.doors),
+            database=database,
+        ).patch()
+        print(f"database: {Path(database).stat().st_size / 1024**2:.1f} MB")
+
+        for compression in PARQUET_COMPRESSIONS:
+            for workers in sorted({1, args.workers}):
+                directory = Path(tmp) / f"{compression}_{workers}"
+                start = time.perf_counter()
+                manifest = export_parquet(
+                    database, directory, compression=compression, workers=workers
+                )
+                elapsed = time.perf_counter() - start
+                size = sum(table["bytes"] for table in manifest["tables"].values())
+                print(
+                    f"{compression:>12}, {workers:>2} workers: {elapsed:6.2f}s, "
+                    f"{size / 1024**2:.1f} MB"
+                )
+
+        views = str(Path(tmp) / "views.duckdb")
+        create_parquet_views(Path(tmp) / "zstd_1", views, project="tower")
+        dbs = [duckdb.connect(database, read_only=True), duckdb.connect(views)]
+        totals = [0.0, 0.0]
+        skipped = 0
+        for query_id, title, sql in load_queries():
+            try:
+                expected = dbs[0].execute(sql).fetchall()
+            except duckdb.Error:
+                skipped += 1
+                continue
+            # SELECT * on the views has a project column, and the catalog
+            # lists views instead of tables
+            results = dbs[1].execute(sql).fetchall()
+            is_catalog = sql.lstrip().upper().startswith(("SHOW", "DESCRIBE"))
+            if results and len(results[0]) == len(expected[0]) and not is_catalog:
+                assert sorted(results, key=repr) == sorted(expected, key=repr), title
+            timings = [best_of(db, sql, args.repeat) for db in dbs]
+            totals = [total + t for total, t in zip(totals, timings)]
+            print(
+                f"{query_id:>3}: {timings[0] * 1000:8.2f} ms -> "
+                f"{timings[1] * 1000:8.2f} ms ({timings[0] / timings[1]:5.2f}x)  "
+                f"{title}"
+            )
+        for db in dbs:
+            db.close()
+        print(
+            f"database -> views total: {totals[0] * 1000:.1f} ms -> "
+            f"{totals[1] * 1000:.1f} ms, {skipped} queries on absent tables skipped"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Compare tessellating a model with reusing a persistent geometry cache.
+
+A synthetic building is converted without the cache, with an empty cache and
+with the cache it filled. A taller building made of the same walls and doors
+is then converted with that cache too, as a related project would be.
+
+Usage::
+
+    python -m benchmarks.bench_geometry_cache --storeys 10 --walls 100
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+from typing import Optional
+
+import duckdb
+import ifcopenshell
+
+from ifc2duckdb import Patcher
+
+from .synthetic import create_storey_model
+
+
+def convert(
+    model: str, database: str, geometry_cache: Optional[str]
+) -> tuple[float, Patcher]:
+    patcher = Patcher(
+        ifcopenshell.open(model),
+        database=database,
+        should_get_psets=False,
+        should_get_inverses=False,
+        geometry_cache=geometry_cache,
+    )
+    start = time.perf_counter()
+    patcher.patch()
+    return time.perf_counter() - start, patcher
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--storeys", type=int, default=10)
+    parser.add_argument("--walls", type=int, default=100, help="Walls per storey")
+    parser.add_argument("--doors", type=int, default=20, help="Doors per storey")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        models = {}
+        for name, storeys in (("model", args.storeys), ("taller", args.storeys * 2)):
+            ifc_file = create_storey_model(storeys, args.walls, args.doors)
+            models[name] = str(Path(tmp) / f"{name}.ifc")
+            ifc_file.write(models[name])
+            print(f"Synthetic {name}: {len(list(ifc_file))} entities")
+            del ifc_file
+
+        cache = str(Path(tmp) / "geometry.sqlite")
+        runs = [
+            ("no cache", "model", None),
+            ("empty cache", "model", cache),
+            ("warm cache", "model", cache),
+            ("taller, warm cache", "taller", cache),
+        ]
+        for i, (label, model, geometry_cache) in enumerate(runs):
+            database = str(Path(tmp) / f"run_{i}.duckdb")
+            elapsed, patcher = convert(models[model], database, geometry_cache)
+            geometry = sum(
+                patcher.phase_stats[(phase, None)]["wall_time"]
+                for phase in ("geometry", "geometry_cache")
+                if (phase, None) in patcher.phase_stats
+            )
+            db = duckdb.connect(database, read_only=True)
+            (geometry_rows,) = db.execute("SELECT count(*) FROM geometry").fetchone()
+            db.close()
+            print(
+                f"{label:>20}: {elapsed:6.2f}s (geometry {geometry:6.2f}s)  "
+                f"{patcher.geometry_cache_hits} hits "
+                f"{patcher.geometry_cache_misses} misses  "
+                f"{geometry_rows} geometry rows"
+            )
+        print(f"Cache size: {Path(cache).stat().st_size / 1024:.0f} KB")
+
+
+if __name__ == "__main__":
+    main()
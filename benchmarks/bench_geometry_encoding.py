@@ -0,0 +1,84 @@
+"""Compare the size and read throughput of the geometry encodings.
+
+A model of pipe segments, each with a distinct mesh, is converted once per
+encoding. The geometry table is then read back and decoded into NumPy
+arrays with ``decode_geometry``.
+
+Usage::
+
+    python -m benchmarks.bench_geometry_encoding --elements 20000
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import duckdb
+import ifcopenshell
+
+from ifc2duckdb import Patcher, decode_geometry
+from ifc2duckdb.geometry_encoding import GEOMETRY_ENCODINGS
+
+from .synthetic import create_pipe_model
+
+
+def convert(model: str, database: str, encoding: str) -> float:
+    patcher = Patcher(
+        ifcopenshell.open(model),
+        database=database,
+        full_schema=False,
+        should_get_inverses=False,
+        should_get_psets=False,
+        should_get_rel_edges=False,
+        should_get_element_location=False,
+        geometry_encoding=encoding,
+    )
+    start = time.perf_counter()
+    patcher.patch()
+    return time.perf_counter() - start
+
+
+def read(database: str) -> tuple[int, float, float]:
+    """Blob bytes, and seconds to fetch and to decode every geometry row."""
+    db = duckdb.connect(database, read_only=True)
+    start = time.perf_counter()
+    rows = db.execute(
+        "SELECT verts, edges, faces, material_ids, encoding FROM geometry"
+    ).fetchall()
+    fetched = time.perf_counter()
+    for row in rows:
+        decode_geometry(*row)
+    decoded = time.perf_counter()
+    db.close()
+    size = sum(len(blob) for row in rows for blob in row[:4])
+    return size, fetched - start, decoded - fetched
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--elements", type=int, default=20000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        model = str(Path(tmp) / "model.ifc")
+        create_pipe_model(args.elements).write(model)
+        raw_size = None
+        for encoding in GEOMETRY_ENCODINGS:
+            database = str(Path(tmp) / f"{encoding}.duckdb")
+            elapsed = convert(model, database, encoding)
+            size, fetch, decode = read(database)
+            raw_size = raw_size or size
+            print(
+                f"{encoding:>9}: convert {elapsed:6.2f}s  "
+                f"blobs {size / 1024**2:7.1f} MB ({raw_size / size:4.1f}x smaller)  "
+                f"file {Path(database).stat().st_size / 1024**2:7.1f} MB  "
+                f"fetch {fetch:5.2f}s  decode {decode:5.2f}s "
+                f"({args.elements / (fetch + decode):,.0f} meshes/s)"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Measure peak memory of geometry conversion under different buffer limits.
+
+Each conversion runs in a fresh process so that its peak RSS is not inflated
+by the previous runs.
+
+Usage::
+
+    python -m benchmarks.bench_geometry_memory --elements 20000 --limits 8 64 0
+"""
+
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import duckdb
+import ifcopenshell
+
+from ifc2duckdb import Patcher
+
+from .synthetic import create_pipe_model
+
+
+def convert(model: str, database: str, limit: int) -> tuple[float, int]:
+    ifc_file = ifcopenshell.open(model)
+    patcher = Patcher(
+        ifc_file,
+        database=database,
+        full_schema=False,
+        should_get_inverses=False,
+        should_get_psets=False,
+        should_get_rel_edges=False,
+        should_get_element_location=False,
+        geometry_memory_limit=limit,
+    )
+    start = time.perf_counter()
+    patcher.patch()
+    return time.perf_counter() - start, patcher.peak_rss or 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--elements", type=int, default=20_000)
+    parser.add_argument(
+        "--limits",
+        type=int,
+        nargs="+",
+        default=[8, 64, 0],
+        help="Buffer limits in MB, 0 for a single flush at the end",
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        model = str(Path(tmp) / "pipes.ifc")
+        create_pipe_model(args.elements).write(model)
+        context = multiprocessing.get_context("spawn")
+        for limit in args.limits:
+            database = str(Path(tmp) / f"limit_{limit}.duckdb")
+            with ProcessPoolExecutor(1, mp_context=context) as executor:
+                elapsed, peak_rss = executor.submit(
+                    convert, model, database, limit * 1024**2 or 2**62
+                ).result()
+            db = duckdb.connect(database, read_only=True)
+            geometry_bytes = db.execute(
+                "SELECT SUM(octet_length(verts) + octet_length(faces)) FROM geometry"
+            ).fetchone()[0]
+            db.close()
+            label = f"{limit} MB" if limit else "unbounded"
+            print(
+                f"{label:>10}: {elapsed:6.2f}s  peak RSS {peak_rss / 1024**2:7.1f} MB  "
+                f"(geometry {geometry_bytes / 1024**2:.1f} MB)"
+            )
+
+
+if __name__ == "__main__":
+    main()
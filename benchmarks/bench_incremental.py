@@ -0,0 +1,98 @@
+"""Compare a full conversion of a revised model with an incremental update.
+
+A synthetic building is converted, then a fraction of its walls is renamed
+and made taller, as a daily re-export would. The revised model is converted
+from scratch and applied as an incremental update to the first database.
+
+Usage::
+
+    python -m benchmarks.bench_incremental --storeys 20 --walls 100 --changed 0.01
+"""
+
+from __future__ import annotations
+
+import argparse
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import duckdb
+import ifcopenshell
+import ifcopenshell.util.representation
+
+from ifc2duckdb import Patcher
+
+from .synthetic import create_storey_model
+
+
+def convert(model: str, database: str, **options: bool) -> float:
+    patcher = Patcher(ifcopenshell.open(model), database=database, **options)
+    start = time.perf_counter()
+    patcher.patch()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--storeys", type=int, default=20)
+    parser.add_argument("--walls", type=int, default=100, help="Walls per storey")
+    parser.add_argument("--doors", type=int, default=20, help="Doors per storey")
+    parser.add_argument(
+        "--changed",
+        type=float,
+        default=0.01,
+        help="Fraction of the walls changed in the revision (default: %(default)s)",
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ifc_file = create_storey_model(args.storeys, args.walls, args.doors)
+        print(f"Synthetic model: {len(list(ifc_file))} entities")
+        original, revised = str(Path(tmp) / "v1.ifc"), str(Path(tmp) / "v2.ifc")
+        ifc_file.write(original)
+        walls = ifc_file.by_type("IfcWall")
+        changed = walls[:: max(1, round(1 / args.changed))]
+        for wall in changed:
+            wall.Name += " (revised)"
+            body = ifcopenshell.util.representation.get_representation(
+                wall, "Model", "Body"
+            )
+            body.Items[0].Depth += 0.5
+        ifc_file.write(revised)
+        del ifc_file
+        print(f"Revision: {len(changed)} of {len(walls)} walls changed")
+
+        previous = str(Path(tmp) / "previous.duckdb")
+        elapsed = convert(original, previous, should_update_incrementally=True)
+        print(f"     initial conversion: {elapsed:6.2f}s")
+
+        full = str(Path(tmp) / "full.duckdb")
+        elapsed = convert(revised, full)
+        print(f"        full conversion: {elapsed:6.2f}s")
+
+        updated = str(Path(tmp) / "updated.duckdb")
+        shutil.copy(previous, updated)
+        incremental = convert(revised, updated, should_update_incrementally=True)
+        print(
+            f"     incremental update: {incremental:6.2f}s "
+            f"({elapsed / incremental:.1f}x faster)"
+        )
+
+        counts = []
+        for database in (full, updated):
+            db = duckdb.connect(database, read_only=True)
+            counts.append(
+                db.execute(
+                    """
+                    SELECT (SELECT count(*) FROM id_map), (SELECT count(*) FROM psets),
+                        (SELECT count(*) FROM shape), (SELECT count(*) FROM geometry)
+                    """
+                ).fetchone()
+            )
+            db.close()
+        print(f"Rows in id_map, psets, shape and geometry: {counts[0]} vs {counts[1]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""Compare columnar Arrow loads against executemany inserts.
+
+Usage::
+
+    python -m benchmarks.bench_load --entities 1000000
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from ifc2duckdb import Patcher
+
+from .synthetic import create_point_cloud_model
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--entities", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    ifc_file = create_point_cloud_model(args.entities)
+    print(f"Synthetic model: {len(list(ifc_file))} entities")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for columnar in (False, True):
+            database = Path(tmp) / f"columnar_{columnar}.duckdb"
+            patcher = Patcher(
+                ifc_file,
+                database=str(database),
+                full_schema=False,
+                should_get_inverses=False,
+                should_get_geometry=False,
+                should_load_columnar=columnar,
+            )
+            start = time.perf_counter()
+            patcher.patch()
+            elapsed = time.perf_counter() - start
+            mode = "arrow" if columnar else "executemany"
+            print(f"{mode:>12}: {elapsed:8.2f}s")
+
+
+if __name__ == "__main__":
+    main()
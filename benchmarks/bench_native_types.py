@@ -0,0 +1,110 @@
+"""Compare relationship queries over JSON columns against native LIST columns.
+
+Usage::
+
+    python -m benchmarks.bench_native_types --elements 500000
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import duckdb
+
+from ifc2duckdb import Patcher
+
+from .synthetic import create_building_model
+
+# The casts are no-ops on native columns and parse the JSON text otherwise
+QUERIES = {
+    "walls per storey": """
+        SELECT bs.Name, COUNT(w.ifc_id)
+        FROM ifcbuildingstorey bs
+        LEFT JOIN (
+            SELECT RelatingStructure,
+                unnest(CAST(RelatedElements AS BIGINT[])) AS element_id
+            FROM ifcrelcontainedinspatialstructure
+        ) rel ON bs.ifc_id = rel.RelatingStructure
+        LEFT JOIN ifcwall w ON w.ifc_id = rel.element_id
+        GROUP BY bs.ifc_id, bs.Name
+    """,
+    "concrete elements": """
+        SELECT im.ifc_class, COUNT(*)
+        FROM ifcmaterial m
+        JOIN (
+            SELECT RelatingMaterial,
+                unnest(CAST(RelatedObjects AS BIGINT[])) AS object_id
+            FROM ifcrelassociatesmaterial
+        ) ram ON m.ifc_id = ram.RelatingMaterial
+        JOIN id_map im ON im.ifc_id = ram.object_id
+        WHERE m.Name = 'Concrete'
+        GROUP BY im.ifc_class
+    """,
+    "without material": """
+        SELECT im.ifc_class, COUNT(*)
+        FROM id_map im
+        LEFT JOIN (
+            SELECT DISTINCT unnest(CAST(RelatedObjects AS BIGINT[])) AS object_id
+            FROM ifcrelassociatesmaterial
+        ) ram ON im.ifc_id = ram.object_id
+        WHERE ram.object_id IS NULL
+        GROUP BY im.ifc_class
+    """,
+}
+
+
+def best_of(cursor: duckdb.DuckDBPyConnection, sql: str, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        cursor.execute(sql).fetchall()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--elements", type=int, default=500_000)
+    parser.add_argument("--storeys", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    ifc_file = create_building_model(args.elements, args.storeys)
+    print(f"Synthetic model: {len(list(ifc_file))} entities")
+
+    timings: dict[str, list[float]] = {label: [] for label in QUERIES}
+    results: dict[str, list[list[tuple]]] = {label: [] for label in QUERIES}
+    with tempfile.TemporaryDirectory() as tmp:
+        for native in (False, True):
+            database = Path(tmp) / f"native_{native}.duckdb"
+            start = time.perf_counter()
+            Patcher(
+                ifc_file,
+                database=str(database),
+                full_schema=False,
+                should_get_inverses=False,
+                should_get_psets=False,
+                should_get_geometry=False,
+                should_use_native_types=native,
+            ).patch()
+            mode = "native" if native else "json"
+            print(f"Conversion ({mode}): {time.perf_counter() - start:.2f}s")
+            cursor = duckdb.connect(str(database), read_only=True)
+            for label, sql in QUERIES.items():
+                results[label].append(sorted(cursor.execute(sql).fetchall()))
+                timings[label].append(best_of(cursor, sql, args.repeat))
+            cursor.close()
+
+    for label, (json_time, native_time) in timings.items():
+        assert results[label][0] == results[label][1], label
+        print(
+            f"{label:>18}: json {json_time * 1000:7.1f}ms  "
+            f"native {native_time * 1000:7.1f}ms  ({json_time / native_time:.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
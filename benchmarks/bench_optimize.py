@@ -0,0 +1,111 @@
+"""Compare file size and query latency before and after the optimize pass.
+
+A synthetic building is converted without the optimize pass, and a copy is
+optimized. The QUERIES_50 of the Streamlit app are run on both, best of
+``--repeat``, and their results checked to match. Queries on tables the
+model does not have are skipped.
+
+Usage::
+
+    python -m benchmarks.bench_optimize --storeys 10 --walls 200 --doors 40
+"""
+
+from __future__ import annotations
+
+import argparse
+import ast
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import duckdb
+
+from ifc2duckdb import Patcher
+from ifc2duckdb.optimize import optimize_database
+
+from .synthetic import create_storey_model
+
+APP = Path(__file__).resolve().parent.parent / "app.py"
+
+
+def load_queries() -> list[tuple[int, str, str]]:
+    """The id, title and SQL of QUERIES_50, read without importing Streamlit."""
+    for node in ast.parse(APP.read_text(encoding="utf-8")).body:
+        if isinstance(node, ast.Assign) and any(
+            getattr(target, "id", None) == "QUERIES_50" for target in node.targets
+        ):
+            assert isinstance(node.value, ast.List)
+            queries = []
+            for call in node.value.elts:
+                assert isinstance(call, ast.Call)
+                query_id, _, title, sql = (ast.literal_eval(a) for a in call.args[:4])
+                queries.append((query_id, title, sql))
+            return queries
+    raise LookupError(f"QUERIES_50 not found in {APP}")
+
+
+def best_of(db: duckdb.DuckDBPyConnection, sql: str, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        db.execute(sql).fetchall()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--storeys", type=int, default=10)
+    parser.add_argument("--walls", type=int, default=200)
+    parser.add_argument("--doors", type=int, default=40)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database = str(Path(tmp) / "loaded.duckdb")
+        optimized = str(Path(tmp) / "optimized.duckdb")
+        Patcher(
+            create_storey_model(args.storeys, args.walls, args.doors),
+            database=database,
+            should_optimize=False,
+        ).patch()
+        shutil.copy(database, optimized)
+        start = time.perf_counter()
+        size, optimized_size = optimize_database(optimized)
+        print(
+            f"optimize: {time.perf_counter() - start:.2f}s, "
+            f"{size / 1024**2:.1f} MB -> {optimized_size / 1024**2:.1f} MB "
+            f"({(optimized_size - size) / size:+.0%})"
+        )
+
+        dbs = [duckdb.connect(path, read_only=True) for path in (database, optimized)]
+        totals = [0.0, 0.0]
+        skipped = 0
+        for query_id, title, sql in load_queries():
+            try:
+                expected = dbs[0].execute(sql).fetchall()
+            except duckdb.Error:
+                skipped += 1
+                continue
+            assert sorted(dbs[1].execute(sql).fetchall(), key=repr) == sorted(
+                expected, key=repr
+            ), title
+            timings = [best_of(db, sql, args.repeat) for db in dbs]
+            totals = [total + t for total, t in zip(totals, timings)]
+            print(
+                f"{query_id:>3}: {timings[0] * 1000:8.2f} ms -> "
+                f"{timings[1] * 1000:8.2f} ms ({timings[0] / timings[1]:5.2f}x)  "
+                f"{title}"
+            )
+        for db in dbs:
+            db.close()
+        print(
+            f"total: {totals[0] * 1000:.1f} ms -> {totals[1] * 1000:.1f} ms "
+            f"({totals[0] / totals[1]:.2f}x), {skipped} queries on absent tables "
+            "skipped"
+        )
+
+
+if __name__ == "__main__":
+    main()
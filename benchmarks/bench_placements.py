@@ -0,0 +1,76 @@
+"""Compare batched placement resolution against get_local_placement per element.
+
+Usage::
+
+    python -m benchmarks.bench_placements --elements 100000 --depth 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import duckdb
+import ifcopenshell
+import ifcopenshell.util.placement
+import numpy as np
+
+from ifc2duckdb import Patcher
+
+from .synthetic import create_placement_model
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--elements", type=int, default=100_000)
+    parser.add_argument("--depth", type=int, default=8)
+    parser.add_argument("--fanout", type=int, default=4)
+    args = parser.parse_args()
+
+    ifc_file = create_placement_model(args.elements, args.depth, args.fanout)
+    placements = [e.ObjectPlacement for e in ifc_file.by_type("IfcProduct")]
+    print(
+        f"Synthetic model: {len(list(ifc_file))} entities, "
+        f"{len(ifc_file.by_type('IfcLocalPlacement'))} placements"
+    )
+
+    start = time.perf_counter()
+    expected = [ifcopenshell.util.placement.get_local_placement(p) for p in placements]
+    per_element = time.perf_counter() - start
+
+    patcher = Patcher(ifc_file)
+    start = time.perf_counter()
+    patcher.resolve_placements()
+    matrices = [patcher.get_placement_matrix(p) for p in placements]
+    batched = time.perf_counter() - start
+    assert np.allclose(np.array(expected), np.array(matrices))
+    print(
+        f"get_local_placement {per_element:6.2f}s  resolver {batched:6.2f}s  "
+        f"({per_element / batched:.1f}x)"
+    )
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database = str(Path(tmp) / "placements.duckdb")
+        Patcher(
+            ifc_file,
+            database=database,
+            full_schema=False,
+            should_get_inverses=False,
+            should_get_psets=False,
+        ).patch()
+        db = duckdb.connect(database, read_only=True)
+        phases = db.execute(
+            """
+            SELECT phase, SUM(wall_time) FROM conversion_stats
+            WHERE phase IN ('placements', 'extract', 'load')
+            GROUP BY phase ORDER BY phase
+            """
+        ).fetchall()
+        db.close()
+    print("Conversion: " + "  ".join(f"{p} {t:.2f}s" for p, t in phases))
+
+
+if __name__ == "__main__":
+    main()
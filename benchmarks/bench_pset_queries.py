@@ -0,0 +1,93 @@
+"""Compare aggregations over the typed psets columns against casting text.
+
+The text queries use ``TRY_CAST`` as DuckDB may evaluate the cast before the
+name filter, which fails on non-numeric values of other properties.
+
+Usage::
+
+    python -m benchmarks.bench_pset_queries --elements 50000
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import duckdb
+
+from ifc2duckdb import Patcher
+
+from .synthetic import create_property_model
+
+QUERIES = {
+    "total area": (
+        "SELECT SUM(TRY_CAST(value AS DOUBLE)) FROM psets WHERE name = 'GrossArea'",
+        "SELECT SUM(value_num) FROM psets WHERE name = 'GrossArea'",
+    ),
+    "total volume": (
+        "SELECT SUM(TRY_CAST(value AS DOUBLE)) FROM psets WHERE name = 'GrossVolume'",
+        "SELECT SUM(value_num) FROM psets WHERE name = 'GrossVolume'",
+    ),
+    "large slabs": (
+        "SELECT COUNT(*) FROM psets "
+        "WHERE name = 'GrossArea' AND TRY_CAST(value AS DOUBLE) > 20",
+        "SELECT COUNT(*) FROM psets WHERE name = 'GrossArea' AND value_num > 20",
+    ),
+    "load bearing": (
+        "SELECT COUNT(*) FROM psets WHERE name = 'LoadBearing' AND value = 'true'",
+        "SELECT COUNT(*) FROM psets WHERE name = 'LoadBearing' AND value_bool",
+    ),
+}
+
+
+def scalar(cursor: duckdb.DuckDBPyConnection, sql: str) -> float:
+    return round(cursor.execute(sql).fetchone()[0], 6)
+
+
+def best_of(cursor: duckdb.DuckDBPyConnection, sql: str, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        cursor.execute(sql).fetchall()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--elements", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    ifc_file = create_property_model(args.elements)
+    print(f"Synthetic model: {len(list(ifc_file))} entities")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database = Path(tmp) / "psets.duckdb"
+        start = time.perf_counter()
+        Patcher(
+            ifc_file,
+            database=str(database),
+            full_schema=False,
+            should_get_inverses=False,
+            should_get_geometry=False,
+        ).patch()
+        print(f"Conversion: {time.perf_counter() - start:.2f}s")
+
+        cursor = duckdb.connect(str(database), read_only=True)
+        rows = cursor.execute("SELECT COUNT(*) FROM psets").fetchone()[0]
+        print(f"psets rows: {rows}")
+        for label, (text_sql, typed_sql) in QUERIES.items():
+            assert scalar(cursor, text_sql) == scalar(cursor, typed_sql), label
+            text = best_of(cursor, text_sql, args.repeat)
+            typed = best_of(cursor, typed_sql, args.repeat)
+            print(
+                f"{label:>14}: cast {text * 1000:7.1f}ms  typed {typed * 1000:7.1f}ms"
+                f"  ({text / typed:.1f}x)"
+            )
+
+
+if __name__ == "__main__":
+    main()
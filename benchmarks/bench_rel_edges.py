@@ -0,0 +1,151 @@
+"""Compare relationship traversal over rel_edges against unnesting IfcRel* tables.
+
+Usage::
+
+    python -m benchmarks.bench_rel_edges --elements 500000
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import duckdb
+
+from ifc2duckdb import Patcher
+
+from .synthetic import create_building_model
+
+UNNESTED_EDGES = """
+    edges(relating_id, related_id) AS (
+        SELECT RelatingStructure, unnest(CAST(RelatedElements AS BIGINT[]))
+        FROM ifcrelcontainedinspatialstructure
+        UNION ALL
+        SELECT RelatingObject, unnest(CAST(RelatedObjects AS BIGINT[]))
+        FROM ifcrelaggregates
+    )
+"""
+REL_EDGES = """
+    edges AS (
+        SELECT relating_id, related_id FROM rel_edges
+        WHERE rel_class IN ('IfcRelContainedInSpatialStructure', 'IfcRelAggregates')
+    )
+"""
+# Walk every wall up to its site
+WALLS_PER_SITE = """
+    WITH RECURSIVE {edges},
+    up(wall_id, ifc_id) AS (
+        SELECT ifc_id, ifc_id FROM ifcwall
+        UNION ALL
+        SELECT up.wall_id, edges.relating_id
+        FROM up JOIN edges ON edges.related_id = up.ifc_id
+    )
+    SELECT s.Name, COUNT(*) FROM up JOIN ifcsite s ON s.ifc_id = up.ifc_id
+    GROUP BY s.Name
+"""
+CONCRETE = {
+    "unnest": """
+        SELECT COUNT(*)
+        FROM ifcmaterial m
+        JOIN (
+            SELECT RelatingMaterial,
+                unnest(CAST(RelatedObjects AS BIGINT[])) AS object_id
+            FROM ifcrelassociatesmaterial
+        ) ram ON m.ifc_id = ram.RelatingMaterial
+        WHERE m.Name = 'Concrete'
+    """,
+    "rel_edges": """
+        SELECT COUNT(*)
+        FROM ifcmaterial m
+        JOIN rel_edges e ON e.relating_id = m.ifc_id
+            AND e.rel_class = 'IfcRelAssociatesMaterial'
+        WHERE m.Name = 'Concrete'
+    """,
+}
+# Storey of a single wall
+LOOKUP = {
+    "unnest": """
+        SELECT RelatingStructure FROM ifcrelcontainedinspatialstructure
+        WHERE list_contains(CAST(RelatedElements AS BIGINT[]), ?)
+    """,
+    "rel_edges": """
+        SELECT relating_id FROM rel_edges
+        WHERE related_id = ? AND rel_class = 'IfcRelContainedInSpatialStructure'
+    """,
+}
+
+
+def timed(cursor: duckdb.DuckDBPyConnection, sql: str, params: list = []) -> float:
+    start = time.perf_counter()
+    cursor.execute(sql, params).fetchall()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--elements", type=int, default=500_000)
+    parser.add_argument("--storeys", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--lookups", type=int, default=100)
+    args = parser.parse_args()
+
+    ifc_file = create_building_model(args.elements, args.storeys)
+    print(f"Synthetic model: {len(list(ifc_file))} entities")
+    step = args.elements // args.lookups
+    walls = [w.id() for w in ifc_file.by_type("IfcWall")][::step]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for rel_edges in (False, True):
+            start = time.perf_counter()
+            Patcher(
+                ifc_file,
+                database=str(Path(tmp) / f"rel_edges_{rel_edges}.duckdb"),
+                full_schema=False,
+                should_get_inverses=False,
+                should_get_psets=False,
+                should_get_geometry=False,
+                should_get_rel_edges=rel_edges,
+            ).patch()
+            print(
+                f"Conversion (rel_edges={rel_edges}): "
+                f"{time.perf_counter() - start:.2f}s"
+            )
+
+        cursor = duckdb.connect(
+            str(Path(tmp) / "rel_edges_True.duckdb"), read_only=True
+        )
+        queries = {
+            "walls per site": {
+                "unnest": WALLS_PER_SITE.format(edges=UNNESTED_EDGES),
+                "rel_edges": WALLS_PER_SITE.format(edges=REL_EDGES),
+            },
+            "concrete elements": CONCRETE,
+        }
+        for label, variants in queries.items():
+            results = {k: cursor.execute(sql).fetchall() for k, sql in variants.items()}
+            assert results["unnest"] == results["rel_edges"], label
+            best = {
+                k: min(timed(cursor, sql) for _ in range(args.repeat))
+                for k, sql in variants.items()
+            }
+            print(
+                f"{label:>18}: unnest {best['unnest'] * 1000:7.1f}ms  "
+                f"rel_edges {best['rel_edges'] * 1000:7.1f}ms  "
+                f"({best['unnest'] / best['rel_edges']:.1f}x)"
+            )
+        totals = {
+            k: sum(timed(cursor, sql, [wall]) for wall in walls)
+            for k, sql in LOOKUP.items()
+        }
+        print(
+            f"{'storey lookups':>18}: unnest {totals['unnest'] * 1000:7.1f}ms  "
+            f"rel_edges {totals['rel_edges'] * 1000:7.1f}ms  "
+            f"({totals['unnest'] / totals['rel_edges']:.1f}x, {len(walls)} lookups)"
+        )
+        cursor.close()
+
+
+if __name__ == "__main__":
+    main()
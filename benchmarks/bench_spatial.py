@@ -0,0 +1,111 @@
+"""Compare proximity queries on meshes, bounding boxes and grid cells.
+
+A model of pipe segments laid out on a grid is converted, then elements near
+random points are looked up three ways: by decoding and placing every mesh,
+by scanning ``shape_bounds`` and by pruning with ``shape_cells`` first.
+
+Usage::
+
+    python -m benchmarks.bench_spatial --elements 20000 --queries 100
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import duckdb
+import numpy as np
+
+from ifc2duckdb import Patcher, decode_geometry
+
+from .synthetic import create_pipe_model
+
+RADIUS = 2.0
+
+
+def near_meshes(db: duckdb.DuckDBPyConnection, point: np.ndarray) -> set[int]:
+    found = set()
+    rows = db.execute(
+        """
+        SELECT s.ifc_id, s.matrix, g.verts, g.edges, g.faces, g.material_ids,
+            g.encoding
+        FROM shape s JOIN geometry g ON s.geometry = g.id
+        """
+    ).fetchall()
+    for ifc_id, matrix, *buffers in rows:
+        m = np.frombuffer(matrix).reshape(4, 4)
+        verts = decode_geometry(*buffers).verts @ m[:3, :3].T + m[:3, 3]
+        lower, upper = verts.min(axis=0), verts.max(axis=0)
+        if (lower <= point + RADIUS).all() and (upper >= point - RADIUS).all():
+            found.add(ifc_id)
+    return found
+
+
+BOX_QUERY = """
+    SELECT ifc_id FROM shape_bounds
+    WHERE minx <= $x + $r AND maxx >= $x - $r
+        AND miny <= $y + $r AND maxy >= $y - $r
+        AND minz <= $z + $r AND maxz >= $z - $r
+"""
+
+CELL_QUERY = """
+    SELECT DISTINCT b.ifc_id
+    FROM shape_cells c JOIN shape_bounds b USING (ifc_id)
+    WHERE c.cell_x BETWEEN spatial_cell($x - $r) AND spatial_cell($x + $r)
+        AND c.cell_y BETWEEN spatial_cell($y - $r) AND spatial_cell($y + $r)
+        AND b.minx <= $x + $r AND b.maxx >= $x - $r
+        AND b.miny <= $y + $r AND b.maxy >= $y - $r
+        AND b.minz <= $z + $r AND b.maxz >= $z - $r
+"""
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--elements", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=100)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database = str(Path(tmp) / "spatial.duckdb")
+        Patcher(
+            create_pipe_model(args.elements),
+            database=database,
+            full_schema=False,
+            should_get_inverses=False,
+            should_get_psets=False,
+            should_get_rel_edges=False,
+            should_get_element_location=False,
+        ).patch()
+
+        db = duckdb.connect(database, read_only=True)
+        rng = np.random.default_rng(0)
+        points = rng.uniform(
+            (0.0, 0.0, 0.0), (100.0, args.elements / 100, 5.0), (args.queries, 3)
+        )
+
+        start = time.perf_counter()
+        expected = near_meshes(db, points[0])
+        mesh_time = time.perf_counter() - start
+        print(f"  decoding every mesh: {mesh_time * 1000:9.1f} ms/query")
+
+        for name, query in (("shape_bounds", BOX_QUERY), ("shape_cells", CELL_QUERY)):
+            results = []
+            start = time.perf_counter()
+            for x, y, z in points.tolist():
+                parameters = {"x": x, "y": y, "z": z, "r": RADIUS}
+                rows = db.execute(query, parameters).fetchall()
+                results.append({row[0] for row in rows})
+            elapsed = (time.perf_counter() - start) / len(points)
+            assert results[0] == expected
+            print(
+                f"{name:>21}: {elapsed * 1000:9.1f} ms/query "
+                f"({mesh_time / elapsed:,.0f}x faster)"
+            )
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Compare the time from an IFC drop to its database swap, watched or polled.
+
+A synthetic building is written into a watched directory a few times, each
+time as a new version, and the time until the watcher has swapped in its
+database is measured, with watchdog (inotify on Linux) and by polling. The
+conversion itself is timed separately, so that the latency the watcher adds,
+debounce included, can be told apart.
+
+Usage::
+
+    python -m benchmarks.bench_watch --drops 3 --walls 20 --debounce 0.5
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from ifc2duckdb.watch import Watcher
+
+from .synthetic import create_storey_model
+
+OPTIONS = {"full_schema": False, "should_get_geometry": False}
+
+
+def measure(
+    models: list[bytes], should_poll: bool, debounce: float, poll_interval: float
+) -> tuple[list[float], list[float]]:
+    """Latencies from each drop to its swap, and the conversion times."""
+    updates = []
+    swapped = threading.Event()
+
+    def on_update(update):
+        updates.append((time.perf_counter(), update.seconds))
+        swapped.set()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        drops = Path(tmp) / "drops"
+        drops.mkdir()
+        watcher = Watcher(
+            drops,
+            database=Path(tmp) / "model.duckdb",
+            debounce=debounce,
+            poll_interval=poll_interval,
+            should_poll=should_poll,
+            options=OPTIONS,
+            on_update=on_update,
+        )
+        stop = threading.Event()
+        thread = threading.Thread(target=watcher.run, args=(stop,))
+        thread.start()
+        latencies = []
+        try:
+            for i, model in enumerate(models):
+                # Give the watcher time to start watching
+                time.sleep(poll_interval)
+                swapped.clear()
+                temporary = Path(tmp) / "model.ifc"
+                temporary.write_bytes(model)
+                start = time.perf_counter()
+                temporary.replace(drops / f"model_{i}.ifc")
+                if not swapped.wait(600):
+                    raise TimeoutError(f"Drop {i} was not converted")
+                latencies.append(updates[-1][0] - start)
+        finally:
+            stop.set()
+            thread.join()
+    return latencies, [seconds for _, seconds in updates]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--drops", type=int, default=3)
+    parser.add_argument("--walls", type=int, default=20)
+    parser.add_argument("--debounce", type=float, default=0.5)
+    parser.add_argument("--poll-interval", type=float, default=1.0)
+    args = parser.parse_args()
+
+    models = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for i in range(args.drops):
+            path = Path(tmp) / f"model_{i}.ifc"
+            create_storey_model(2, args.walls + i, doors=2).write(str(path))
+            models.append(path.read_bytes())
+
+    for name, should_poll in (("watchdog", False), ("polling", True)):
+        latencies, conversions = measure(
+            models, should_poll, args.debounce, args.poll_interval
+        )
+        print(
+            f"{name:>8}: {statistics.median(latencies):6.2f}s from drop to swap, "
+            f"{statistics.median(conversions):6.2f}s converting"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Measure how conversion time scales with the number of worker processes.
+
+Usage::
+
+    python -m benchmarks.bench_workers --entities 200000 --workers 1 2 4 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import duckdb
+
+from ifc2duckdb import Patcher
+
+from .synthetic import create_point_cloud_model
+
+
+def table_counts(database: Path) -> dict[str, int]:
+    db = duckdb.connect(str(database), read_only=True)
+    try:
+        tables = [r[0] for r in db.execute("SHOW TABLES").fetchall()]
+        return {
+            t: db.execute(f'SELECT COUNT(*) FROM "{t}"').fetchone()[0] for t in tables
+        }
+    finally:
+        db.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--entities", type=int, default=200_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    ifc_file = create_point_cloud_model(args.entities)
+    print(f"Synthetic model: {len(list(ifc_file))} entities")
+
+    serial_time = None
+    serial_counts = None
+    with tempfile.TemporaryDirectory() as tmp:
+        for workers in args.workers:
+            database = Path(tmp) / f"workers_{workers}.duckdb"
+            patcher = Patcher(
+                ifc_file,
+                database=str(database),
+                full_schema=False,
+                should_get_geometry=False,
+                workers=workers,
+            )
+            start = time.perf_counter()
+            patcher.patch()
+            elapsed = time.perf_counter() - start
+
+            counts = table_counts(database)
+            if serial_time is None:
+                serial_time, serial_counts = elapsed, counts
+            speedup = serial_time / elapsed
+            matches = "ok" if counts == serial_counts else "MISMATCH"
+            print(
+                f"workers={workers:<3} {elapsed:8.2f}s  speedup={speedup:5.2f}x  "
+                f"rows={sum(counts.values())} {matches}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""Run the conversion over the option matrix and check it against a baseline.
+
+A synthetic building is converted once per combination of ``--no-geometry``,
+``--no-psets``, ``--expand`` and ``--no-inverses``, each in a fresh process.
+Per-phase wall time, rows/s and peak RSS are written to a JSON baseline on
+the first run (or with ``--update-baseline``). Later runs are compared with
+it and exit with status 1 when a conversion got slower or bigger than the
+thresholds allow.
+
+Usage::
+
+    python -m benchmarks.suite --storeys 4 --walls 50
+    python -m benchmarks.suite --update-baseline
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import multiprocessing
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any
+
+import ifcopenshell
+
+from ifc2duckdb import Patcher
+
+from .synthetic import create_storey_model
+
+# CLI flag: the Patcher argument it sets and its value
+OPTIONS = {
+    "no-geometry": ("should_get_geometry", False),
+    "no-psets": ("should_get_psets", False),
+    "expand": ("should_expand", True),
+    "no-inverses": ("should_get_inverses", False),
+}
+
+DEFAULT_BASELINE = Path(__file__).with_name("baseline.json")
+
+
+def configurations() -> dict[str, dict[str, bool]]:
+    """Every combination of OPTIONS, named after its flags."""
+    configs = {}
+    for count in range(len(OPTIONS) + 1):
+        for flags in itertools.combinations(OPTIONS, count):
+            configs[" ".join(f"--{f}" for f in flags) or "default"] = dict(
+                OPTIONS[f] for f in flags
+            )
+    return configs
+
+
+def convert(model: str, database: str, options: dict[str, bool]) -> dict[str, Any]:
+    ifc_file = ifcopenshell.open(model)
+    patcher = Patcher(ifc_file, database=database, **options)
+    start = time.perf_counter()
+    patcher.patch()
+    total = time.perf_counter() - start
+    # Per-class phases such as extract and load are summed over the classes
+    phases: dict[str, dict[str, float]] = {}
+    for (name, _), stats in patcher.phase_stats.items():
+        phase = phases.setdefault(name, {"seconds": 0.0, "cpu_seconds": 0.0, "rows": 0})
+        phase["seconds"] += stats["wall_time"]
+        phase["cpu_seconds"] += stats["cpu_time"]
+        phase["rows"] += stats["rows"]
+    for phase in phases.values():
+        phase["rows_per_second"] = (
+            phase["rows"] / phase["seconds"] if phase["seconds"] else 0
+        )
+    return {
+        "seconds": total,
+        "peak_rss_mb": (patcher.peak_rss or 0) / 1024**2,
+        "phases": phases,
+    }
+
+
+def compare(
+    baseline: dict[str, Any],
+    results: dict[str, Any],
+    threshold: float,
+    memory_threshold: float,
+    min_seconds: float,
+) -> list[str]:
+    """Describe every run exceeding its baseline by more than the thresholds."""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        slower = result["seconds"] - base["seconds"]
+        if slower > min_seconds and slower > base["seconds"] * threshold:
+            regressions.append(
+                f"{name}: {result['seconds']:.2f}s vs {base['seconds']:.2f}s"
+            )
+        for phase, stats in result["phases"].items():
+            base_phase = base["phases"].get(phase)
+            if base_phase is None:
+                continue
+            slower = stats["seconds"] - base_phase["seconds"]
+            if slower > min_seconds and slower > base_phase["seconds"] * threshold:
+                regressions.append(
+                    f"{name} [{phase}]: {stats['seconds']:.2f}s "
+                    f"vs {base_phase['seconds']:.2f}s"
+                )
+        if result["peak_rss_mb"] > base["peak_rss_mb"] * (1 + memory_threshold):
+            regressions.append(
+                f"{name}: peak RSS {result['peak_rss_mb']:.0f} MB "
+                f"vs {base['peak_rss_mb']:.0f} MB"
+            )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--storeys", type=int, default=4)
+    parser.add_argument("--walls", type=int, default=50, help="Walls per storey")
+    parser.add_argument("--doors", type=int, default=10, help="Doors per storey")
+    parser.add_argument("--slabs", type=int, default=2, help="Slabs per storey")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="Record this run as the baseline instead of comparing with it",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.25,
+        help="Allowed relative slowdown of a run or phase (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--memory-threshold",
+        type=float,
+        default=0.15,
+        help="Allowed relative peak RSS growth (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--min-seconds",
+        type=float,
+        default=0.1,
+        help="Slowdowns below this are treated as noise (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--configs", nargs="+", help="Only run these configurations, e.g. default"
+    )
+    args = parser.parse_args()
+
+    model_parameters = {
+        "storeys": args.storeys,
+        "walls": args.walls,
+        "doors": args.doors,
+        "slabs": args.slabs,
+    }
+    configs = configurations()
+    if args.configs:
+        configs = {name: configs[name] for name in args.configs}
+
+    baseline = None
+    if args.baseline.exists() and not args.update_baseline:
+        baseline = json.loads(args.baseline.read_text())
+        if baseline["model"] != model_parameters:
+            print(
+                f"{args.baseline} was recorded for {baseline['model']}, "
+                "rerun with the same model or --update-baseline",
+                file=sys.stderr,
+            )
+            sys.exit(2)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        model = str(Path(tmp) / "model.ifc")
+        ifc_file = create_storey_model(**model_parameters)
+        print(f"Synthetic model: {len(list(ifc_file))} entities")
+        ifc_file.write(model)
+        del ifc_file
+
+        context = multiprocessing.get_context("spawn")
+        for i, (name, options) in enumerate(configs.items()):
+            database = str(Path(tmp) / f"run_{i}.duckdb")
+            with ProcessPoolExecutor(1, mp_context=context) as executor:
+                result = executor.submit(convert, model, database, options).result()
+            results[name] = result
+            phases = "  ".join(
+                f"{phase} {stats['seconds']:.2f}s"
+                for phase, stats in result["phases"].items()
+            )
+            print(
+                f"{name:>48}: {result['seconds']:6.2f}s  "
+                f"{result['peak_rss_mb']:6.0f} MB  {phases}"
+            )
+
+    if baseline is None:
+        args.baseline.write_text(
+            json.dumps({"model": model_parameters, "results": results}, indent=2)
+        )
+        print(f"Baseline written to {args.baseline}")
+        return
+
+    regressions = compare(
+        baseline["results"],
+        results,
+        args.threshold,
+        args.memory_threshold,
+        args.min_seconds,
+    )
+    if regressions:
+        print("Regressions against the baseline:", file=sys.stderr)
+        for regression in regressions:
+            print(f"  {regression}", file=sys.stderr)
+        sys.exit(1)
+    print(f"No regressions against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
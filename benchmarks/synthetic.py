@@ -0,0 +1,418 @@
+"""Synthetic IFC models for benchmarking the converter."""
+
+from __future__ import annotations
+
+import ifcopenshell
+import ifcopenshell.api.aggregate
+import ifcopenshell.api.context
+import ifcopenshell.api.geometry
+import ifcopenshell.api.project
+import ifcopenshell.api.pset
+import ifcopenshell.api.root
+import ifcopenshell.api.spatial
+import ifcopenshell.api.type
+import ifcopenshell.api.unit
+import ifcopenshell.guid
+import numpy as np
+
+
+def create_point_cloud_model(entities: int) -> ifcopenshell.file:
+    """Create an IFC4 model with roughly ``entities`` low-level instances.
+
+    The model is made of cartesian points, polylines referencing them (entity
+    list attributes) and single value properties (select attributes), which
+    is representative of the bulk of instances in large exported models.
+    """
+    f = ifcopenshell.api.project.create_file(version="IFC4")
+    ifcopenshell.api.root.create_entity(f, ifc_class="IfcProject", name="Benchmark")
+    points = []
+    count = 0
+    while count < entities:
+        points.append(f.createIfcCartesianPoint((float(count), float(count % 97), 0.0)))
+        count += 1
+        if len(points) == 3:
+            f.createIfcPolyline(points)
+            f.createIfcPropertySingleValue(
+                f"Property{count % 50}", None, f.createIfcReal(count * 0.5), None
+            )
+            points = []
+            count += 2
+    return f
+
+
+def create_property_model(elements: int) -> ifcopenshell.file:
+    """Create an IFC4 model with ``elements`` slabs carrying properties.
+
+    Every slab has its own base quantities (area, volume, length) and a
+    property set mixing numeric, boolean and text values, so the psets table
+    ends up with seven rows per element.
+    """
+    f = ifcopenshell.api.project.create_file(version="IFC4")
+    ifcopenshell.api.root.create_entity(f, ifc_class="IfcProject", name="Benchmark")
+    guid = ifcopenshell.guid.new
+    for i in range(elements):
+        slab = f.createIfcSlab(guid(), None, f"Slab{i}")
+        quantities = f.createIfcElementQuantity(
+            guid(),
+            None,
+            "Qto_SlabBaseQuantities",
+            None,
+            None,
+            [
+                f.createIfcQuantityArea("GrossArea", None, None, 10.0 + i % 13),
+                f.createIfcQuantityVolume("GrossVolume", None, None, 2.0 + i % 7),
+                f.createIfcQuantityLength("Width", None, None, 0.2 + i % 3 / 10),
+            ],
+        )
+        properties = f.createIfcPropertySet(
+            guid(),
+            None,
+            "Pset_SlabCommon",
+            None,
+            [
+                f.createIfcPropertySingleValue(
+                    "LoadBearing", None, f.createIfcBoolean(i % 2 == 0), None
+                ),
+                f.createIfcPropertySingleValue(
+                    "IsExternal", None, f.createIfcBoolean(i % 5 == 0), None
+                ),
+                f.createIfcPropertySingleValue(
+                    "FireRating", None, f.createIfcLabel(f"{i % 4}HR"), None
+                ),
+                f.createIfcPropertySingleValue(
+                    "ThermalTransmittance",
+                    None,
+                    f.createIfcThermalTransmittanceMeasure(0.1 + i % 9 / 10),
+                    None,
+                ),
+            ],
+        )
+        f.createIfcRelDefinesByProperties(guid(), None, None, None, [slab], quantities)
+        f.createIfcRelDefinesByProperties(guid(), None, None, None, [slab], properties)
+    return f
+
+
+def create_building_model(
+    elements: int, storeys: int = 10, doors: int = 0
+) -> ifcopenshell.file:
+    """Create an IFC4 site / building / storeys model with ``elements`` walls.
+
+    Walls are spread over the storeys with one containment relationship per
+    storey, and every other wall is associated with a concrete material, so
+    the relationship tables hold a few very long entity lists. The first
+    ``doors`` walls are voided by an opening filled with a door, which are
+    only located through their wall.
+    """
+    f = ifcopenshell.api.project.create_file(version="IFC4")
+    guid = ifcopenshell.guid.new
+    project = ifcopenshell.api.root.create_entity(
+        f, ifc_class="IfcProject", name="Benchmark"
+    )
+    site = f.createIfcSite(guid(), None, "Site")
+    building = f.createIfcBuilding(guid(), None, "Building")
+    f.createIfcRelAggregates(guid(), None, None, None, project, [site])
+    f.createIfcRelAggregates(guid(), None, None, None, site, [building])
+    levels = [
+        f.createIfcBuildingStorey(guid(), None, f"Level {i}", Elevation=i * 3.0)
+        for i in range(storeys)
+    ]
+    f.createIfcRelAggregates(guid(), None, None, None, building, levels)
+    concrete = f.createIfcMaterial("Concrete")
+    walls = [f.createIfcWall(guid(), None, f"Wall{i}") for i in range(elements)]
+    for i, storey in enumerate(levels):
+        f.createIfcRelContainedInSpatialStructure(
+            guid(), None, None, None, walls[i::storeys], storey
+        )
+    f.createIfcRelAssociatesMaterial(guid(), None, None, None, walls[::2], concrete)
+    for i, wall in enumerate(walls[:doors]):
+        opening = f.createIfcOpeningElement(guid(), None, f"Opening{i}")
+        door = f.createIfcDoor(guid(), None, f"Door{i}")
+        f.createIfcRelVoidsElement(guid(), None, None, None, wall, opening)
+        f.createIfcRelFillsElement(guid(), None, None, None, opening, door)
+    return f
+
+
+def create_pipe_model(elements: int) -> ifcopenshell.file:
+    """Create an IFC4 model with ``elements`` pipe segments.
+
+    Each segment has its own swept circle body, so every element yields a
+    distinct tessellated geometry of a few kilobytes, as in MEP models.
+    """
+    f = ifcopenshell.api.project.create_file(version="IFC4")
+    ifcopenshell.api.root.create_entity(f, ifc_class="IfcProject", name="Benchmark")
+    origin = f.createIfcAxis2Placement3D(f.createIfcCartesianPoint((0.0, 0.0, 0.0)))
+    context = f.createIfcGeometricRepresentationContext(
+        None, "Model", 3, 1.0e-5, origin, None
+    )
+    body = f.createIfcGeometricRepresentationSubContext(
+        "Body", "Model", None, None, None, None, context, None, "MODEL_VIEW", None
+    )
+    direction = f.createIfcDirection((0.0, 0.0, 1.0))
+    for i in range(elements):
+        profile = f.createIfcCircleProfileDef("AREA", None, None, 0.05 + i % 7 * 0.01)
+        length = 1.0 + i % 13 + i * 1e-4
+        solid = f.createIfcExtrudedAreaSolid(profile, None, direction, length)
+        representation = f.createIfcShapeRepresentation(
+            body, "Body", "SweptSolid", [solid]
+        )
+        placement = f.createIfcLocalPlacement(
+            None,
+            f.createIfcAxis2Placement3D(
+                f.createIfcCartesianPoint((float(i % 100), float(i // 100), 0.0))
+            ),
+        )
+        f.createIfcPipeSegment(
+            ifcopenshell.guid.new(),
+            None,
+            f"Pipe{i}",
+            None,
+            None,
+            placement,
+            f.createIfcProductDefinitionShape(None, None, [representation]),
+        )
+    return f
+
+
+def create_storey_model(
+    storeys: int, walls: int, doors: int = 0, slabs: int = 1
+) -> ifcopenshell.file:
+    """Create an IFC4 building of ``storeys`` storeys authored with ifcopenshell.api.
+
+    Each storey contains ``walls`` walls, ``doors`` doors and ``slabs`` slabs,
+    all with extruded body geometry, a placement, a common property set and
+    base quantities. Walls also inherit properties from a shared wall type,
+    so the model exercises every part of the conversion.
+    """
+    f = ifcopenshell.api.project.create_file(version="IFC4")
+    project = ifcopenshell.api.root.create_entity(
+        f, ifc_class="IfcProject", name="Benchmark"
+    )
+    ifcopenshell.api.unit.assign_unit(f)
+    model = ifcopenshell.api.context.add_context(f, context_type="Model")
+    body = ifcopenshell.api.context.add_context(
+        f,
+        context_type="Model",
+        context_identifier="Body",
+        target_view="MODEL_VIEW",
+        parent=model,
+    )
+    site = ifcopenshell.api.root.create_entity(f, ifc_class="IfcSite", name="Site")
+    building = ifcopenshell.api.root.create_entity(
+        f, ifc_class="IfcBuilding", name="Building"
+    )
+    ifcopenshell.api.aggregate.assign_object(
+        f, products=[site], relating_object=project
+    )
+    ifcopenshell.api.aggregate.assign_object(
+        f, products=[building], relating_object=site
+    )
+
+    wall_type = ifcopenshell.api.root.create_entity(
+        f, ifc_class="IfcWallType", name="Generic Wall"
+    )
+    pset = ifcopenshell.api.pset.add_pset(f, product=wall_type, name="Pset_WallCommon")
+    ifcopenshell.api.pset.edit_pset(
+        f, pset=pset, properties={"FireRating": "EI60", "IsExternal": False}
+    )
+
+    def place(product: ifcopenshell.entity_instance, x: float, y: float, z: float):
+        matrix = np.eye(4)
+        matrix[:3, 3] = (x, y, z)
+        ifcopenshell.api.geometry.edit_object_placement(
+            f, product=product, matrix=matrix, is_si=True
+        )
+
+    def describe(
+        product: ifcopenshell.entity_instance,
+        pset_name: str,
+        properties: dict,
+        qto_name: str,
+        quantities: dict,
+    ):
+        pset = ifcopenshell.api.pset.add_pset(f, product=product, name=pset_name)
+        ifcopenshell.api.pset.edit_pset(f, pset=pset, properties=properties)
+        qto = ifcopenshell.api.pset.add_qto(f, product=product, name=qto_name)
+        ifcopenshell.api.pset.edit_qto(f, qto=qto, properties=quantities)
+
+    for level in range(storeys):
+        elevation = level * 3.0
+        storey = ifcopenshell.api.root.create_entity(
+            f, ifc_class="IfcBuildingStorey", name=f"Level {level}"
+        )
+        storey.Elevation = elevation
+        ifcopenshell.api.aggregate.assign_object(
+            f, products=[storey], relating_object=building
+        )
+        elements = []
+
+        level_walls = []
+        for i in range(walls):
+            length = 2.0 + i % 5
+            wall = ifcopenshell.api.root.create_entity(
+                f, ifc_class="IfcWall", name=f"Wall {level}.{i}"
+            )
+            representation = ifcopenshell.api.geometry.add_wall_representation(
+                f, context=body, length=length, height=3.0, thickness=0.2
+            )
+            ifcopenshell.api.geometry.assign_representation(
+                f, product=wall, representation=representation
+            )
+            place(wall, i * 0.5, float(i % 10), elevation)
+            describe(
+                wall,
+                "Pset_WallCommon",
+                {
+                    "LoadBearing": i % 2 == 0,
+                    "ThermalTransmittance": 0.25 + i % 3 * 0.05,
+                },
+                "Qto_WallBaseQuantities",
+                {"Length": length, "Height": 3.0, "NetSideArea": length * 3.0},
+            )
+            level_walls.append(wall)
+        if level_walls:
+            ifcopenshell.api.type.assign_type(
+                f, related_objects=level_walls, relating_type=wall_type
+            )
+        elements += level_walls
+
+        for i in range(doors):
+            door = ifcopenshell.api.root.create_entity(
+                f, ifc_class="IfcDoor", name=f"Door {level}.{i}"
+            )
+            door.OverallHeight, door.OverallWidth = 2.1, 0.9
+            representation = ifcopenshell.api.geometry.add_wall_representation(
+                f, context=body, length=0.9, height=2.1, thickness=0.05
+            )
+            ifcopenshell.api.geometry.assign_representation(
+                f, product=door, representation=representation
+            )
+            place(door, i * 1.5, -1.0, elevation)
+            describe(
+                door,
+                "Pset_DoorCommon",
+                {"IsExternal": i == 0, "FireRating": "EI30"},
+                "Qto_DoorBaseQuantities",
+                {"Height": 2.1, "Width": 0.9, "Area": 2.1 * 0.9},
+            )
+            elements.append(door)
+
+        for i in range(slabs):
+            slab = ifcopenshell.api.root.create_entity(
+                f, ifc_class="IfcSlab", name=f"Slab {level}.{i}"
+            )
+            representation = ifcopenshell.api.geometry.add_slab_representation(
+                f,
+                context=body,
+                depth=0.25,
+                polyline=[(0.0, 0.0), (10.0, 0.0), (10.0, 10.0), (0.0, 10.0)],
+            )
+            ifcopenshell.api.geometry.assign_representation(
+                f, product=slab, representation=representation
+            )
+            place(slab, i * 10.0, 0.0, elevation)
+            describe(
+                slab,
+                "Pset_SlabCommon",
+                {"LoadBearing": True, "IsExternal": False},
+                "Qto_SlabBaseQuantities",
+                {"Depth": 0.25, "GrossArea": 100.0, "GrossVolume": 25.0},
+            )
+            elements.append(slab)
+
+        if elements:
+            ifcopenshell.api.spatial.assign_container(
+                f, products=elements, relating_structure=storey
+            )
+    return f
+
+
+def create_placement_model(
+    elements: int, depth: int = 8, fanout: int = 4
+) -> ifcopenshell.file:
+    """Create an IFC4 model of ``elements`` proxies in a deep placement tree.
+
+    Placements nest ``depth`` levels deep with ``fanout`` children each, like
+    site / building / storey / space / assembly hierarchies, and every
+    element is placed relative to one of the leaves. Elements have no body,
+    so the shape table only holds their placements.
+    """
+    f = ifcopenshell.api.project.create_file(version="IFC4")
+    ifcopenshell.api.root.create_entity(f, ifc_class="IfcProject", name="Benchmark")
+
+    def placement(parent, i: int) -> ifcopenshell.entity_instance:
+        angle = i * 0.3
+        return f.createIfcLocalPlacement(
+            parent,
+            f.createIfcAxis2Placement3D(
+                f.createIfcCartesianPoint((float(i), i * 0.5, 3.0)),
+                f.createIfcDirection((0.0, 0.0, 1.0)),
+                f.createIfcDirection((float(np.cos(angle)), float(np.sin(angle)), 0.0)),
+            ),
+        )
+
+    level = [placement(None, 0)]
+    for _ in range(depth - 1):
+        level = [placement(parent, i) for parent in level for i in range(fanout)]
+        if len(level) >= elements:
+            break
+    for i in range(elements):
+        f.createIfcBuildingElementProxy(
+            ifcopenshell.guid.new(),
+            None,
+            f"Proxy{i}",
+            None,
+            None,
+            placement(level[i % len(level)], i),
+        )
+    return f
+
+
+def create_clash_model(elements: int) -> ifcopenshell.file:
+    """Create an IFC4 model of ``elements`` beams and ducts crossing in bays.
+
+    Bays are laid out on a grid, each with a beam along x and a duct along y
+    crossing under it. One duct in three cuts through its beam, one passes
+    0.1 m under it and the others 1 m under it, so a clash detection with a
+    clearance of more than 0.1 m finds as many hard as clearance clashes.
+    """
+    f = ifcopenshell.api.project.create_file(version="IFC4")
+    ifcopenshell.api.root.create_entity(f, ifc_class="IfcProject", name="Benchmark")
+    origin = f.createIfcAxis2Placement3D(f.createIfcCartesianPoint((0.0, 0.0, 0.0)))
+    context = f.createIfcGeometricRepresentationContext(
+        None, "Model", 3, 1.0e-5, origin, None
+    )
+    body = f.createIfcGeometricRepresentationSubContext(
+        "Body", "Model", None, None, None, None, context, None, "MODEL_VIEW", None
+    )
+    up = f.createIfcDirection((0.0, 0.0, 1.0))
+
+    def box(ifc_class: str, name: str, lower: tuple, size: tuple) -> None:
+        centre = f.createIfcAxis2Placement2D(
+            f.createIfcCartesianPoint((size[0] / 2, size[1] / 2))
+        )
+        profile = f.createIfcRectangleProfileDef("AREA", None, centre, *size[:2])
+        solid = f.createIfcExtrudedAreaSolid(profile, None, up, size[2])
+        representation = f.createIfcShapeRepresentation(
+            body, "Body", "SweptSolid", [solid]
+        )
+        placement = f.createIfcLocalPlacement(
+            None, f.createIfcAxis2Placement3D(f.createIfcCartesianPoint(lower))
+        )
+        getattr(f, f"create{ifc_class}")(
+            ifcopenshell.guid.new(),
+            None,
+            name,
+            None,
+            None,
+            placement,
+            f.createIfcProductDefinitionShape(None, None, [representation]),
+        )
+
+    bays = (elements + 1) // 2
+    columns = max(int(bays**0.5), 1)
+    for i in range(bays):
+        x, y = i % columns * 8.0, i // columns * 8.0
+        box("IfcBeam", f"Beam{i}", (x, y + 3.0, 2.5), (6.0, 0.3, 0.5))
+        duct_z = (2.6, 2.0, 1.1)[i % 3]
+        box("IfcDuctSegment", f"Duct{i}", (x + 3.0, y, duct_z), (0.4, 6.0, 0.4))
+    return f
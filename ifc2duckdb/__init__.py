@@ -6,8 +6,9 @@ to DuckDB format for fast analysis and querying of Building Information
 Modeling (BIM) data.
 """
 
+from .geometry_encoding import decode_geometry
 from .patcher import Patcher
 from .version import __version__
 
-__all__ = ["Patcher", "__version__"]
+__all__ = ["Patcher", "decode_geometry", "__version__"]
 __version__ = __version__
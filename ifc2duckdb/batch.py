@@ -0,0 +1,349 @@
+# IfcPatch - IFC to DuckDB conversion utility
+# Copyright chuongmep (C) 2025
+#
+# SPDX-License-Identifier: LGPL-3.0-or-later
+"""Convert many IFC files, several at a time.
+
+Files are converted largest first, so that the longest jobs do not start
+last. Each job runs in its own process, forked from the scheduler once it
+has imported IfcOpenShell and DuckDB. A job is killed when it runs longer
+than ``timeout`` seconds, or when its resident memory, child processes
+included, exceeds ``memory_limit`` bytes. Failed jobs are queued again,
+after the others, up to ``retries`` times. A database is written next to
+its final path and only moved in place once complete.
+
+``batch_summary.json`` in the output directory records the SHA-256, status
+and timings of every file, and is rewritten as each job ends. A file with
+the same hash and conversion options as its last successful conversion is
+skipped, as long as its database still exists.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import glob
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Optional, Union
+
+import ifcopenshell
+
+from .patcher import Patcher
+
+BATCH_SUMMARY = "batch_summary.json"
+
+# Bytes read at a time when hashing a file
+HASH_CHUNK_SIZE = 1 << 20
+
+# Seconds between checks of the time and memory of the running jobs
+POLL_INTERVAL = 0.2
+
+# Statuses of a file whose database is up to date
+DONE_STATUSES = ("converted", "skipped")
+
+
+class BatchConverter:
+    """Convert every IFC file of a directory or glob into ``output``.
+
+    ``options`` are keyword arguments of :class:`Patcher`, the same for every
+    file. Databases keep the path of their file relative to the directory,
+    or to the deepest directory all files matching the glob are in.
+    """
+
+    def __init__(
+        self,
+        output: Union[str, Path],
+        jobs: int = 1,
+        memory_limit: Optional[int] = None,
+        timeout: Optional[float] = None,
+        retries: int = 1,
+        should_skip_unchanged: bool = True,
+        options: Optional[dict[str, Any]] = None,
+        logger: Union[logging.Logger, None] = None,
+    ) -> None:
+        self.output = Path(output)
+        self.jobs = jobs or os.cpu_count() or 1
+        self.memory_limit = memory_limit
+        self.timeout = timeout
+        self.retries = retries
+        self.should_skip_unchanged = should_skip_unchanged
+        self.options = options or {}
+        self.logger = logger or logging.getLogger("ifc2duckdb")
+        self.summary: dict[str, Any] = {}
+
+    def run(self, source: str) -> dict[str, Any]:
+        """Convert the files of ``source``. Returns the summary."""
+        inputs = self.find_inputs(source)
+        if not inputs:
+            raise FileNotFoundError(f"No IFC files in {source}")
+        self.output.mkdir(parents=True, exist_ok=True)
+        previous = self.load_summary()
+        is_same_options = previous.get("options") == self.options
+        previous_files = previous.get("files", {})
+        start = time.perf_counter()
+        self.summary = {
+            "source": source,
+            "started": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "jobs": self.jobs,
+            "options": self.options,
+            "files": {},
+        }
+
+        hashes = self.hash_inputs(inputs, previous_files)
+        pending = []
+        for name, path in sorted(
+            inputs.items(), key=lambda item: item[1].stat().st_size, reverse=True
+        ):
+            stat = path.stat()
+            entry = {
+                "input": str(path),
+                "output": str(self.get_database(name)),
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "sha256": hashes[name],
+                "status": "pending",
+                "attempts": 0,
+                "seconds": [],
+                "peak_rss": None,
+                "error": None,
+            }
+            old = previous_files.get(name, {})
+            if (
+                self.should_skip_unchanged
+                and is_same_options
+                and old.get("status") in DONE_STATUSES
+                and old.get("sha256") == entry["sha256"]
+                and self.get_database(name).exists()
+            ):
+                entry["status"] = "skipped"
+            else:
+                pending.append(name)
+            self.summary["files"][name] = entry
+        self.logger.info(
+            "Converting %d of %d files with %d jobs",
+            len(pending),
+            len(inputs),
+            self.jobs,
+        )
+
+        self.schedule(pending)
+        statuses = [entry["status"] for entry in self.summary["files"].values()]
+        self.summary["finished"] = time.strftime("%Y-%m-%dT%H:%M:%S%z")
+        self.summary["seconds"] = time.perf_counter() - start
+        self.summary["totals"] = {
+            status: statuses.count(status)
+            for status in ("converted", "skipped", "failed")
+        }
+        self.write_summary()
+        return self.summary
+
+    def find_inputs(self, source: str) -> dict[str, Path]:
+        """The IFC files of a directory or glob, by their relative path."""
+        if Path(source).is_dir():
+            root = Path(source)
+            paths = [p for p in root.rglob("*") if p.suffix.lower() == ".ifc"]
+        else:
+            paths = [Path(p) for p in glob.glob(source, recursive=True)]
+            paths = [p for p in paths if p.is_file()]
+            if not paths:
+                return {}
+            root = Path(os.path.commonpath([p.parent for p in paths]))
+        return {p.relative_to(root).as_posix(): p for p in sorted(paths)}
+
+    def get_database(self, name: str) -> Path:
+        return (self.output / name).with_suffix(".duckdb")
+
+    def hash_inputs(
+        self, inputs: dict[str, Path], previous: dict[str, dict[str, Any]]
+    ) -> dict[str, str]:
+        """The SHA-256 of each file, reused from the last run if unmodified."""
+
+        def get_hash(name: str) -> str:
+            path = inputs[name]
+            stat = path.stat()
+            old = previous.get(name, {})
+            if old.get("sha256") and (old.get("size"), old.get("mtime_ns")) == (
+                stat.st_size,
+                stat.st_mtime_ns,
+            ):
+                return str(old["sha256"])
+            digest = hashlib.sha256()
+            with open(path, "rb") as f:
+                while chunk := f.read(HASH_CHUNK_SIZE):
+                    digest.update(chunk)
+            return digest.hexdigest()
+
+        with ThreadPoolExecutor(self.jobs) as executor:
+            return dict(zip(inputs, executor.map(get_hash, inputs)))
+
+    def schedule(self, names: list[str]) -> None:
+        """Run the conversions of ``names``, in order, ``jobs`` at a time."""
+        import multiprocessing
+        from multiprocessing.connection import wait
+
+        # Imported before forking, so that jobs do not import it again
+        import duckdb  # noqa: F401
+
+        method = "fork" if "fork" in multiprocessing.get_all_start_methods() else None
+        context = multiprocessing.get_context(method)
+        if self.memory_limit and _tree_rss(os.getpid()) is None:
+            self.logger.warning("Memory of jobs cannot be measured, limit not enforced")
+
+        pending = deque(names)
+        running: dict[str, tuple[Any, Any, float]] = {}
+        while pending or running:
+            while pending and len(running) < self.jobs:
+                name = pending.popleft()
+                running[name] = self.start_job(context, name)
+            wait(
+                [process.sentinel for process, _, _ in running.values()],
+                timeout=POLL_INTERVAL,
+            )
+            for name, (process, connection, start) in list(running.items()):
+                entry = self.summary["files"][name]
+                elapsed = time.perf_counter() - start
+                if connection.poll():
+                    try:
+                        error, peak_rss = connection.recv()
+                    except EOFError:
+                        # Died without sending a result
+                        process.join()
+                        error = f"Exited with code {process.exitcode}"
+                    else:
+                        process.join()
+                        entry["peak_rss"] = peak_rss or entry["peak_rss"]
+                elif process.exitcode is not None:
+                    error = f"Exited with code {process.exitcode}"
+                elif self.timeout is not None and elapsed > self.timeout:
+                    error = f"Timed out after {self.timeout:g}s"
+                elif self.memory_limit is not None:
+                    rss = _tree_rss(process.pid) or 0
+                    entry["peak_rss"] = max(entry["peak_rss"] or 0, rss)
+                    if rss <= self.memory_limit:
+                        continue
+                    error = (
+                        f"Exceeded the memory limit of "
+                        f"{self.memory_limit / 1024**2:.0f} MB"
+                    )
+                else:
+                    continue
+
+                if process.is_alive():
+                    process.kill()
+                    process.join()
+                connection.close()
+                del running[name]
+                entry["seconds"].append(round(elapsed, 3))
+                if self.finish_job(name, error):
+                    pending.append(name)
+                self.write_summary()
+
+    def start_job(self, context: Any, name: str) -> tuple[Any, Any, float]:
+        entry = self.summary["files"][name]
+        entry["attempts"] += 1
+        database = self.get_database(name)
+        partial = database.with_name(database.stem + ".partial.duckdb")
+        partial.parent.mkdir(parents=True, exist_ok=True)
+        remove_database(partial)
+        # Incremental conversions update the previous database
+        if self.options.get("should_update_incrementally") and database.exists():
+            shutil.copy(database, partial)
+        receiver, sender = context.Pipe(duplex=False)
+        process = context.Process(
+            target=convert_file,
+            args=(entry["input"], str(partial), self.options, sender),
+            name=f"ifc2duckdb {name}",
+        )
+        process.start()
+        sender.close()
+        self.logger.debug("Started %s (attempt %d)", name, entry["attempts"])
+        return process, receiver, time.perf_counter()
+
+    def finish_job(self, name: str, error: Optional[str]) -> bool:
+        """Move a database in place, or record its error. True to retry."""
+        entry = self.summary["files"][name]
+        database = self.get_database(name)
+        partial = database.with_name(database.stem + ".partial.duckdb")
+        entry["error"] = error
+        if error:
+            remove_database(partial)
+            if entry["attempts"] <= self.retries:
+                self.logger.warning("%s failed, retrying: %s", name, error)
+                entry["status"] = "pending"
+                return True
+            entry["status"] = "failed"
+            self.logger.error("%s failed: %s", name, error)
+            return False
+        remove_database(database)
+        os.replace(partial, database)
+        entry["status"] = "converted"
+        self.logger.info("Converted %s in %.1fs", name, entry["seconds"][-1])
+        return False
+
+    def load_summary(self) -> dict[str, Any]:
+        path = self.output / BATCH_SUMMARY
+        if not path.exists():
+            return {}
+        try:
+            summary: dict[str, Any] = json.loads(path.read_text(encoding="utf-8"))
+            return summary
+        except ValueError:
+            self.logger.warning("Ignoring unreadable %s", path)
+            return {}
+
+    def write_summary(self) -> None:
+        path = self.output / BATCH_SUMMARY
+        temporary = path.with_name(path.name + ".tmp")
+        temporary.write_text(json.dumps(self.summary, indent=2), encoding="utf-8")
+        os.replace(temporary, path)
+
+
+def remove_database(database: Path) -> None:
+    """Remove a database with its write-ahead log and optimize pass files."""
+    for suffix in ("", ".wal", ".optimize", ".optimize.wal"):
+        database.with_name(database.name + suffix).unlink(missing_ok=True)
+
+
+def convert_file(
+    path: str, database: str, options: dict[str, Any], sender: Any
+) -> None:
+    """Job process converting one file, sends back its error and peak RSS."""
+    try:
+        patcher = Patcher(ifcopenshell.open(path), database=database, **options)
+        patcher.patch()
+        sender.send((None, patcher.peak_rss))
+    except Exception as e:
+        sender.send((f"{type(e).__name__}: {e}", None))
+    finally:
+        sender.close()
+
+
+def _tree_rss(pid: int) -> Optional[int]:
+    """Resident memory of a process and its descendants, None without /proc."""
+    try:
+        page_size = os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, ValueError):  # Windows
+        return None
+    total = 0
+    pids = [pid]
+    while pids:
+        current = pids.pop()
+        try:
+            with open(f"/proc/{current}/statm") as f:
+                total += int(f.read().split()[1]) * page_size
+        except OSError:  # Exited, or no /proc
+            if current == pid:
+                return None
+            continue
+        with contextlib.suppress(OSError):
+            for task in os.listdir(f"/proc/{current}/task"):
+                with open(f"/proc/{current}/task/{task}/children") as f:
+                    pids.extend(int(child) for child in f.read().split())
+    return total
@@ -0,0 +1,602 @@
+# IfcPatch - IFC to DuckDB conversion utility
+# Copyright chuongmep (C) 2025
+#
+# SPDX-License-Identifier: LGPL-3.0-or-later
+"""Clash detection between the elements of a converted database.
+
+Candidate pairs are found by a sweep and prune over the ``shape_bounds``
+boxes along x. For each candidate pair, only the triangles that reach into
+the other element's box are tested against each other. The tests run in
+NumPy batches spread over worker processes. Clashes are written to the
+``clashes`` table:
+
+- ``hard``: the meshes cross by more than ``tolerance``, or one element is
+  inside the other. ``depth`` is how far they cross, along the normal of
+  the faces crossed.
+- ``clearance``: the meshes are apart but closer than ``clearance``.
+  ``depth`` is how far inside the clearance they are.
+
+Lengths are in project units, like ``shape_bounds``.
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Any, Iterable, Optional, Union
+
+import numpy as np
+
+from .geometry_encoding import decode_geometry
+
+CLASH_KINDS = ("hard", "clearance")
+
+# Elements whose candidate pairs are generated at once by the sweep
+SWEEP_CHUNK_SIZE = 4096
+
+# Candidate element pairs per worker task
+PAIR_CHUNK_SIZE = 64
+
+# Triangle pairs tested at once
+TRIANGLE_BATCH_SIZE = 1 << 14
+
+# Skewed so that rays cast from a vertex are unlikely to graze an edge
+RAY_DIRECTION = np.array([0.5773, 0.5774, 0.5775]) / np.linalg.norm(
+    [0.5773, 0.5774, 0.5775]
+)
+
+Clash = tuple[int, int, str, float]
+
+
+class ClashDetector:
+    """Find clashing elements in a database converted with geometry.
+
+    ``a_classes`` and ``b_classes`` restrict the test to pairs of an element
+    of one with an element of the other, subtypes included. ``storeys``
+    restricts it to elements located on those storeys (by name).
+    """
+
+    def __init__(
+        self,
+        database: str,
+        tolerance: float = 0.0,
+        clearance: float = 0.0,
+        workers: int = 1,
+        logger: Union[logging.Logger, None] = None,
+    ) -> None:
+        self.database = database
+        self.tolerance = tolerance
+        self.clearance = clearance
+        self.workers = workers
+        self.logger = logger or logging.getLogger("ifc2duckdb")
+        self.meshes: dict[int, np.ndarray] = {}
+
+    def run(
+        self,
+        a_classes: Optional[Iterable[str]] = None,
+        b_classes: Optional[Iterable[str]] = None,
+        storeys: Optional[Iterable[str]] = None,
+    ) -> int:
+        """Detect clashes and replace the ``clashes`` table with them."""
+        import duckdb
+
+        db = duckdb.connect(self.database)
+        try:
+            pairs = self.load_candidates(db, a_classes, b_classes, storeys)
+        finally:
+            db.close()
+        # Workers are forked once DuckDB is closed, whose threads and locks
+        # would be copied in an unknown state
+        clashes = self.detect(pairs)
+
+        db = duckdb.connect(self.database)
+        try:
+            db.execute(
+                """
+                CREATE OR REPLACE TABLE clashes (
+                    a_id BIGINT NOT NULL,
+                    b_id BIGINT NOT NULL,
+                    kind TEXT NOT NULL,
+                    depth DOUBLE
+                );
+                """
+            )
+            if clashes:
+                import pyarrow as pa
+
+                columns = [pa.array(column) for column in zip(*clashes)]
+                rows = pa.Table.from_arrays(columns, names=["a", "b", "kind", "depth"])
+                db.register("_clash_rows", rows)
+                try:
+                    db.execute("INSERT INTO clashes SELECT * FROM _clash_rows;")
+                finally:
+                    db.unregister("_clash_rows")
+        finally:
+            db.close()
+        return len(clashes)
+
+    def load_candidates(
+        self,
+        db: Any,
+        a_classes: Optional[Iterable[str]] = None,
+        b_classes: Optional[Iterable[str]] = None,
+        storeys: Optional[Iterable[str]] = None,
+    ) -> np.ndarray:
+        """The candidate pairs of an open database, whose meshes are loaded.
+
+        Returns an (n, 2) array of element ids.
+        """
+        (schema,) = db.execute("SELECT schema FROM metadata").fetchone()
+        a_set = get_subtypes(schema, a_classes) if a_classes else None
+        b_set = get_subtypes(schema, b_classes) if b_classes else None
+
+        query = """
+            SELECT b.ifc_id, m.ifc_class, b.minx, b.miny, b.minz,
+                b.maxx, b.maxy, b.maxz
+            FROM shape_bounds b JOIN id_map m USING (ifc_id)
+        """
+        parameters: list[Any] = []
+        if storeys is not None:
+            query += """
+                JOIN element_location l USING (ifc_id)
+                WHERE l.storey_name IN (SELECT unnest(?::TEXT[]))
+            """
+            parameters.append(list(storeys))
+        rows = db.execute(query + " ORDER BY b.ifc_id;", parameters).fetchall()
+        in_a = np.array([a_set is None or row[1] in a_set for row in rows], dtype=bool)
+        in_b = np.array([b_set is None or row[1] in b_set for row in rows], dtype=bool)
+        wanted = in_a | in_b
+        rows = [row for row, keep in zip(rows, wanted) if keep]
+        in_a, in_b = in_a[wanted], in_b[wanted]
+        if not rows:
+            return np.empty((0, 2), dtype=np.int64)
+        ifc_ids = np.array([row[0] for row in rows], dtype=np.int64)
+        boxes = np.array([row[2:] for row in rows], dtype=np.float64)
+
+        first, second = find_overlapping_pairs(
+            boxes[:, :3], boxes[:, 3:], max(self.clearance, 0.0)
+        )
+        keep = (in_a[first] & in_b[second]) | (in_b[first] & in_a[second])
+        first, second = first[keep], second[keep]
+        # With class filters, a_id is the element of a_classes
+        swap = ~(in_a[first] & in_b[second])
+        first, second = np.where(swap, second, first), np.where(swap, first, second)
+        pairs = np.column_stack((ifc_ids[first], ifc_ids[second]))
+        self.logger.info(
+            "Clash detection: %d elements, %d candidate pairs", len(rows), len(pairs)
+        )
+        if len(pairs):
+            self.meshes = self.load_meshes(db, np.unique(pairs))
+        return pairs
+
+    def detect(self, pairs: np.ndarray) -> list[Clash]:
+        """The clashes among candidate pairs, whose meshes are loaded."""
+        if not len(pairs):
+            return []
+        chunks = [
+            pairs[i : i + PAIR_CHUNK_SIZE]
+            for i in range(0, len(pairs), PAIR_CHUNK_SIZE)
+        ]
+        pool = self.start_worker_pool()
+        try:
+            if pool is None:
+                results = [self.detect_chunk(chunk) for chunk in chunks]
+            else:
+                results = pool.map(_detect_chunk, chunks)
+        finally:
+            if pool is not None:
+                pool.terminate()
+            self.meshes = {}
+        clashes = [clash for result in results for clash in result]
+        self.logger.info(
+            "Clash detection: %d hard, %d clearance",
+            sum(clash[2] == "hard" for clash in clashes),
+            sum(clash[2] == "clearance" for clash in clashes),
+        )
+        return clashes
+
+    def start_worker_pool(self) -> Any:
+        if self.workers <= 1:
+            return None
+        import multiprocessing
+
+        if "fork" not in multiprocessing.get_all_start_methods():
+            self.logger.warning(
+                "Parallel clash detection requires the 'fork' start method, "
+                "detecting with a single process"
+            )
+            return None
+        global _worker_detector
+        _worker_detector = self
+        return multiprocessing.get_context("fork").Pool(self.workers)
+
+    def load_meshes(self, db: Any, ifc_ids: np.ndarray) -> dict[int, np.ndarray]:
+        """The world triangles of elements, as (n, 3, 3) arrays in project units."""
+        row = db.execute("SELECT * FROM metadata LIMIT 1").fetchone()
+        columns = [column[0] for column in db.description]
+        if "unit_scale" in columns:
+            unit_scale = row[columns.index("unit_scale")]
+        else:
+            self.logger.warning(
+                "The database has no unit scale, reconvert it for clash detection "
+                "in models not in metres"
+            )
+            unit_scale = 1.0
+        import pyarrow as pa
+
+        db.register("_clash_ids", pa.table({"ifc_id": ifc_ids}))
+        try:
+            rows = db.execute(
+                """
+                SELECT s.ifc_id, s.matrix, s.geometry, g.verts, g.edges, g.faces,
+                    g.material_ids, g.encoding
+                FROM shape s JOIN _clash_ids USING (ifc_id)
+                JOIN geometry g ON s.geometry = g.id;
+                """
+            ).fetchall()
+        finally:
+            db.unregister("_clash_ids")
+        triangles: dict[str, np.ndarray] = {}
+        meshes = {}
+        for ifc_id, matrix, geometry_id, *buffers in rows:
+            local = triangles.get(geometry_id)
+            if local is None:
+                mesh = decode_geometry(*buffers)
+                local = np.asarray(mesh.verts, dtype=np.float64)[mesh.faces]
+                triangles[geometry_id] = local
+            if not len(local):
+                continue
+            m = np.frombuffer(matrix).reshape(4, 4)
+            # Meshes are in metres, matrix translations in project units
+            meshes[ifc_id] = local @ m[:3, :3].T / unit_scale + m[:3, 3]
+        return meshes
+
+    def detect_chunk(self, pairs: np.ndarray) -> list[Clash]:
+        clashes = []
+        for a_id, b_id in pairs.tolist():
+            a, b = self.meshes.get(a_id), self.meshes.get(b_id)
+            if a is None or b is None:
+                continue
+            clash = get_clash(a, b, self.tolerance, self.clearance)
+            if clash is not None:
+                clashes.append((a_id, b_id, *clash))
+        return clashes
+
+
+def get_subtypes(schema: str, classes: Iterable[str]) -> set[str]:
+    """The names of classes and all their subtypes in an IFC schema."""
+    import ifcopenshell
+
+    declarations = ifcopenshell.schema_by_name(schema)
+    names = set()
+    pending = [declarations.declaration_by_name(name) for name in classes]
+    while pending:
+        declaration = pending.pop()
+        assert isinstance(declaration, ifcopenshell.ifcopenshell_wrapper.entity)
+        names.add(declaration.name())
+        pending.extend(declaration.subtypes())
+    return names
+
+
+def find_overlapping_pairs(
+    lower: np.ndarray, upper: np.ndarray, margin: float = 0.0
+) -> tuple[np.ndarray, np.ndarray]:
+    """Index pairs (i, j), i < j, of boxes closer than ``margin`` to each other.
+
+    Boxes are sorted along x, so the candidates of each box are those that
+    follow it until one starts past its end. Candidates are then filtered by
+    y and z.
+    """
+    lower = lower - margin
+    order = np.argsort(lower[:, 0], kind="stable")
+    lower, upper = lower[order], upper[order]
+    ends = np.searchsorted(lower[:, 0], upper[:, 0], side="right")
+    firsts, seconds = [], []
+    for start in range(0, len(order), SWEEP_CHUNK_SIZE):
+        chunk = np.arange(start, min(start + SWEEP_CHUNK_SIZE, len(order)))
+        counts = np.maximum(ends[chunk] - chunk - 1, 0)
+        first = np.repeat(chunk, counts)
+        # Each box is paired with the boxes that follow it in its window
+        starts = np.repeat(np.cumsum(counts) - counts, counts)
+        second = first + 1 + np.arange(counts.sum()) - starts
+        keep = np.all(
+            (lower[second, 1:] <= upper[first, 1:])
+            & (lower[first, 1:] <= upper[second, 1:]),
+            axis=1,
+        )
+        firsts.append(order[first[keep]])
+        seconds.append(order[second[keep]])
+    if not firsts:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    first, second = np.concatenate(firsts), np.concatenate(seconds)
+    return np.minimum(first, second), np.maximum(first, second)
+
+
+def get_clash(
+    a: np.ndarray, b: np.ndarray, tolerance: float, clearance: float
+) -> Optional[tuple[str, float]]:
+    """The kind and depth of the clash between two triangle meshes, if any."""
+    a_lower, a_upper = a.min(axis=(0, 1)), a.max(axis=(0, 1))
+    b_lower, b_upper = b.min(axis=(0, 1)), b.max(axis=(0, 1))
+    margin = max(clearance, 0.0)
+    # The triangles of each reaching into the box of the other
+    near_a = a[get_box_overlaps(a, b_lower - margin, b_upper + margin)]
+    near_b = b[get_box_overlaps(b, a_lower - margin, a_upper + margin)]
+    pairs = get_triangle_pairs(near_a, near_b, margin)
+
+    crossing = len(pairs[0]) > 0 and is_crossing(near_a, near_b, pairs)
+    if crossing:
+        depth = get_penetration_depth(near_a, near_b)
+    elif is_inside(a, b, a_lower, a_upper, b_lower, b_upper) or is_inside(
+        b, a, b_lower, b_upper, a_lower, a_upper
+    ):
+        depth = get_penetration_depth(a, b)
+    else:
+        depth = None
+    if depth is not None and depth > tolerance:
+        return "hard", depth
+
+    if clearance > 0 and len(pairs[0]):
+        # Meshes crossing within the tolerance touch
+        distance = 0.0 if depth is not None else get_distance(near_a, near_b, pairs)
+        if distance < clearance:
+            return "clearance", clearance - distance
+    return None
+
+
+def get_box_overlaps(
+    triangles: np.ndarray, lower: np.ndarray, upper: np.ndarray
+) -> np.ndarray:
+    """Which triangles overlap the box from ``lower`` to ``upper``."""
+    overlaps: np.ndarray = np.all(
+        (triangles.min(axis=1) <= upper) & (triangles.max(axis=1) >= lower), axis=1
+    )
+    return overlaps
+
+
+def get_triangle_pairs(
+    a: np.ndarray, b: np.ndarray, margin: float
+) -> tuple[np.ndarray, np.ndarray]:
+    """Index pairs of triangles of ``a`` and ``b`` whose boxes are close."""
+    a_lower, a_upper = a.min(axis=1), a.max(axis=1)
+    b_lower, b_upper = b.min(axis=1), b.max(axis=1)
+    if len(a) * len(b) <= TRIANGLE_BATCH_SIZE:
+        # Few enough to compare every pair
+        first, second = np.divmod(np.arange(len(a) * len(b)), len(b))
+        keep = np.all(
+            (a_lower[first] - margin <= b_upper[second])
+            & (b_lower[second] - margin <= a_upper[first]),
+            axis=1,
+        )
+        return first[keep], second[keep]
+    lower = np.concatenate((a_lower, b_lower))
+    upper = np.concatenate((a_upper, b_upper))
+    first, second = find_overlapping_pairs(lower, upper, margin)
+    # Only pairs of a triangle of each, first is the lower index so from a
+    keep = (first < len(a)) & (second >= len(a))
+    return first[keep], second[keep] - len(a)
+
+
+def is_crossing(
+    a: np.ndarray, b: np.ndarray, pairs: tuple[np.ndarray, np.ndarray]
+) -> bool:
+    """Whether an edge of a triangle passes through the other, for any pair."""
+    for i in range(0, len(pairs[0]), TRIANGLE_BATCH_SIZE):
+        ta = a[pairs[0][i : i + TRIANGLE_BATCH_SIZE]]
+        tb = b[pairs[1][i : i + TRIANGLE_BATCH_SIZE]]
+        # The three edges of each triangle against the other triangle
+        starts = np.concatenate((ta, tb))
+        ends = np.roll(starts, -1, axis=1)
+        triangles = np.repeat(np.concatenate((tb, ta)), 3, axis=0)
+        crossing = segments_cross_triangles(
+            starts.reshape(-1, 3), ends.reshape(-1, 3), triangles
+        )
+        if crossing.any():
+            return True
+    return False
+
+
+def get_penetration_depth(a: np.ndarray, b: np.ndarray) -> float:
+    """How far meshes must move apart to stop overlapping, along a face normal.
+
+    The vertices of both are projected on the normal of every face, and the
+    depth is the smallest overlap of the projections. This is exact for
+    convex meshes unless they are best separated along no face normal, and
+    an estimate otherwise.
+    """
+    normals = np.cross(a[:, 1] - a[:, 0], a[:, 2] - a[:, 0])
+    normals = np.concatenate((normals, np.cross(b[:, 1] - b[:, 0], b[:, 2] - b[:, 0])))
+    lengths = np.linalg.norm(normals, axis=1)
+    normals = normals[lengths > 0] / lengths[lengths > 0, None]
+    # Opposite faces give the same overlap
+    largest = normals[np.arange(len(normals)), np.abs(normals).argmax(axis=1)]
+    normals *= np.sign(largest)[:, None]
+    normals = np.unique(normals.round(6), axis=0)
+    a_vertices, b_vertices = a.reshape(-1, 3), b.reshape(-1, 3)
+    depth = np.inf
+    batch = max(TRIANGLE_BATCH_SIZE // max(len(a_vertices), len(b_vertices)), 1)
+    for i in range(0, len(normals), batch):
+        axes = normals[i : i + batch].T
+        a_projections, b_projections = a_vertices @ axes, b_vertices @ axes
+        overlaps = np.minimum(
+            a_projections.max(axis=0) - b_projections.min(axis=0),
+            b_projections.max(axis=0) - a_projections.min(axis=0),
+        )
+        depth = min(depth, float(overlaps.min()))
+    return max(depth, 0.0) if np.isfinite(depth) else 0.0
+
+
+def segments_cross_triangles(
+    start: np.ndarray, end: np.ndarray, triangles: np.ndarray
+) -> np.ndarray:
+    """Which segments pass through the triangle of the same index.
+
+    Segments in the plane of their triangle are not counted, so faces that
+    only touch do not cross.
+    """
+    direction = end - start
+    edge1 = triangles[:, 1] - triangles[:, 0]
+    edge2 = triangles[:, 2] - triangles[:, 0]
+    h = np.cross(direction, edge2)
+    determinant = np.einsum("nk,nk->n", edge1, h)
+    scale = (
+        np.linalg.norm(direction, axis=1)
+        * np.linalg.norm(edge1, axis=1)
+        * np.linalg.norm(edge2, axis=1)
+    )
+    valid = np.abs(determinant) > 1e-9 * scale
+    inverse = 1.0 / np.where(valid, determinant, 1.0)
+    s = start - triangles[:, 0]
+    u = inverse * np.einsum("nk,nk->n", s, h)
+    q = np.cross(s, edge1)
+    v = inverse * np.einsum("nk,nk->n", direction, q)
+    t = inverse * np.einsum("nk,nk->n", edge2, q)
+    crossing: np.ndarray = (
+        valid & (u >= 0) & (v >= 0) & (u + v <= 1) & (t >= 0) & (t <= 1)
+    )
+    return crossing
+
+
+def is_inside(
+    a: np.ndarray,
+    b: np.ndarray,
+    a_lower: np.ndarray,
+    a_upper: np.ndarray,
+    b_lower: np.ndarray,
+    b_upper: np.ndarray,
+) -> bool:
+    """Whether mesh ``a``, which does not cross ``b``, is inside it.
+
+    A ray is cast from a vertex of ``a``, which is inside the closed mesh
+    ``b`` if the ray passes through an odd number of its triangles.
+    """
+    if np.any(a_lower < b_lower) or np.any(a_upper > b_upper):
+        return False
+    origin = a[0, 0]
+    edge1 = b[:, 1] - b[:, 0]
+    edge2 = b[:, 2] - b[:, 0]
+    h = np.cross(RAY_DIRECTION, edge2)
+    determinant = np.einsum("nk,nk->n", edge1, h)
+    valid = np.abs(determinant) > 1e-12
+    inverse = 1.0 / np.where(valid, determinant, 1.0)
+    s = origin - b[:, 0]
+    u = inverse * np.einsum("nk,nk->n", s, h)
+    q = np.cross(s, edge1)
+    v = inverse * (q @ RAY_DIRECTION)
+    t = inverse * np.einsum("nk,nk->n", edge2, q)
+    hits = valid & (u >= 0) & (v >= 0) & (u + v <= 1) & (t > 0)
+    return bool(np.count_nonzero(hits) % 2)
+
+
+def get_distance(
+    a: np.ndarray, b: np.ndarray, pairs: tuple[np.ndarray, np.ndarray]
+) -> float:
+    """The smallest distance between pairs of triangles that do not cross.
+
+    It is found between a vertex of one triangle and the other triangle, or
+    between an edge of each.
+    """
+    distance = np.inf
+    for i in range(0, len(pairs[0]), TRIANGLE_BATCH_SIZE):
+        ta = a[pairs[0][i : i + TRIANGLE_BATCH_SIZE]]
+        tb = b[pairs[1][i : i + TRIANGLE_BATCH_SIZE]]
+        points = np.concatenate((ta, tb)).reshape(-1, 3)
+        triangles = np.repeat(np.concatenate((tb, ta)), 3, axis=0)
+        # Each of the three edges of a triangle with each of the other
+        a_starts, b_starts = np.repeat(ta, 3, axis=1), np.tile(tb, (1, 3, 1))
+        a_ends = np.repeat(np.roll(ta, -1, axis=1), 3, axis=1)
+        b_ends = np.tile(np.roll(tb, -1, axis=1), (1, 3, 1))
+        distances = np.concatenate(
+            (
+                get_point_triangle_distances(points, triangles),
+                get_segment_distances(
+                    a_starts.reshape(-1, 3),
+                    a_ends.reshape(-1, 3),
+                    b_starts.reshape(-1, 3),
+                    b_ends.reshape(-1, 3),
+                ),
+            )
+        )
+        distance = min(distance, float(np.nanmin(distances)))
+    return distance
+
+
+def get_point_triangle_distances(
+    points: np.ndarray, triangles: np.ndarray
+) -> np.ndarray:
+    """Distances from points to the triangles of the same index.
+
+    Finds the closest point by the Voronoi region of the triangle the point
+    projects into, as in Ericson, Real-Time Collision Detection, 5.1.5.
+    """
+    a, b, c = triangles[:, 0], triangles[:, 1], triangles[:, 2]
+    ab, ac = b - a, c - a
+    ap, bp, cp = points - a, points - b, points - c
+
+    def dot(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        product: np.ndarray = np.einsum("nk,nk->n", x, y)
+        return product
+
+    d1, d2 = dot(ab, ap), dot(ac, ap)
+    d3, d4 = dot(ab, bp), dot(ac, bp)
+    d5, d6 = dot(ab, cp), dot(ac, cp)
+    va = d3 * d6 - d5 * d4
+    vb = d5 * d2 - d1 * d6
+    vc = d1 * d4 - d3 * d2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        on_ab = a + ab * (d1 / (d1 - d3))[:, None]
+        on_ac = a + ac * (d2 / (d2 - d6))[:, None]
+        on_bc = b + (c - b) * ((d4 - d3) / ((d4 - d3) + (d5 - d6)))[:, None]
+        denominator = va + vb + vc
+        inside = a + ab * (vb / denominator)[:, None] + ac * (vc / denominator)[:, None]
+    conditions = [
+        (d1 <= 0) & (d2 <= 0),
+        (d3 >= 0) & (d4 <= d3),
+        (vc <= 0) & (d1 >= 0) & (d3 <= 0),
+        (d6 >= 0) & (d5 <= d6),
+        (vb <= 0) & (d2 >= 0) & (d6 <= 0),
+        (va <= 0) & (d4 - d3 >= 0) & (d5 - d6 >= 0),
+    ]
+    choices = [a, b, on_ab, c, on_ac, on_bc]
+    closest = np.select(
+        [condition[:, None] for condition in conditions], choices, inside
+    )
+    distances: np.ndarray = np.linalg.norm(points - closest, axis=1)
+    return distances
+
+
+def get_segment_distances(
+    p1: np.ndarray, q1: np.ndarray, p2: np.ndarray, q2: np.ndarray
+) -> np.ndarray:
+    """Distances between the segments p1-q1 and p2-q2 of the same index.
+
+    As in Ericson, Real-Time Collision Detection, 5.1.9.
+    """
+    d1, d2, r = q1 - p1, q2 - p2, p1 - p2
+    a = np.einsum("nk,nk->n", d1, d1)
+    e = np.einsum("nk,nk->n", d2, d2)
+    f = np.einsum("nk,nk->n", d2, r)
+    c = np.einsum("nk,nk->n", d1, r)
+    b = np.einsum("nk,nk->n", d1, d2)
+    denominator = a * e - b * b
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Closest point on the first line, then on the second segment
+        s = np.where(denominator > 1e-12, (b * f - c * e) / denominator, 0.0).clip(0, 1)
+        t = np.where(e > 1e-12, (b * s + f) / e, 0.0)
+        s = np.where(
+            t < 0,
+            np.where(a > 1e-12, -c / a, 0.0),
+            np.where(t > 1, np.where(a > 1e-12, (b - c) / a, 0.0), s),
+        ).clip(0, 1)
+    t = t.clip(0, 1)
+    distances: np.ndarray = np.linalg.norm(
+        p1 + d1 * s[:, None] - p2 - d2 * t[:, None], axis=1
+    )
+    return distances
+
+
+_worker_detector: Optional[ClashDetector] = None
+
+
+def _detect_chunk(pairs: np.ndarray) -> list[Clash]:
+    assert _worker_detector is not None
+    return _worker_detector.detect_chunk(pairs)
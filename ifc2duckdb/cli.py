@@ -4,10 +4,23 @@ import argparse
 import logging
 import sys
 from pathlib import Path
+from typing import Any
 
 import ifcopenshell
 
-from .patcher import Patcher
+from .batch import BATCH_SUMMARY, BatchConverter
+from .clash import ClashDetector
+from .export import (
+    DEFAULT_ROW_GROUP_SIZE,
+    PARQUET_COMPRESSIONS,
+    create_parquet_views,
+    export_parquet,
+)
+from .geometry_cache import DEFAULT_GEOMETRY_CACHE_SIZE
+from .geometry_encoding import GEOMETRY_ENCODINGS
+from .optimize import optimize_database
+from .patcher import DEFAULT_GEOMETRY_MEMORY_LIMIT, DEFAULT_SPATIAL_CELL_SIZE, Patcher
+from .watch import Watcher
 
 
 def setup_logging(verbose: bool = False) -> None:
@@ -20,33 +33,8 @@ def setup_logging(verbose: bool = False) -> None:
     )
 
 
-def main() -> None:
-    """Main entry point for the CLI."""
-    parser = argparse.ArgumentParser(
-        description="Convert IFC files to DuckDB format for fast analysis and querying",
-        formatter_class=argparse.RawDescriptionHelpFormatter,
-        epilog="""
-Examples:
-  ifc2duckdb input.ifc output.duckdb
-  ifc2duckdb input.ifc --database output.duckdb --no-geometry
-  ifc2duckdb input.ifc --database output.duckdb --verbose
-        """,
-    )
-
-    parser.add_argument(
-        "input_file",
-        type=str,
-        help="Path to the input IFC file",
-    )
-
-    parser.add_argument(
-        "--database",
-        "-d",
-        type=str,
-        default="database.duckdb",
-        help="Path to the output DuckDB database file (default: database.duckdb)",
-    )
-
+def add_conversion_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the options of the conversion, shared by main and batch."""
     parser.add_argument(
         "--no-full-schema",
         action="store_true",
@@ -66,12 +54,31 @@ Examples:
         help="Expand entity lists into separate rows",
     )
 
+    parser.add_argument(
+        "--expand-links",
+        action="store_true",
+        help="Expand entity lists into link tables of (parent_id, attribute, "
+        "ordinal, child_id) rows, one per class and attribute",
+    )
+
     parser.add_argument(
         "--no-inverses",
         action="store_true",
         help="Skip inverse relationship data",
     )
 
+    parser.add_argument(
+        "--no-rel-edges",
+        action="store_true",
+        help="Skip the rel_edges relationship table",
+    )
+
+    parser.add_argument(
+        "--no-element-location",
+        action="store_true",
+        help="Skip the element_location spatial containment table",
+    )
+
     parser.add_argument(
         "--no-psets",
         action="store_true",
@@ -90,6 +97,704 @@ Examples:
         help="Skip geometry data for representation tables",
     )
 
+    parser.add_argument(
+        "--executemany",
+        action="store_true",
+        help="Insert rows with executemany batches instead of columnar Arrow loads",
+    )
+
+    parser.add_argument(
+        "--native-types",
+        action="store_true",
+        help="Store aggregates as LIST columns and mixed selects as STRUCTs "
+        "instead of JSON",
+    )
+
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only convert the entities changed since the previous incremental "
+        "conversion into the same database",
+    )
+
+    parser.add_argument(
+        "--lazy-schema",
+        action="store_true",
+        help="With the full schema, only create tables for IFC classes present "
+        "in the file and empty views for the others",
+    )
+
+    parser.add_argument(
+        "--no-optimize",
+        action="store_true",
+        help="Keep the tables in load order, without the final sorting, ENUM "
+        "encoding and indexing pass (see ifc2duckdb optimize)",
+    )
+
+    parser.add_argument(
+        "--workers",
+        "-j",
+        type=int,
+        default=1,
+        help="Number of processes extracting IFC classes in parallel "
+        "(0: one per CPU, default: 1)",
+    )
+
+    parser.add_argument(
+        "--geometry-memory-limit",
+        type=int,
+        default=DEFAULT_GEOMETRY_MEMORY_LIMIT // 1024**2,
+        metavar="MB",
+        help="Megabytes of shape and geometry rows buffered before they are "
+        "written to the database (default: %(default)s)",
+    )
+
+    parser.add_argument(
+        "--geometry-cache",
+        metavar="PATH",
+        help="Reuse tessellations cached in this file by earlier conversions, "
+        "and cache new ones",
+    )
+
+    parser.add_argument(
+        "--geometry-cache-size",
+        type=int,
+        default=DEFAULT_GEOMETRY_CACHE_SIZE // 1024**2,
+        metavar="MB",
+        help="Megabytes of tessellations kept in the geometry cache, least "
+        "recently used first evicted (default: %(default)s)",
+    )
+
+    parser.add_argument(
+        "--geometry-encoding",
+        choices=GEOMETRY_ENCODINGS,
+        default="raw",
+        help="Store vertices as float64 (raw), float32 or uint16 quantized "
+        "within their bounding box; the compact encodings also delta encode "
+        "and compress the indices (default: %(default)s)",
+    )
+
+    parser.add_argument(
+        "--spatial-cell-size",
+        type=float,
+        default=DEFAULT_SPATIAL_CELL_SIZE,
+        metavar="METRES",
+        help="Size of the grid cells shapes are indexed by in shape_cells "
+        "(default: %(default)s)",
+    )
+
+
+def get_conversion_options(args: argparse.Namespace) -> dict[str, Any]:
+    """The Patcher keyword arguments of the conversion options."""
+    return dict(
+        full_schema=not args.no_full_schema,
+        is_strict=args.strict,
+        should_expand=args.expand,
+        should_get_inverses=not args.no_inverses,
+        should_get_psets=not args.no_psets,
+        should_get_geometry=not args.no_geometry,
+        should_skip_geometry_data=args.skip_geometry_data,
+        should_load_columnar=not args.executemany,
+        should_use_native_types=args.native_types,
+        should_get_rel_edges=not args.no_rel_edges,
+        should_get_element_location=not args.no_element_location,
+        should_update_incrementally=args.incremental,
+        should_use_lazy_schema=args.lazy_schema,
+        should_expand_links=args.expand_links,
+        should_optimize=not args.no_optimize,
+        workers=args.workers,
+        geometry_memory_limit=args.geometry_memory_limit * 1024**2,
+        geometry_cache=args.geometry_cache,
+        geometry_cache_size=args.geometry_cache_size * 1024**2,
+        geometry_encoding=args.geometry_encoding,
+        spatial_cell_size=args.spatial_cell_size,
+    )
+
+
+def clash(argv: list[str]) -> None:
+    """Detect clashes between the elements of a converted database."""
+    parser = argparse.ArgumentParser(
+        prog="ifc2duckdb clash",
+        description="Detect clashes between the elements of a database "
+        "converted with geometry, into its clashes table",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  ifc2duckdb clash output.duckdb
+  ifc2duckdb clash output.duckdb --a IfcDuctSegment --b IfcBeam --storey "Level 3"
+  ifc2duckdb clash output.duckdb --tolerance 0.01 --clearance 0.05 --workers 8
+        """,
+    )
+
+    parser.add_argument(
+        "database",
+        type=str,
+        help="Path to the DuckDB database file",
+    )
+
+    parser.add_argument(
+        "--a",
+        metavar="CLASS",
+        nargs="+",
+        help="Only test elements of these IFC classes, and their subtypes...",
+    )
+
+    parser.add_argument(
+        "--b",
+        metavar="CLASS",
+        nargs="+",
+        help="...against elements of these IFC classes (default: any class)",
+    )
+
+    parser.add_argument(
+        "--storey",
+        metavar="NAME",
+        nargs="+",
+        help="Only test elements located on these storeys",
+    )
+
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.0,
+        help="Ignore hard clashes this deep or less, in project units (default: 0)",
+    )
+
+    parser.add_argument(
+        "--clearance",
+        type=float,
+        default=0.0,
+        help="Also report elements closer than this, in project units "
+        "(default: 0, no clearance clashes)",
+    )
+
+    parser.add_argument(
+        "--workers",
+        "-j",
+        type=int,
+        default=1,
+        help="Number of worker processes testing candidate pairs (default: 1)",
+    )
+
+    parser.add_argument(
+        "--verbose",
+        "-v",
+        action="store_true",
+        help="Enable verbose output",
+    )
+
+    args = parser.parse_args(argv)
+    setup_logging(args.verbose)
+
+    if not Path(args.database).exists():
+        print(f"Error: Database '{args.database}' does not exist.", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        detector = ClashDetector(
+            args.database,
+            tolerance=args.tolerance,
+            clearance=args.clearance,
+            workers=args.workers,
+        )
+        count = detector.run(args.a, args.b, args.storey)
+        print(f"Found {count} clashes, written to the clashes table")
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        if args.verbose:
+            import traceback
+
+            traceback.print_exc()
+        sys.exit(1)
+
+
+def optimize(argv: list[str]) -> None:
+    """Rewrite a converted database into its query-friendly layout."""
+    parser = argparse.ArgumentParser(
+        prog="ifc2duckdb optimize",
+        description="Sort, ENUM encode, index and compact a converted database, "
+        "as done at the end of every conversion without --no-optimize",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  ifc2duckdb optimize output.duckdb
+        """,
+    )
+
+    parser.add_argument(
+        "database",
+        type=str,
+        help="Path to the DuckDB database file",
+    )
+
+    parser.add_argument(
+        "--verbose",
+        "-v",
+        action="store_true",
+        help="Enable verbose output",
+    )
+
+    args = parser.parse_args(argv)
+    setup_logging(args.verbose)
+
+    if not Path(args.database).exists():
+        print(f"Error: Database '{args.database}' does not exist.", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        size, optimized_size = optimize_database(args.database)
+        print(
+            f"Optimized {args.database}: {size / 1024**2:.1f} MB -> "
+            f"{optimized_size / 1024**2:.1f} MB"
+        )
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        if args.verbose:
+            import traceback
+
+            traceback.print_exc()
+        sys.exit(1)
+
+
+def export(argv: list[str]) -> None:
+    """Export a converted database to a Hive partitioned Parquet directory."""
+    parser = argparse.ArgumentParser(
+        prog="ifc2duckdb export",
+        description="Write the tables of a converted database as Parquet, "
+        "partitioned by project and IFC class, with a manifest",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  ifc2duckdb export output.duckdb warehouse/
+  ifc2duckdb export output.duckdb warehouse/ --project tower-b --workers 8
+  ifc2duckdb export output.duckdb warehouse/ --compression snappy
+        """,
+    )
+
+    parser.add_argument(
+        "database",
+        type=str,
+        help="Path to the DuckDB database file",
+    )
+
+    parser.add_argument(
+        "directory",
+        type=str,
+        help="Directory the project is written into, next to other projects",
+    )
+
+    parser.add_argument(
+        "--project",
+        metavar="NAME",
+        help="Name of the project partition, replaced if it exists "
+        "(default: the database file name)",
+    )
+
+    parser.add_argument(
+        "--row-group-size",
+        type=int,
+        default=DEFAULT_ROW_GROUP_SIZE,
+        metavar="ROWS",
+        help="Rows per Parquet row group (default: %(default)s)",
+    )
+
+    parser.add_argument(
+        "--compression",
+        choices=PARQUET_COMPRESSIONS,
+        default="zstd",
+        help="Parquet compression codec (default: %(default)s)",
+    )
+
+    parser.add_argument(
+        "--workers",
+        "-j",
+        type=int,
+        default=1,
+        help="Number of tables written in parallel (0: one per CPU, default: 1)",
+    )
+
+    parser.add_argument(
+        "--verbose",
+        "-v",
+        action="store_true",
+        help="Enable verbose output",
+    )
+
+    args = parser.parse_args(argv)
+    setup_logging(args.verbose)
+
+    if not Path(args.database).exists():
+        print(f"Error: Database '{args.database}' does not exist.", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        manifest = export_parquet(
+            args.database,
+            args.directory,
+            project=args.project,
+            row_group_size=args.row_group_size,
+            compression=args.compression,
+            workers=args.workers,
+        )
+        print(
+            f"Exported project {manifest['project']} to {args.directory}: "
+            f"{sum(t['rows'] for t in manifest['tables'].values())} rows"
+        )
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        if args.verbose:
+            import traceback
+
+            traceback.print_exc()
+        sys.exit(1)
+
+
+def views(argv: list[str]) -> None:
+    """Create a database of views over a Parquet export."""
+    parser = argparse.ArgumentParser(
+        prog="ifc2duckdb views",
+        description="Create a DuckDB database with a view per table over the "
+        "Parquet files of every exported project",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  ifc2duckdb views warehouse/ warehouse.duckdb
+  ifc2duckdb views warehouse/ tower-b.duckdb --project tower-b
+        """,
+    )
+
+    parser.add_argument(
+        "directory",
+        type=str,
+        help="Directory written by ifc2duckdb export",
+    )
+
+    parser.add_argument(
+        "database",
+        type=str,
+        help="Path to the DuckDB database file the views are created in",
+    )
+
+    parser.add_argument(
+        "--project",
+        metavar="NAME",
+        help="Only read this project, as its database would",
+    )
+
+    parser.add_argument(
+        "--verbose",
+        "-v",
+        action="store_true",
+        help="Enable verbose output",
+    )
+
+    args = parser.parse_args(argv)
+    setup_logging(args.verbose)
+
+    try:
+        count = create_parquet_views(args.directory, args.database, args.project)
+        print(f"Created {count} views in {args.database}")
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        if args.verbose:
+            import traceback
+
+            traceback.print_exc()
+        sys.exit(1)
+
+
+def batch(argv: list[str]) -> None:
+    """Convert every IFC file of a directory or glob, several at a time."""
+    parser = argparse.ArgumentParser(
+        prog="ifc2duckdb batch",
+        description="Convert the IFC files of a directory or glob into a "
+        "directory of databases, largest first across a pool of jobs, skipping "
+        f"files unchanged since the last run (see {BATCH_SUMMARY})",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  ifc2duckdb batch exports/ --out databases/ --jobs 8
+  ifc2duckdb batch "exports/**/*.ifc" --out databases/ --jobs 4 --timeout 3600
+  ifc2duckdb batch exports/ --out databases/ --memory-limit 8192 --no-geometry
+        """,
+    )
+
+    parser.add_argument(
+        "source",
+        type=str,
+        help="Directory searched for .ifc files, or a glob",
+    )
+
+    parser.add_argument(
+        "--out",
+        "-o",
+        required=True,
+        metavar="DIR",
+        help="Directory the databases and the summary are written to",
+    )
+
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of files converted at once (0: one per CPU, default: 1)",
+    )
+
+    parser.add_argument(
+        "--memory-limit",
+        type=int,
+        metavar="MB",
+        help="Stop a conversion using more resident memory than this, its "
+        "worker processes included (default: no limit)",
+    )
+
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        metavar="SECONDS",
+        help="Stop a conversion running longer than this (default: no limit)",
+    )
+
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=1,
+        help="Number of times a failed conversion is tried again, after the "
+        "other files (default: %(default)s)",
+    )
+
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Convert files even if unchanged since their last conversion",
+    )
+
+    add_conversion_arguments(parser)
+
+    parser.add_argument(
+        "--verbose",
+        "-v",
+        action="store_true",
+        help="Enable verbose output",
+    )
+
+    args = parser.parse_args(argv)
+    setup_logging(args.verbose)
+
+    try:
+        converter = BatchConverter(
+            args.out,
+            jobs=args.jobs,
+            memory_limit=args.memory_limit and args.memory_limit * 1024**2,
+            timeout=args.timeout,
+            retries=args.retries,
+            should_skip_unchanged=not args.force,
+            options=get_conversion_options(args),
+        )
+        summary = converter.run(args.source)
+        totals = summary["totals"]
+        print(
+            f"Converted {totals['converted']}, skipped {totals['skipped']} and "
+            f"failed {totals['failed']} files in {summary['seconds']:.1f}s, "
+            f"see {Path(args.out) / BATCH_SUMMARY}"
+        )
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        if args.verbose:
+            import traceback
+
+            traceback.print_exc()
+        sys.exit(1)
+    if totals["failed"]:
+        sys.exit(1)
+
+
+def watch(argv: list[str]) -> None:
+    """Convert the IFC files dropped into a directory as they land."""
+    parser = argparse.ArgumentParser(
+        prog="ifc2duckdb watch",
+        description="Watch a directory and convert each new or changed IFC "
+        "file once completely written, swapping its database in place",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  ifc2duckdb watch drops/
+  ifc2duckdb watch drops/ --out databases/ --debounce 10
+  ifc2duckdb watch //server/share/drops --database model.duckdb --polling
+        """,
+    )
+
+    parser.add_argument(
+        "directory",
+        type=str,
+        help="Directory watched for .ifc files",
+    )
+
+    target = parser.add_mutually_exclusive_group()
+
+    target.add_argument(
+        "--out",
+        "-o",
+        metavar="DIR",
+        help="Directory the databases are written to, one per file "
+        "(default: the watched directory)",
+    )
+
+    target.add_argument(
+        "--database",
+        "-d",
+        metavar="PATH",
+        help="Convert every file into this database, the latest replacing "
+        "the others",
+    )
+
+    parser.add_argument(
+        "--debounce",
+        type=float,
+        default=2.0,
+        metavar="SECONDS",
+        help="Time a file must stay unchanged before it is converted "
+        "(default: %(default)s)",
+    )
+
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=1.0,
+        metavar="SECONDS",
+        help="Time between checks for changes (default: %(default)s)",
+    )
+
+    parser.add_argument(
+        "--polling",
+        action="store_true",
+        help="Poll the directory instead of watching it with watchdog, e.g. on "
+        "network shares which do not report changes",
+    )
+
+    add_conversion_arguments(parser)
+
+    parser.add_argument(
+        "--verbose",
+        "-v",
+        action="store_true",
+        help="Enable verbose output",
+    )
+
+    args = parser.parse_args(argv)
+    setup_logging(args.verbose)
+
+    if not Path(args.directory).is_dir():
+        print(f"Error: Directory '{args.directory}' does not exist.", file=sys.stderr)
+        sys.exit(1)
+
+    def report(update: Any) -> None:
+        print(
+            f"Updated {update.database} to version {update.version} "
+            f"from {update.source}",
+            flush=True,
+        )
+
+    try:
+        watcher = Watcher(
+            args.directory,
+            output=args.out,
+            database=args.database,
+            debounce=args.debounce,
+            poll_interval=args.poll_interval,
+            should_poll=args.polling,
+            options=get_conversion_options(args),
+            on_update=report,
+        )
+        watcher.run()
+    except KeyboardInterrupt:
+        pass
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        if args.verbose:
+            import traceback
+
+            traceback.print_exc()
+        sys.exit(1)
+
+
+COMMANDS = {
+    "clash": clash,
+    "optimize": optimize,
+    "export": export,
+    "views": views,
+    "batch": batch,
+    "watch": watch,
+}
+
+
+def main() -> None:
+    """Main entry point for the CLI."""
+    # An IFC file named like a command is converted, e.g. a file named batch
+    if (
+        len(sys.argv) > 1
+        and sys.argv[1] in COMMANDS
+        and not Path(sys.argv[1]).is_file()
+    ):
+        COMMANDS[sys.argv[1]](sys.argv[2:])
+        return
+
+    parser = argparse.ArgumentParser(
+        description="Convert IFC files to DuckDB format for fast analysis and querying",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  ifc2duckdb input.ifc output.duckdb
+  ifc2duckdb input.ifc --database output.duckdb --no-geometry
+  ifc2duckdb input.ifc --database output.duckdb --verbose
+  ifc2duckdb input.ifc --database output.duckdb --workers 8
+  ifc2duckdb input.ifc --database output.duckdb --native-types
+  ifc2duckdb input.ifc --database output.duckdb --parquet warehouse/
+  ifc2duckdb clash output.duckdb --a IfcDuctSegment --b IfcBeam
+  ifc2duckdb optimize output.duckdb
+  ifc2duckdb export output.duckdb warehouse/ --project tower-b
+  ifc2duckdb views warehouse/ warehouse.duckdb
+  ifc2duckdb batch exports/ --out databases/ --jobs 8
+  ifc2duckdb watch drops/ --database model.duckdb
+        """,
+    )
+
+    parser.add_argument(
+        "input_file",
+        type=str,
+        help="Path to the input IFC file",
+    )
+
+    parser.add_argument(
+        "--database",
+        "-d",
+        type=str,
+        default="database.duckdb",
+        help="Path to the output DuckDB database file (default: database.duckdb)",
+    )
+
+    add_conversion_arguments(parser)
+
+    parser.add_argument(
+        "--parquet",
+        metavar="DIR",
+        help="Also export the database to this Parquet directory "
+        "(see ifc2duckdb export)",
+    )
+
+    parser.add_argument(
+        "--project",
+        metavar="NAME",
+        help="Name of the project partition of the Parquet export "
+        "(default: the database file name)",
+    )
+
+    parser.add_argument(
+        "--trace",
+        metavar="FILE",
+        help="Write the conversion phases to a Chrome trace JSON file",
+    )
+
     parser.add_argument(
         "--verbose",
         "-v",
@@ -124,13 +829,8 @@ Examples:
         patcher = Patcher(
             file=ifc_file,
             database=args.database,
-            full_schema=not args.no_full_schema,
-            is_strict=args.strict,
-            should_expand=args.expand,
-            should_get_inverses=not args.no_inverses,
-            should_get_psets=not args.no_psets,
-            should_get_geometry=not args.no_geometry,
-            should_skip_geometry_data=args.skip_geometry_data,
+            trace_file=args.trace,
+            **get_conversion_options(args),
         )
 
         # Convert to DuckDB
@@ -141,6 +841,14 @@ Examples:
         if output_path:
             print("Conversion completed successfully!")
             print(f"Output database: {output_path}")
+            if args.parquet:
+                manifest = export_parquet(
+                    output_path,
+                    args.parquet,
+                    project=args.project,
+                    workers=args.workers,
+                )
+                print(f"Exported project {manifest['project']} to {args.parquet}")
         else:
             print(
                 "Error: Conversion failed - no output file generated.", file=sys.stderr
@@ -0,0 +1,297 @@
+# IfcPatch - IFC to DuckDB conversion utility
+# Copyright chuongmep (C) 2025
+#
+# SPDX-License-Identifier: LGPL-3.0-or-later
+"""Export converted databases to a Hive partitioned Parquet directory.
+
+Every table of a database is written under ``<directory>/<table>/``, in a
+``project=<name>`` partition, so that any number of projects can be
+exported into the same directory by independent conversions:
+
+- ``id_map``, ``element_location``, ``psets`` and ``shape`` are further
+  partitioned by ``ifc_class``, which ``psets`` and ``shape`` gain as a
+  column.
+- Empty tables and the empty views of the lazy schema write no file.
+
+Each export also writes ``<directory>/_manifests/<project>.json`` with the
+columns, rows and files of every table. :func:`create_parquet_views` reads
+the manifests to create a view per table over the files of every project.
+The views have the columns of the database, plus ``project``.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Optional, Union
+
+from .version import __version__
+
+PARQUET_COMPRESSIONS = ("zstd", "snappy", "gzip", "lz4", "uncompressed")
+
+# DuckDB's default, rows are written and scanned a row group at a time
+DEFAULT_ROW_GROUP_SIZE = 122880
+
+# Tables partitioned by ifc_class, joined from id_map when they lack it
+CLASS_PARTITIONED_TABLES = ("id_map", "element_location", "psets", "shape")
+
+# Bookkeeping of incremental conversions into a database file
+EXCLUDED_TABLES = {"entity_hashes", "conversion_options"}
+
+MANIFEST_DIRECTORY = "_manifests"
+
+PROJECT_PATTERN = re.compile(r"[\w.-]+")
+
+
+def export_parquet(
+    database: Union[str, Path],
+    directory: Union[str, Path],
+    project: Optional[str] = None,
+    row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+    compression: str = "zstd",
+    workers: int = 1,
+    logger: Union[logging.Logger, None] = None,
+) -> dict[str, Any]:
+    """Write the tables of ``database`` as the ``project`` partition.
+
+    The project is named after the database file by default, and replaces
+    any earlier export of the same name. Tables are written by ``workers``
+    threads (0: one per CPU). Returns the manifest.
+    """
+    import duckdb
+
+    logger = logger or logging.getLogger("ifc2duckdb")
+    database = Path(database)
+    directory = Path(directory)
+    project = project or database.stem
+    check_project(project)
+    if compression not in PARQUET_COMPRESSIONS:
+        raise ValueError(f"Unknown Parquet compression {compression!r}")
+
+    db = duckdb.connect(str(database), read_only=True)
+    try:
+        relations = db.execute(
+            """
+            SELECT table_name, false FROM duckdb_tables() WHERE NOT internal
+            UNION ALL
+            SELECT view_name, true FROM duckdb_views() WHERE NOT internal
+            ORDER BY 1;
+            """
+        ).fetchall()
+        columns: dict[str, list[list[str]]] = {}
+        for table, column, data_type in db.execute(
+            """
+            SELECT table_name, column_name, data_type FROM duckdb_columns()
+            WHERE NOT internal ORDER BY table_name, column_index;
+            """
+        ).fetchall():
+            # ENUMs are written as text
+            if data_type.startswith("ENUM("):
+                data_type = "VARCHAR"
+            columns.setdefault(table, []).append([column, data_type])
+        macros = {
+            name: {"parameters": parameters, "definition": definition}
+            for name, definition, parameters in db.execute(
+                """
+                SELECT function_name, macro_definition, parameters
+                FROM duckdb_functions()
+                WHERE function_type = 'macro' AND NOT internal;
+                """
+            ).fetchall()
+        }
+
+        for stale in directory.glob(f"*/project={project}"):
+            shutil.rmtree(stale)
+        tables = [
+            table
+            for table, is_view in relations
+            if not is_view and table not in EXCLUDED_TABLES
+        ]
+        workers = workers or os.cpu_count() or 1
+        with ThreadPoolExecutor(workers) as executor:
+            written = dict(
+                zip(
+                    tables,
+                    executor.map(
+                        lambda table: write_table(
+                            db.cursor(),
+                            table,
+                            directory / table / f"project={project}",
+                            row_group_size,
+                            compression,
+                        ),
+                        tables,
+                    ),
+                )
+            )
+    finally:
+        db.close()
+
+    manifest: dict[str, Any] = {
+        "project": project,
+        "source": str(database.resolve()),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "ifc2duckdb": __version__,
+        "row_group_size": row_group_size,
+        "compression": compression,
+        "tables": {},
+        "macros": macros,
+    }
+    for table, _ in relations:
+        if table in EXCLUDED_TABLES:
+            continue
+        partition_by, rows = written.get(table, ([], 0))
+        files = sorted(
+            path.relative_to(directory).as_posix()
+            for path in (directory / table / f"project={project}").rglob("*.parquet")
+        )
+        manifest["tables"][table] = {
+            "columns": columns[table],
+            "partition_by": ["project"] + partition_by,
+            "rows": rows,
+            "files": files,
+            "bytes": sum((directory / path).stat().st_size for path in files),
+        }
+
+    path = directory / MANIFEST_DIRECTORY / f"{project}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    logger.info(
+        "Exported %d tables, %d rows to %s",
+        sum(1 for table in manifest["tables"].values() if table["files"]),
+        sum(table["rows"] for table in manifest["tables"].values()),
+        directory / f"*/project={project}",
+    )
+    return manifest
+
+
+def check_project(project: str) -> None:
+    if not PROJECT_PATTERN.fullmatch(project):
+        raise ValueError(
+            f"Invalid project name {project!r}, use letters, digits, '.', '-' "
+            "and '_'"
+        )
+
+
+def write_table(
+    db: Any, table: str, path: Path, row_group_size: int, compression: str
+) -> tuple[list[str], int]:
+    """Write the rows of a table, returns its partition columns and rows."""
+    try:
+        rows = db.execute(f'SELECT count(*) FROM "{table}";').fetchone()[0]
+        if not rows:
+            return [], 0
+        names = [
+            row[0]
+            for row in db.execute(
+                "SELECT column_name FROM duckdb_columns() WHERE table_name = ?;",
+                [table],
+            ).fetchall()
+        ]
+        query = f'SELECT * FROM "{table}"'
+        partition_by = []
+        if table in CLASS_PARTITIONED_TABLES:
+            partition_by = ["ifc_class"]
+            if "ifc_class" not in names:
+                query = (
+                    f'SELECT t.*, id_map.ifc_class FROM "{table}" t '
+                    "JOIN id_map USING (ifc_id)"
+                )
+        options = [
+            "FORMAT parquet",
+            f"COMPRESSION {compression}",
+            f"ROW_GROUP_SIZE {int(row_group_size)}",
+        ]
+        if partition_by:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            options.append(f"PARTITION_BY ({', '.join(partition_by)})")
+            target = path
+        else:
+            path.mkdir(parents=True, exist_ok=True)
+            target = path / "data_0.parquet"
+        target_sql = str(target).replace("'", "''")
+        db.execute(f"COPY ({query}) TO '{target_sql}' ({', '.join(options)});")
+        return partition_by, rows
+    finally:
+        db.close()
+
+
+def create_parquet_views(
+    directory: Union[str, Path],
+    database: Union[str, Path],
+    project: Optional[str] = None,
+) -> int:
+    """Create a view per exported table in ``database``, over every project.
+
+    With ``project`` the views only read that project's partition, so that
+    ids are unique as in its database. Columns exported by some projects
+    only are NULL in the others. Tables without files are empty views.
+    Returns the number of views.
+    """
+    import duckdb
+
+    directory = Path(directory).resolve()
+    if project:
+        check_project(project)
+    pattern = f"{project}.json" if project else "*.json"
+    manifests = [
+        json.loads(path.read_text(encoding="utf-8"))
+        for path in sorted((directory / MANIFEST_DIRECTORY).glob(pattern))
+    ]
+    if not manifests:
+        raise FileNotFoundError(f"No Parquet export manifest in {directory}")
+    where = f" WHERE project = '{project}'" if project else ""
+
+    columns: dict[str, dict[str, str]] = {}
+    partition_by: dict[str, list[str]] = {}
+    has_files: dict[str, bool] = {}
+    macros: dict[str, dict[str, Any]] = {}
+    for manifest in manifests:
+        for table, info in manifest["tables"].items():
+            columns.setdefault(table, {}).update(
+                {name: data_type for name, data_type in info["columns"]}
+            )
+            partitions = partition_by.setdefault(table, ["project"])
+            partitions += [p for p in info["partition_by"] if p not in partitions]
+            has_files[table] = has_files.get(table, False) or bool(info["files"])
+        macros.update(manifest.get("macros", {}))
+
+    db = duckdb.connect(str(database))
+    try:
+        db.execute("BEGIN;")
+        for table, types in sorted(columns.items()):
+            names = list(types) + [p for p in partition_by[table] if p not in types]
+            if has_files[table]:
+                files = str(directory / table / "**" / "*.parquet").replace("'", "''")
+                select = ", ".join(f'"{name}"' for name in names)
+                source = (
+                    f"read_parquet('{files}', hive_partitioning = true, "
+                    "union_by_name = true, hive_types_autocast = false)"
+                )
+                db.execute(
+                    f'CREATE OR REPLACE VIEW "{table}" AS '
+                    f"SELECT {select} FROM {source}{where};"
+                )
+            else:
+                select = ", ".join(
+                    f'CAST(NULL AS {types.get(name, "VARCHAR")}) AS "{name}"'
+                    for name in names
+                )
+                db.execute(
+                    f'CREATE OR REPLACE VIEW "{table}" AS SELECT {select} WHERE false;'
+                )
+        for name, macro in sorted(macros.items()):
+            db.execute(
+                f"CREATE OR REPLACE MACRO {name}({', '.join(macro['parameters'])}) "
+                f"AS {macro['definition']};"
+            )
+        db.execute("COMMIT;")
+    finally:
+        db.close()
+    return len(columns)
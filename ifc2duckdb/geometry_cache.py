@@ -0,0 +1,117 @@
+# IfcPatch - IFC to DuckDB conversion utility
+# Copyright chuongmep (C) 2025
+#
+# SPDX-License-Identifier: LGPL-3.0-or-later
+"""Persistent cache of tessellated geometry shared across conversions."""
+
+from __future__ import annotations
+
+import sqlite3
+import time
+from typing import NamedTuple
+
+# Bytes of cached geometry kept before the least recently used is evicted
+DEFAULT_GEOMETRY_CACHE_SIZE = 1024**3
+
+# Keys looked up per query, below the SQLite host parameter limit
+LOOKUP_CHUNK_SIZE = 500
+
+# Entries written per transaction, so that concurrent conversions interleave
+COMMIT_INTERVAL = 100
+
+
+class CachedGeometry(NamedTuple):
+    verts: bytes
+    edges: bytes
+    faces: bytes
+    material_ids: bytes
+    # JSON list of the canonical hashes of the materials
+    materials: str
+    # Shape matrix relative to the object placement, in SI units
+    matrix: bytes
+
+
+class GeometryCache:
+    """Tessellated geometry keyed by a hash of its definition.
+
+    Entries are stored in a SQLite file, which several conversions can share
+    even when they run at the same time. Whenever the cache is closed, the
+    least recently used entries beyond ``max_size`` bytes are evicted.
+    """
+
+    def __init__(self, path: str, max_size: int = DEFAULT_GEOMETRY_CACHE_SIZE) -> None:
+        self.path = path
+        self.max_size = max_size
+        self.db = sqlite3.connect(path, timeout=60)
+        self.db.execute("PRAGMA journal_mode=WAL;")
+        self.db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS geometry (
+                key TEXT PRIMARY KEY,
+                verts BLOB,
+                edges BLOB,
+                faces BLOB,
+                material_ids BLOB,
+                materials TEXT,
+                matrix BLOB,
+                size INTEGER NOT NULL,
+                last_used REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS geometry_last_used_idx
+            ON geometry (last_used);
+            """
+        )
+        # Keys read since the cache was opened, touched when it is closed
+        self.used: set[str] = set()
+        self.uncommitted = 0
+
+    def get_many(self, keys: list[str]) -> dict[str, CachedGeometry]:
+        entries = {}
+        for i in range(0, len(keys), LOOKUP_CHUNK_SIZE):
+            chunk = keys[i : i + LOOKUP_CHUNK_SIZE]
+            rows = self.db.execute(
+                f"""
+                SELECT key, verts, edges, faces, material_ids, materials, matrix
+                FROM geometry WHERE key IN ({",".join("?" * len(chunk))});
+                """,
+                chunk,
+            ).fetchall()
+            for key, *entry in rows:
+                entries[key] = CachedGeometry(*entry)
+        self.used.update(entries)
+        return entries
+
+    def put(self, key: str, entry: CachedGeometry) -> None:
+        size = sum(len(value) for value in entry)
+        self.db.execute(
+            "INSERT OR REPLACE INTO geometry VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?);",
+            (key, *entry, size, time.time()),
+        )
+        self.uncommitted += 1
+        if self.uncommitted >= COMMIT_INTERVAL:
+            self.db.commit()
+            self.uncommitted = 0
+
+    def close(self) -> None:
+        """Record the entries used, evict beyond ``max_size`` and close."""
+        now = time.time()
+        self.db.executemany(
+            "UPDATE geometry SET last_used = ? WHERE key = ?;",
+            [(now, key) for key in self.used],
+        )
+        self.db.execute(
+            """
+            DELETE FROM geometry WHERE key IN (
+                SELECT key FROM (
+                    SELECT key, SUM(size) OVER (
+                        ORDER BY last_used DESC, key
+                    ) AS total
+                    FROM geometry
+                )
+                WHERE total > ?
+            );
+            """,
+            (self.max_size,),
+        )
+        self.db.commit()
+        self.db.close()
@@ -0,0 +1,204 @@
+# IfcPatch - IFC to DuckDB conversion utility
+# Copyright chuongmep (C) 2025
+#
+# SPDX-License-Identifier: LGPL-3.0-or-later
+"""Compact encodings of the mesh buffers stored in the geometry table.
+
+``raw`` keeps the buffers as IfcOpenShell returns them: float64 vertices and
+int32 indices. The compact encodings store vertices as float32
+(``float32``) or as uint16 quantized within the bounding box of the mesh
+(``quantized``), delta and varint encode the indices and compress every
+blob, with zstd when the ``zstandard`` package is installed or else zlib.
+The ``encoding`` column of a geometry row records how it was encoded, e.g.
+``quantized+zstd``, and :func:`decode_geometry` reads any of them back.
+"""
+
+from __future__ import annotations
+
+import zlib
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+GEOMETRY_ENCODINGS = ("raw", "float32", "quantized")
+
+# Largest uint16, the number of steps across the bounding box of a mesh
+QUANTIZATION_STEPS = 65535
+
+# Fast levels, geometry is compressed while the iterator is waiting
+ZSTD_LEVEL = 3
+ZLIB_LEVEL = 1
+
+# Bytes of a varint holding any zigzag encoded int32 delta, and the values
+# from which each extra byte is needed
+MAX_VARINT_BYTES = 5
+VARINT_THRESHOLDS = np.array(
+    [1 << 7 * i for i in range(1, MAX_VARINT_BYTES)], dtype=np.uint64
+)
+
+
+class Mesh(NamedTuple):
+    # (n, 3) float64 for raw geometry, otherwise float32
+    verts: np.ndarray
+    # (n, 2) and (n, 3) int32 vertex indices
+    edges: np.ndarray
+    faces: np.ndarray
+    # int32 index into the materials list of each face
+    material_ids: np.ndarray
+
+
+def get_compression() -> str:
+    """The compression compact encodings use, depending on what is installed."""
+    try:
+        import zstandard  # noqa: F401
+    except ImportError:
+        return "zlib"
+    return "zstd"
+
+
+def compress(data: bytes, compression: str) -> bytes:
+    if compression == "zstd":
+        import zstandard
+
+        compressed: bytes = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+        return compressed
+    return zlib.compress(data, ZLIB_LEVEL)
+
+
+def decompress(data: bytes, compression: str) -> bytes:
+    if compression == "zstd":
+        import zstandard
+
+        decompressed: bytes = zstandard.ZstdDecompressor().decompress(data)
+        return decompressed
+    return zlib.decompress(data)
+
+
+def encode_geometry(
+    verts: bytes,
+    edges: bytes,
+    faces: bytes,
+    material_ids: bytes,
+    encoding: str,
+    compression: str,
+) -> tuple[bytes, bytes, bytes, bytes, str]:
+    """Encode raw mesh buffers, returned with the value of their encoding column."""
+    if encoding == "raw":
+        return verts, edges, faces, material_ids, encoding
+    vertices = np.frombuffer(verts, dtype=np.float64)
+    if encoding == "float32":
+        encoded_verts = vertices.astype(np.float32).tobytes()
+    elif encoding == "quantized":
+        encoded_verts = quantize(vertices.reshape(-1, 3))
+    else:
+        raise ValueError(f"Unknown geometry encoding: {encoding}")
+    blobs = [encoded_verts] + [
+        encode_varints(np.frombuffer(b, dtype=np.int32))
+        for b in (edges, faces, material_ids)
+    ]
+    e_verts, e_edges, e_faces, e_material_ids = [
+        compress(blob, compression) for blob in blobs
+    ]
+    return e_verts, e_edges, e_faces, e_material_ids, f"{encoding}+{compression}"
+
+
+def decode_geometry(
+    verts: bytes,
+    edges: bytes,
+    faces: bytes,
+    material_ids: bytes,
+    encoding: Optional[str] = "raw",
+) -> Mesh:
+    """Read the buffers of a geometry row as NumPy arrays.
+
+    Raw buffers, and float32 vertices once decompressed, are viewed without
+    copying, so those arrays are read-only.
+
+    Example::
+
+        row = db.execute(
+            "SELECT verts, edges, faces, material_ids, encoding FROM geometry"
+        ).fetchone()
+        mesh = decode_geometry(*row)
+    """
+    name, _, compression = (encoding or "raw").partition("+")
+    if name == "raw":
+        return Mesh(
+            np.frombuffer(verts, dtype=np.float64).reshape(-1, 3),
+            np.frombuffer(edges, dtype=np.int32).reshape(-1, 2),
+            np.frombuffer(faces, dtype=np.int32).reshape(-1, 3),
+            np.frombuffer(material_ids, dtype=np.int32),
+        )
+    blobs = [decompress(b, compression) for b in (verts, edges, faces, material_ids)]
+    if name == "float32":
+        vertices = np.frombuffer(blobs[0], dtype=np.float32).reshape(-1, 3)
+    elif name == "quantized":
+        vertices = dequantize(blobs[0])
+    else:
+        raise ValueError(f"Unknown geometry encoding: {encoding}")
+    return Mesh(
+        vertices,
+        decode_varints(blobs[1]).reshape(-1, 2),
+        decode_varints(blobs[2]).reshape(-1, 3),
+        decode_varints(blobs[3]),
+    )
+
+
+def quantize(vertices: np.ndarray) -> bytes:
+    """Vertices as uint16 steps across their bounding box.
+
+    The lower corner of the box and the step size along each axis come
+    first, as six float64.
+    """
+    if not len(vertices):
+        return np.zeros(6).tobytes()
+    lower = vertices.min(axis=0)
+    step = (vertices.max(axis=0) - lower) / QUANTIZATION_STEPS
+    # A flat mesh has no extent along an axis, any step size will do
+    step[step == 0] = 1.0
+    steps: np.ndarray = np.rint((vertices - lower) / step).astype(np.uint16)
+    return np.concatenate((lower, step)).tobytes() + steps.tobytes()
+
+
+def dequantize(data: bytes) -> np.ndarray:
+    lower, step = np.frombuffer(data, dtype=np.float64, count=6).reshape(2, 3)
+    steps = np.frombuffer(data, dtype=np.uint16, offset=48).reshape(-1, 3)
+    return (lower + steps * step).astype(np.float32)
+
+
+def encode_varints(values: np.ndarray) -> bytes:
+    """Delta, zigzag and LEB128 varint encode a sequence of integers."""
+    deltas = values.astype(np.int64)
+    deltas[1:] -= values[:-1]
+    zigzag = ((deltas << 1) ^ (deltas >> 63)).astype(np.uint64)
+    if not len(zigzag) or zigzag.max() < 0x80:
+        # Every value fits in a single byte, as in most meshes
+        return zigzag.astype(np.uint8).tobytes()
+    # One byte per 7 bits, all but the last with the high bit set
+    lengths = 1 + np.searchsorted(VARINT_THRESHOLDS, zigzag, side="right")
+    positions = np.arange(MAX_VARINT_BYTES)
+    shifts = (positions * 7).astype(np.uint64)
+    groups = ((zigzag[:, None] >> shifts) & np.uint64(0x7F)).astype(np.uint8)
+    groups[positions < lengths[:, None] - 1] |= 0x80
+    varints: bytes = groups[positions < lengths[:, None]].tobytes()
+    return varints
+
+
+def decode_varints(data: bytes) -> np.ndarray:
+    """Read back the int32 sequence written by :func:`encode_varints`."""
+    if not data:
+        return np.empty(0, dtype=np.int32)
+    groups = np.frombuffer(data, dtype=np.uint8)
+    if groups.max() < 0x80:
+        zigzag = groups.astype(np.uint64)
+    else:
+        ends = np.flatnonzero(groups < 0x80)
+        starts = np.concatenate(([0], ends[:-1] + 1))
+        # Position of every byte within its value, for the shift of its 7 bits
+        positions = np.arange(len(groups)) - np.repeat(starts, ends - starts + 1)
+        bits = (groups & 0x7F).astype(np.uint64) << (positions * 7).astype(np.uint64)
+        zigzag = np.bitwise_or.reduceat(bits, starts)
+    deltas = (zigzag >> np.uint64(1)).astype(np.int64) ^ -(
+        zigzag & np.uint64(1)
+    ).astype(np.int64)
+    return np.cumsum(deltas).astype(np.int32)
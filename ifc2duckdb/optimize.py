@@ -0,0 +1,171 @@
+# IfcPatch - IFC to DuckDB conversion utility
+# Copyright chuongmep (C) 2025
+#
+# SPDX-License-Identifier: LGPL-3.0-or-later
+"""Rewrite a converted database into its query-friendly physical layout.
+
+Rows are loaded in whatever order the conversion produced them, and tables
+rewritten by an incremental update leave free blocks behind. The database
+is copied into a fresh file in which:
+
+- ``psets``, ``id_map`` and ``shape_cells`` are sorted by the columns they
+  are filtered on, so DuckDB's zone maps skip most row groups.
+- The class and property name columns listed in ``ENUM_COLUMNS`` become
+  ENUMs, whose values are sorted so that ORDER BY is unchanged. Other text
+  columns, e.g. names or property values, keep their type whatever the
+  model. ENUMs are not used in incrementally updated databases, whose later
+  updates may insert new values.
+- ART indexes are created on the join keys not covered by a primary key,
+  for point lookups such as ``WHERE ifc_id = ?``.
+- Statistics are recomputed and the file checkpointed.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+from pathlib import Path
+from typing import Any, Union
+
+# Columns the rows of each table are sorted by
+SORT_KEYS = {
+    "id_map": ("ifc_class", "ifc_id"),
+    "psets": ("name", "ifc_id"),
+    "shape_cells": ("cell_x", "cell_y", "ifc_id"),
+}
+
+# Join keys indexed, in addition to the parent_id and child_id of link tables
+INDEX_KEYS = {
+    "psets": ("ifc_id",),
+    "inverses": ("ifc_id",),
+    "element_location": ("ifc_id", "storey_id"),
+    "shape": ("ifc_id",),
+    "shape_bounds": ("ifc_id",),
+    "element_quantities": ("ifc_id",),
+}
+
+# Text columns turned into ENUMs, all of them few values repeated many times
+ENUM_COLUMNS = {
+    "id_map": ("ifc_class",),
+    "psets": ("pset_name", "name", "value_type", "unit"),
+    "element_location": ("ifc_class",),
+    "rel_edges": ("rel_class",),
+}
+
+# Catalog name the optimized copy is attached under
+OPTIMIZED = "_ifc2duckdb_optimized"
+
+
+def optimize_database(
+    database: Union[str, Path], logger: Union[logging.Logger, None] = None
+) -> tuple[int, int]:
+    """Rewrite ``database`` in place. Returns its size before and after."""
+    import duckdb
+
+    logger = logger or logging.getLogger("ifc2duckdb")
+    database = Path(database)
+    optimized = database.with_name(database.name + ".optimize")
+    for path in (optimized, optimized.with_name(optimized.name + ".wal")):
+        path.unlink(missing_ok=True)
+    size = database.stat().st_size
+
+    db = duckdb.connect(str(database))
+    try:
+        [(source,)] = db.execute("SELECT current_database();").fetchall()
+        target = str(optimized).replace("'", "''")
+        db.execute(
+            f"""
+            ATTACH '{target}' AS {OPTIMIZED};
+            COPY FROM DATABASE "{source}" TO {OPTIMIZED} (SCHEMA);
+            USE {OPTIMIZED};
+            """
+        )
+        # Indexes are created again once the rows are loaded, and would keep
+        # their columns from being altered
+        indexes = db.execute(
+            "SELECT index_name, sql FROM duckdb_indexes() WHERE database_name = ?;",
+            [OPTIMIZED],
+        ).fetchall()
+        for name, _ in indexes:
+            db.execute(f'DROP INDEX "{name}";')
+        tables = [
+            row[0]
+            for row in db.execute(
+                """
+                SELECT table_name FROM duckdb_tables()
+                WHERE database_name = ? ORDER BY table_name;
+                """,
+                [source],
+            ).fetchall()
+        ]
+        if "conversion_options" in tables:
+            logger.info("Incrementally updated database, text columns kept as is")
+        else:
+            encode_enums(db, source)
+        for table in tables:
+            order = ""
+            if table in SORT_KEYS:
+                order = "ORDER BY " + ", ".join(SORT_KEYS[table])
+            db.execute(
+                f'INSERT INTO "{table}" SELECT * FROM "{source}"."{table}" {order};'
+            )
+        for _, sql in indexes:
+            db.execute(sql)
+        create_indexes(db, tables)
+        db.execute(f'VACUUM ANALYZE; USE "{source}";')
+        db.execute(f"DETACH {OPTIMIZED};")
+    except BaseException:
+        db.close()
+        optimized.unlink(missing_ok=True)
+        raise
+    db.close()
+
+    os.replace(optimized, database)
+    database.with_name(database.name + ".wal").unlink(missing_ok=True)
+    return size, database.stat().st_size
+
+
+def encode_enums(db: Any, source: str) -> None:
+    """Turn the ``ENUM_COLUMNS`` of the optimized copy into ENUMs."""
+    tables = {
+        row[0]
+        for row in db.execute(
+            "SELECT table_name FROM duckdb_tables() WHERE database_name = ?;",
+            [source],
+        ).fetchall()
+    }
+    for table, names in ENUM_COLUMNS.items():
+        if table not in tables:
+            continue
+        for name in names:
+            enum = f"{table}_{name}_enum"
+            db.execute(
+                f"""
+                CREATE TYPE "{enum}" AS ENUM (
+                    SELECT DISTINCT "{name}" FROM "{source}"."{table}"
+                    WHERE "{name}" IS NOT NULL ORDER BY 1
+                );
+                ALTER TABLE "{table}" ALTER "{name}" SET DATA TYPE "{enum}";
+                """
+            )
+
+
+def create_indexes(db: Any, tables: list[str]) -> None:
+    """Index the join keys of the optimized copy."""
+    keys = {table: INDEX_KEYS[table] for table in tables if table in INDEX_KEYS}
+    for (table,) in db.execute(
+        """
+        SELECT c.table_name
+        FROM duckdb_columns() c JOIN duckdb_tables() t USING (database_name, table_oid)
+        WHERE database_name = ? AND c.column_name IN ('parent_id', 'child_id')
+        GROUP BY c.table_name HAVING count(*) = 2 ORDER BY c.table_name;
+        """,
+        [OPTIMIZED],
+    ).fetchall():
+        keys[table] = ("parent_id", "child_id")
+    for table, columns in keys.items():
+        for column in columns:
+            db.execute(
+                f'CREATE INDEX IF NOT EXISTS "{table}_{column}_idx" '
+                f'ON "{table}" ("{column}");'
+            )
@@ -9,13 +9,16 @@
 
 from __future__ import annotations
 
+import contextlib
+import hashlib
 import itertools
 import json
 import logging
 import os
 import re
+import sys
 import time
-from typing import Any, Union, Optional
+from typing import Any, Iterable, Iterator, Optional, Union
 
 import ifcopenshell
 import ifcopenshell.geom
@@ -30,10 +33,43 @@ import ifcopenshell.util.unit
 import ifcpatch
 import numpy as np
 
+from .geometry_cache import DEFAULT_GEOMETRY_CACHE_SIZE, CachedGeometry, GeometryCache
+from .geometry_encoding import GEOMETRY_ENCODINGS, encode_geometry, get_compression
+
 # DuckDB will be imported in the patch method when needed
 
 DEFAULT_DATABASE_NAME = "database.duckdb"
 
+# Number of elements of a single class extracted per worker task
+WORKER_CHUNK_SIZE = 10000
+
+# Link table rows extracted before the rows of a class are loaded, as a single
+# element may list many thousands of entities
+LINK_CHUNK_SIZE = 100000
+
+# Bytes of shape and geometry rows buffered before they are flushed to DuckDB
+DEFAULT_GEOMETRY_MEMORY_LIMIT = 256 * 1024 * 1024
+
+# CREATE TABLE and empty CREATE VIEW statements of every class, generated once
+# per schema and the options that change its columns
+TABLE_DDL_CACHE: dict[tuple[Any, ...], tuple[str, str]] = {}
+
+# Geometry settings changed from the ifcopenshell defaults
+GEOMETRY_SETTINGS: dict[ifcopenshell.geom.SETTING, Any] = {
+    "apply-default-materials": False
+}
+
+# Quoted STEP strings, skipped, and entity references such as #42
+STEP_REFERENCE = re.compile(r"'(?:[^']|'')*'|#(\d+)")
+
+IDENTITY_MATRIX = np.eye(4, dtype=np.float64).tobytes()
+
+# Metres along x and y of the cells of the shape_cells grid
+DEFAULT_SPATIAL_CELL_SIZE = 5.0
+
+# Which of the lower (0) or upper (1) bounds each corner of a box takes
+BOX_CORNERS = np.array(list(itertools.product((0, 1), repeat=3)))
+
 # Data type mapping for DuckDB (chosen to stay close to SQLite logic)
 # - TEXT -> TEXT
 # - INTEGER -> BIGINT
@@ -41,6 +77,12 @@ DEFAULT_DATABASE_NAME = "database.duckdb"
 # - JSON -> JSON
 # - BLOB -> BLOB
 # DuckDB supports JSON natively (>=0.7). We rely on that.
+# With should_use_native_types aggregates become LIST columns (BIGINT[] for
+# entity references) and selects mixing entities and values become STRUCTs.
+NATIVE_SELECT_TYPE = (
+    'STRUCT("type" TEXT, ifc_id BIGINT, value_num DOUBLE, value_bool BOOLEAN, '
+    "value_text TEXT)"
+)
 
 
 class Patcher(ifcpatch.BasePatcher):
@@ -62,6 +104,21 @@ class Patcher(ifcpatch.BasePatcher):
         should_get_psets: bool = True,
         should_get_geometry: bool = True,
         should_skip_geometry_data: bool = False,
+        should_load_columnar: bool = True,
+        should_use_native_types: bool = False,
+        should_get_rel_edges: bool = True,
+        should_get_element_location: bool = True,
+        should_update_incrementally: bool = False,
+        should_use_lazy_schema: bool = False,
+        should_expand_links: bool = False,
+        should_optimize: bool = True,
+        workers: int = 1,
+        geometry_memory_limit: int = DEFAULT_GEOMETRY_MEMORY_LIMIT,
+        trace_file: Optional[str] = None,
+        geometry_cache: Optional[str] = None,
+        geometry_cache_size: int = DEFAULT_GEOMETRY_CACHE_SIZE,
+        geometry_encoding: str = "raw",
+        spatial_cell_size: float = DEFAULT_SPATIAL_CELL_SIZE,
     ) -> None:
         super().__init__(file, logger)
         # Configure logger
@@ -87,11 +144,68 @@ class Patcher(ifcpatch.BasePatcher):
         self.should_get_psets = should_get_psets
         self.should_get_geometry = should_get_geometry
         self.should_skip_geometry_data = should_skip_geometry_data
+        self.should_load_columnar = should_load_columnar
+        self.should_use_native_types = should_use_native_types
+        self.should_get_rel_edges = should_get_rel_edges
+        self.should_get_element_location = should_get_element_location
+        self.should_update_incrementally = should_update_incrementally
+        self.should_use_lazy_schema = should_use_lazy_schema
+        self.should_expand_links = should_expand_links
+        self.should_optimize = should_optimize
+        self.workers = workers if workers > 0 else os.cpu_count() or 1
+        self.geometry_memory_limit = geometry_memory_limit
+        self.trace_file = trace_file
+        self.geometry_cache = geometry_cache
+        self.geometry_cache_size = geometry_cache_size
+        self.geometry_cache_hits = 0
+        self.geometry_cache_misses = 0
+        if geometry_encoding not in GEOMETRY_ENCODINGS:
+            raise ValueError(
+                f"Unknown geometry encoding {geometry_encoding!r}, expected one of "
+                f"{', '.join(GEOMETRY_ENCODINGS)}"
+            )
+        self.geometry_encoding = geometry_encoding
+        self.geometry_compression = "zlib"
+        self.spatial_cell_size = spatial_cell_size
+        self.native_columns: dict[str, list[Optional[bool]]] = {}
+        self.rel_edge_attributes: dict[str, Optional[tuple[list[int], list[int]]]] = {}
+        self.link_attributes: dict[str, dict[int, str]] = {}
 
         self.file_patched: Union[str, None] = None
+        # Whether patch() updates the previous conversion instead of creating one
+        self.is_updating = False
+        # A previous conversion that cannot be updated, replaced once converted
+        self.replaced_database: Any = None
+        self.peak_rss: Optional[int] = None
+        # (phase, IFC class): accumulated conversion_stats columns
+        self.phase_stats: dict[tuple[str, Optional[str]], dict[str, Any]] = {}
+        self.trace_events: list[dict[str, Any]] = []
+        self.current_phase: Optional[tuple[str, Optional[str]]] = None
+        self.nested_phase_times: list[list[float]] = []
+        # IfcLocalPlacement id: row of its world matrix in placement_matrices
+        self.placement_index: dict[int, int] = {}
+        self.placement_matrices = np.empty((0, 4, 4))
 
-    geometry_rows: dict[str, tuple[str, bytes, bytes, bytes, bytes, str]]
-    shape_rows: dict[int, tuple[int, float, float, float, bytes, Union[str, None]]]
+    # Rows waiting to be flushed, and the ids of every row already added
+    geometry_rows: list[tuple[str, bytes, bytes, bytes, bytes, str, str]]
+    shape_rows: list[tuple[int, float, float, float, bytes, Union[str, None]]]
+    geometry_ids: set[str]
+    shape_ids: set[int]
+    # Id of the stored mesh of every geometry id added, a hash of its content
+    geometry_aliases: dict[str, str]
+    stored_geometry_ids: set[str]
+    # Local bounding box of every stored mesh, minx, miny, minz, maxx, ...
+    geometry_bounds: dict[str, tuple[float, ...]]
+    # Element types, whose shapes are not placed in the world
+    type_shape_ids: set[int]
+    # Quantities of a stored mesh in SI units, by its id and the rotation part
+    # of the shape matrix, and the element_quantities rows waiting to be flushed
+    mesh_quantities: dict[tuple[str, bytes], tuple[float, float, float, float]]
+    quantity_rows: list[tuple[int, float, float, float, float]]
+    pending_geometry_size: int
+    # Canonical hash of each entity hashed for the geometry cache, and back
+    canonical_hashes: dict[int, bytes]
+    canonical_ids: dict[bytes, int]
 
     def get_output(self) -> Union[str, None]:
         return self.file_patched
@@ -111,22 +225,39 @@ class Patcher(ifcpatch.BasePatcher):
             database = database.with_suffix(database.suffix + ".duckdb")
 
         self.schema = ifcopenshell.schema_by_name(self.file.schema_identifier)
-        self.db = duckdb.connect(str(database))
-        self.c = self.db.cursor()
-        self.file_patched = str(database)
-
-        self.check_existing_ifc_database()
-        self.create_id_map()
-        self.create_metadata()
-
-        if self.should_get_psets:
-            self.create_pset_table()
-
-        if self.should_get_geometry:
-            self.create_geometry_table()
-            self.create_geometry()
+        self.shape_rows = []
+        self.geometry_rows = []
+        self.shape_ids = set()
+        self.geometry_ids = set()
+        self.geometry_aliases = {}
+        self.stored_geometry_ids = set()
+        self.geometry_bounds = {}
+        self.type_shape_ids = set()
+        self.mesh_quantities = {}
+        self.quantity_rows = []
+        if self.geometry_encoding != "raw":
+            self.geometry_compression = get_compression()
+            if self.geometry_compression != "zstd":
+                self.logger.warning(
+                    "zstandard is not installed, compressing geometry with zlib"
+                )
+        self.pending_geometry_size = 0
+        self.geometry_cache_hits = 0
+        self.geometry_cache_misses = 0
+        self.phase_stats = {}
+        self.trace_events = []
+        self.conversion_start = time.perf_counter()
+        self.replaced_database = None
+        self.is_updating = (
+            self.should_update_incrementally and self.can_update_database(database)
+        )
+        if self.replaced_database is not None:
+            # Converted aside, so that a failed conversion keeps the previous one
+            database = database.with_name(database.stem + ".partial.duckdb")
+            for path in (database, database.with_name(database.name + ".wal")):
+                path.unlink(missing_ok=True)
 
-        if self.full_schema:
+        if self.full_schema and not self.should_use_lazy_schema:
             ifc_classes = [
                 d.name()
                 for d in self.schema.declarations()
@@ -135,36 +266,608 @@ class Patcher(ifcpatch.BasePatcher):
         else:
             ifc_classes = self.file.wrapped_data.types()
 
+        if self.should_skip_geometry_data:
+            ifc_classes = [c for c in ifc_classes if not self.is_geometry_data(c)]
+
+        if self.should_get_geometry:
+            # Before forking, so that workers share the resolved placements
+            with self.phase("placements"):
+                self.resolve_placements()
+
+        # Workers are forked before DuckDB and the geometry iterator start threads
+        pool = None if self.is_updating else self.start_worker_pool()
+        try:
+            self.db = duckdb.connect(str(database))
+            self.c = self.db.cursor()
+            self.file_patched = str(database)
+
+            if self.is_updating:
+                self.update_database(ifc_classes)
+            else:
+                self.create_database(ifc_classes, pool)
+
+            if self.full_schema and self.should_use_lazy_schema:
+                with self.phase("schema"):
+                    self.create_empty_views(ifc_classes)
+
+            with self.phase("commit"):
+                self.db.commit()
+
+            if self.should_optimize:
+                from .optimize import optimize_database
+
+                self.c.close()
+                self.db.close()
+                with self.phase("optimize"):
+                    size, optimized_size = optimize_database(database, self.logger)
+                self.logger.info(
+                    "Optimized the database layout: %.1f MB -> %.1f MB",
+                    size / 1024**2,
+                    optimized_size / 1024**2,
+                )
+                self.db = duckdb.connect(str(database))
+                self.c = self.db.cursor()
+
+            self.insert_conversion_stats()
+            self.db.commit()
+            self.c.close()
+            self.db.close()
+        finally:
+            if pool is not None:
+                pool.terminate()
+
+        if self.replaced_database is not None:
+            wal = self.replaced_database.with_name(self.replaced_database.name + ".wal")
+            wal.unlink(missing_ok=True)
+            os.replace(database, self.replaced_database)
+            self.file_patched = str(self.replaced_database)
+
+        if self.trace_file:
+            self.write_trace(self.trace_file)
+        self.peak_rss = _peak_rss()
+        if self.peak_rss is not None:
+            self.logger.info("Peak RSS: %.1f MB", self.peak_rss / 1024**2)
+
+    def create_database(self, ifc_classes: list[str], pool: Any) -> None:
+        """Convert the whole model into a new database."""
+        with self.phase("schema"):
+            self.check_existing_ifc_database()
+            self.create_id_map()
+            self.create_metadata()
+
+            if self.should_get_inverses:
+                self.create_inverses_table()
+
+            if self.should_get_rel_edges:
+                self.create_rel_edges_table()
+
+            if self.should_get_element_location:
+                self.create_element_location_table()
+
+            if self.should_get_psets:
+                self.create_pset_table()
+
+            if self.should_get_geometry:
+                self.create_geometry_table()
+
+        if self.should_get_geometry:
+            self.create_geometry()
+
+        if pool is not None:
+            self.insert_data_parallel(pool, ifc_classes)
+        else:
+            for ifc_class in ifc_classes:
+                declaration = self.schema.declaration_by_name(ifc_class)
+                with self.phase("schema"):
+                    self.create_table(ifc_class, declaration)
+                self.insert_data(ifc_class)
+
+        if self.should_get_inverses:
+            with self.phase("inverses"):
+                if self.should_skip_geometry_data:
+                    for ifc_class in self.file.wrapped_data.types():
+                        if self.is_geometry_data(ifc_class):
+                            self.insert_rows(
+                                "inverses",
+                                self.get_reference_rows(self.file.by_type(ifc_class)),
+                            )
+                self.insert_inverses(ifc_classes)
+
+        if self.should_get_rel_edges:
+            with self.phase("rel_edges"):
+                self.index_rel_edges()
+
+        if self.should_get_element_location:
+            with self.phase("element_location"):
+                self.insert_element_location()
+
+        if self.should_get_psets:
+            with self.phase("psets"):
+                self.insert_psets()
+
+        if self.should_get_geometry:
+            with self.phase("final_inserts"):
+                self.flush_geometry()
+
+        if self.should_update_incrementally:
+            # Fingerprints the next incremental update compares the model with
+            with self.phase("entity_hashes"):
+                self.create_entity_hashes_table()
+                self.insert_rows("entity_hashes", self.get_entity_hashes())
+                self.insert_rows(
+                    "conversion_options", list(self.get_conversion_options().items())
+                )
+
+    def update_database(self, ifc_classes: list[str]) -> None:
+        """Apply the changes since the previous conversion to its database.
+
+        Entities are compared with the fingerprints in ``entity_hashes``. Rows
+        of added, changed and removed entities are deleted from every table
+        and the current ones extracted again. Geometry, property sets and
+        inverses are only rebuilt for the entities depending on a change.
+        """
+        with self.phase("diff"):
+            self.c.execute(
+                "CREATE TEMP TABLE new_entity_hashes AS "
+                "SELECT * FROM entity_hashes LIMIT 0;"
+            )
+            self.insert_rows("new_entity_hashes", self.get_entity_hashes())
+            # ifc_id with its class before and after, NULL when added or removed
+            changes = self.c.execute(
+                """
+                SELECT ifc_id, o.ifc_class, n.ifc_class
+                FROM entity_hashes o FULL JOIN new_entity_hashes n USING (ifc_id)
+                WHERE o.hash IS DISTINCT FROM n.hash
+                ORDER BY ifc_id;
+                """
+            ).fetchall()
+        removed = {ifc_id for ifc_id, _, ifc_class in changes if ifc_class is None}
+        added = {ifc_id for ifc_id, ifc_class, _ in changes if ifc_class is None}
+        self.logger.info(
+            "%d entities added, %d changed and %d removed since the previous "
+            "conversion",
+            len(added),
+            len(changes) - len(added) - len(removed),
+            len(removed),
+        )
+        if not changes:
+            self.c.execute("DROP TABLE new_entity_hashes;")
+            return
+
+        tables = {
+            row[0]
+            for row in self.c.execute(
+                """
+                SELECT table_name FROM information_schema.tables
+                WHERE table_type = 'BASE TABLE';
+                """
+            ).fetchall()
+        }
+        self.c.execute(
+            "CREATE TEMP TABLE changed_ids AS SELECT unnest(?::BIGINT[]) AS ifc_id;",
+            [[row[0] for row in changes]],
+        )
+        current = {ifc_id for ifc_id, _, ifc_class in changes if ifc_class is not None}
+        # Elements do not reference their openings, so the element voided by a
+        # changed or removed opening relationship is tessellated again as well
+        seeds = set(current)
+        if "IfcRelVoidsElement" in tables:
+            seeds.update(
+                row[0]
+                for row in self.c.execute(
+                    """
+                    SELECT "RelatingBuildingElement" FROM "IfcRelVoidsElement"
+                    WHERE ifc_id IN (SELECT ifc_id FROM changed_ids);
+                    """
+                ).fetchall()
+                if row[0] not in removed
+            )
+        dirty = self.get_dirty_ids(seeds)
+
+        with self.phase("delete"):
+            self.c.execute("BEGIN;")
+            for ifc_class in sorted({c for row in changes for c in row[1:] if c}):
+                if ifc_class in tables:
+                    self.c.execute(
+                        f"""
+                        DELETE FROM "{ifc_class}"
+                        WHERE ifc_id IN (SELECT ifc_id FROM changed_ids);
+                        """
+                    )
+                for name in self.get_link_attributes(ifc_class).values():
+                    if f"{ifc_class}_{name}" in tables:
+                        self.c.execute(
+                            f"""
+                            DELETE FROM "{ifc_class}_{name}"
+                            WHERE parent_id IN (SELECT ifc_id FROM changed_ids);
+                            """
+                        )
+            self.c.execute(
+                "DELETE FROM id_map WHERE ifc_id IN (SELECT ifc_id FROM changed_ids);"
+            )
+            # Entities the stale rows referenced, whose inverses and property
+            # sets may have changed too
+            references: Optional[set[int]] = None
+            if self.should_get_inverses:
+                references = {
+                    row[0]
+                    for row in self.c.execute(
+                        """
+                        DELETE FROM inverses
+                        WHERE referencing_id IN (SELECT ifc_id FROM changed_ids)
+                        RETURNING ifc_id;
+                        """
+                    ).fetchall()
+                }
+            if self.should_get_rel_edges:
+                self.c.execute(
+                    """
+                    DELETE FROM rel_edges
+                    WHERE rel_id IN (SELECT ifc_id FROM changed_ids);
+                    """
+                )
+            if self.should_get_element_location:
+                self.c.execute("DELETE FROM element_location;")
+            pset_ids: Optional[set[int]] = None
+            if self.should_get_psets:
+                if references is None:
+                    # Without the inverses the previous assignments are unknown
+                    self.c.execute("DELETE FROM psets;")
+                else:
+                    pset_ids = dirty | removed | references
+                    pset_ids |= self.get_pset_owners(dirty, current)
+                    self.c.execute(
+                        """
+                        DELETE FROM psets
+                        WHERE ifc_id IN (SELECT unnest(?::BIGINT[]));
+                        """,
+                        [sorted(pset_ids)],
+                    )
+            if self.should_get_geometry:
+                for table in (
+                    "shape",
+                    "shape_bounds",
+                    "shape_cells",
+                    "element_quantities",
+                ):
+                    self.c.execute(
+                        f"""
+                        DELETE FROM {table}
+                        WHERE ifc_id IN (SELECT unnest(?::BIGINT[]));
+                        """,
+                        [sorted(dirty | removed)],
+                    )
+            self.c.execute("COMMIT;")
+
+        if self.should_get_geometry:
+            self.create_geometry(dirty)
+
         for ifc_class in ifc_classes:
-            declaration = self.schema.declaration_by_name(ifc_class)
-            if self.should_skip_geometry_data and (
-                ifcopenshell.util.schema.is_a(declaration, "IfcRepresentation")
-                or ifcopenshell.util.schema.is_a(declaration, "IfcRepresentationItem")
-            ):
+            ifc_ids = [
+                ifc_id for ifc_id, _, new_class in changes if new_class == ifc_class
+            ]
+            if not ifc_ids:
                 continue
-            self.create_table(ifc_class, declaration)
-            self.insert_data(ifc_class)
+            with self.phase("schema"):
+                self.create_table(ifc_class, self.schema.declaration_by_name(ifc_class))
+            elements = [self.file.by_id(ifc_id) for ifc_id in ifc_ids]
+            with self.phase("extract", ifc_class):
+                for data in self.extract_chunks(ifc_class, elements):
+                    if references is not None:
+                        references.update(row[0] for row in data[3])
+                    self.load_data(ifc_class, *data)
+            if references is not None:
+                references.update(ifc_ids)
+
+        if references is not None and self.should_skip_geometry_data:
+            # Skipped classes have no rows, but still reference other entities
+            reference_rows = self.get_reference_rows(
+                self.file.by_id(ifc_id)
+                for ifc_id, _, new_class in changes
+                if new_class is not None and self.is_geometry_data(new_class)
+            )
+            references.update(row[0] for row in reference_rows)
+            self.insert_rows("inverses", reference_rows)
 
-        # Fix executemany input: convert dict_values to list of tuples
         if self.should_get_geometry:
-            if self.shape_rows:
-                shape_values = [tuple(v) for v in self.shape_rows.values()]
-                if shape_values:  # ensure not empty
-                    self.c.executemany(
-                        "INSERT INTO shape VALUES (?, ?, ?, ?, ?, ?);", shape_values
-                    )
+            # Products left without a shape by the extraction, whose placement
+            # depends on a change
+            with self.phase("placements"):
+                for ifc_id in sorted(dirty - self.shape_ids):
+                    shape_row = self.get_placement_row(self.file.by_id(ifc_id))
+                    if shape_row is not None:
+                        self.add_shape_row(shape_row)
 
-            if self.geometry_rows:
-                geometry_values = [tuple(v) for v in self.geometry_rows.values()]
-                if geometry_values:  # ensure not empty
-                    self.c.executemany(
-                        "INSERT INTO geometry VALUES (?, ?, ?, ?, ?, ?);",
-                        geometry_values,
-                    )
+        if references is not None:
+            with self.phase("inverses"):
+                self.insert_inverses(ifc_classes, sorted(references))
+
+        if self.should_get_element_location:
+            with self.phase("element_location"):
+                self.insert_element_location()
+
+        if self.should_get_psets:
+            with self.phase("psets"):
+                self.insert_psets(pset_ids)
+
+        if self.should_get_geometry:
+            with self.phase("final_inserts"):
+                self.flush_geometry()
+                # Representations no shape uses anymore
+                self.c.execute(
+                    """
+                    DELETE FROM geometry WHERE id NOT IN (
+                        SELECT geometry FROM shape WHERE geometry IS NOT NULL
+                    );
+                    """
+                )
+
+        with self.phase("entity_hashes"):
+            # Last, so that an interrupted update is redone by the next one
+            self.c.execute(
+                """
+                DELETE FROM entity_hashes
+                WHERE ifc_id IN (SELECT ifc_id FROM changed_ids);
+                INSERT INTO entity_hashes SELECT * FROM new_entity_hashes
+                WHERE ifc_id IN (SELECT ifc_id FROM changed_ids);
+                DROP TABLE new_entity_hashes;
+                DROP TABLE changed_ids;
+                """
+            )
+
+    def can_update_database(self, database: Any) -> bool:
+        """Whether ``database`` holds a conversion this one can update.
+
+        A previous conversion that was not incremental or used other options
+        is converted again from scratch, and set as ``replaced_database``.
+        """
+        import duckdb
+
+        if not database.exists():
+            return False
+        db = duckdb.connect(str(database), read_only=True)
+        try:
+            tables = {
+                row[0]
+                for row in db.execute(
+                    "SELECT table_name FROM information_schema.tables;"
+                ).fetchall()
+            }
+            options = None
+            if {"entity_hashes", "conversion_options"} <= tables:
+                options = dict(
+                    db.execute("SELECT name, value FROM conversion_options;").fetchall()
+                )
+        finally:
+            db.close()
+        if options == self.get_conversion_options():
+            return True
+        if "id_map" not in tables:
+            return False
+        self.logger.warning(
+            "%s was not converted incrementally with the same options, "
+            "converting it again",
+            database,
+        )
+        self.replaced_database = database
+        return False
+
+    def get_conversion_options(self) -> dict[str, str]:
+        """The options an update must share with the conversion it updates."""
+        options = {
+            "schema": self.file.schema_identifier,
+            "full_schema": self.full_schema,
+            "should_use_lazy_schema": self.should_use_lazy_schema,
+            "is_strict": self.is_strict,
+            "should_expand": self.should_expand,
+            "should_expand_links": self.should_expand_links,
+            "should_get_inverses": self.should_get_inverses,
+            "should_get_psets": self.should_get_psets,
+            "should_get_geometry": self.should_get_geometry,
+            "should_skip_geometry_data": self.should_skip_geometry_data,
+            "should_use_native_types": self.should_use_native_types,
+            "should_get_rel_edges": self.should_get_rel_edges,
+            "should_get_element_location": self.should_get_element_location,
+            "geometry_encoding": self.geometry_encoding,
+            "spatial_cell_size": self.spatial_cell_size,
+        }
+        return {name: json.dumps(value) for name, value in options.items()}
+
+    def get_entity_hashes(self) -> list[tuple[int, str, Optional[str], int]]:
+        """Fingerprint every entity, as rows of the ``entity_hashes`` table.
+
+        The hash is taken over the entity as written in IFC-SPF, so it changes
+        with any of its attribute values or references.
+        """
+        rooted = {
+            d.name()
+            for d in self.schema.declarations()
+            if isinstance(d, ifcopenshell.ifcopenshell_wrapper.entity)
+            and ifcopenshell.util.schema.is_a(d, "IfcRoot")
+        }
+        rows = []
+        # The unwrapped instances skip building Python entity_instance objects
+        for ifc_id in sorted(self.file.wrapped_data.entity_names()):
+            entity = self.file.wrapped_data.by_id(ifc_id)
+            ifc_class = entity.is_a()
+            global_id = entity.get_argument(0) if ifc_class in rooted else None
+            digest = hashlib.blake2b(
+                entity.to_string(False).encode(), digest_size=8
+            ).digest()
+            rows.append(
+                (
+                    ifc_id,
+                    ifc_class,
+                    global_id,
+                    int.from_bytes(digest, "little", signed=True),
+                )
+            )
+        return rows
+
+    def get_dirty_ids(self, ifc_ids: set[int]) -> set[int]:
+        """The entities whose shape or property sets may depend on ``ifc_ids``.
+
+        These are ``ifc_ids`` and every entity referencing one of them, directly
+        or not, such as the products placed relative to a moved placement.
+        Voided elements and styled representation items do not reference their
+        openings and styles, which are followed the other way.
+        """
+        dirty: set[int] = set()
+        queue = list(ifc_ids)
+        while queue:
+            ifc_id = queue.pop()
+            if ifc_id in dirty:
+                continue
+            dirty.add(ifc_id)
+            entity = self.file.by_id(ifc_id)
+            queue.extend(e.id() for e in self.file.get_inverse(entity))
+            # RelatingBuildingElement and Item
+            if entity.is_a("IfcRelVoidsElement") and entity[4] is not None:
+                queue.append(entity[4].id())
+            elif entity.is_a("IfcStyledItem") and entity[0] is not None:
+                queue.append(entity[0].id())
+        return dirty
+
+    def get_pset_owners(self, ifc_ids: set[int], changed: set[int]) -> set[int]:
+        """Entities whose property sets are among the dirty ``ifc_ids``.
 
-        self.db.commit()
-        self.c.close()
-        self.db.close()
+        A relationship is dirty as soon as one of its related objects is, so
+        its objects are only returned when it changed itself or its property
+        sets or type are dirty.
+        """
+        owners: set[int] = set()
+        for ifc_id in ifc_ids:
+            entity = self.file.by_id(ifc_id)
+            if entity.is_a("IfcRelDefinesByProperties") or entity.is_a(
+                "IfcRelDefinesByType"
+            ):
+                # RelatedObjects and the relating property set, set of them or type
+                relating = entity[5]
+                relating = relating if relating.id() else relating.wrappedValue
+                relating = relating if isinstance(relating, tuple) else (relating,)
+                if ifc_id in changed or any(r.id() in ifc_ids for r in relating):
+                    owners.update(e.id() for e in entity[4])
+            elif entity.is_a("IfcMaterialProperties") and entity.Material:
+                owners.add(entity.Material.id())
+            elif entity.is_a("IfcProfileProperties") and entity.ProfileDefinition:
+                owners.add(entity.ProfileDefinition.id())
+        return owners
+
+    @contextlib.contextmanager
+    def phase(self, name: str, ifc_class: Optional[str] = None) -> Iterator[None]:
+        """Record the wall time, CPU time and rows loaded by a conversion phase.
+
+        Repeated phases add up to a single ``conversion_stats`` row per phase
+        and class, while every occurrence is kept as a trace event. Time spent
+        in a nested phase is only accounted to the nested one.
+        """
+        key = (name, ifc_class)
+        stats = self.phase_stats.setdefault(
+            key,
+            {
+                "started": time.perf_counter() - self.conversion_start,
+                "wall_time": 0.0,
+                "cpu_time": 0.0,
+                "rows": 0,
+                "bytes": 0,
+                "peak_rss": None,
+                "calls": 0,
+            },
+        )
+        rows, size = stats["rows"], stats["bytes"]
+        previous, self.current_phase = self.current_phase, key
+        # Wall and CPU time of the nested phases
+        nested = [0.0, 0.0]
+        self.nested_phase_times.append(nested)
+        start, cpu_start = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            end, cpu_end = time.perf_counter(), time.process_time()
+            self.current_phase = previous
+            self.nested_phase_times.pop()
+            if self.nested_phase_times:
+                self.nested_phase_times[-1][0] += end - start
+                self.nested_phase_times[-1][1] += cpu_end - cpu_start
+            stats["wall_time"] += end - start - nested[0]
+            stats["cpu_time"] += cpu_end - cpu_start - nested[1]
+            stats["peak_rss"] = _peak_rss()
+            stats["calls"] += 1
+            if self.trace_file:
+                self.trace_events.append(
+                    {
+                        "name": name if ifc_class is None else f"{name} {ifc_class}",
+                        "cat": name,
+                        "ph": "X",
+                        "ts": (start - self.conversion_start) * 1e6,
+                        "dur": (end - start) * 1e6,
+                        "pid": os.getpid(),
+                        "tid": 0,
+                        "args": {
+                            "ifc_class": ifc_class,
+                            "rows": stats["rows"] - rows,
+                            "bytes": stats["bytes"] - size,
+                        },
+                    }
+                )
+
+    def insert_conversion_stats(self) -> None:
+        """Persist the phase statistics into ``conversion_stats``.
+
+        Statistics of a previous conversion of the database are replaced.
+        """
+        self.c.execute(
+            """
+            CREATE TABLE IF NOT EXISTS conversion_stats (
+                phase TEXT NOT NULL,
+                ifc_class TEXT,
+                started DOUBLE,
+                wall_time DOUBLE,
+                cpu_time DOUBLE,
+                rows BIGINT,
+                bytes BIGINT,
+                peak_rss BIGINT,
+                calls INTEGER
+            );
+            DELETE FROM conversion_stats;
+            """
+        )
+        rows = [
+            (name, ifc_class, *stats.values())
+            for (name, ifc_class), stats in self.phase_stats.items()
+        ]
+        # Stats rows are not themselves accounted for
+        self.current_phase = None
+        self.insert_rows("conversion_stats", rows)
+        for (name, ifc_class), stats in self.phase_stats.items():
+            self.logger.debug(
+                "Phase %s%s: %.2fs wall, %.2fs CPU, %d rows",
+                name,
+                "" if ifc_class is None else f" {ifc_class}",
+                stats["wall_time"],
+                stats["cpu_time"],
+                stats["rows"],
+            )
+
+    def write_trace(self, path: str) -> None:
+        """Write the phases as a Chrome trace for chrome://tracing or Perfetto."""
+        with open(path, "w") as f:
+            json.dump({"traceEvents": self.trace_events}, f)
+
+    def start_worker_pool(self) -> Any:
+        if self.workers <= 1:
+            return None
+        import multiprocessing
+
+        if "fork" not in multiprocessing.get_all_start_methods():
+            self.logger.warning(
+                "Parallel extraction requires the 'fork' start method, "
+                "converting with a single process"
+            )
+            return None
+        global _worker_patcher
+        _worker_patcher = self
+        return multiprocessing.get_context("fork").Pool(self.workers)
 
     # ---- Schema helpers ----
     def check_existing_ifc_database(self) -> None:
@@ -180,6 +883,22 @@ class Patcher(ifcpatch.BasePatcher):
                 "This could lead to mixed ids or duplicate content."
             )
 
+    def create_entity_hashes_table(self) -> None:
+        self.c.execute(
+            """
+            CREATE TABLE IF NOT EXISTS entity_hashes (
+                ifc_id BIGINT PRIMARY KEY,
+                ifc_class TEXT NOT NULL,
+                global_id TEXT,
+                hash BIGINT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS conversion_options (
+                name TEXT PRIMARY KEY,
+                value TEXT
+            );
+            """
+        )
+
     def create_id_map(self) -> None:
         self.c.execute(
             "CREATE TABLE IF NOT EXISTS id_map (ifc_id BIGINT PRIMARY KEY, ifc_class TEXT NOT NULL);"
@@ -190,11 +909,16 @@ class Patcher(ifcpatch.BasePatcher):
             "IfcOpenShell-1.0.0",
             self.file.schema,
             self.file.header.file_description.description[0],
+            ifcopenshell.util.unit.calculate_unit_scale(self.file),
         ]
         self.c.execute(
-            "CREATE TABLE IF NOT EXISTS metadata (preprocessor TEXT, schema TEXT, mvd TEXT);"
+            """
+            CREATE TABLE IF NOT EXISTS metadata (
+                preprocessor TEXT, schema TEXT, mvd TEXT, unit_scale DOUBLE
+            );
+            """
         )
-        self.c.execute("INSERT INTO metadata VALUES (?, ?, ?);", metadata)
+        self.c.execute("INSERT INTO metadata VALUES (?, ?, ?, ?);", metadata)
 
     def create_pset_table(self) -> None:
         self.c.execute(
@@ -203,7 +927,51 @@ class Patcher(ifcpatch.BasePatcher):
                 ifc_id BIGINT NOT NULL,
                 pset_name TEXT,
                 name TEXT,
-                value TEXT
+                value TEXT,
+                value_num DOUBLE,
+                value_bool BOOLEAN,
+                value_text TEXT,
+                value_type TEXT,
+                unit TEXT
+            );
+            """
+        )
+
+    def create_inverses_table(self) -> None:
+        self.c.execute(
+            """
+            CREATE TABLE IF NOT EXISTS inverses (
+                ifc_id BIGINT NOT NULL,
+                referencing_id BIGINT NOT NULL
+            );
+            """
+        )
+
+    def create_rel_edges_table(self) -> None:
+        self.c.execute(
+            """
+            CREATE TABLE IF NOT EXISTS rel_edges (
+                rel_id BIGINT NOT NULL,
+                rel_class TEXT NOT NULL,
+                relating_id BIGINT NOT NULL,
+                related_id BIGINT NOT NULL,
+                ordinal INTEGER NOT NULL
+            );
+            """
+        )
+
+    def create_element_location_table(self) -> None:
+        self.c.execute(
+            """
+            CREATE TABLE IF NOT EXISTS element_location (
+                ifc_id BIGINT NOT NULL,
+                ifc_class TEXT NOT NULL,
+                space_id BIGINT,
+                storey_id BIGINT,
+                storey_name TEXT,
+                storey_elevation DOUBLE,
+                building_id BIGINT,
+                site_id BIGINT
             );
             """
         )
@@ -229,31 +997,137 @@ class Patcher(ifcpatch.BasePatcher):
                 edges BLOB,
                 faces BLOB,
                 material_ids BLOB,
-                materials JSON
+                materials JSON,
+                encoding TEXT
+            );
+            """
+        )
+        self.c.execute(
+            """
+            CREATE TABLE IF NOT EXISTS shape_bounds (
+                ifc_id BIGINT NOT NULL,
+                minx DOUBLE,
+                miny DOUBLE,
+                minz DOUBLE,
+                maxx DOUBLE,
+                maxy DOUBLE,
+                maxz DOUBLE
             );
             """
         )
+        self.c.execute(
+            """
+            CREATE TABLE IF NOT EXISTS shape_cells (
+                cell_x INTEGER NOT NULL,
+                cell_y INTEGER NOT NULL,
+                ifc_id BIGINT NOT NULL
+            );
+            """
+        )
+        self.c.execute(
+            """
+            CREATE TABLE IF NOT EXISTS element_quantities (
+                ifc_id BIGINT NOT NULL,
+                volume DOUBLE,
+                surface_area DOUBLE,
+                footprint_area DOUBLE,
+                height DOUBLE
+            );
+            """
+        )
+        # Grid cell of a coordinate in project units, for queries on shape_cells
+        unit_scale = ifcopenshell.util.unit.calculate_unit_scale(self.file)
+        self.c.execute(
+            f"""
+            CREATE OR REPLACE MACRO spatial_cell(value) AS
+            CAST(floor(value / {self.spatial_cell_size / unit_scale!r}) AS INTEGER);
+            """
+        )
 
     def create_table(
         self, ifc_class: str, declaration: ifcopenshell.ifcopenshell_wrapper.declaration
     ) -> None:
+        if self.should_use_lazy_schema and self.is_updating:
+            # Replaces the empty views of a class the model did not have before
+            names = [ifc_class] + [
+                f"{ifc_class}_{name}"
+                for name in self.get_link_attributes(ifc_class).values()
+            ]
+            for name in names:
+                views = self.c.execute(
+                    "SELECT count(*) FROM duckdb_views() WHERE view_name = ?;", [name]
+                ).fetchone()
+                if views and views[0]:
+                    self.c.execute(f'DROP VIEW "{name}";')
+        self.c.execute(self.get_table_ddl(ifc_class, declaration)[0])
+
+    def create_empty_views(self, ifc_classes: list[str]) -> None:
+        """Create an empty view for every class of the schema without a table.
+
+        Queries on classes absent from the model still work, without the cost
+        of creating hundreds of empty tables.
+        """
+        tables = {
+            row[0]
+            for row in self.c.execute(
+                "SELECT table_name FROM information_schema.tables;"
+            ).fetchall()
+        }
+        statements = [
+            self.get_table_ddl(d.name(), d)[1]
+            for d in self.schema.declarations()
+            if isinstance(d, ifcopenshell.ifcopenshell_wrapper.entity)
+            and d.name() not in tables
+            and d.name() not in ifc_classes
+            and not (self.should_skip_geometry_data and self.is_geometry_data(d.name()))
+        ]
+        if statements:
+            self.c.execute("BEGIN;")
+            self.c.execute("\n".join(statements))
+            self.c.execute("COMMIT;")
+
+    def get_table_ddl(
+        self, ifc_class: str, declaration: ifcopenshell.ifcopenshell_wrapper.declaration
+    ) -> tuple[str, str]:
+        """The CREATE TABLE statement of a class, and of an empty view instead.
+
+        With ``should_expand_links`` both also create the link table of each
+        entity list attribute.
+        """
+        key = (
+            self.file.schema_identifier,
+            ifc_class,
+            self.should_expand,
+            self.should_expand_links,
+            self.is_strict,
+            self.should_use_native_types,
+            self.should_get_inverses,
+        )
+        if key in TABLE_DDL_CACHE:
+            return TABLE_DDL_CACHE[key]
+
         # Start CREATE TABLE statement, quote table name
         statement = f'CREATE TABLE IF NOT EXISTS "{ifc_class}" ('
+        # The same columns, as typed NULLs
+        view_columns = ["CAST(NULL AS BIGINT) AS ifc_id"]
 
         # Add ifc_id column
-        if self.should_expand:
+        if self.should_expand and not self.should_expand_links:
             statement += "ifc_id BIGINT NOT NULL"
         else:
             statement += "ifc_id BIGINT PRIMARY KEY"
 
         # Validate declaration
         assert isinstance(declaration, ifcopenshell.ifcopenshell_wrapper.entity)
+        # Entity lists stored in link tables have no column
+        link_attributes = self.get_link_attributes(ifc_class)
         total_attributes = declaration.attribute_count()
-        if total_attributes:
+        columns = [i for i in range(total_attributes) if i not in link_attributes]
+        if columns:
             statement += ", "
 
         derived = declaration.derived()
-        for i in range(total_attributes):
+        for i in columns:
             attribute = declaration.attribute_by_index(i)
             primitive = ifcopenshell.util.attribute.get_primitive_type(attribute)
 
@@ -266,6 +1140,8 @@ class Patcher(ifcpatch.BasePatcher):
                 data_type = "DOUBLE"
             elif self.should_expand and self.is_entity_list(attribute):
                 data_type = "BIGINT"
+            elif isinstance(primitive, tuple) and self.should_use_native_types:
+                data_type = self.get_native_type(primitive)
             elif isinstance(primitive, tuple):
                 data_type = "JSON"
             else:
@@ -283,20 +1159,38 @@ class Patcher(ifcpatch.BasePatcher):
                 optional = "" if attribute.optional() else " NOT NULL"
 
             # Add comma if not last column
-            comma = "" if i == total_attributes - 1 else ", "
+            comma = "" if i == columns[-1] else ", "
 
             # Add column, quote attribute name (double quotes)
             statement += f'"{attribute.name()}" {data_type}{optional}{comma}'
+            view_columns.append(f'CAST(NULL AS {data_type}) AS "{attribute.name()}"')
 
         # Add inverses column if needed
         if self.should_get_inverses:
-            statement += ", inverses JSON"
+            statement += ", inverses BIGINT[]"
+            view_columns.append("CAST(NULL AS BIGINT[]) AS inverses")
 
         # Close statement
         statement += ");"
 
-        # Execute
-        self.c.execute(statement)
+        view = (
+            f'CREATE VIEW IF NOT EXISTS "{ifc_class}" AS '
+            f"SELECT {', '.join(view_columns)} WHERE false;"
+        )
+        for name in link_attributes.values():
+            statement += (
+                f'\nCREATE TABLE IF NOT EXISTS "{ifc_class}_{name}" ('
+                "parent_id BIGINT NOT NULL, attribute TEXT NOT NULL, "
+                "ordinal INTEGER NOT NULL, child_id BIGINT NOT NULL);"
+            )
+            view += (
+                f'\nCREATE VIEW IF NOT EXISTS "{ifc_class}_{name}" AS '
+                "SELECT CAST(NULL AS BIGINT) AS parent_id, "
+                "CAST(NULL AS TEXT) AS attribute, CAST(NULL AS INTEGER) AS ordinal, "
+                "CAST(NULL AS BIGINT) AS child_id WHERE false;"
+            )
+        TABLE_DDL_CACHE[key] = (statement, view)
+        return statement, view
 
     def insert_data(self, ifc_class: str, batch_size: int = 1000) -> None:
         """
@@ -304,110 +1198,659 @@ class Patcher(ifcpatch.BasePatcher):
         Optimized for large datasets using batching and transactions.
         """
         elements = self.file.by_type(ifc_class, include_subtypes=False)
+        # The load phase nested in it is not accounted to the extraction
+        with self.phase("extract", ifc_class):
+            for data in self.extract_chunks(ifc_class, elements):
+                self.load_data(ifc_class, *data, batch_size)
+
+    def insert_data_parallel(self, pool: Any, ifc_classes: list[str]) -> None:
+        """Extract classes in worker processes and load them from this one.
+
+        Classes are split into chunks of ``WORKER_CHUNK_SIZE`` elements so that
+        big classes such as ``IfcCartesianPoint`` are shared across workers.
+        Results are consumed in submission order, which keeps the output
+        identical to the serial path.
+        """
+        counts = {
+            ifc_class: len(self.file.by_type(ifc_class, include_subtypes=False))
+            for ifc_class in ifc_classes
+        }
+        tasks = [
+            (ifc_class, start, min(start + WORKER_CHUNK_SIZE, count))
+            for ifc_class, count in counts.items()
+            for start in range(0, count, WORKER_CHUNK_SIZE)
+        ]
+        results = pool.imap(_extract_chunk, tasks)
+        for ifc_class in ifc_classes:
+            with self.phase("schema"):
+                self.create_table(ifc_class, self.schema.declaration_by_name(ifc_class))
+            for _ in range(0, counts[ifc_class], WORKER_CHUNK_SIZE):
+                # Time spent waiting on the workers
+                with self.phase("extract", ifc_class):
+                    chunks = next(results)
+                for data in chunks:
+                    self.load_data(ifc_class, *data)
+
+    def extract_chunks(
+        self, ifc_class: str, elements: list[ifcopenshell.entity_instance]
+    ) -> Iterator[
+        tuple[
+            list[Any], list[Any], list[Any], list[Any], list[Any], dict[str, list[Any]]
+        ]
+    ]:
+        """Build the class, id_map, placement, inverse, rel_edges and link rows.
+
+        The rows are yielded in chunks of at most ``LINK_CHUNK_SIZE`` link rows,
+        so that the link tables of long entity lists are loaded as they are
+        extracted. Without ``should_expand_links`` a single chunk is yielded.
+        This only reads from the IFC file so it can run in a worker process.
+        """
         rows: list[list[Any]] = []
         id_map_rows: list[tuple[int, str]] = []
-        pset_rows: list[tuple[int, str, str, Any]] = []
-
-        def batch_insert(cursor: Any, table_name: str, data: list[Any], batch_size: int = batch_size) -> None:
-            for i in range(0, len(data), batch_size):
-                batch = data[i : i + batch_size]
-                cursor.executemany(
-                    f"INSERT INTO {table_name} VALUES ({','.join(['?'] * len(batch[0]))});",
-                    batch,
-                )
+        shape_rows: list[tuple[int, float, float, float, bytes, None]] = []
+        inverse_rows: list[tuple[int, int]] = []
+        rel_edge_rows: list[tuple[int, str, int, int, int]] = []
+        # Link table: rows of (parent_id, attribute, ordinal, child_id)
+        link_rows: dict[str, list[tuple[int, str, int, int]]] = {}
+        link_count = 0
+
+        # Attribute index: whether its native column holds STRUCTs, None when the
+        # value is stored as JSON or expanded
+        native_columns = self.get_native_columns(ifc_class)
+        rel_edge_attributes = None
+        if self.should_get_rel_edges:
+            rel_edge_attributes = self.get_rel_edge_attributes(ifc_class)
+        link_attributes = self.get_link_attributes(ifc_class)
+        for name in link_attributes.values():
+            link_rows[f"{ifc_class}_{name}"] = []
+        should_expand = self.should_expand and not self.should_expand_links
 
         for element in elements:
             nested_indices: list[int] = []
             values: list[Any] = [element.id()]
+            # Entities referenced by this element, i.e. the edges of the inverse index
+            references: Optional[set[int]] = set() if self.should_get_inverses else None
 
-            for i, attribute in enumerate(element):
-                if isinstance(attribute, ifcopenshell.entity_instance):
+            attributes = list(element)
+            for i, attribute in enumerate(attributes):
+                if i in link_attributes:
+                    # A narrow row per item instead of a copy of the whole row
+                    name = link_attributes[i]
+                    links = self.get_link_rows(element.id(), name, attribute)
+                    table_rows = link_rows[f"{ifc_class}_{name}"]
+                    for link in links:
+                        table_rows.append(link)
+                        link_count += 1
+                        if references is not None:
+                            references.add(link[3])
+                elif (is_struct := native_columns[i]) is not None and (
+                    attribute is not None
+                ):
+                    values.append(
+                        self.get_native_value(attribute, is_struct, references)
+                    )
+                elif isinstance(attribute, ifcopenshell.entity_instance):
                     if attribute.id():
                         values.append(attribute.id())
+                        if references is not None:
+                            references.add(attribute.id())
                     else:
                         values.append(
                             json.dumps(
-                                {
-                                    "type": attribute.is_a(),
-                                    "value": attribute.wrappedValue,
-                                }
+                                self.serialise_value(element, attribute, references)
                             )
                         )
                 elif (
-                    self.should_expand
+                    should_expand
                     and attribute
                     and isinstance(attribute, tuple)
                     and isinstance(attribute[0], ifcopenshell.entity_instance)
                 ):
                     nested_indices.append(i + 1)
-                    serialized = self.serialise_value(element, attribute)
+                    serialized = self.serialise_value(element, attribute, references)
                     if attribute[0].id():
                         values.append(serialized)
                     else:
                         values.append(json.dumps(serialized))
                 elif isinstance(attribute, tuple):
-                    values.append(json.dumps(self.serialise_value(element, attribute)))
+                    values.append(
+                        json.dumps(self.serialise_value(element, attribute, references))
+                    )
                 else:
                     values.append(attribute)
 
-            if self.should_get_inverses:
-                inverse_ids = [e.id() for e in self.file.get_inverse(element)]
-                values.append(json.dumps(inverse_ids))
+            if references is not None:
+                # Filled from the inverses table once every class is loaded
+                values.append(None)
+                inverse_rows.extend((ref, element.id()) for ref in references)
 
-            if self.should_expand:
+            if should_expand:
                 rows.extend(self.get_permutations(values, nested_indices))
             else:
                 rows.append(values)
 
             id_map_rows.append((element.id(), ifc_class))
 
-            if self.should_get_psets:
-                psets = ifcopenshell.util.element.get_psets(element)
-                for pset_name, pset_data in psets.items():
-                    for prop_name, value in pset_data.items():
-                        if prop_name == "id":
-                            continue
-                        if isinstance(value, list):
-                            value = json.dumps(value)
-                        pset_rows.append((element.id(), pset_name, prop_name, value))
-
-            if self.should_get_geometry and element.id() not in self.shape_rows:
-                if placement := getattr(element, "ObjectPlacement", None):
-                    m = ifcopenshell.util.placement.get_local_placement(placement)
-                    x, y, z = m[:, 3][0:3].tolist()
-                    self.shape_rows[element.id()] = (
-                        element.id(),
-                        x,
-                        y,
-                        z,
-                        m.tobytes(),
-                        None,
+            if rel_edge_attributes is not None:
+                relating, related = rel_edge_attributes
+                related_ids = [
+                    related_id
+                    for i in related
+                    for related_id in self.get_entity_ids(attributes[i])
+                ]
+                rel_edge_rows.extend(
+                    (element.id(), ifc_class, relating_id, related_id, ordinal)
+                    for i in relating
+                    for relating_id in self.get_entity_ids(attributes[i])
+                    for ordinal, related_id in enumerate(related_ids)
+                )
+
+            if self.should_get_geometry and element.id() not in self.shape_ids:
+                if shape_row := self.get_placement_row(element):
+                    shape_rows.append(shape_row)
+
+            if link_count >= LINK_CHUNK_SIZE:
+                yield (
+                    rows,
+                    id_map_rows,
+                    shape_rows,
+                    inverse_rows,
+                    rel_edge_rows,
+                    link_rows,
+                )
+                rows, id_map_rows, shape_rows = [], [], []
+                inverse_rows, rel_edge_rows = [], []
+                link_rows = {table: [] for table in link_rows}
+                link_count = 0
+
+        if rows or id_map_rows or not elements:
+            yield rows, id_map_rows, shape_rows, inverse_rows, rel_edge_rows, link_rows
+
+    def get_reference_rows(
+        self, elements: Iterable[ifcopenshell.entity_instance]
+    ) -> list[tuple[int, int]]:
+        """Inverse rows of entities whose class table is not written."""
+        rows: list[tuple[int, int]] = []
+        for element in elements:
+            references: set[int] = set()
+            self.serialise_value(element, tuple(element), references)
+            rows.extend((ref, element.id()) for ref in references)
+        return rows
+
+    def load_data(
+        self,
+        ifc_class: str,
+        rows: list[Any],
+        id_map_rows: list[Any],
+        shape_rows: list[Any],
+        inverse_rows: list[Any],
+        rel_edge_rows: list[Any],
+        link_rows: dict[str, list[Any]],
+        batch_size: int = 1000,
+    ) -> None:
+        with self.phase("load", ifc_class):
+            # Shapes created by the geometry iterator take precedence
+            for shape_row in shape_rows:
+                self.add_shape_row(shape_row)
+
+            # ---- Insert into database using a single transaction ----
+            if rows or id_map_rows:
+                self.c.execute("BEGIN;")
+                if rows:
+                    self.insert_rows(ifc_class, rows, batch_size)
+                if id_map_rows:
+                    with self.phase("id_map"):
+                        self.insert_rows("id_map", id_map_rows, batch_size)
+                if inverse_rows:
+                    self.insert_rows("inverses", inverse_rows, batch_size)
+                if rel_edge_rows:
+                    self.insert_rows("rel_edges", rel_edge_rows, batch_size)
+                for table_name, table_rows in link_rows.items():
+                    self.insert_rows(table_name, table_rows, batch_size)
+                self.c.execute("COMMIT;")
+
+    def index_rel_edges(self) -> None:
+        """Sort ``rel_edges`` by relating entity and index both directions.
+
+        The sort order gives tight zone maps for relating lookups, the indexes
+        serve point lookups and joins from either end of an edge.
+        """
+        self.c.execute(
+            """
+            CREATE TEMP TABLE rel_edges_sorted AS
+            SELECT * FROM rel_edges ORDER BY relating_id, rel_class, rel_id, ordinal;
+            DELETE FROM rel_edges;
+            INSERT INTO rel_edges SELECT * FROM rel_edges_sorted;
+            DROP TABLE rel_edges_sorted;
+            CREATE INDEX IF NOT EXISTS rel_edges_relating_idx
+                ON rel_edges (relating_id);
+            CREATE INDEX IF NOT EXISTS rel_edges_related_idx
+                ON rel_edges (related_id);
+            """
+        )
+
+    def insert_element_location(self) -> None:
+        """Populate ``element_location`` with the spatial location of every product.
+
+        Containment, aggregation, nesting and the opening relationships are
+        folded into a single parent per entity, so a door is located through
+        the opening it fills and the wall hosting that opening, and a stair
+        flight through its stair. Each parent chain is walked once and shared
+        by every entity on it.
+        """
+        # In order of precedence, an entity keeps the first parent it is given
+        parent_classes = (
+            "IfcRelContainedInSpatialStructure",
+            "IfcRelAggregates",
+            "IfcRelNests",
+            "IfcRelVoidsElement",
+            "IfcRelFillsElement",
+        )
+        parents: dict[int, int] = {}
+        if self.should_get_rel_edges:
+            # The edges are already loaded, reading them back is much cheaper
+            # than walking the relationships again
+            edges = self.c.execute(
+                """
+                SELECT related_id, relating_id FROM rel_edges
+                WHERE list_position(?, rel_class) IS NOT NULL
+                ORDER BY list_position(?, rel_class), rel_id, ordinal;
+                """,
+                [list(parent_classes)] * 2,
+            ).fetchall()
+            for ifc_id, parent_id in edges:
+                parents.setdefault(ifc_id, parent_id)
+        else:
+            for rel_class in parent_classes:
+                rel_edge_attributes = self.get_rel_edge_attributes(rel_class)
+                if rel_edge_attributes is None:
+                    continue
+                relating, related = (indices[0] for indices in rel_edge_attributes)
+                for rel in self.file.by_type(rel_class):
+                    parent = rel[relating]
+                    if parent is None:
+                        continue
+                    for ifc_id in self.get_entity_ids(rel[related]):
+                        parents.setdefault(ifc_id, parent.id())
+
+        # Spatial element id: its column in the (space, storey, building, site) tuple
+        roles: dict[int, int] = {}
+        for role, ifc_class in enumerate(
+            ("IfcSpace", "IfcBuildingStorey", "IfcBuilding", "IfcSite")
+        ):
+            for element in self.file.by_type(ifc_class):
+                roles[element.id()] = role
+        storeys = {
+            storey.id(): (storey.Name, storey.Elevation)
+            for storey in self.file.by_type("IfcBuildingStorey")
+        }
+
+        empty: tuple[Optional[int], ...] = (None,) * 4
+        locations: dict[int, tuple[Optional[int], ...]] = {}
+
+        def locate(ifc_id: int) -> tuple[Optional[int], ...]:
+            # Walk up to the first located ancestor, a dict keeps the chain
+            # ordered and stops on cyclic decompositions
+            chain: dict[int, None] = {}
+            current: Optional[int] = ifc_id
+            while (
+                current is not None
+                and current not in locations
+                and current not in chain
+            ):
+                chain[current] = None
+                current = parents.get(current)
+            location = empty if current is None else locations.get(current, empty)
+            # The innermost spatial element of each kind wins
+            for node in reversed(chain):
+                role = roles.get(node)
+                if role is not None:
+                    location = location[:role] + (node,) + location[role + 1 :]
+                locations[node] = location
+            return location
+
+        product_classes = [
+            d.name()
+            for d in self.schema.declarations()
+            if isinstance(d, ifcopenshell.ifcopenshell_wrapper.entity)
+            and ifcopenshell.util.schema.is_a(d, "IfcProduct")
+        ]
+        products = self.c.execute(
+            """
+            SELECT ifc_id, ifc_class FROM id_map
+            WHERE ifc_class IN (SELECT unnest(?::TEXT[]))
+            ORDER BY ifc_id;
+            """,
+            [product_classes],
+        ).fetchall()
+        rows = []
+        for ifc_id, ifc_class in products:
+            space_id, storey_id, building_id, site_id = locate(ifc_id)
+            storey_name, storey_elevation = storeys.get(storey_id, (None, None))
+            rows.append(
+                (
+                    ifc_id,
+                    ifc_class,
+                    space_id,
+                    storey_id,
+                    storey_name,
+                    storey_elevation,
+                    building_id,
+                    site_id,
+                )
+            )
+        self.insert_rows("element_location", rows)
+
+    def insert_inverses(
+        self, ifc_classes: list[str], ifc_ids: Optional[list[int]] = None
+    ) -> None:
+        """Fill the ``inverses`` list column of class tables from the edge table.
+
+        With ``ifc_ids``, only the lists of those entities are updated.
+        """
+        where = ""
+        if ifc_ids is not None:
+            self.c.execute(
+                """
+                CREATE TEMP TABLE inverse_ids AS
+                SELECT unnest(?::BIGINT[]) AS ifc_id;
+                """,
+                [ifc_ids],
+            )
+            where = "WHERE ifc_id IN (SELECT ifc_id FROM inverse_ids)"
+        populated = {
+            row[0]
+            for row in self.c.execute(
+                f"SELECT DISTINCT ifc_class FROM id_map {where}"
+            ).fetchall()
+        }
+        self.c.execute(
+            f"""
+            CREATE TEMP TABLE inverse_lists AS
+            SELECT ifc_id, list(referencing_id ORDER BY referencing_id) AS ids
+            FROM inverses {where}
+            GROUP BY ifc_id;
+            """
+        )
+        for ifc_class in ifc_classes:
+            if ifc_class not in populated:
+                continue
+            self.c.execute(
+                f"""
+                UPDATE "{ifc_class}" AS t SET inverses = COALESCE(
+                    (SELECT i.ids FROM inverse_lists i WHERE i.ifc_id = t.ifc_id),
+                    []::BIGINT[]
+                ) {where};
+                """
+            )
+        self.c.execute("DROP TABLE inverse_lists; DROP TABLE IF EXISTS inverse_ids;")
+
+    def insert_psets(self, ifc_ids: Optional[set[int]] = None) -> None:
+        """Populate the psets table from the property relationships.
+
+        Each property or quantity set is resolved once, whatever the number of
+        elements it is assigned to. Elements are then joined to the sets they
+        inherit from their type and to their own sets in DuckDB. As in
+        ``ifcopenshell.util.element.get_psets``, occurrence values override type
+        values of the same property. With ``ifc_ids``, only the property sets
+        of those entities are inserted.
+        """
+        definitions: dict[int, list[tuple[Any, ...]]] = {}
+        # (ifc_id, definition id, ordinal), higher ordinals take precedence
+        assignments: list[tuple[int, int, int]] = []
+        # Property class: (index of its Unit attribute, quantity measure type)
+        property_classes: dict[str, tuple[Optional[int], Optional[str]]] = {}
+        unit_symbols: dict[int, Optional[str]] = {}
+        project_units: dict[tuple[str, Optional[str]], Any] = {}
+        projects = self.file.by_type("IfcProject")
+        has_project_units = bool(projects and projects[0].UnitsInContext)
+
+        def describe(prop: Any) -> tuple[Any, Optional[str], Optional[str]]:
+            # Verbose definitions describe properties and quantities as dicts,
+            # predefined property sets still give their raw attribute values
+            if not isinstance(prop, dict) or "class" not in prop:
+                return prop, None, None
+            entity = self.file.by_id(prop["id"])
+            if prop["class"] not in property_classes:
+                declaration = entity.wrapped_data.declaration().as_entity()
+                names = [a.name() for a in declaration.all_attributes()]
+                measure_type = None
+                if entity.is_a("IfcPhysicalSimpleQuantity"):
+                    attribute = declaration.attribute_by_index(3)
+                    measure_type = attribute.type_of_attribute().declared_type().name()
+                property_classes[prop["class"]] = (
+                    names.index("Unit") if "Unit" in names else None,
+                    measure_type,
+                )
+            unit_index, measure_type = property_classes[prop["class"]]
+            value_type = prop.get("value_type", measure_type)
+            # Without an explicit unit, single values and quantities fall back
+            # to the project unit of their measure type. Attributes are read by
+            # index as in the relationship loops below. Properties without a
+            # value have no measure type to look a unit up for.
+            unit = None if unit_index is None else entity[unit_index]
+            if unit is None and has_project_units and prop.get("value") is not None:
+                key = (prop["class"], value_type)
+                if value_type is None or key not in project_units:
+                    project_units[key] = ifcopenshell.util.unit.get_property_unit(
+                        entity, self.file, use_cache=True
                     )
+                unit = project_units[key]
+            if unit is None:
+                return prop.get("value"), value_type, None
+            if unit.id() not in unit_symbols:
+                unit_symbols[unit.id()] = _unit_symbol(unit)
+            return prop.get("value"), value_type, unit_symbols[unit.id()]
 
-        # ---- Insert into database using transaction + batching ----
-        if rows or id_map_rows or pset_rows:
-            self.c.execute("BEGIN;")
-            if rows:
-                batch_insert(self.c, ifc_class, rows, batch_size)
-            if id_map_rows:
-                batch_insert(self.c, "id_map", id_map_rows, batch_size)
-            if pset_rows:
-                batch_insert(self.c, "psets", pset_rows, batch_size)
-            self.c.execute("COMMIT;")
+        def resolve(definition: ifcopenshell.entity_instance) -> int:
+            definition_id = definition.id()
+            if definition_id not in definitions:
+                props = ifcopenshell.util.element.get_property_definition(
+                    definition, verbose=True
+                )
+                rows = []
+                for position, (name, prop) in enumerate(props.items()):
+                    if name == "id":
+                        continue
+                    value, value_type, unit = describe(prop)
+                    rows.append(
+                        (definition_id, definition.Name, name)
+                        + _split_value(value)
+                        + (value_type, unit, position)
+                    )
+                definitions[definition_id] = rows
+            return definition_id
+
+        def assign(ifc_id: int, definition_ids: list[int]) -> None:
+            assignments.extend(
+                (ifc_id, definition_id, ordinal)
+                for ordinal, definition_id in enumerate(definition_ids)
+            )
+
+        def is_wanted(ifc_id: int) -> bool:
+            return ifc_ids is None or ifc_id in ifc_ids
+
+        # Relationships are read by index (4: RelatedObjects, 5: Relating*) as
+        # named attribute access dominates the cost on large models
+        element_types: dict[int, int] = {}
+        for rel in self.file.by_type("IfcRelDefinesByType"):
+            type_id = rel[5].id()
+            for element in rel[4]:
+                element_types.setdefault(element.id(), type_id)
+        # Types whose sets are inherited by a wanted element
+        inherited_types = {
+            element_types[i] for i in ifc_ids or () if i in element_types
+        }
+
+        type_definitions: dict[int, list[int]] = {}
+        for element_type in self.file.by_type("IfcTypeObject"):
+            type_id = element_type.id()
+            type_definitions[type_id] = (
+                [resolve(d) for d in element_type.HasPropertySets or []]
+                if is_wanted(type_id) or type_id in inherited_types
+                else []
+            )
+            if is_wanted(type_id):
+                assign(type_id, type_definitions[type_id])
+
+        element_definitions: dict[int, list[int]] = {}
+        for rel in self.file.by_type("IfcRelDefinesByProperties"):
+            # Types only get their psets through HasPropertySets
+            related = [
+                element.id()
+                for element in rel[4]
+                if element.id() not in type_definitions and is_wanted(element.id())
+            ]
+            if not related:
+                continue
+            relating = rel[5]
+            # IFC4 allows an IfcPropertySetDefinitionSet wrapping several sets
+            relating = relating if relating.id() else relating.wrappedValue
+            relating = relating if isinstance(relating, tuple) else (relating,)
+            definition_ids = [resolve(d) for d in relating]
+            for ifc_id in related:
+                element_definitions.setdefault(ifc_id, []).extend(definition_ids)
+
+        for ifc_id in element_types.keys() | element_definitions.keys():
+            if is_wanted(ifc_id):
+                inherited = type_definitions.get(element_types.get(ifc_id, 0), [])
+                assign(ifc_id, inherited + element_definitions.get(ifc_id, []))
+
+        # Material and profile properties
+        if self.file.schema == "IFC2X3":
+            owned = [
+                (d, d.Material)
+                for d in self.file.by_type("IfcExtendedMaterialProperties")
+            ]
+        else:
+            owned = [
+                (d, d.Material) for d in self.file.by_type("IfcMaterialProperties")
+            ]
+            owned += [
+                (d, d.ProfileDefinition)
+                for d in self.file.by_type("IfcProfileProperties")
+            ]
+        owner_definitions: dict[int, list[int]] = {}
+        for definition, owner in owned:
+            if owner is not None and is_wanted(owner.id()):
+                owner_definitions.setdefault(owner.id(), []).append(resolve(definition))
+        for ifc_id, definition_ids in owner_definitions.items():
+            assign(ifc_id, definition_ids)
+
+        definition_rows = [row for rows in definitions.values() for row in rows]
+        if not definition_rows or not assignments:
+            return
+
+        self.c.execute(
+            """
+            CREATE TEMP TABLE pset_definitions (
+                definition_id BIGINT, pset_name TEXT, name TEXT, value TEXT,
+                value_num DOUBLE, value_bool BOOLEAN, value_text TEXT,
+                value_type TEXT, unit TEXT, position INTEGER
+            );
+            CREATE TEMP TABLE pset_assignments (
+                ifc_id BIGINT, definition_id BIGINT, ordinal INTEGER
+            );
+            """
+        )
+        self.insert_rows("pset_definitions", definition_rows)
+        self.insert_rows("pset_assignments", assignments)
+        self.c.execute(
+            """
+            INSERT INTO psets
+            SELECT ifc_id, pset_name, name, value, value_num, value_bool, value_text,
+                value_type, unit
+            FROM (
+                SELECT a.ifc_id, d.* EXCLUDE (definition_id, position), a.ordinal,
+                    d.position
+                FROM pset_assignments a
+                JOIN pset_definitions d USING (definition_id)
+                QUALIFY row_number() OVER (
+                    PARTITION BY a.ifc_id, d.pset_name, d.name ORDER BY a.ordinal DESC
+                ) = 1
+            )
+            ORDER BY ifc_id, ordinal, position;
+            DROP TABLE pset_definitions;
+            DROP TABLE pset_assignments;
+            """
+        )
+
+    def insert_rows(
+        self, table_name: str, rows: list[Any], batch_size: int = 1000
+    ) -> None:
+        """Load rows into a table.
+
+        By default the rows are transposed into Arrow columns and loaded with a
+        single ``INSERT ... SELECT`` per call. With ``should_load_columnar``
+        disabled (or when pyarrow is not installed) rows are pushed through
+        ``executemany`` in batches of ``batch_size``.
+        """
+        if not rows:
+            return
+        stats = self.phase_stats.get(self.current_phase) if self.current_phase else None
+        if stats is not None:
+            stats["rows"] += len(rows)
+        if self.should_load_columnar:
+            try:
+                import pyarrow as pa
+            except ImportError:
+                self.logger.warning(
+                    "pyarrow is not installed, falling back to executemany inserts"
+                )
+                self.should_load_columnar = False
+            else:
+                columns = [_to_arrow_array(pa, list(c)) for c in zip(*rows)]
+                table = pa.Table.from_arrays(
+                    columns, names=[f"c{i}" for i in range(len(columns))]
+                )
+                if stats is not None:
+                    stats["bytes"] += table.nbytes
+                self.c.register("_ifc2duckdb_rows", table)
+                try:
+                    self.c.execute(
+                        f'INSERT INTO "{table_name}" SELECT * FROM _ifc2duckdb_rows;'
+                    )
+                finally:
+                    self.c.unregister("_ifc2duckdb_rows")
+                return
+
+        if stats is not None:
+            # Text and blobs by length, anything else as an 8 byte scalar
+            stats["bytes"] += sum(
+                len(v) if isinstance(v, (str, bytes)) else 8
+                for row in rows
+                for v in row
+            )
+        placeholders = ",".join(["?"] * len(rows[0]))
+        for i in range(0, len(rows), batch_size):
+            self.c.executemany(
+                f'INSERT INTO "{table_name}" VALUES ({placeholders});',
+                rows[i : i + batch_size],
+            )
 
     # ---- Geometry ----
-    def create_geometry(self) -> None:
+    def create_geometry(self, ifc_ids: Optional[set[int]] = None) -> None:
+        """Tessellate the elements and element types, or those in ``ifc_ids``."""
         self.unit_scale = ifcopenshell.util.unit.calculate_unit_scale(self.file)
-        self.shape_rows = {}
-        self.geometry_rows = {}
+        self.area_scale = ifcopenshell.util.unit.calculate_unit_scale(
+            self.file, "AREAUNIT"
+        )
+        self.volume_scale = ifcopenshell.util.unit.calculate_unit_scale(
+            self.file, "VOLUMEUNIT"
+        )
 
         if self.file.schema in ("IFC2X3", "IFC4"):
             elements = self.file.by_type("IfcElement") + self.file.by_type("IfcProxy")
         else:
             elements = self.file.by_type("IfcElement")
+        element_types = self.file.by_type("IfcElementType")
+        if ifc_ids is not None:
+            elements = [e for e in elements if e.id() in ifc_ids]
+            element_types = [t for t in element_types if t.id() in ifc_ids]
 
         self.settings = ifcopenshell.geom.settings()
-        self.settings.set("apply-default-materials", False)
+        for name, value in GEOMETRY_SETTINGS.items():
+            self.settings.set(name, value)
 
         body_contexts = [
             c.id()
@@ -425,13 +1868,48 @@ class Patcher(ifcpatch.BasePatcher):
         )
         self.settings.set("context-ids", body_contexts)
 
-        products = elements
+        cache = None
+        if self.geometry_cache:
+            cache = GeometryCache(self.geometry_cache, self.geometry_cache_size)
+            with self.phase("geometry_cache"):
+                self.prepare_geometry_cache()
+        try:
+            with self.phase("geometry"):
+                self.create_element_geometry(elements, cache)
+            with self.phase("element_type_geometry"):
+                self.create_element_type_geometry(element_types, body_contexts, cache)
+        finally:
+            if cache is not None:
+                cache.close()
+        if cache is not None:
+            self.logger.info(
+                "Geometry cache: %d hits, %d misses",
+                self.geometry_cache_hits,
+                self.geometry_cache_misses,
+            )
+        if self.geometry_aliases:
+            self.logger.info(
+                "Geometry: %d meshes stored as %d unique (%.1fx deduplication)",
+                len(self.geometry_aliases),
+                len(self.stored_geometry_ids),
+                self.get_geometry_dedup_ratio(),
+            )
+
+    def create_element_geometry(
+        self, products: list[ifcopenshell.entity_instance], cache: Any
+    ) -> None:
+        """Tessellate elements with the geometry iterator, unless cached."""
+        keys: dict[int, str] = {}
+        if cache is not None:
+            with self.phase("geometry_cache"):
+                products, keys = self.load_cached_geometry(products, cache)
+        if not products:
+            return
         iterator = ifcopenshell.geom.iterator(
             self.settings, self.file, os.cpu_count() or 1, include=products
         )
         if not iterator.initialize():
-            if products:
-                print("WARNING. Geometry iterator failed to initialize.")
+            print("WARNING. Geometry iterator failed to initialize.")
             return
         start_time = time.time()
         checkpoint = start_time
@@ -444,7 +1922,11 @@ class Patcher(ifcpatch.BasePatcher):
                 percent_preprocessed = iterator.progress()
                 elapsed_since_checkpoint = time.time() - checkpoint
                 elapsed_total = time.time() - start_time
-                rate = (250 / elapsed_since_checkpoint) if elapsed_since_checkpoint > 0 else 0.0
+                rate = (
+                    (250 / elapsed_since_checkpoint)
+                    if elapsed_since_checkpoint > 0
+                    else 0.0
+                )
                 remaining = total - progress
                 eta_seconds = (remaining / rate) if rate > 0 else 0.0
                 self.logger.info(
@@ -465,26 +1947,34 @@ class Patcher(ifcpatch.BasePatcher):
                 shape_id = shape.id
                 geometry = shape.geometry
                 geometry_id = geometry.id
-                if geometry_id not in self.geometry_rows:
-                    self.add_geometry_row(geometry_id, geometry)
                 m = ifcopenshell.util.shape.get_shape_matrix(shape).copy()
+                if shape_id in keys:
+                    # Cached geometry is shared by id across the elements
+                    geometry_id = keys[shape_id]
+                    placement = self.get_si_placement(self.file.by_id(shape_id))
+                    relative = np.linalg.inv(placement) @ m
+                    self.cache_geometry(cache, geometry_id, geometry, relative)
+                if geometry_id not in self.geometry_ids:
+                    self.add_geometry_row(geometry_id, geometry)
+                verts, faces = geometry.verts_buffer, geometry.faces_buffer
+                self.add_quantities_row(shape_id, geometry_id, m, verts, faces)
                 m[:3, 3] /= self.unit_scale
                 x, y, z = m[:, 3][0:3].tolist()
-                self.shape_rows[shape_id] = (
-                    shape_id,
-                    x,
-                    y,
-                    z,
-                    m.tobytes(),
-                    geometry_id,
-                )
+                self.add_shape_row((shape_id, x, y, z, m.tobytes(), geometry_id))
             if not iterator.next():
                 break
 
-        element_types = self.file.by_type("IfcElementType")
+    def create_element_type_geometry(
+        self,
+        element_types: list[ifcopenshell.entity_instance],
+        body_contexts: list[int],
+        cache: Any,
+    ) -> None:
+        """Tessellate the body representation of element types, unless cached."""
         body_contexts_objs = [self.file.by_id(i) for i in body_contexts]
         m_bytes = np.eye(4, dtype=np.float64).tobytes()
         for element_type in element_types:
+            self.type_shape_ids.add(element_type.id())
             representation = None
             for context in body_contexts_objs:
                 representation = ifcopenshell.util.representation.get_representation(
@@ -495,8 +1985,15 @@ class Patcher(ifcpatch.BasePatcher):
             element_geometry_id: Optional[str] = None
             if representation:
                 geometry_id_ = str(representation.id())
-                if geometry_id_ in self.geometry_rows:
+                entry = None
+                if cache is not None:
+                    geometry_id_ = self.get_representation_key(representation)
+                    entry = self.get_cached_geometry(cache, geometry_id_)
+                if geometry_id_ in self.geometry_ids:
+                    element_geometry_id = geometry_id_
+                elif entry is not None:
                     element_geometry_id = geometry_id_
+                    self.add_geometry_buffers(element_geometry_id, *entry)
                 else:
                     element_geometry: Any = ifcopenshell.geom.create_shape(
                         self.settings, representation
@@ -504,30 +2001,682 @@ class Patcher(ifcpatch.BasePatcher):
                     if element_geometry is not None:
                         element_geometry_id = geometry_id_
                         assert isinstance(element_geometry, W.Triangulation)
+                        if cache is not None:
+                            self.cache_geometry(
+                                cache, geometry_id_, element_geometry, np.eye(4)
+                            )
                         self.add_geometry_row(element_geometry_id, element_geometry)
-            shape_id = element_type.id()
-            self.shape_rows[shape_id] = (
-                shape_id,
-                *(0.0, 0.0, 0.0),
-                m_bytes,
-                element_geometry_id,
+            self.add_shape_row(
+                (element_type.id(), *(0.0, 0.0, 0.0), m_bytes, element_geometry_id)
             )
 
+    def prepare_geometry_cache(self) -> None:
+        """Index what the cache keys of the tessellations are computed from."""
+        self.canonical_hashes = {}
+        self.canonical_ids = {}
+        # Entities referencing what they style, hashed along with it
+        self.canonical_extras: dict[int, list[int]] = {}
+        for styled_item in self.file.by_type("IfcStyledItem"):
+            item = styled_item.wrapped_data.get_argument(0)
+            if item is not None:
+                self.canonical_extras.setdefault(item.id(), []).append(styled_item.id())
+        for representation in self.file.by_type("IfcMaterialDefinitionRepresentation"):
+            material = representation.wrapped_data.get_argument(3)
+            self.canonical_extras.setdefault(material.id(), []).append(
+                representation.id()
+            )
+
+        self.geometry_openings: dict[int, list[ifcopenshell.entity_instance]] = {}
+        for rel in self.file.by_type("IfcRelVoidsElement"):
+            self.geometry_openings.setdefault(rel[4].id(), []).append(rel[5])
+
+        # Materials of the elements, or else of their types
+        self.geometry_materials: dict[int, ifcopenshell.entity_instance] = {}
+        for rel in self.file.by_type("IfcRelAssociatesMaterial"):
+            for related_object in rel[4]:
+                self.geometry_materials.setdefault(related_object.id(), rel[5])
+        for rel in self.file.by_type("IfcRelDefinesByType"):
+            material = self.geometry_materials.get(rel[5].id())
+            if material is not None:
+                for related_object in rel[4]:
+                    self.geometry_materials.setdefault(related_object.id(), material)
+
+        self.geometry_fingerprint = json.dumps(
+            {
+                "ifcopenshell": ifcopenshell.version,
+                "schema": self.file.schema,
+                "unit_scale": self.unit_scale,
+                "settings": GEOMETRY_SETTINGS,
+            },
+            sort_keys=True,
+        ).encode()
+
+    def get_canonical_hash(self, entity: ifcopenshell.entity_instance) -> bytes:
+        """Hash an entity and everything it references, whatever their ids.
+
+        Identical definitions hash the same, within a model or across models.
+        References back to an entity being hashed, through a cycle, are hashed
+        as a placeholder.
+        """
+        hashes = self.canonical_hashes
+        texts: dict[int, list[str]] = {}
+        stack = [entity.id()]
+        while stack:
+            ifc_id = stack[-1]
+            if ifc_id in hashes:
+                stack.pop()
+                continue
+            if ifc_id not in texts:
+                texts[ifc_id] = [
+                    self.get_entity_text(i)
+                    for i in [ifc_id, *self.canonical_extras.get(ifc_id, ())]
+                ]
+                references = {
+                    int(reference)
+                    for text in texts[ifc_id]
+                    for reference in STEP_REFERENCE.findall(text)
+                    if reference
+                }
+                pending = [i for i in references if i not in hashes and i not in texts]
+                if pending:
+                    stack.extend(pending)
+                    continue
+
+            def substitute(match: re.Match[str]) -> str:
+                if match.group(1) is None:
+                    return match.group(0)
+                digest = hashes.get(int(match.group(1)))
+                return "*" if digest is None else digest.hex()
+
+            text = "\n".join(STEP_REFERENCE.sub(substitute, t) for t in texts[ifc_id])
+            digest = hashlib.blake2b(text.encode(), digest_size=16).digest()
+            hashes[ifc_id] = digest
+            self.canonical_ids.setdefault(digest, ifc_id)
+            stack.pop()
+        return hashes[entity.id()]
+
+    def get_entity_text(self, ifc_id: int) -> str:
+        """The STEP text of an entity without its id, e.g. IFCWALL(...)."""
+        text: str = self.file.wrapped_data.by_id(ifc_id).to_string(False)
+        return text[text.index("=") + 1 :]
+
+    def get_geometry_key(self, element: ifcopenshell.entity_instance) -> Optional[str]:
+        """The cache key of the tessellation of an element, if it has a shape.
+
+        Besides the representation, the key covers the openings cut from the
+        element, where they are relative to it, and its material.
+        """
+        if element.Representation is None:
+            return None
+        key = hashlib.blake2b(self.geometry_fingerprint, digest_size=16)
+        key.update(self.get_canonical_hash(element.Representation))
+        inverse_placement = None
+        for opening in self.geometry_openings.get(element.id(), ()):
+            if opening.Representation is None:
+                continue
+            if inverse_placement is None:
+                inverse_placement = np.linalg.inv(self.get_si_placement(element))
+            relative = inverse_placement @ self.get_si_placement(opening)
+            key.update(self.get_canonical_hash(opening.Representation))
+            key.update((np.round(relative, 9) + 0.0).tobytes())
+        material = self.geometry_materials.get(element.id())
+        if material is not None:
+            key.update(self.get_canonical_hash(material))
+        return key.hexdigest()
+
+    def get_representation_key(
+        self, representation: ifcopenshell.entity_instance
+    ) -> str:
+        """The cache key of the tessellation of a type representation."""
+        key = hashlib.blake2b(self.geometry_fingerprint, digest_size=16)
+        key.update(self.get_canonical_hash(representation))
+        return key.hexdigest()
+
+    def get_si_placement(self, element: ifcopenshell.entity_instance) -> Any:
+        """The world matrix of an element placement, in SI units."""
+        if element.ObjectPlacement is None:
+            return np.eye(4)
+        m = self.get_placement_matrix(element.ObjectPlacement).copy()
+        m[:3, 3] *= self.unit_scale
+        return m
+
+    def load_cached_geometry(
+        self, elements: list[ifcopenshell.entity_instance], cache: GeometryCache
+    ) -> tuple[list[ifcopenshell.entity_instance], dict[int, str]]:
+        """Add the shapes of the cached elements.
+
+        Returns the elements left to tessellate and the cache key of every
+        element that has one. Elements without a representation are neither,
+        as the iterator has nothing to tessellate for them.
+        """
+        keys = {}
+        for element in elements:
+            key = self.get_geometry_key(element)
+            if key is not None:
+                keys[element.id()] = key
+        entries = cache.get_many(sorted(set(keys.values())))
+        misses = []
+        for element in elements:
+            key = keys.get(element.id())
+            if key is None:
+                continue
+            buffers = self.get_cached_buffers(entries.get(key))
+            if buffers is None:
+                misses.append(element)
+                continue
+            if key not in self.geometry_ids:
+                self.add_geometry_buffers(key, *buffers)
+            relative = entries[key].matrix
+            if relative == IDENTITY_MATRIX:
+                # As placed by the iterator, without a round trip through SI
+                m = np.eye(4)
+                if element.ObjectPlacement is not None:
+                    m = self.get_placement_matrix(element.ObjectPlacement)
+            else:
+                matrix = np.frombuffer(relative).reshape(4, 4)
+                m = self.get_si_placement(element) @ matrix
+                m[:3, 3] /= self.unit_scale
+            self.add_quantities_row(element.id(), key, m, buffers[0], buffers[2])
+            x, y, z = m[:, 3][0:3].tolist()
+            self.add_shape_row((element.id(), x, y, z, m.tobytes(), key))
+        return misses, keys
+
+    def get_cached_geometry(
+        self, cache: GeometryCache, key: str
+    ) -> Optional[tuple[bytes, bytes, bytes, bytes, str]]:
+        """The geometry buffers cached under ``key``, if any."""
+        return self.get_cached_buffers(cache.get_many([key]).get(key))
+
+    def get_cached_buffers(
+        self, entry: Optional[CachedGeometry]
+    ) -> Optional[tuple[bytes, bytes, bytes, bytes, str]]:
+        """The buffers of a cache entry, with its materials found in this model.
+
+        Counts a hit, or a miss when there is no entry or one of its materials
+        is not in the model.
+        """
+        if entry is None:
+            self.geometry_cache_misses += 1
+            return None
+        ifc_ids = [
+            self.canonical_ids.get(bytes.fromhex(digest))
+            for digest in json.loads(entry.materials)
+        ]
+        if None in ifc_ids:
+            self.geometry_cache_misses += 1
+            return None
+        self.geometry_cache_hits += 1
+        materials = json.dumps(ifc_ids)
+        return entry.verts, entry.edges, entry.faces, entry.material_ids, materials
+
+    def cache_geometry(
+        self,
+        cache: GeometryCache,
+        key: str,
+        geometry: W.Triangulation,
+        relative: Any,
+    ) -> None:
+        """Cache a tessellation, with its shape matrix relative to the placement."""
+        materials = []
+        for material in geometry.materials:
+            try:
+                style = self.file.by_id(material.instance_id())
+            except RuntimeError:
+                return  # A default material, not defined in the model
+            materials.append(self.get_canonical_hash(style).hex())
+        if np.allclose(relative, np.eye(4), rtol=0, atol=1e-9):
+            matrix = IDENTITY_MATRIX
+        else:
+            matrix = np.ascontiguousarray(relative, dtype=np.float64).tobytes()
+        cache.put(
+            key,
+            CachedGeometry(
+                geometry.verts_buffer,
+                geometry.edges_buffer,
+                geometry.faces_buffer,
+                geometry.material_ids_buffer,
+                json.dumps(materials),
+                matrix,
+            ),
+        )
+
+    def resolve_placements(self) -> None:
+        """Resolve the world matrix of every IfcLocalPlacement in one pass.
+
+        Relative placements are parsed into a stack of matrices, then composed
+        level by level from the root placements down. Shared parents such as
+        storey placements are computed once, instead of once per element as
+        with ``get_local_placement``.
+        """
+        placements = self.file.by_type("IfcLocalPlacement")
+        count = len(placements)
+        self.placement_index = {p.id(): i for i, p in enumerate(placements)}
+        parents = np.full(count, -1, dtype=np.int64)
+        local = np.empty((count, 4, 4))
+        world = np.empty((count, 4, 4))
+        # IfcAxis2Placement3D at a cartesian point, parsed together below
+        axis_placements: list[int] = []
+        origins: list[Any] = []
+        axes: list[Any] = []
+        ref_directions: list[Any] = []
+
+        # Attributes are read by index (PlacementRelTo, RelativePlacement;
+        # Location, Axis, RefDirection) from the unwrapped instances, which
+        # skips building Python entity_instance objects for every reference
+        for i, placement in enumerate(placements):
+            relative = placement.wrapped_data.get_argument(1)
+            location = relative.get_argument(0)
+            if (
+                relative.is_a() == "IfcAxis2Placement3D"
+                and location.is_a() == "IfcCartesianPoint"
+            ):
+                axis = relative.get_argument(1)
+                ref_direction = relative.get_argument(2)
+                axis_placements.append(i)
+                origins.append(location.get_argument(0))
+                axes.append((0.0, 0.0, 1.0) if axis is None else axis.get_argument(0))
+                ref_directions.append(
+                    (1.0, 0.0, 0.0)
+                    if ref_direction is None
+                    else ref_direction.get_argument(0)
+                )
+            else:
+                local[i] = ifcopenshell.util.placement.get_axis2placement(
+                    placement.RelativePlacement
+                )
+            parent = placement.wrapped_data.get_argument(0)
+            if parent is None:
+                continue
+            if (j := self.placement_index.get(parent.id())) is not None:
+                parents[i] = j
+            else:
+                # Grid or linear placements are left to ifcopenshell
+                world[i] = ifcopenshell.util.placement.get_local_placement(
+                    placement.PlacementRelTo
+                )
+                parents[i] = -2
+
+        if axis_placements:
+            # Same construction as ifcopenshell.util.placement.a2p
+            with np.errstate(invalid="ignore", divide="ignore"):
+                x = np.array(ref_directions, dtype=np.float64)
+                z = np.array(axes, dtype=np.float64)
+                x /= np.linalg.norm(x, axis=1)[:, None]
+                z /= np.linalg.norm(z, axis=1)[:, None]
+                y = np.cross(z, x)
+                y /= np.linalg.norm(y, axis=1)[:, None]
+            matrices = np.zeros((len(axis_placements), 4, 4))
+            matrices[:, :3, 0] = x
+            matrices[:, :3, 1] = y
+            matrices[:, :3, 2] = z
+            matrices[:, :3, 3] = origins
+            matrices[:, 3, 3] = 1.0
+            local[axis_placements] = matrices
+
+        resolved = parents < 0
+        roots = parents == -1
+        world[roots] = local[roots]
+        external = parents == -2
+        world[external] = np.matmul(world[external], local[external])
+
+        # Each level only needs its parents, which the previous level resolved
+        while not resolved.all():
+            pending = np.flatnonzero(~resolved)
+            ready = pending[resolved[parents[pending]]]
+            if not len(ready):
+                break  # Cyclic placements, left to ifcopenshell
+            world[ready] = np.matmul(world[parents[ready]], local[ready])
+            resolved[ready] = True
+
+        for i in np.flatnonzero(~resolved).tolist():
+            del self.placement_index[placements[i].id()]
+        self.placement_matrices = world
+
+    def get_placement_matrix(self, placement: ifcopenshell.entity_instance) -> Any:
+        """The world matrix of an object placement, resolved up front if possible."""
+        i = self.placement_index.get(placement.id())
+        if i is None:
+            return ifcopenshell.util.placement.get_local_placement(placement)
+        return self.placement_matrices[i]
+
+    def get_placement_row(
+        self, element: ifcopenshell.entity_instance
+    ) -> Optional[tuple[int, float, float, float, bytes, None]]:
+        """The shape row of an element located by its placement alone."""
+        placement = getattr(element, "ObjectPlacement", None)
+        if not placement:
+            return None
+        m = self.get_placement_matrix(placement)
+        x, y, z = m[:, 3][0:3].tolist()
+        return (element.id(), x, y, z, m.tobytes(), None)
+
+    def add_shape_row(
+        self, row: tuple[int, float, float, float, bytes, Union[str, None]]
+    ) -> None:
+        """Buffer a shape row unless one was already added for the element."""
+        if row[0] in self.shape_ids:
+            return
+        self.shape_ids.add(row[0])
+        if row[5] is not None:
+            row = (*row[:5], self.geometry_aliases[row[5]])
+        self.shape_rows.append(row)
+        # Three doubles and the ids alongside the matrix
+        self.pending_geometry_size += len(row[4]) + 64
+        if self.pending_geometry_size >= self.geometry_memory_limit:
+            self.flush_geometry()
+
     def add_geometry_row(self, geometry_id: str, geometry: W.Triangulation) -> None:
-        v = geometry.verts_buffer
-        e = geometry.edges_buffer
-        f = geometry.faces_buffer
-        mids = geometry.material_ids_buffer
-        m = json.dumps([m.instance_id() for m in geometry.materials])
-        self.geometry_rows[geometry_id] = (geometry_id, v, e, f, mids, m)
+        self.add_geometry_buffers(
+            geometry_id,
+            geometry.verts_buffer,
+            geometry.edges_buffer,
+            geometry.faces_buffer,
+            geometry.material_ids_buffer,
+            json.dumps([m.instance_id() for m in geometry.materials]),
+        )
 
-    # ---- Utilities ----
-    def serialise_value(self, element: ifcopenshell.entity_instance, value: Any) -> Any:
-        return element.walk(
-            lambda v: isinstance(v, ifcopenshell.entity_instance),
-            lambda v: v.id() if v.id() else {"type": v.is_a(), "value": v.wrappedValue},
-            value,
+    def add_geometry_buffers(
+        self, geometry_id: str, v: bytes, e: bytes, f: bytes, mids: bytes, m: str
+    ) -> None:
+        """Buffer a geometry row, unless the same mesh was already added.
+
+        Rows are stored under a hash of their content, which the shape rows
+        referencing ``geometry_id`` point at instead, and encoded as
+        ``geometry_encoding`` tells.
+        """
+        self.geometry_ids.add(geometry_id)
+        content = hashlib.blake2b(digest_size=16)
+        for buffer in (v, e, f, mids, m.encode()):
+            content.update(len(buffer).to_bytes(8, "little"))
+            content.update(buffer)
+        stored_id = content.hexdigest()
+        self.geometry_aliases[geometry_id] = stored_id
+        if stored_id in self.stored_geometry_ids:
+            return
+        self.stored_geometry_ids.add(stored_id)
+        if v:
+            vertices = np.frombuffer(v, dtype=np.float64).reshape(-1, 3)
+            self.geometry_bounds[stored_id] = (
+                *vertices.min(axis=0).tolist(),
+                *vertices.max(axis=0).tolist(),
+            )
+        v, e, f, mids, encoding = encode_geometry(
+            v, e, f, mids, self.geometry_encoding, self.geometry_compression
+        )
+        self.geometry_rows.append((stored_id, v, e, f, mids, m, encoding))
+        self.pending_geometry_size += len(v) + len(e) + len(f) + len(mids) + len(m)
+        if self.pending_geometry_size >= self.geometry_memory_limit:
+            self.flush_geometry()
+
+    def add_quantities_row(
+        self, ifc_id: int, geometry_id: str, m: Any, verts: bytes, faces: bytes
+    ) -> None:
+        """Buffer the quantities of an element from its placed mesh.
+
+        They are computed once per mesh and orientation, in SI units, and
+        stored in the area, volume and length units of the project.
+        """
+        if not faces:
+            return
+        key = (self.geometry_aliases[geometry_id], m[:3, :3].tobytes())
+        quantities = self.mesh_quantities.get(key)
+        if quantities is None:
+            quantities = _mesh_quantities(verts, faces, m[:3, :3])
+            self.mesh_quantities[key] = quantities
+        volume, surface_area, footprint_area, height = quantities
+        self.quantity_rows.append(
+            (
+                ifc_id,
+                volume / self.volume_scale,
+                surface_area / self.area_scale,
+                footprint_area / self.area_scale,
+                height / self.unit_scale,
+            )
         )
+        self.pending_geometry_size += 40
+
+    def insert_shape_bounds(
+        self, rows: list[tuple[int, float, float, float, bytes, Union[str, None]]]
+    ) -> None:
+        """Load the world bounding box and grid cells of shapes with a mesh.
+
+        Boxes are in project units, like the shape matrices, and cover the
+        local box of the mesh once placed. ``shape_cells`` has a row for
+        every ``spatial_cell_size`` square along x and y the box overlaps.
+        """
+        bounds = []
+        placed = []
+        for row in rows:
+            key = row[5]
+            if key in self.geometry_bounds and row[0] not in self.type_shape_ids:
+                bounds.append(self.geometry_bounds[key])
+                placed.append(row)
+        if not placed:
+            return
+        rows = placed
+        ifc_ids = np.array([row[0] for row in rows], dtype=np.int64)
+        boxes = np.array(bounds)
+        matrices = np.frombuffer(b"".join(row[4] for row in rows)).reshape(-1, 4, 4)
+        corners = boxes.reshape(-1, 2, 3)[:, BOX_CORNERS, np.arange(3)]
+        # Meshes are in metres, matrix translations in project units
+        world = np.matmul(corners, matrices[:, :3, :3].transpose(0, 2, 1))
+        world = world / self.unit_scale + matrices[:, None, :3, 3]
+        lower, upper = world.min(axis=1), world.max(axis=1)
+        self.insert_rows(
+            "shape_bounds",
+            list(zip(ifc_ids.tolist(), *lower.T.tolist(), *upper.T.tolist())),
+        )
+
+        size = self.spatial_cell_size / self.unit_scale
+        first = np.floor(lower[:, :2] / size).astype(np.int64)
+        counts = np.floor(upper[:, :2] / size).astype(np.int64) - first + 1
+        cells = counts[:, 0] * counts[:, 1]
+        shape = np.repeat(np.arange(len(rows)), cells)
+        offsets = np.arange(cells.sum()) - np.repeat(np.cumsum(cells) - cells, cells)
+        cell_x = first[shape, 0] + offsets % counts[shape, 0]
+        cell_y = first[shape, 1] + offsets // counts[shape, 0]
+        self.insert_rows(
+            "shape_cells",
+            list(zip(cell_x.tolist(), cell_y.tolist(), ifc_ids[shape].tolist())),
+        )
+
+    def get_geometry_dedup_ratio(self) -> float:
+        """How many meshes were added per geometry row stored."""
+        if not self.stored_geometry_ids:
+            return 1.0
+        return len(self.geometry_aliases) / len(self.stored_geometry_ids)
+
+    def flush_geometry(self) -> None:
+        """Write the buffered shape and geometry rows and release them.
+
+        Rows are flushed whenever they exceed ``geometry_memory_limit`` bytes,
+        so memory use stays bounded however large the model is.
+        """
+        if self.shape_rows or self.geometry_rows:
+            self.c.execute("BEGIN;")
+            if self.is_updating and self.geometry_rows:
+                # Meshes stored again replace their previous rows
+                self.c.execute(
+                    "DELETE FROM geometry WHERE id IN (SELECT unnest(?::TEXT[]));",
+                    [[row[0] for row in self.geometry_rows]],
+                )
+            self.insert_rows("shape", self.shape_rows)
+            self.insert_shape_bounds(self.shape_rows)
+            self.insert_rows("geometry", self.geometry_rows)
+            self.insert_rows("element_quantities", self.quantity_rows)
+            self.c.execute("COMMIT;")
+        self.shape_rows = []
+        self.geometry_rows = []
+        self.quantity_rows = []
+        self.pending_geometry_size = 0
+
+    # ---- Utilities ----
+    def serialise_value(
+        self,
+        element: ifcopenshell.entity_instance,
+        value: Any,
+        references: Optional[set[int]] = None,
+    ) -> Any:
+        def is_instance(v: Any) -> bool:
+            return isinstance(v, ifcopenshell.entity_instance)
+
+        def serialise(v: ifcopenshell.entity_instance) -> Any:
+            if v.id():
+                if references is not None:
+                    references.add(v.id())
+                return v.id()
+            # Defined types may wrap entities, e.g. IfcPropertySetDefinitionSet
+            return {
+                "type": v.is_a(),
+                "value": element.walk(is_instance, serialise, v.wrappedValue),
+            }
+
+        return element.walk(is_instance, serialise, value)
+
+    def get_native_type(self, primitive: Any) -> str:
+        """Map an aggregate or select primitive type to a native DuckDB type."""
+        if primitive in ("string", "enum", "binary"):
+            return "TEXT"
+        if primitive in ("entity", "integer", "boolean"):
+            return "BIGINT"
+        if primitive == "float":
+            return "DOUBLE"
+        if isinstance(primitive, tuple) and primitive[0] == "select":
+            return "BIGINT" if self.is_entity_select(primitive) else NATIVE_SELECT_TYPE
+        if isinstance(primitive, tuple):
+            return f"{self.get_native_type(primitive[1])}[]"
+        return "TEXT"
+
+    def get_native_columns(self, ifc_class: str) -> list[Optional[bool]]:
+        """Describe which attributes of a class are stored as native values.
+
+        Each attribute maps to None when it is stored as before (scalars, JSON
+        or expanded entity lists), otherwise to whether the innermost values
+        of its native column are STRUCTs.
+        """
+        if ifc_class not in self.native_columns:
+            declaration = self.schema.declaration_by_name(ifc_class)
+            assert isinstance(declaration, W.entity)
+            columns: list[Optional[bool]] = []
+            for i in range(declaration.attribute_count()):
+                attribute = declaration.attribute_by_index(i)
+                primitive = ifcopenshell.util.attribute.get_primitive_type(attribute)
+                if (
+                    not self.should_use_native_types
+                    or not isinstance(primitive, tuple)
+                    or (self.should_expand and self.is_entity_list(attribute))
+                    or i in self.get_link_attributes(ifc_class)
+                ):
+                    columns.append(None)
+                else:
+                    columns.append(self.get_native_type(primitive).startswith("STRUCT"))
+            self.native_columns[ifc_class] = columns
+        return self.native_columns[ifc_class]
+
+    def get_native_value(
+        self, value: Any, is_struct: bool, references: Optional[set[int]] = None
+    ) -> Any:
+        """Convert an attribute value for a column typed by get_native_type."""
+        if isinstance(value, tuple):
+            return [self.get_native_value(v, is_struct, references) for v in value]
+        if not isinstance(value, ifcopenshell.entity_instance):
+            return value
+        if value.id() and references is not None:
+            references.add(value.id())
+        if not is_struct:
+            return value.id()
+        if value.id():
+            return {
+                "type": value.is_a(),
+                "ifc_id": value.id(),
+                "value_num": None,
+                "value_bool": None,
+                "value_text": None,
+            }
+        # Wrapped values of a defined type, e.g. IfcLabel or IfcLengthMeasure
+        wrapped = self.serialise_value(value, value.wrappedValue, references)
+        _, value_num, value_bool, value_text = _split_value(wrapped)
+        return {
+            "type": value.is_a(),
+            "ifc_id": None,
+            "value_num": value_num,
+            "value_bool": value_bool,
+            "value_text": value_text,
+        }
+
+    def get_rel_edge_attributes(
+        self, ifc_class: str
+    ) -> Optional[tuple[list[int], list[int]]]:
+        """Indices of the relating and related attributes of a relationship.
+
+        Returns None for classes which are not relationships or have no
+        relating side, e.g. the IFC2X3 IfcRelAssociates.
+        """
+        if ifc_class not in self.rel_edge_attributes:
+            declaration = self.schema.declaration_by_name(ifc_class)
+            assert isinstance(declaration, W.entity)
+            relating: list[int] = []
+            related: list[int] = []
+            if ifcopenshell.util.schema.is_a(declaration, "IfcRelationship"):
+                for i, attribute in enumerate(declaration.all_attributes()):
+                    primitive = ifcopenshell.util.attribute.get_primitive_type(
+                        attribute
+                    )
+                    if not self.is_entity_reference(primitive):
+                        continue
+                    if attribute.name().startswith("Relating"):
+                        relating.append(i)
+                    elif attribute.name().startswith("Related"):
+                        related.append(i)
+                # IFC2X3 IfcRelCoversSpaces names its relating space RelatedSpace
+                if not relating and len(related) > 1:
+                    relating.append(related.pop(0))
+            self.rel_edge_attributes[ifc_class] = (
+                (relating, related) if relating and related else None
+            )
+        return self.rel_edge_attributes[ifc_class]
+
+    def get_link_attributes(self, ifc_class: str) -> dict[int, str]:
+        """Index and name of the attributes stored in link tables.
+
+        With ``should_expand_links`` these are the entity list attributes of
+        the class, empty otherwise.
+        """
+        if ifc_class not in self.link_attributes:
+            declaration = self.schema.declaration_by_name(ifc_class)
+            assert isinstance(declaration, W.entity)
+            self.link_attributes[ifc_class] = {
+                i: attribute.name()
+                for i, attribute in enumerate(declaration.all_attributes())
+                if self.should_expand_links and self.is_entity_list(attribute)
+            }
+        return self.link_attributes[ifc_class]
+
+    def get_link_rows(
+        self, ifc_id: int, attribute: str, value: Any
+    ) -> Iterator[tuple[int, str, int, int]]:
+        """Yield the link table rows of an entity list, nested lists flattened."""
+        for ordinal, child_id in enumerate(self.get_entity_ids(value)):
+            yield ifc_id, attribute, ordinal, child_id
+
+    def get_entity_ids(self, value: Any) -> list[int]:
+        """Ids of the entities in an attribute value, in order.
+
+        Aggregates and defined types wrapping entities, such as the IFC4
+        IfcPropertySetDefinitionSet, are flattened.
+        """
+        if isinstance(value, tuple):
+            # Plain entity lists, by far the most common case
+            if all(isinstance(v, ifcopenshell.entity_instance) for v in value):
+                ids = [v.id() for v in value]
+                if all(ids):
+                    return ids
+            return [i for v in value for i in self.get_entity_ids(v)]
+        if not isinstance(value, ifcopenshell.entity_instance):
+            return []
+        if value.id():
+            return [value.id()]
+        return self.get_entity_ids(value.wrappedValue)
 
     def get_permutations(self, lst: list[Any], indexes: list[int]) -> list[Any]:
         nested_lists = [lst[i] for i in indexes]
@@ -540,6 +2689,31 @@ class Patcher(ifcpatch.BasePatcher):
             final_lists.append(temp_list)
         return final_lists
 
+    def is_geometry_data(self, ifc_class: str) -> bool:
+        declaration = self.schema.declaration_by_name(ifc_class)
+        return ifcopenshell.util.schema.is_a(
+            declaration, "IfcRepresentation"
+        ) or ifcopenshell.util.schema.is_a(declaration, "IfcRepresentationItem")
+
+    def is_entity_select(self, primitive: Any) -> bool:
+        if primitive == "entity":
+            return True
+        return (
+            isinstance(primitive, tuple)
+            and primitive[0] == "select"
+            and all(self.is_entity_select(p) for p in primitive[1])
+        )
+
+    def is_entity_reference(self, primitive: Any) -> bool:
+        """Whether values of a primitive type only ever reference entities."""
+        if primitive == "entity":
+            return True
+        if isinstance(primitive, tuple) and primitive[0] == "select":
+            return all(self.is_entity_reference(p) for p in primitive[1])
+        if isinstance(primitive, tuple):
+            return self.is_entity_reference(primitive[1])
+        return False
+
     def is_entity_list(
         self, attribute: ifcopenshell.ifcopenshell_wrapper.attribute
     ) -> bool:
@@ -550,3 +2724,123 @@ class Patcher(ifcpatch.BasePatcher):
                     return False
             return True
         return False
+
+
+# Worker process state, inherited from the parent when the pool is forked
+_worker_patcher: Optional[Patcher] = None
+_worker_elements: tuple[str, list[ifcopenshell.entity_instance]] = ("", [])
+
+
+def _extract_chunk(task: tuple[str, int, int]) -> list[tuple[Any, ...]]:
+    global _worker_elements
+    ifc_class, start, stop = task
+    assert _worker_patcher is not None
+    if _worker_elements[0] != ifc_class:
+        elements = _worker_patcher.file.by_type(ifc_class, include_subtypes=False)
+        _worker_elements = (ifc_class, elements)
+    elements = _worker_elements[1][start:stop]
+    return list(_worker_patcher.extract_chunks(ifc_class, elements))
+
+
+def _peak_rss() -> Optional[int]:
+    """Peak resident set size of this process in bytes, None if unavailable."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Reported in bytes on macOS and in kilobytes elsewhere
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _mesh_quantities(
+    verts: bytes, faces: bytes, rotation: Any
+) -> tuple[float, float, float, float]:
+    """Volume, surface area, footprint area and height of a mesh, in SI units.
+
+    The mesh is first transformed by the rotation part of its shape matrix,
+    scale included. The volume sums the signed tetrahedra from the origin to
+    every triangle, so it is only meaningful for closed meshes. The footprint
+    is the area of the faces facing up projected on the xy plane, which is
+    the area covered unless parts of the mesh overhang others.
+    """
+    vertices = np.frombuffer(verts, dtype=np.float64).reshape(-1, 3) @ rotation.T
+    triangles = vertices[np.frombuffer(faces, dtype=np.int32).reshape(-1, 3)]
+    normals = np.cross(
+        triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0]
+    )
+    volume = np.einsum("ij,ij->", triangles[:, 0], normals) / 6
+    # Faces facing down instead when the mesh is inside out, or open
+    footprint = max(normals[:, 2].clip(0).sum(), -normals[:, 2].clip(None, 0).sum())
+    return (
+        abs(float(volume)),
+        float(np.linalg.norm(normals, axis=1).sum() / 2),
+        float(footprint / 2),
+        float(np.ptp(vertices[:, 2])),
+    )
+
+
+def _to_arrow_array(pa: Any, values: list[Any]) -> Any:
+    """Build an Arrow array from a column of Python values.
+
+    Homogeneous columns keep their natural Arrow type and are cast by DuckDB on
+    insert. Mixed columns (typically ``psets.value``) are normalised the same
+    way DuckDB casts bound ``executemany`` parameters, so both load paths
+    produce identical tables.
+    """
+    try:
+        return pa.array(values)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        pass
+    if all(v is None or isinstance(v, (bool, int, float)) for v in values):
+        try:
+            return pa.array([int(v) if isinstance(v, bool) else v for v in values])
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            pass
+    return pa.array(
+        [
+            (
+                None
+                if v is None
+                else ("true" if v else "false") if isinstance(v, bool) else str(v)
+            )
+            for v in values
+        ],
+        type=pa.string(),
+    )
+
+
+def _split_value(value: Any) -> tuple[Any, Any, Any, Any]:
+    """Split a property value into ``(value, value_num, value_bool, value_text)``.
+
+    ``value`` keeps the textual form the psets table has always exposed, the
+    typed columns hold the same value natively so that numeric filters and
+    aggregates do not have to cast.
+    """
+    if isinstance(value, bool):
+        return value, None, value, None
+    if isinstance(value, (int, float)):
+        return value, float(value), None, None
+    if isinstance(value, (list, tuple)):
+        text = json.dumps(list(value))
+        return text, None, None, text
+    if value is None:
+        return None, None, None, None
+    return value, None, None, str(value)
+
+
+def _unit_symbol(unit: ifcopenshell.entity_instance) -> Optional[str]:
+    if unit.is_a("IfcNamedUnit"):
+        return ifcopenshell.util.unit.get_unit_symbol(unit)
+    if unit.is_a("IfcMonetaryUnit"):
+        return str(unit.Currency)
+    if unit.is_a("IfcDerivedUnit"):
+        symbols = []
+        for element in unit.Elements:
+            symbol = _unit_symbol(element.Unit)
+            if symbol is None:
+                return None
+            exponent = element.Exponent
+            symbols.append(symbol + ("" if exponent == 1 else str(exponent)))
+        return " ".join(symbols)
+    return None
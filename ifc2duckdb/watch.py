@@ -0,0 +1,368 @@
+# IfcPatch - IFC to DuckDB conversion utility
+# Copyright chuongmep (C) 2025
+#
+# SPDX-License-Identifier: LGPL-3.0-or-later
+"""Convert the IFC files dropped into a directory as they land.
+
+The directory is watched through ``watchdog`` (inotify on Linux) when it is
+installed, and otherwise polled. A new or changed file is converted once
+complete: its size and modification time have not changed for ``debounce``
+seconds, and it ends with the ``END-ISO-10303-21;`` trailer of IFC-SPF.
+Each file is converted into its own database, like ``ifc2duckdb batch``,
+or every file into the same ``database``, the most recent winning.
+
+The conversion runs in a process of its own, into a partial database next
+to the target, which then replaces the target with ``os.replace``. Readers
+opening the database get one version or the other whole, and connections
+already open keep reading the previous one.
+
+After each swap, ``<database>.version`` is rewritten with the version
+number, source file and hash, and ``on_update`` called, so that a query
+layer can drop its caches when :func:`read_database_version` changes.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import queue
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, NamedTuple, Optional, Union
+
+from .batch import HASH_CHUNK_SIZE, convert_file, remove_database
+
+# Last bytes of a complete IFC-SPF file
+SPF_TRAILER = b"END-ISO-10303-21;"
+
+# Bytes at the end of a file searched for the trailer, which may be followed
+# by whitespace or comments
+TRAILER_SEARCH_SIZE = 4096
+
+# Events of watchdog for files written, moved or deleted
+WRITE_EVENTS = ("created", "modified", "moved", "deleted", "closed")
+
+# A database open in another process cannot be replaced on Windows, until
+# it is closed
+SWAP_ATTEMPTS = 20
+SWAP_RETRY_INTERVAL = 0.5
+
+
+class DatabaseUpdate(NamedTuple):
+    database: str
+    source: str
+    version: int
+    sha256: str
+    # Time the conversion took
+    seconds: float
+
+
+class Watcher:
+    """Convert the IFC files of ``directory`` as they are added or changed.
+
+    Databases are written to ``output`` (default: ``directory``), keeping
+    the path of their file relative to ``directory``, or all to
+    ``database``. ``options`` are keyword arguments of :class:`Patcher`.
+    """
+
+    def __init__(
+        self,
+        directory: Union[str, Path],
+        output: Union[str, Path, None] = None,
+        database: Union[str, Path, None] = None,
+        debounce: float = 2.0,
+        poll_interval: float = 1.0,
+        should_poll: bool = False,
+        options: Optional[dict[str, Any]] = None,
+        on_update: Optional[Callable[[DatabaseUpdate], None]] = None,
+        logger: Union[logging.Logger, None] = None,
+    ) -> None:
+        self.directory = Path(directory)
+        self.output = Path(output) if output else self.directory
+        self.database = Path(database) if database else None
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.should_poll = should_poll
+        self.options = options or {}
+        self.on_update = on_update
+        self.logger = logger or logging.getLogger("ifc2duckdb")
+        # Size and modification time of each file when last converted, or
+        # found up to date
+        self.handled: dict[Path, tuple[int, int]] = {}
+        # Files waiting to be complete, with their size and modification
+        # time and since when they have not changed
+        self.pending: dict[Path, tuple[tuple[int, int], float]] = {}
+        # Files reported as changed by watchdog
+        self.events: queue.Queue[Path] = queue.Queue()
+        # Hash of the file each database was last converted from
+        self.hashes: dict[Path, str] = {}
+        self.incomplete: set[Path] = set()
+
+    def run(self, stop: Optional[threading.Event] = None) -> None:
+        """Watch the directory until ``stop`` is set."""
+        stop = stop or threading.Event()
+        self.start()
+        observer = None if self.should_poll else self.start_observer()
+        if observer is None:
+            self.logger.info("Polling %s every %gs", self.directory, self.poll_interval)
+        try:
+            while not stop.is_set():
+                self.check(scan=observer is None)
+                if observer is None:
+                    stop.wait(self.poll_interval)
+                else:
+                    self.wait()
+        finally:
+            if observer is not None:
+                observer.stop()
+                observer.join()
+
+    def start(self) -> None:
+        """Queue the files whose database is missing or older than them."""
+        files = self.find_files()
+        newest = max(files, key=lambda path: path.stat().st_mtime_ns, default=None)
+        for path in files:
+            database = self.get_database(path)
+            stat = path.stat()
+            # Only the most recent file matters for a shared database
+            if (self.database and path != newest) or (
+                database.exists() and database.stat().st_mtime_ns >= stat.st_mtime_ns
+            ):
+                self.handled[path] = (stat.st_size, stat.st_mtime_ns)
+        self.scan()
+
+    def start_observer(self) -> Any:
+        """Start watchdog, or return None if it is not installed."""
+        try:
+            from watchdog.events import FileSystemEventHandler
+            from watchdog.observers import Observer
+        except ImportError:
+            self.logger.info("watchdog is not installed, polling for changes")
+            return None
+
+        events = self.events
+
+        class Handler(FileSystemEventHandler):
+            def on_any_event(self, event: Any) -> None:
+                # Not the opened and closed_no_write events of reading files
+                if event.event_type not in WRITE_EVENTS:
+                    return
+                for path in (event.src_path, getattr(event, "dest_path", "")):
+                    if str(path).lower().endswith(".ifc"):
+                        events.put(Path(os.fsdecode(path)))
+
+        observer = Observer()
+        observer.schedule(Handler(), str(self.directory), recursive=True)
+        observer.start()
+        self.logger.info("Watching %s for IFC files", self.directory)
+        return observer
+
+    def wait(self) -> None:
+        """Wait for an event, or for a pending file to reach the debounce."""
+        now = time.monotonic()
+        # Incomplete files past their debounce are checked every poll_interval
+        deadlines = [
+            since + self.debounce - now
+            for _, since in self.pending.values()
+            if since + self.debounce > now
+        ]
+        timeout = min([self.poll_interval, *deadlines])
+        try:
+            # Left for check() to handle
+            self.events.put(self.events.get(timeout=timeout))
+        except queue.Empty:
+            pass
+
+    def find_files(self) -> list[Path]:
+        return sorted(
+            path
+            for path in self.directory.rglob("*")
+            if path.suffix.lower() == ".ifc" and path.is_file()
+        )
+
+    def get_database(self, path: Path) -> Path:
+        if self.database:
+            return self.database
+        return (self.output / path.relative_to(self.directory)).with_suffix(".duckdb")
+
+    def scan(self) -> None:
+        """Queue every file changed since it was last handled."""
+        for path in self.find_files():
+            self.events.put(path)
+
+    def check(self, scan: bool = True) -> list[DatabaseUpdate]:
+        """Queue the files changed, and convert those now complete."""
+        if scan:
+            self.scan()
+        now = time.monotonic()
+        while not self.events.empty():
+            path = self.events.get()
+            try:
+                stat = path.stat()
+            except OSError:  # Deleted, or moved away
+                self.pending.pop(path, None)
+                continue
+            signature = (stat.st_size, stat.st_mtime_ns)
+            if self.handled.get(path) == signature:
+                continue
+            if self.pending.get(path, (None, 0.0))[0] != signature:
+                self.pending[path] = (signature, now)
+
+        ready = []
+        for path, (signature, since) in list(self.pending.items()):
+            if now - since < self.debounce:
+                continue
+            if not is_complete(path):
+                if path not in self.incomplete:
+                    self.logger.info("Waiting for %s to be complete", path)
+                    self.incomplete.add(path)
+                continue
+            ready.append(path)
+        if self.database and ready:
+            # Older files would be replaced by the newest right away
+            ready.sort(key=lambda path: self.pending[path][0][1])
+            for path in ready[:-1]:
+                self.handled[path] = self.pending.pop(path)[0]
+            ready = ready[-1:]
+
+        updates = []
+        for path in ready:
+            signature = self.pending.pop(path)[0]
+            self.incomplete.discard(path)
+            self.handled[path] = signature
+            update = self.convert(path)
+            if update is not None:
+                updates.append(update)
+        return updates
+
+    def convert(self, path: Path) -> Optional[DatabaseUpdate]:
+        """Convert a file and swap its database in place."""
+        import multiprocessing
+
+        database = self.get_database(path)
+        sha256 = hash_file(path)
+        if database.exists() and database not in self.hashes:
+            self.hashes[database] = (read_database_version(database) or {}).get(
+                "sha256", ""
+            )
+        if self.hashes.get(database) == sha256:
+            self.logger.debug("%s is unchanged", path)
+            return None
+        partial = database.with_name(database.stem + ".partial.duckdb")
+        partial.parent.mkdir(parents=True, exist_ok=True)
+        remove_database(partial)
+        if self.options.get("should_update_incrementally") and database.exists():
+            shutil.copy(database, partial)
+
+        self.logger.info("Converting %s", path)
+        start = time.perf_counter()
+        # Forked from a server started without the threads of watchdog, which
+        # imports IfcOpenShell and DuckDB once
+        context: Union[
+            multiprocessing.context.ForkServerContext,
+            multiprocessing.context.SpawnContext,
+        ]
+        if "forkserver" in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context("forkserver")
+            context.set_forkserver_preload(["ifc2duckdb.batch"])
+        else:
+            context = multiprocessing.get_context("spawn")
+        receiver, sender = context.Pipe(duplex=False)
+        process = context.Process(
+            target=convert_file, args=(str(path), str(partial), self.options, sender)
+        )
+        process.start()
+        sender.close()
+        try:
+            error, _ = receiver.recv()
+        except EOFError:
+            process.join()
+            error = f"Exited with code {process.exitcode}"
+        process.join()
+        receiver.close()
+        if error:
+            remove_database(partial)
+            self.logger.error(
+                "%s failed, keeping the previous database: %s", path, error
+            )
+            return None
+
+        swap_database(partial, database)
+        self.hashes[database] = sha256
+        previous = read_database_version(database) or {}
+        update = DatabaseUpdate(
+            str(database),
+            str(path),
+            previous.get("version", 0) + 1,
+            sha256,
+            time.perf_counter() - start,
+        )
+        write_database_version(update)
+        self.logger.info(
+            "Updated %s to version %d in %.1fs",
+            database,
+            update.version,
+            update.seconds,
+        )
+        if self.on_update is not None:
+            self.on_update(update)
+        return update
+
+
+def is_complete(path: Path) -> bool:
+    """Whether an IFC-SPF file has been written up to its trailer."""
+    try:
+        with open(path, "rb") as f:
+            f.seek(max(path.stat().st_size - TRAILER_SEARCH_SIZE, 0))
+            return SPF_TRAILER in f.read()
+    except OSError:
+        return False
+
+
+def hash_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def swap_database(partial: Path, database: Path) -> None:
+    """Replace ``database`` with ``partial`` in a single rename."""
+    for attempt in range(SWAP_ATTEMPTS):
+        try:
+            # A leftover log of the previous database would be replayed
+            database.with_name(database.name + ".wal").unlink(missing_ok=True)
+            os.replace(partial, database)
+            return
+        except PermissionError:
+            if attempt == SWAP_ATTEMPTS - 1:
+                raise
+            time.sleep(SWAP_RETRY_INTERVAL)
+
+
+def get_version_path(database: Union[str, Path]) -> Path:
+    database = Path(database)
+    return database.with_name(database.name + ".version")
+
+
+def read_database_version(database: Union[str, Path]) -> Optional[dict[str, Any]]:
+    """The version record of a database updated by a watcher, if any."""
+    try:
+        text = get_version_path(database).read_text(encoding="utf-8")
+        version: dict[str, Any] = json.loads(text)
+    except (OSError, ValueError):
+        return None
+    return version
+
+
+def write_database_version(update: DatabaseUpdate) -> None:
+    path = get_version_path(update.database)
+    temporary = path.with_name(path.name + ".tmp")
+    record = dict(update._asdict(), updated=time.strftime("%Y-%m-%dT%H:%M:%S%z"))
+    temporary.write_text(json.dumps(record, indent=2), encoding="utf-8")
+    os.replace(temporary, path)
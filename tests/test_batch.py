@@ -0,0 +1,124 @@
+"""Tests for the batch conversion of IFC files."""
+
+import json
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from ifc2duckdb.batch import BATCH_SUMMARY, BatchConverter
+
+OPTIONS = {"full_schema": False, "should_get_geometry": False}
+
+
+def write_models(directory):
+    from benchmarks.synthetic import create_storey_model
+
+    (directory / "tower").mkdir(parents=True)
+    create_storey_model(1, 2, doors=1).write(str(directory / "annex.ifc"))
+    create_storey_model(2, 4, doors=1).write(str(directory / "tower" / "a.IFC"))
+    (directory / "notes.txt").write_text("not a model")
+
+
+class TestBatchConverter:
+    """Test cases for BatchConverter."""
+
+    def test_batch(self):
+        """Test files convert largest first, and unchanged files are skipped."""
+        import duckdb
+
+        with tempfile.TemporaryDirectory() as tmp:
+            source = Path(tmp) / "exports"
+            output = Path(tmp) / "databases"
+            write_models(source)
+            (source / "broken.ifc").write_text("not a model either")
+
+            converter = BatchConverter(output, jobs=2, retries=1, options=OPTIONS)
+            summary = converter.run(str(source))
+            files = summary["files"]
+            assert list(files) == ["tower/a.IFC", "annex.ifc", "broken.ifc"]
+            assert summary["totals"] == {"converted": 2, "skipped": 0, "failed": 1}
+            assert files["broken.ifc"]["attempts"] == 2
+            assert "Unable to parse" in files["broken.ifc"]["error"]
+            assert len(files["annex.ifc"]["sha256"]) == 64
+            assert json.loads((output / BATCH_SUMMARY).read_text()) == summary
+            assert sorted(p.name for p in output.rglob("*.duckdb")) == [
+                "a.duckdb",
+                "annex.duckdb",
+            ]
+            db = duckdb.connect(str(output / "tower" / "a.duckdb"), read_only=True)
+            assert db.execute('SELECT count(*) FROM "IfcWall"').fetchone()[0] == 8
+            db.close()
+
+            # Same content, touched: only the failed file is converted again
+            (source / "annex.ifc").touch()
+            summary = converter.run(str(source))
+            assert summary["totals"] == {"converted": 0, "skipped": 2, "failed": 1}
+
+            # New content, or new options
+            from benchmarks.synthetic import create_storey_model
+
+            create_storey_model(1, 3, doors=1).write(str(source / "annex.ifc"))
+            summary = converter.run(str(source))
+            assert summary["files"]["annex.ifc"]["status"] == "converted"
+            assert summary["files"]["tower/a.IFC"]["status"] == "skipped"
+            converter = BatchConverter(
+                output, options={**OPTIONS, "should_get_psets": False}
+            )
+            summary = converter.run(str(source))
+            assert summary["totals"] == {"converted": 2, "skipped": 0, "failed": 1}
+
+    def test_timeout(self):
+        """Test a job running too long is stopped without leaving a database."""
+        with tempfile.TemporaryDirectory() as tmp:
+            source = Path(tmp) / "exports"
+            output = Path(tmp) / "databases"
+            write_models(source)
+
+            converter = BatchConverter(output, timeout=0.01, retries=0, options=OPTIONS)
+            summary = converter.run(str(source / "*.ifc"))
+            assert list(summary["files"]) == ["annex.ifc"]
+            entry = summary["files"]["annex.ifc"]
+            assert (entry["status"], entry["attempts"]) == ("failed", 1)
+            assert entry["error"].startswith("Timed out")
+            assert list(output.iterdir()) == [output / BATCH_SUMMARY]
+
+    def test_crash(self):
+        """Test a job dying without a result is retried, then recorded as failed."""
+        import os
+        from unittest.mock import patch
+
+        def crash(*args):
+            os._exit(139)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            source = Path(tmp) / "exports"
+            output = Path(tmp) / "databases"
+            write_models(source)
+
+            converter = BatchConverter(output, jobs=2, retries=1, options=OPTIONS)
+            with patch("ifc2duckdb.batch.convert_file", crash):
+                summary = converter.run(str(source))
+            assert summary["totals"] == {"converted": 0, "skipped": 0, "failed": 2}
+            for entry in summary["files"].values():
+                assert (entry["status"], entry["attempts"]) == ("failed", 2)
+                assert entry["error"] == "Exited with code 139"
+            assert list(output.rglob("*.duckdb")) == []
+
+    def test_find_inputs(self):
+        """Test files are named by their path relative to the source."""
+        with tempfile.TemporaryDirectory() as tmp:
+            source = Path(tmp) / "exports"
+            write_models(source)
+            converter = BatchConverter(Path(tmp) / "databases")
+
+            assert list(converter.find_inputs(str(source))) == [
+                "annex.ifc",
+                "tower/a.IFC",
+            ]
+            assert list(converter.find_inputs(f"{source}/**/*.IFC")) == ["a.IFC"]
+            assert converter.get_database("tower/a.IFC") == (
+                Path(tmp) / "databases" / "tower" / "a.duckdb"
+            )
+            with pytest.raises(FileNotFoundError):
+                converter.run(str(source / "*.step"))
@@ -0,0 +1,224 @@
+"""Tests for clash detection."""
+
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from ifc2duckdb import Patcher
+from ifc2duckdb.clash import ClashDetector, find_overlapping_pairs, get_clash
+
+# The 12 triangles of a unit cube, as indices of its corners
+CUBE_FACES = np.array(
+    [
+        [0, 1, 3], [0, 3, 2], [4, 6, 7], [4, 7, 5],
+        [0, 4, 5], [0, 5, 1], [2, 3, 7], [2, 7, 6],
+        [0, 2, 6], [0, 6, 4], [1, 5, 7], [1, 7, 3],
+    ]
+)  # fmt: skip
+
+
+def box(lower, upper, rotation=None):
+    """The triangles of a box, turned about its centre."""
+    lower, upper = np.asarray(lower, dtype=float), np.asarray(upper, dtype=float)
+    corners = np.array(
+        [[x, y, z] for x in (0, 1) for y in (0, 1) for z in (0, 1)], dtype=float
+    )
+    verts = lower + corners * (upper - lower)
+    if rotation is not None:
+        centre = (lower + upper) / 2
+        verts = (verts - centre) @ rotation.T + centre
+    return verts[CUBE_FACES]
+
+
+class TestClash:
+    """Test cases for the broad and narrow phases of clash detection."""
+
+    def test_find_overlapping_pairs(self):
+        """Test the sweep finds the same pairs as comparing every box."""
+        rng = np.random.default_rng(0)
+        lower = rng.uniform(0.0, 50.0, (300, 3))
+        upper = lower + rng.uniform(0.1, 5.0, (300, 3))
+        margin = 0.5
+        expected = {
+            (i, j)
+            for i in range(len(lower))
+            for j in range(i + 1, len(lower))
+            if np.all(lower[i] - margin <= upper[j])
+            and np.all(lower[j] - margin <= upper[i])
+        }
+        first, second = find_overlapping_pairs(lower, upper, margin)
+        assert len(first) == len(expected)
+        assert set(zip(first.tolist(), second.tolist())) == expected
+
+    @pytest.mark.parametrize(
+        "b, expected",
+        [
+            # A bar through the box, 0.4 deep from above
+            (box((0.3, -1.0, 0.6), (0.7, 2.0, 1.4)), ("hard", 0.4)),
+            # Inside the box without crossing it, 0.4 above its bottom
+            (box((0.3, 0.4, 0.2), (0.5, 0.6, 0.4)), ("hard", 0.4)),
+            # Touching faces do not cross
+            (box((1.0, 0.0, 0.0), (2.0, 1.0, 1.0)), ("clearance", 0.25)),
+            (box((1.1, 0.2, 0.2), (2.0, 0.8, 0.8)), ("clearance", 0.15)),
+            (box((1.3, 0.0, 0.0), (2.0, 1.0, 1.0)), None),
+        ],
+    )
+    def test_get_clash(self, b, expected):
+        """Test the kind and depth of clashes with a unit cube."""
+        clash = get_clash(box((0, 0, 0), (1, 1, 1)), b, 0.01, 0.25)
+        if expected is None:
+            assert clash is None
+        else:
+            assert clash[0] == expected[0]
+            assert clash[1] == pytest.approx(expected[1])
+
+    def test_get_clash_tolerance(self):
+        """Test shallow crossings are within the tolerance but not the clearance."""
+        a = box((0, 0, 0), (1, 1, 1))
+        b = box((0.2, 0.2, 0.95), (0.8, 0.8, 2.0))
+        assert get_clash(a, b, 0.01, 0.0)[0] == "hard"
+        assert get_clash(a, b, 0.1, 0.0) is None
+        assert get_clash(a, b, 0.1, 0.2) == ("clearance", 0.2)
+
+    def test_get_clash_rotated(self):
+        """Test the clearance to a box turned so that an edge faces the cube."""
+        angle = np.pi / 4
+        rotation = np.array(
+            [
+                [np.cos(angle), -np.sin(angle), 0.0],
+                [np.sin(angle), np.cos(angle), 0.0],
+                [0.0, 0.0, 1.0],
+            ]
+        )
+        # Its closest edge is half a diagonal from its centre
+        centre = 1.1 + np.sqrt(0.5)
+        b = box((centre - 0.5, 0.0, 0.0), (centre + 0.5, 1.0, 1.0), rotation)
+        kind, depth = get_clash(box((0, 0, 0), (1, 1, 1)), b, 0.0, 0.2)
+        assert kind == "clearance"
+        assert depth == pytest.approx(0.1)
+
+    def test_run(self):
+        """Test the clashes table of a model in millimetres, filtered."""
+        import duckdb
+        import ifcopenshell.api.aggregate
+        import ifcopenshell.api.context
+        import ifcopenshell.api.geometry
+        import ifcopenshell.api.project
+        import ifcopenshell.api.root
+        import ifcopenshell.api.spatial
+        import ifcopenshell.api.unit
+
+        ifc_file = ifcopenshell.api.project.create_file(version="IFC4")
+        project = ifcopenshell.api.root.create_entity(ifc_file, ifc_class="IfcProject")
+        ifcopenshell.api.unit.assign_unit(
+            ifc_file, length={"is_metric": True, "raw": "MILLIMETERS"}
+        )
+        model = ifcopenshell.api.context.add_context(ifc_file, context_type="Model")
+        body = ifcopenshell.api.context.add_context(
+            ifc_file,
+            context_type="Model",
+            context_identifier="Body",
+            target_view="MODEL_VIEW",
+            parent=model,
+        )
+
+        def add(ifc_class, storey, matrix, length, height, thickness):
+            product = ifcopenshell.api.root.create_entity(ifc_file, ifc_class=ifc_class)
+            representation = ifcopenshell.api.geometry.add_wall_representation(
+                ifc_file,
+                context=body,
+                length=length,
+                height=height,
+                thickness=thickness,
+            )
+            ifcopenshell.api.geometry.assign_representation(
+                ifc_file, product=product, representation=representation
+            )
+            ifcopenshell.api.geometry.edit_object_placement(
+                ifc_file, product=product, matrix=matrix, is_si=True
+            )
+            ifcopenshell.api.spatial.assign_container(
+                ifc_file, products=[product], relating_structure=storey
+            )
+            return product.id()
+
+        def placed(x, y, z, along_y=False):
+            matrix = np.eye(4)
+            if along_y:
+                matrix[:2, :2] = [[0.0, -1.0], [1.0, 0.0]]
+            matrix[:3, 3] = [x, y, z]
+            return matrix
+
+        expected = {}
+        for level in range(2):
+            storey = ifcopenshell.api.root.create_entity(
+                ifc_file, ifc_class="IfcBuildingStorey", name=f"Level {level}"
+            )
+            ifcopenshell.api.aggregate.assign_object(
+                ifc_file, products=[storey], relating_object=project
+            )
+            z = level * 10.0
+            # A wall along x, 0.2 m thick from y = 0 to 0.2
+            wall = add("IfcWall", storey, placed(0.0, 0.0, z), 6.0, 3.0, 0.2)
+            # A beam along y through the wall, 0.3 m from z + 2.5 to 2.8
+            beam = add(
+                "IfcBeam", storey, placed(2.1, -1.0, z + 2.5, True), 2.0, 0.3, 0.2
+            )
+            # A member along y clear of the wall, 50 mm beyond its end
+            member = add(
+                "IfcMember", storey, placed(6.25, -1.0, z, True), 2.0, 1.0, 0.2
+            )
+            expected[level] = (wall, beam, member)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            database = str(Path(tmp) / "clash.duckdb")
+            Patcher(ifc_file, database=database, full_schema=False).patch()
+
+            detector = ClashDetector(database, clearance=100.0)
+            assert detector.run() == 4
+            assert detector.run(["IfcBuildingElement"], ["IfcWall"]) == 4
+            assert detector.run(["IfcBeam"], ["IfcWall"], ["Level 1"]) == 1
+            db = duckdb.connect(database)
+            clashes = db.execute("SELECT * FROM clashes").fetchall()
+            db.close()
+
+        wall, beam, member = expected[1]
+        ((a_id, b_id, kind, depth),) = clashes
+        assert (a_id, b_id, kind) == (beam, wall, "hard")
+        # The beam would have to rise 500 mm to clear the top of the wall
+        assert depth == pytest.approx(500.0)
+
+    def test_run_workers(self):
+        """Test detecting with worker processes finds the same clashes."""
+        import duckdb
+
+        from benchmarks.synthetic import create_clash_model
+
+        with tempfile.TemporaryDirectory() as tmp:
+            database = str(Path(tmp) / "clash.duckdb")
+            Patcher(
+                create_clash_model(300), database=database, full_schema=False
+            ).patch()
+            results = []
+            for workers in (1, 2):
+                detector = ClashDetector(database, clearance=0.2, workers=workers)
+                start_worker_pool = detector.start_worker_pool
+
+                def check_closed():
+                    # Fails while the read-write connection of run() is open
+                    duckdb.connect(database, read_only=True).close()
+                    return start_worker_pool()
+
+                with patch.object(detector, "start_worker_pool", check_closed):
+                    detector.run()
+                db = duckdb.connect(database)
+                results.append(
+                    db.execute(
+                        "SELECT kind, count(*) FROM clashes GROUP BY kind ORDER BY kind"
+                    ).fetchall()
+                )
+                db.close()
+        assert results[0] == results[1] == [("clearance", 50), ("hard", 50)]
@@ -1,6 +1,7 @@
 """Tests for the CLI module."""
 
 import sys
+import tempfile
 from unittest.mock import Mock, patch
 
 import pytest
@@ -55,6 +56,23 @@ class TestCLI:
         # Verify success message was printed
         assert any("Conversion completed successfully!" in str(call) for call in mock_print.call_args_list)
 
+    @patch('ifc2duckdb.cli.BatchConverter')
+    @patch('ifc2duckdb.cli.ifcopenshell')
+    @patch('ifc2duckdb.cli.Patcher')
+    @patch('sys.argv', ['ifc2duckdb', 'batch', '--database', 'output.duckdb'])
+    def test_main_file_named_like_command(
+        self, mock_patcher_class, mock_ifcopenshell, mock_converter_class
+    ):
+        """Test an IFC file named like a subcommand is converted."""
+        with patch('pathlib.Path.is_file', return_value=True):
+            with patch('pathlib.Path.exists', return_value=True):
+                with patch('builtins.print'):
+                    main()
+
+        mock_ifcopenshell.open.assert_called_once_with("batch")
+        mock_patcher_class.return_value.patch.assert_called_once()
+        mock_converter_class.assert_not_called()
+
     @patch('sys.argv', ['ifc2duckdb', 'nonexistent.ifc'])
     def test_main_file_not_found(self):
         """Test CLI with non-existent input file."""
@@ -93,3 +111,154 @@ class TestCLI:
         
         # Verify verbose logging was set up
         mock_setup_logging.assert_called_once_with(True)
+
+    @patch('ifc2duckdb.cli.ClashDetector')
+    @patch(
+        'sys.argv',
+        [
+            'ifc2duckdb', 'clash', 'output.duckdb', '--a', 'IfcDuctSegment',
+            '--b', 'IfcBeam', 'IfcColumn', '--storey', 'Level 3',
+            '--clearance', '0.05', '--workers', '4',
+        ],
+    )
+    def test_main_clash(self, mock_detector_class):
+        """Test the clash subcommand runs clash detection on a database."""
+        mock_detector = Mock()
+        mock_detector.run.return_value = 3
+        mock_detector_class.return_value = mock_detector
+
+        with patch('pathlib.Path.exists', return_value=True):
+            with patch('builtins.print') as mock_print:
+                main()
+
+        mock_detector_class.assert_called_once_with(
+            'output.duckdb', tolerance=0.0, clearance=0.05, workers=4
+        )
+        mock_detector.run.assert_called_once_with(
+            ['IfcDuctSegment'], ['IfcBeam', 'IfcColumn'], ['Level 3']
+        )
+        assert any("Found 3 clashes" in str(call) for call in mock_print.call_args_list)
+
+    @patch('ifc2duckdb.cli.optimize_database', return_value=(4 * 1024**2, 3 * 1024**2))
+    @patch('sys.argv', ['ifc2duckdb', 'optimize', 'output.duckdb'])
+    def test_main_optimize(self, mock_optimize):
+        """Test the optimize subcommand rewrites a database and reports its size."""
+        with patch('pathlib.Path.exists', return_value=True):
+            with patch('builtins.print') as mock_print:
+                main()
+
+        mock_optimize.assert_called_once_with('output.duckdb')
+        assert any("4.0 MB -> 3.0 MB" in str(call) for call in mock_print.call_args_list)
+
+    @patch('ifc2duckdb.cli.export_parquet')
+    @patch(
+        'sys.argv',
+        [
+            'ifc2duckdb', 'export', 'output.duckdb', 'warehouse',
+            '--project', 'tower', '--compression', 'snappy', '--workers', '4',
+        ],
+    )
+    def test_main_export(self, mock_export):
+        """Test the export subcommand writes a project to a Parquet directory."""
+        mock_export.return_value = {
+            'project': 'tower',
+            'tables': {'IfcWall': {'rows': 12}, 'psets': {'rows': 30}},
+        }
+
+        with patch('pathlib.Path.exists', return_value=True):
+            with patch('builtins.print') as mock_print:
+                main()
+
+        mock_export.assert_called_once_with(
+            'output.duckdb',
+            'warehouse',
+            project='tower',
+            row_group_size=122880,
+            compression='snappy',
+            workers=4,
+        )
+        assert any("42 rows" in str(call) for call in mock_print.call_args_list)
+
+    @patch('ifc2duckdb.cli.create_parquet_views', return_value=790)
+    @patch('sys.argv', ['ifc2duckdb', 'views', 'warehouse', 'views.duckdb'])
+    def test_main_views(self, mock_views):
+        """Test the views subcommand creates views over a Parquet directory."""
+        with patch('builtins.print') as mock_print:
+            main()
+
+        mock_views.assert_called_once_with('warehouse', 'views.duckdb', None)
+        assert any("Created 790 views" in str(call) for call in mock_print.call_args_list)
+
+    @patch('ifc2duckdb.cli.BatchConverter')
+    @patch(
+        'sys.argv',
+        [
+            'ifc2duckdb', 'batch', 'exports', '--out', 'databases', '--jobs', '4',
+            '--memory-limit', '2048', '--timeout', '600', '--no-geometry',
+        ],
+    )
+    def test_main_batch(self, mock_converter_class):
+        """Test the batch subcommand converts a directory and fails on errors."""
+        mock_converter = Mock()
+        mock_converter.run.return_value = {
+            'seconds': 12.5,
+            'totals': {'converted': 3, 'skipped': 5, 'failed': 1},
+        }
+        mock_converter_class.return_value = mock_converter
+
+        with patch('builtins.print') as mock_print:
+            with pytest.raises(SystemExit) as exc_info:
+                main()
+
+        assert exc_info.value.code == 1
+        args, kwargs = mock_converter_class.call_args
+        assert args == ('databases',)
+        assert kwargs['jobs'] == 4
+        assert kwargs['memory_limit'] == 2048 * 1024**2
+        assert kwargs['timeout'] == 600.0
+        assert kwargs['retries'] == 1
+        assert kwargs['should_skip_unchanged'] is True
+        assert kwargs['options']['should_get_geometry'] is False
+        mock_converter.run.assert_called_once_with('exports')
+        assert any(
+            "Converted 3, skipped 5 and failed 1" in str(call)
+            for call in mock_print.call_args_list
+        )
+
+    @patch('ifc2duckdb.cli.Watcher')
+    def test_main_watch(self, mock_watcher_class):
+        """Test the watch subcommand runs a watcher until interrupted."""
+        mock_watcher = Mock()
+        mock_watcher.run.side_effect = KeyboardInterrupt
+        mock_watcher_class.return_value = mock_watcher
+
+        with tempfile.TemporaryDirectory() as tmp:
+            argv = [
+                'ifc2duckdb', 'watch', tmp, '--database', 'model.duckdb',
+                '--debounce', '5', '--polling', '--no-geometry',
+            ]
+            with patch('sys.argv', argv):
+                main()
+
+        args, kwargs = mock_watcher_class.call_args
+        assert args == (tmp,)
+        assert kwargs['database'] == 'model.duckdb'
+        assert kwargs['output'] is None
+        assert kwargs['debounce'] == 5.0
+        assert kwargs['should_poll'] is True
+        assert kwargs['options']['should_get_geometry'] is False
+        mock_watcher.run.assert_called_once_with()
+
+        update = Mock(database='model.duckdb', version=2, source='drops/a.ifc')
+        with patch('builtins.print') as mock_print:
+            kwargs['on_update'](update)
+        assert "Updated model.duckdb to version 2 from drops/a.ifc" in str(
+            mock_print.call_args
+        )
+
+    @patch('sys.argv', ['ifc2duckdb', 'watch', 'missing_drops'])
+    def test_main_watch_missing_directory(self):
+        """Test the watch subcommand fails on a missing directory."""
+        with pytest.raises(SystemExit) as exc_info:
+            main()
+        assert exc_info.value.code == 1
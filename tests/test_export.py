@@ -0,0 +1,133 @@
+"""Tests for the Parquet export of converted databases."""
+
+import json
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from ifc2duckdb import Patcher
+from ifc2duckdb.export import create_parquet_views, export_parquet
+
+
+def convert(database, full_schema=False, **kwargs):
+    from benchmarks.synthetic import create_storey_model
+
+    Patcher(
+        create_storey_model(2, 6, doors=2),
+        database=database,
+        full_schema=full_schema,
+        **kwargs,
+    ).patch()
+
+
+class TestExport:
+    """Test cases for export_parquet and create_parquet_views."""
+
+    def test_export_parquet(self):
+        """Test two projects export side by side and read back through views."""
+        import duckdb
+
+        queries = [
+            'SELECT * FROM "IfcWall" ORDER BY ifc_id',
+            "SELECT name, value_num FROM psets ORDER BY ALL",
+            "SELECT ifc_class, count(*) FROM id_map GROUP BY ALL ORDER BY ALL",
+            "SELECT id, materials, encoding FROM geometry ORDER BY id",
+            "SELECT spatial_cell(25.0)",
+        ]
+        with tempfile.TemporaryDirectory() as tmp:
+            database = str(Path(tmp) / "tower.duckdb")
+            directory = Path(tmp) / "warehouse"
+            convert(database)
+            manifest = export_parquet(database, directory, workers=2)
+            export_parquet(database, directory, project="annex", compression="snappy")
+
+            assert manifest["project"] == "tower"
+            psets = manifest["tables"]["psets"]
+            assert psets["partition_by"] == ["project", "ifc_class"]
+            assert "psets/project=tower/ifc_class=IfcWall/data_0.parquet" in (
+                psets["files"]
+            )
+            assert manifest["tables"]["IfcWall"]["files"] == [
+                "IfcWall/project=tower/data_0.parquet"
+            ]
+            assert "entity_hashes" not in manifest["tables"]
+            saved = json.loads(
+                (directory / "_manifests" / "tower.json").read_text(encoding="utf-8")
+            )
+            assert saved == manifest
+
+            db = duckdb.connect(database, read_only=True)
+            expected = [db.execute(query).fetchall() for query in queries]
+            rows = db.execute("SELECT count(*) FROM psets").fetchone()[0]
+            db.close()
+            assert psets["rows"] == rows
+
+            views = str(Path(tmp) / "tower_views.duckdb")
+            create_parquet_views(directory, views, project="tower")
+            db = duckdb.connect(views)
+            results = [db.execute(query).fetchall() for query in queries[1:]]
+            walls = db.execute(queries[0].replace("*", "* EXCLUDE (project)"))
+            results.insert(0, walls.fetchall())
+            db.close()
+            assert results == expected
+
+            views = str(Path(tmp) / "views.duckdb")
+            assert create_parquet_views(directory, views) == len(manifest["tables"])
+            db = duckdb.connect(views)
+            projects = db.execute(
+                "SELECT project, count(*) FROM psets GROUP BY ALL ORDER BY ALL"
+            ).fetchall()
+            columns = [row[0] for row in db.execute('DESCRIBE "IfcWall"').fetchall()]
+            db.close()
+        assert projects == [("annex", rows), ("tower", rows)]
+        assert columns[0] == "ifc_id" and columns[-1] == "project"
+
+    def test_export_replaces_project(self):
+        """Test exporting a project again replaces its files only."""
+        import duckdb
+
+        with tempfile.TemporaryDirectory() as tmp:
+            database = str(Path(tmp) / "tower.duckdb")
+            directory = Path(tmp) / "warehouse"
+            convert(database)
+            export_parquet(database, directory, project="annex")
+            stale = directory / "IfcWall" / "project=tower" / "stale.parquet"
+            stale.parent.mkdir(parents=True)
+            stale.write_bytes(b"")
+            export_parquet(database, directory)
+            assert not stale.exists()
+
+            views = str(Path(tmp) / "views.duckdb")
+            create_parquet_views(directory, views)
+            db = duckdb.connect(views)
+            walls = db.execute(
+                'SELECT project, count(*) FROM "IfcWall" GROUP BY ALL ORDER BY ALL'
+            ).fetchall()
+            db.close()
+        assert walls == [("annex", 12), ("tower", 12)]
+
+    def test_empty_views(self):
+        """Test tables without rows and lazy schema views stay queryable."""
+        import duckdb
+
+        with tempfile.TemporaryDirectory() as tmp:
+            database = str(Path(tmp) / "tower.duckdb")
+            directory = Path(tmp) / "warehouse"
+            convert(database, should_use_lazy_schema=True, full_schema=True)
+            manifest = export_parquet(database, directory)
+            assert manifest["tables"]["IfcBeam"]["files"] == []
+            assert not (directory / "IfcBeam").exists()
+
+            views = str(Path(tmp) / "views.duckdb")
+            create_parquet_views(directory, views)
+            db = duckdb.connect(views)
+            beams = db.execute('SELECT count(*), max(ifc_id) FROM "IfcBeam"')
+            assert beams.fetchall() == [(0, None)]
+            db.close()
+
+    def test_invalid_project(self):
+        """Test project names that are not a single path segment are refused."""
+        with tempfile.TemporaryDirectory() as tmp:
+            with pytest.raises(ValueError, match="Invalid project name"):
+                export_parquet(Path(tmp) / "tower.duckdb", tmp, project="../tower")
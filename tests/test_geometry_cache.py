@@ -0,0 +1,46 @@
+"""Tests for the persistent geometry cache."""
+
+import tempfile
+from pathlib import Path
+
+from ifc2duckdb.geometry_cache import CachedGeometry, GeometryCache
+
+
+class TestGeometryCache:
+    """Test cases for the GeometryCache class."""
+
+    def test_round_trip(self):
+        """Test entries are read back by a later cache on the same file."""
+        entry = CachedGeometry(b"v" * 8, b"e", b"f", b"m", "[]", b"x" * 128)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = str(Path(tmp) / "geometry.sqlite")
+            cache = GeometryCache(path)
+            cache.put("a", entry)
+            cache.close()
+
+            cache = GeometryCache(path)
+            assert cache.get_many(["a", "b"]) == {"a": entry}
+            cache.close()
+
+    def test_least_recently_used_evicted(self):
+        """Test the cache is trimmed to its size, keeping the entries used."""
+        entry = CachedGeometry(b"v" * 100, b"", b"", b"", "[]", b"")
+        size = sum(len(value) for value in entry)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = str(Path(tmp) / "geometry.sqlite")
+            cache = GeometryCache(path, max_size=2 * size)
+            for key in ("a", "b", "c"):
+                cache.put(key, entry)
+            cache.close()
+
+            cache = GeometryCache(path, max_size=2 * size)
+            assert set(cache.get_many(["a", "b", "c"])) == {"b", "c"}
+            cache.close()
+
+            cache = GeometryCache(path, max_size=size)
+            cache.get_many(["b"])
+            cache.close()
+
+            cache = GeometryCache(path)
+            assert set(cache.get_many(["a", "b", "c"])) == {"b"}
+            cache.close()
@@ -0,0 +1,59 @@
+"""Tests for the compact geometry encodings."""
+
+import numpy as np
+import pytest
+
+from ifc2duckdb.geometry_encoding import (
+    GEOMETRY_ENCODINGS,
+    decode_geometry,
+    decode_varints,
+    encode_geometry,
+    encode_varints,
+)
+
+
+class TestGeometryEncoding:
+    """Test cases for encoding and decoding mesh buffers."""
+
+    @pytest.mark.parametrize(
+        "values",
+        [
+            [],
+            [0, 1, 2, 3, 2, 1],
+            [-(2**31), 2**31 - 1, 0, -1, 127, 128, -(2**31)],
+        ],
+    )
+    def test_varints(self, values):
+        """Test integers survive delta and varint encoding."""
+        values = np.array(values, dtype=np.int32)
+        assert decode_varints(encode_varints(values)).tolist() == values.tolist()
+
+    @pytest.mark.parametrize("encoding", GEOMETRY_ENCODINGS)
+    def test_round_trip(self, encoding):
+        """Test decoded meshes match the raw buffers within the precision."""
+        rng = np.random.default_rng(0)
+        verts = rng.uniform(-5.0, 5.0, (100, 3))
+        # A flat mesh, without extent along z
+        verts[:, 2] = 1.5
+        edges = rng.integers(0, 100, (150, 2), dtype=np.int32)
+        faces = rng.integers(0, 100, (80, 3), dtype=np.int32)
+        material_ids = np.repeat(np.arange(4, dtype=np.int32), 20)
+
+        *buffers, label = encode_geometry(
+            verts.tobytes(),
+            edges.tobytes(),
+            faces.tobytes(),
+            material_ids.tobytes(),
+            encoding,
+            "zlib",
+        )
+        mesh = decode_geometry(*buffers, label)
+
+        assert label == ("raw" if encoding == "raw" else f"{encoding}+zlib")
+        tolerance = {"raw": 0, "float32": 1e-6, "quantized": 10 / 65535}[encoding]
+        assert np.allclose(mesh.verts, verts, rtol=0, atol=tolerance)
+        assert np.array_equal(mesh.edges, edges)
+        assert np.array_equal(mesh.faces, faces)
+        assert np.array_equal(mesh.material_ids, material_ids)
+        if encoding != "raw":
+            assert sum(map(len, buffers)) < verts.nbytes + edges.nbytes
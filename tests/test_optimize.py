@@ -0,0 +1,127 @@
+"""Tests for the physical layout optimisation of converted databases."""
+
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from ifc2duckdb import Patcher
+from ifc2duckdb.optimize import optimize_database
+
+
+def read_tables(database):
+    """Every table's rows in storage order, and its column types."""
+    import duckdb
+
+    db = duckdb.connect(database)
+    tables = {
+        name: db.execute(f'SELECT * FROM "{name}"').fetchall()
+        for (name,) in db.execute(
+            "SELECT table_name FROM duckdb_tables() ORDER BY table_name"
+        ).fetchall()
+    }
+    types = dict(
+        db.execute(
+            """
+            SELECT table_name || '.' || column_name, data_type FROM duckdb_columns()
+            WHERE NOT internal
+            """
+        ).fetchall()
+    )
+    indexes = {
+        row[0]
+        for row in db.execute("SELECT index_name FROM duckdb_indexes()").fetchall()
+    }
+    db.close()
+    return tables, types, indexes
+
+
+class TestOptimize:
+    """Test cases for optimize_database."""
+
+    @pytest.mark.parametrize("incremental", [False, True])
+    def test_optimize_database(self, incremental):
+        """Test the rows are kept, sorted, ENUM encoded and indexed."""
+        from benchmarks.synthetic import create_storey_model
+
+        with tempfile.TemporaryDirectory() as tmp:
+            database = str(Path(tmp) / "optimize.duckdb")
+            Patcher(
+                create_storey_model(2, 6, doors=2),
+                database=database,
+                full_schema=False,
+                should_update_incrementally=incremental,
+                should_optimize=False,
+            ).patch()
+            tables, types, _ = read_tables(database)
+            optimize_database(database)
+            optimized, optimized_types, indexes = read_tables(database)
+            assert not Path(database + ".optimize").exists()
+
+        assert tables.keys() == optimized.keys()
+        for name, rows in tables.items():
+            assert sorted(rows, key=repr) == sorted(optimized[name], key=repr)
+        psets = optimized["psets"]
+        assert psets == sorted(psets, key=lambda row: (row[2], row[0]))
+        id_map = optimized["id_map"]
+        assert id_map == sorted(id_map, key=lambda row: (row[1], row[0]))
+
+        assert {"psets_ifc_id_idx", "shape_ifc_id_idx"} <= indexes
+        # Created by the conversion, and again in the optimized copy
+        assert "rel_edges_relating_idx" in indexes
+        if incremental:
+            assert optimized_types == types
+        else:
+            for column in (
+                "id_map.ifc_class",
+                "psets.name",
+                "psets.unit",
+                "element_location.ifc_class",
+                "rel_edges.rel_class",
+            ):
+                assert optimized_types[column].startswith("ENUM("), column
+            # Data columns are kept as text, however repetitive
+            for column in (
+                "IfcWall.GlobalId",
+                "IfcWall.Name",
+                "psets.value",
+                "psets.value_text",
+                "element_location.storey_name",
+                "conversion_stats.phase",
+            ):
+                assert optimized_types[column] == "VARCHAR", column
+
+    def test_queries_unchanged(self):
+        """Test ENUM columns compare, sort and join like the text they replace."""
+        import duckdb
+
+        from benchmarks.synthetic import create_storey_model
+
+        queries = [
+            """
+            SELECT ifc_class, count(*) FROM id_map
+            WHERE ifc_class LIKE 'IfcW%' OR ifc_class = 'IfcNotInTheModel'
+            GROUP BY ifc_class ORDER BY ifc_class
+            """,
+            """
+            SELECT p.name, i.ifc_class, count(*)
+            FROM psets p JOIN id_map i USING (ifc_id)
+            GROUP BY ALL ORDER BY ALL
+            """,
+            "SELECT lower(rel_class) FROM rel_edges ORDER BY 1",
+        ]
+        results = []
+        with tempfile.TemporaryDirectory() as tmp:
+            for should_optimize in (False, True):
+                database = str(Path(tmp) / f"queries_{should_optimize}.duckdb")
+                Patcher(
+                    create_storey_model(2, 6, doors=2),
+                    database=database,
+                    full_schema=False,
+                    should_optimize=should_optimize,
+                ).patch()
+                db = duckdb.connect(database)
+                results.append([db.execute(query).fetchall() for query in queries])
+                db.close()
+        assert results[0] == results[1]
+        assert results[0][0]
@@ -1,5 +1,6 @@
 """Tests for the Patcher class."""
 
+import json
 import tempfile
 from pathlib import Path
 from unittest.mock import Mock, patch
@@ -25,6 +26,19 @@ class TestPatcher:
         assert patcher.should_get_psets is True
         assert patcher.should_get_geometry is True
         assert patcher.should_skip_geometry_data is False
+        assert patcher.should_load_columnar is True
+        assert patcher.should_use_native_types is False
+        assert patcher.should_get_rel_edges is True
+        assert patcher.should_get_element_location is True
+        assert patcher.should_update_incrementally is False
+        assert patcher.should_use_lazy_schema is False
+        assert patcher.should_expand_links is False
+        assert patcher.should_optimize is True
+        assert patcher.workers == 1
+        assert patcher.geometry_memory_limit == 256 * 1024 * 1024
+        assert patcher.geometry_cache is None
+        assert patcher.geometry_encoding == "raw"
+        assert patcher.spatial_cell_size == 5.0
 
     def test_init_custom_values(self):
         """Test Patcher initialization with custom values."""
@@ -39,6 +53,20 @@ class TestPatcher:
             should_get_psets=False,
             should_get_geometry=False,
             should_skip_geometry_data=True,
+            should_load_columnar=False,
+            should_use_native_types=True,
+            should_get_rel_edges=False,
+            should_get_element_location=False,
+            should_update_incrementally=True,
+            should_use_lazy_schema=True,
+            should_expand_links=True,
+            should_optimize=False,
+            workers=4,
+            geometry_memory_limit=1024,
+            geometry_cache="geometry.sqlite",
+            geometry_cache_size=1024,
+            geometry_encoding="quantized",
+            spatial_cell_size=10.0,
         )
         
         assert patcher.database == "custom.duckdb"
@@ -49,6 +77,20 @@ class TestPatcher:
         assert patcher.should_get_psets is False
         assert patcher.should_get_geometry is False
         assert patcher.should_skip_geometry_data is True
+        assert patcher.should_load_columnar is False
+        assert patcher.should_use_native_types is True
+        assert patcher.should_get_rel_edges is False
+        assert patcher.should_get_element_location is False
+        assert patcher.should_update_incrementally is True
+        assert patcher.should_use_lazy_schema is True
+        assert patcher.should_expand_links is True
+        assert patcher.should_optimize is False
+        assert patcher.workers == 4
+        assert patcher.geometry_memory_limit == 1024
+        assert patcher.geometry_cache == "geometry.sqlite"
+        assert patcher.geometry_cache_size == 1024
+        assert patcher.geometry_encoding == "quantized"
+        assert patcher.spatial_cell_size == 10.0
 
     def test_get_output_before_patch(self):
         """Test get_output before patch is called."""
@@ -107,6 +149,807 @@ class TestPatcher:
         mock_element.walk.assert_called_once()
         assert result == "serialized_value"
 
+    @pytest.mark.parametrize("rel_edges", [True, False])
+    def test_element_location(self, rel_edges):
+        """Test products are located through containment, decomposition and hosts."""
+        import duckdb
+        import ifcopenshell
+        import ifcopenshell.guid
+
+        ifc_file = ifcopenshell.file(schema="IFC4")
+        guid = ifcopenshell.guid.new
+        site = ifc_file.createIfcSite(guid())
+        building = ifc_file.createIfcBuilding(guid())
+        storey = ifc_file.createIfcBuildingStorey(guid(), Name="Level 1", Elevation=3.0)
+        space = ifc_file.createIfcSpace(guid())
+        wall = ifc_file.createIfcWall(guid())
+        opening = ifc_file.createIfcOpeningElement(guid())
+        door = ifc_file.createIfcDoor(guid())
+        stair = ifc_file.createIfcStair(guid())
+        flight = ifc_file.createIfcStairFlight(guid())
+        furniture = ifc_file.createIfcFurniture(guid())
+        orphan = ifc_file.createIfcBuildingElementProxy(guid())
+        ifc_file.createIfcRelAggregates(guid(), None, None, None, site, [building])
+        ifc_file.createIfcRelAggregates(guid(), None, None, None, building, [storey])
+        ifc_file.createIfcRelAggregates(guid(), None, None, None, storey, [space])
+        ifc_file.createIfcRelAggregates(guid(), None, None, None, stair, [flight])
+        ifc_file.createIfcRelContainedInSpatialStructure(
+            guid(), None, None, None, [wall, stair], storey
+        )
+        ifc_file.createIfcRelContainedInSpatialStructure(
+            guid(), None, None, None, [furniture], space
+        )
+        ifc_file.createIfcRelVoidsElement(guid(), None, None, None, wall, opening)
+        ifc_file.createIfcRelFillsElement(guid(), None, None, None, opening, door)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            database = str(Path(tmp) / "element_location.duckdb")
+            Patcher(
+                ifc_file,
+                database=database,
+                full_schema=False,
+                should_get_geometry=False,
+                should_get_rel_edges=rel_edges,
+            ).patch()
+            db = duckdb.connect(database)
+            rows = db.execute("SELECT * FROM element_location ORDER BY ifc_id").fetchall()
+            db.close()
+
+        located = (storey.id(), "Level 1", 3.0, building.id(), site.id())
+        assert rows == [
+            (site.id(), "IfcSite", None, None, None, None, None, site.id()),
+            (building.id(), "IfcBuilding", None, None, None, None, building.id(), site.id()),
+            (storey.id(), "IfcBuildingStorey", None) + located,
+            (space.id(), "IfcSpace", space.id()) + located,
+            (wall.id(), "IfcWall", None) + located,
+            (opening.id(), "IfcOpeningElement", None) + located,
+            (door.id(), "IfcDoor", None) + located,
+            (stair.id(), "IfcStair", None) + located,
+            (flight.id(), "IfcStairFlight", None) + located,
+            (furniture.id(), "IfcFurniture", space.id()) + located,
+            (orphan.id(), "IfcBuildingElementProxy", None, None, None, None, None, None),
+        ]
+
+    def test_geometry_memory_limit(self):
+        """Test geometry flushed row by row matches geometry flushed once."""
+        import duckdb
+        import ifcopenshell.api.context
+        import ifcopenshell.api.geometry
+        import ifcopenshell.api.project
+        import ifcopenshell.api.root
+        import ifcopenshell.api.unit
+        import numpy as np
+
+        ifc_file = ifcopenshell.api.project.create_file(version="IFC4")
+        ifcopenshell.api.root.create_entity(ifc_file, ifc_class="IfcProject")
+        ifcopenshell.api.unit.assign_unit(ifc_file)
+        model = ifcopenshell.api.context.add_context(ifc_file, context_type="Model")
+        body = ifcopenshell.api.context.add_context(
+            ifc_file,
+            context_type="Model",
+            context_identifier="Body",
+            target_view="MODEL_VIEW",
+            parent=model,
+        )
+        for i in range(3):
+            wall = ifcopenshell.api.root.create_entity(ifc_file, ifc_class="IfcWall")
+            representation = ifcopenshell.api.geometry.add_wall_representation(
+                ifc_file, context=body, length=i + 1.0, height=3.0, thickness=0.2
+            )
+            ifcopenshell.api.geometry.assign_representation(
+                ifc_file, product=wall, representation=representation
+            )
+            matrix = np.eye(4)
+            matrix[0, 3] = i * 2.0
+            ifcopenshell.api.geometry.edit_object_placement(
+                ifc_file, product=wall, matrix=matrix, is_si=True
+            )
+        # Placed without a body, only a placement row
+        storey = ifcopenshell.api.root.create_entity(
+            ifc_file, ifc_class="IfcBuildingStorey"
+        )
+        ifcopenshell.api.geometry.edit_object_placement(ifc_file, product=storey)
+
+        tables = {}
+        with tempfile.TemporaryDirectory() as tmp:
+            for limit in (1, 256 * 1024 * 1024):
+                database = str(Path(tmp) / f"geometry_{limit}.duckdb")
+                patcher = Patcher(
+                    ifc_file,
+                    database=database,
+                    full_schema=False,
+                    geometry_memory_limit=limit,
+                )
+                patcher.patch()
+                db = duckdb.connect(database)
+                tables[limit] = [
+                    db.execute(f"SELECT * FROM {table} ORDER BY 1").fetchall()
+                    for table in ("shape", "geometry")
+                ]
+                db.close()
+
+        shapes, geometries = tables[1]
+        assert tables[1] == tables[256 * 1024 * 1024]
+        assert [row[0] for row in shapes] == sorted(
+            [w.id() for w in ifc_file.by_type("IfcWall")] + [storey.id()]
+        )
+        assert len(geometries) == 3
+        assert {row[5] for row in shapes} == {row[0] for row in geometries} | {None}
+        assert patcher.peak_rss is None or patcher.peak_rss > 0
+
+    def test_geometry_deduplicated(self):
+        """Test identical meshes of distinct representations are stored once."""
+        import duckdb
+        import ifcopenshell.api.context
+        import ifcopenshell.api.geometry
+        import ifcopenshell.api.project
+        import ifcopenshell.api.root
+        import ifcopenshell.api.unit
+
+        ifc_file = ifcopenshell.api.project.create_file(version="IFC4")
+        ifcopenshell.api.root.create_entity(ifc_file, ifc_class="IfcProject")
+        ifcopenshell.api.unit.assign_unit(ifc_file)
+        model = ifcopenshell.api.context.add_context(ifc_file, context_type="Model")
+        body = ifcopenshell.api.context.add_context(
+            ifc_file,
+            context_type="Model",
+            context_identifier="Body",
+            target_view="MODEL_VIEW",
+            parent=model,
+        )
+        walls = []
+        for length in (1.0, 1.0, 1.0, 2.0):
+            wall = ifcopenshell.api.root.create_entity(ifc_file, ifc_class="IfcWall")
+            representation = ifcopenshell.api.geometry.add_wall_representation(
+                ifc_file, context=body, length=length, height=3.0, thickness=0.2
+            )
+            ifcopenshell.api.geometry.assign_representation(
+                ifc_file, product=wall, representation=representation
+            )
+            ifcopenshell.api.geometry.edit_object_placement(ifc_file, product=wall)
+            walls.append(wall)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            database = str(Path(tmp) / "geometry.duckdb")
+            patcher = Patcher(ifc_file, database=database, full_schema=False)
+            patcher.patch()
+            db = duckdb.connect(database)
+            shapes = dict(db.execute("SELECT ifc_id, geometry FROM shape").fetchall())
+            geometry_ids = db.execute("SELECT id FROM geometry").fetchall()
+            db.close()
+
+        assert len(geometry_ids) == 2
+        assert len({shapes[wall.id()] for wall in walls[:3]}) == 1
+        assert shapes[walls[0].id()] != shapes[walls[3].id()]
+        assert patcher.get_geometry_dedup_ratio() == 2.0
+
+    @pytest.mark.parametrize("encoding", ["float32", "quantized"])
+    def test_geometry_encoding(self, encoding):
+        """Test compact geometry decodes to the raw geometry."""
+        import duckdb
+        import ifcopenshell.api.context
+        import ifcopenshell.api.geometry
+        import ifcopenshell.api.project
+        import ifcopenshell.api.root
+        import ifcopenshell.api.unit
+        import numpy as np
+
+        from ifc2duckdb import decode_geometry
+
+        ifc_file = ifcopenshell.api.project.create_file(version="IFC4")
+        ifcopenshell.api.root.create_entity(ifc_file, ifc_class="IfcProject")
+        ifcopenshell.api.unit.assign_unit(ifc_file)
+        model = ifcopenshell.api.context.add_context(ifc_file, context_type="Model")
+        body = ifcopenshell.api.context.add_context(
+            ifc_file,
+            context_type="Model",
+            context_identifier="Body",
+            target_view="MODEL_VIEW",
+            parent=model,
+        )
+        for length in (1.0, 2.5):
+            wall = ifcopenshell.api.root.create_entity(ifc_file, ifc_class="IfcWall")
+            representation = ifcopenshell.api.geometry.add_wall_representation(
+                ifc_file, context=body, length=length, height=3.0, thickness=0.2
+            )
+            ifcopenshell.api.geometry.assign_representation(
+                ifc_file, product=wall, representation=representation
+            )
+            ifcopenshell.api.geometry.edit_object_placement(ifc_file, product=wall)
+
+        meshes = {}
+        with tempfile.TemporaryDirectory() as tmp:
+            for name in ("raw", encoding):
+                database = str(Path(tmp) / f"{name}.duckdb")
+                Patcher(
+                    ifc_file,
+                    database=database,
+                    full_schema=False,
+                    geometry_encoding=name,
+                ).patch()
+                db = duckdb.connect(database)
+                rows = db.execute(
+                    """
+                    SELECT s.ifc_id, g.verts, g.edges, g.faces, g.material_ids,
+                        g.encoding
+                    FROM shape s JOIN geometry g ON s.geometry = g.id
+                    ORDER BY s.ifc_id;
+                    """
+                ).fetchall()
+                db.close()
+                meshes[name] = [decode_geometry(*row[1:]) for row in rows]
+
+        assert len(meshes[encoding]) == len(meshes["raw"]) == 2
+        for mesh, raw in zip(meshes[encoding], meshes["raw"]):
+            assert np.allclose(mesh.verts, raw.verts, rtol=0, atol=1e-4)
+            assert np.array_equal(mesh.faces, raw.faces)
+            assert np.array_equal(mesh.edges, raw.edges)
+            assert np.array_equal(mesh.material_ids, raw.material_ids)
+
+    def test_shape_bounds(self):
+        """Test world bounding boxes and grid cells of placed meshes."""
+        import duckdb
+        import ifcopenshell.api.context
+        import ifcopenshell.api.geometry
+        import ifcopenshell.api.project
+        import ifcopenshell.api.root
+        import ifcopenshell.api.unit
+        import numpy as np
+
+        ifc_file = ifcopenshell.api.project.create_file(version="IFC4")
+        ifcopenshell.api.root.create_entity(ifc_file, ifc_class="IfcProject")
+        # Millimetres, where the shape matrices and bounds are in mm too
+        ifcopenshell.api.unit.assign_unit(
+            ifc_file, length={"is_metric": True, "raw": "MILLIMETERS"}
+        )
+        model = ifcopenshell.api.context.add_context(ifc_file, context_type="Model")
+        body = ifcopenshell.api.context.add_context(
+            ifc_file,
+            context_type="Model",
+            context_identifier="Body",
+            target_view="MODEL_VIEW",
+            parent=model,
+        )
+        walls = []
+        for rotate in (False, True):
+            wall = ifcopenshell.api.root.create_entity(ifc_file, ifc_class="IfcWall")
+            representation = ifcopenshell.api.geometry.add_wall_representation(
+                ifc_file, context=body, length=12.0, height=3.0, thickness=0.2
+            )
+            ifcopenshell.api.geometry.assign_representation(
+                ifc_file, product=wall, representation=representation
+            )
+            matrix = np.eye(4)
+            if rotate:
+                # A quarter turn about z, the wall then runs along y
+                matrix[:2, :2] = [[0.0, -1.0], [1.0, 0.0]]
+            matrix[:3, 3] = [1.0, 2.0, 3.0]
+            ifcopenshell.api.geometry.edit_object_placement(
+                ifc_file, product=wall, matrix=matrix, is_si=True
+            )
+            walls.append(wall)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            database = str(Path(tmp) / "bounds.duckdb")
+            Patcher(ifc_file, database=database, full_schema=False).patch()
+            db = duckdb.connect(database)
+            bounds = {
+                row[0]: row[1:]
+                for row in db.execute("SELECT * FROM shape_bounds").fetchall()
+            }
+            cells = db.execute(
+                "SELECT ifc_id, cell_x, cell_y FROM shape_cells ORDER BY ALL"
+            ).fetchall()
+            near = db.execute(
+                """
+                SELECT DISTINCT ifc_id FROM shape_cells
+                WHERE cell_x = spatial_cell(1500.0) AND cell_y = spatial_cell(9000.0);
+                """
+            ).fetchall()
+            db.close()
+
+        assert np.allclose(bounds[walls[0].id()], (1000, 2000, 3000, 13000, 2200, 6000))
+        assert np.allclose(bounds[walls[1].id()], (800, 2000, 3000, 1000, 14000, 6000))
+        # 5 m cells: x from 1 to 13 m spans three, y from 2 to 14 m three more
+        assert cells == sorted(
+            [(walls[0].id(), x, 0) for x in range(3)]
+            + [(walls[1].id(), 0, y) for y in range(3)]
+        )
+        assert near == [(walls[1].id(),)]
+
+    def test_element_quantities(self):
+        """Test quantities computed from placed meshes, in project units."""
+        import duckdb
+        import ifcopenshell.api.context
+        import ifcopenshell.api.geometry
+        import ifcopenshell.api.project
+        import ifcopenshell.api.root
+        import ifcopenshell.api.unit
+        import numpy as np
+
+        ifc_file = ifcopenshell.api.project.create_file(version="IFC4")
+        ifcopenshell.api.root.create_entity(ifc_file, ifc_class="IfcProject")
+        # Lengths in millimetres, areas and volumes in square and cubic metres
+        ifcopenshell.api.unit.assign_unit(
+            ifc_file, length={"is_metric": True, "raw": "MILLIMETERS"}
+        )
+        model = ifcopenshell.api.context.add_context(ifc_file, context_type="Model")
+        body = ifcopenshell.api.context.add_context(
+            ifc_file,
+            context_type="Model",
+            context_identifier="Body",
+            target_view="MODEL_VIEW",
+            parent=model,
+        )
+        rotations = {
+            "standing": np.eye(3),
+            # A quarter turn about z, the same quantities
+            "turned": [[0.0, -1.0, 0.0], [1.0, 0.0, 0.0], [0.0, 0.0, 1.0]],
+            # A quarter turn about x, the wall lies on its face
+            "lying": [[1.0, 0.0, 0.0], [0.0, 0.0, -1.0], [0.0, 1.0, 0.0]],
+        }
+        walls = {}
+        for name, rotation in rotations.items():
+            wall = ifcopenshell.api.root.create_entity(ifc_file, ifc_class="IfcWall")
+            representation = ifcopenshell.api.geometry.add_wall_representation(
+                ifc_file, context=body, length=12.0, height=3.0, thickness=0.2
+            )
+            ifcopenshell.api.geometry.assign_representation(
+                ifc_file, product=wall, representation=representation
+            )
+            matrix = np.eye(4)
+            matrix[:3, :3] = rotation
+            matrix[:3, 3] = [1.0, 2.0, 3.0]
+            ifcopenshell.api.geometry.edit_object_placement(
+                ifc_file, product=wall, matrix=matrix, is_si=True
+            )
+            walls[name] = wall.id()
+
+        with tempfile.TemporaryDirectory() as tmp:
+            database = str(Path(tmp) / "quantities.duckdb")
+            Patcher(ifc_file, database=database, full_schema=False).patch()
+            db = duckdb.connect(database)
+            quantities = {
+                row[0]: row[1:]
+                for row in db.execute("SELECT * FROM element_quantities").fetchall()
+            }
+            db.close()
+
+        # Volume, surface area, footprint area and height
+        standing = (7.2, 2 * (12 * 3 + 12 * 0.2 + 3 * 0.2), 12 * 0.2, 3000.0)
+        assert np.allclose(quantities[walls["standing"]], standing)
+        assert np.allclose(quantities[walls["turned"]], standing)
+        assert np.allclose(quantities[walls["lying"]], (*standing[:2], 36.0, 200.0))
+
+    def test_conversion_stats(self):
+        """Test conversion phases are recorded in conversion_stats and a trace."""
+        import duckdb
+        import ifcopenshell
+        import ifcopenshell.guid
+
+        ifc_file = ifcopenshell.file(schema="IFC4")
+        storey = ifc_file.createIfcBuildingStorey(ifcopenshell.guid.new())
+        walls = [ifc_file.createIfcWall(ifcopenshell.guid.new()) for _ in range(3)]
+        ifc_file.createIfcRelContainedInSpatialStructure(
+            ifcopenshell.guid.new(), None, None, None, walls, storey
+        )
+
+        with tempfile.TemporaryDirectory() as tmp:
+            database = str(Path(tmp) / "stats.duckdb")
+            trace_file = str(Path(tmp) / "trace.json")
+            Patcher(
+                ifc_file,
+                database=database,
+                full_schema=False,
+                should_get_geometry=False,
+                trace_file=trace_file,
+            ).patch()
+            db = duckdb.connect(database)
+            stats = db.execute(
+                """
+                SELECT phase, ifc_class, rows, calls FROM conversion_stats
+                ORDER BY started, phase
+                """
+            ).fetchall()
+            negative = db.execute(
+                """
+                SELECT COUNT(*) FROM conversion_stats
+                WHERE wall_time < 0 OR cpu_time < 0 OR bytes < 0
+                """
+            ).fetchone()[0]
+            db.close()
+            with open(trace_file) as f:
+                events = json.load(f)["traceEvents"]
+
+        # The initial tables and one class table per class
+        assert stats[0] == ("schema", None, 0, 4)
+        assert ("extract", "IfcWall", 0, 1) in stats
+        assert ("load", "IfcWall", 3, 1) in stats
+        # The relationship row, its 4 references and 3 edges
+        assert ("load", "IfcRelContainedInSpatialStructure", 8, 1) in stats
+        assert ("id_map", None, 5, 3) in stats
+        assert ("element_location", None, 4, 1) in stats
+        assert [row[0] for row in stats[-2:]] == ["commit", "optimize"]
+        assert negative == 0
+        assert {e["name"] for e in events} >= {"schema", "extract IfcWall", "id_map"}
+        assert all(e["ph"] == "X" and e["dur"] >= 0 for e in events)
+        # Occurrences of a phase are separate events
+        assert sum(e["name"] == "id_map" for e in events) == 3
+
+    def test_placements(self):
+        """Test resolved placement matrices match ifcopenshell's get_local_placement."""
+        import duckdb
+        import ifcopenshell
+        import ifcopenshell.guid
+        import ifcopenshell.util.placement
+        import numpy as np
+
+        ifc_file = ifcopenshell.file(schema="IFC4")
+
+        def placement(parent, location, axis=None, ref_direction=None):
+            return ifc_file.createIfcLocalPlacement(
+                parent,
+                ifc_file.createIfcAxis2Placement3D(
+                    ifc_file.createIfcCartesianPoint(location),
+                    axis and ifc_file.createIfcDirection(axis),
+                    ref_direction and ifc_file.createIfcDirection(ref_direction),
+                ),
+            )
+
+        site = placement(None, (100.0, 200.0, 0.0), (0.0, 0.0, 1.0), (0.6, 0.8, 0.0))
+        building = placement(site, (10.0, 0.0, 0.0), (0.0, 1.0, 0.0), (1.0, 0.0, 0.0))
+        storey = ifc_file.createIfcLocalPlacement(
+            building,
+            ifc_file.createIfcAxis2Placement2D(
+                ifc_file.createIfcCartesianPoint((1.0, 2.0))
+            ),
+        )
+        placements = [
+            placement(storey, (float(i), 0.5, 3.0), (0.0, 0.0, 1.0), (1.0, 1.0, 0.0))
+            for i in range(3)
+        ] + [placement(storey, (0.0, 0.0, 0.0)), placement(None, (5.0, 5.0, 5.0))]
+        elements = [
+            ifc_file.createIfcBuildingElementProxy(
+                ifcopenshell.guid.new(), ObjectPlacement=p
+            )
+            for p in placements
+        ]
+        elements.append(
+            ifc_file.createIfcBuildingStorey(
+                ifcopenshell.guid.new(), ObjectPlacement=storey
+            )
+        )
+
+        with tempfile.TemporaryDirectory() as tmp:
+            database = str(Path(tmp) / "placements.duckdb")
+            Patcher(ifc_file, database=database, full_schema=False).patch()
+            db = duckdb.connect(database)
+            rows = dict(db.execute("SELECT ifc_id, matrix FROM shape").fetchall())
+            db.close()
+
+        assert len(rows) == len(elements)
+        for element in elements:
+            expected = ifcopenshell.util.placement.get_local_placement(
+                element.ObjectPlacement
+            )
+            matrix = np.frombuffer(rows[element.id()]).reshape(4, 4)
+            assert np.allclose(matrix, expected)
+
+    @pytest.mark.parametrize(
+        "inverses, lazy_schema, expand_links",
+        [
+            (True, False, False),
+            (False, False, False),
+            (True, True, False),
+            (True, True, True),
+        ],
+    )
+    def test_incremental_update(self, inverses, lazy_schema, expand_links):
+        """Test an incremental update matches a conversion from scratch."""
+        import duckdb
+        import ifcopenshell
+        import ifcopenshell.api.aggregate
+        import ifcopenshell.api.context
+        import ifcopenshell.api.feature
+        import ifcopenshell.api.geometry
+        import ifcopenshell.api.project
+        import ifcopenshell.api.pset
+        import ifcopenshell.api.root
+        import ifcopenshell.api.spatial
+        import ifcopenshell.api.unit
+        import ifcopenshell.util.element
+        import numpy as np
+
+        ifc_file = ifcopenshell.api.project.create_file(version="IFC4")
+        project = ifcopenshell.api.root.create_entity(ifc_file, ifc_class="IfcProject")
+        ifcopenshell.api.unit.assign_unit(ifc_file)
+        model = ifcopenshell.api.context.add_context(ifc_file, context_type="Model")
+        body = ifcopenshell.api.context.add_context(
+            ifc_file,
+            context_type="Model",
+            context_identifier="Body",
+            target_view="MODEL_VIEW",
+            parent=model,
+        )
+
+        def place(product, z):
+            matrix = np.eye(4)
+            matrix[2, 3] = z
+            ifcopenshell.api.geometry.edit_object_placement(
+                ifc_file, product=product, matrix=matrix, is_si=True
+            )
+
+        def add_wall(storey, length):
+            wall = ifcopenshell.api.root.create_entity(ifc_file, ifc_class="IfcWall")
+            representation = ifcopenshell.api.geometry.add_wall_representation(
+                ifc_file, context=body, length=length, height=3.0, thickness=0.2
+            )
+            ifcopenshell.api.geometry.assign_representation(
+                ifc_file, product=wall, representation=representation
+            )
+            place(wall, 0.0)
+            ifcopenshell.api.spatial.assign_container(
+                ifc_file, relating_structure=storey, products=[wall]
+            )
+            pset = ifcopenshell.api.pset.add_pset(
+                ifc_file, product=wall, name="Pset_WallCommon"
+            )
+            ifcopenshell.api.pset.edit_pset(
+                ifc_file, pset=pset, properties={"Reference": f"W{length}"}
+            )
+            return wall
+
+        storeys = []
+        for level in range(2):
+            storey = ifcopenshell.api.root.create_entity(
+                ifc_file, ifc_class="IfcBuildingStorey", name=f"Level {level}"
+            )
+            place(storey, level * 3.0)
+            ifcopenshell.api.aggregate.assign_object(
+                ifc_file, relating_object=project, products=[storey]
+            )
+            storeys.append(storey)
+        walls = [add_wall(storey, i + 1.0) for storey in storeys for i in range(3)]
+
+        options = dict(
+            full_schema=lazy_schema,
+            should_get_inverses=inverses,
+            should_use_lazy_schema=lazy_schema,
+            should_expand_links=expand_links,
+        )
+        with tempfile.TemporaryDirectory() as tmp:
+            updated = str(Path(tmp) / "updated.duckdb")
+            patcher = Patcher(
+                ifc_file, database=updated, should_update_incrementally=True, **options
+            )
+            patcher.patch()
+            assert patcher.is_updating is False
+
+            # Rename, remove, edit a property, move a storey and add an opening
+            walls[0].Name = "Renamed"
+            ifcopenshell.api.root.remove_product(ifc_file, product=walls[1])
+            pset = ifcopenshell.util.element.get_pset(walls[2], "Pset_WallCommon")
+            ifcopenshell.api.pset.edit_pset(
+                ifc_file,
+                pset=ifc_file.by_id(pset["id"]),
+                properties={"Reference": "Edited"},
+            )
+            place(storeys[1], 4.0)
+            opening = ifcopenshell.api.root.create_entity(
+                ifc_file, ifc_class="IfcOpeningElement"
+            )
+            representation = ifcopenshell.api.geometry.add_wall_representation(
+                ifc_file, context=body, length=0.5, height=1.0, thickness=0.5
+            )
+            ifcopenshell.api.geometry.assign_representation(
+                ifc_file, product=opening, representation=representation
+            )
+            place(opening, 0.0)
+            ifcopenshell.api.feature.add_feature(
+                ifc_file, feature=opening, element=walls[3]
+            )
+            add_wall(storeys[0], 4.0)
+            revised = ifcopenshell.file.from_string(ifc_file.to_string())
+
+            patcher = Patcher(
+                revised, database=updated, should_update_incrementally=True, **options
+            )
+            patcher.patch()
+            assert patcher.is_updating is True
+            assert ("diff", None) in patcher.phase_stats
+
+            converted = str(Path(tmp) / "converted.duckdb")
+            Patcher(revised, database=converted, **options).patch()
+
+            tables = []
+            table_types = []
+            for database in (updated, converted):
+                db = duckdb.connect(database)
+                names = db.execute(
+                    """
+                    SELECT table_name, table_type FROM information_schema.tables
+                    WHERE table_name NOT IN (
+                        'metadata', 'conversion_stats', 'entity_hashes',
+                        'conversion_options'
+                    )
+                    ORDER BY table_name;
+                    """
+                ).fetchall()
+                tables.append(
+                    {
+                        name: sorted(
+                            db.execute(f'SELECT * FROM "{name}"').fetchall(), key=repr
+                        )
+                        for name, _ in names
+                    }
+                )
+                table_types.append(dict(names))
+                db.close()
+
+        assert tables[0] == tables[1]
+        assert table_types[0] == table_types[1]
+        assert "IfcOpeningElement" in tables[0]
+        if lazy_schema:
+            # The opening class was an empty view before the update
+            assert table_types[0]["IfcOpeningElement"] == "BASE TABLE"
+            assert table_types[0]["IfcBeam"] == "VIEW"
+            assert table_types[0]["IfcWall"] == "BASE TABLE"
+        if expand_links:
+            # One wall was removed and another added to the first storey
+            links = tables[0]["IfcRelContainedInSpatialStructure_RelatedElements"]
+            assert len(links) == 6
+        assert ("Renamed",) in [row[3:4] for row in tables[0]["IfcWall"]]
+
+    def test_incremental_replace(self):
+        """Test a database that cannot be updated is only replaced on success."""
+        import duckdb
+        import ifcopenshell.api.project
+        import ifcopenshell.api.root
+
+        ifc_file = ifcopenshell.api.project.create_file(version="IFC4")
+        ifcopenshell.api.root.create_entity(ifc_file, ifc_class="IfcProject")
+        ifcopenshell.api.root.create_entity(ifc_file, ifc_class="IfcWall")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            database = Path(tmp) / "model.duckdb"
+            Patcher(ifc_file, database=str(database), full_schema=False).patch()
+
+            patcher = Patcher(
+                ifc_file,
+                database=str(database),
+                full_schema=False,
+                should_update_incrementally=True,
+            )
+            with patch.object(
+                Patcher, "create_database", side_effect=RuntimeError("Interrupted")
+            ):
+                with pytest.raises(RuntimeError):
+                    patcher.patch()
+            patcher.db.close()
+            db = duckdb.connect(str(database), read_only=True)
+            assert db.execute('SELECT count(*) FROM "IfcWall"').fetchone() == (1,)
+            db.close()
+
+            patcher.patch()
+            assert patcher.is_updating is False
+            assert patcher.get_output() == str(database)
+            assert sorted(p.name for p in Path(tmp).iterdir()) == ["model.duckdb"]
+            db = duckdb.connect(str(database), read_only=True)
+            assert db.execute("SELECT count(*) FROM entity_hashes").fetchone()[0]
+            db.close()
+
+    def test_geometry_cache(self, capsys):
+        """Test cached tessellations match tessellating the model again."""
+        import duckdb
+        import ifcopenshell
+        import ifcopenshell.api.context
+        import ifcopenshell.api.feature
+        import ifcopenshell.api.geometry
+        import ifcopenshell.api.project
+        import ifcopenshell.api.root
+        import ifcopenshell.api.style
+        import ifcopenshell.api.unit
+        import numpy as np
+
+        ifc_file = ifcopenshell.api.project.create_file(version="IFC4")
+        ifcopenshell.api.root.create_entity(ifc_file, ifc_class="IfcProject")
+        ifcopenshell.api.unit.assign_unit(ifc_file)
+        model = ifcopenshell.api.context.add_context(ifc_file, context_type="Model")
+        body = ifcopenshell.api.context.add_context(
+            ifc_file,
+            context_type="Model",
+            context_identifier="Body",
+            target_view="MODEL_VIEW",
+            parent=model,
+        )
+        style = ifcopenshell.api.style.add_style(ifc_file, name="Red")
+        ifcopenshell.api.style.add_surface_style(
+            ifc_file,
+            style=style,
+            attributes={
+                "SurfaceColour": {"Name": None, "Red": 1.0, "Green": 0.0, "Blue": 0.0}
+            },
+        )
+
+        def add_product(ifc_class, length, x, z=0.0):
+            product = ifcopenshell.api.root.create_entity(ifc_file, ifc_class=ifc_class)
+            representation = ifcopenshell.api.geometry.add_wall_representation(
+                ifc_file, context=body, length=length, height=3.0, thickness=0.2
+            )
+            ifcopenshell.api.geometry.assign_representation(
+                ifc_file, product=product, representation=representation
+            )
+            matrix = np.eye(4)
+            matrix[0, 3], matrix[2, 3] = x, z
+            ifcopenshell.api.geometry.edit_object_placement(
+                ifc_file, product=product, matrix=matrix, is_si=True
+            )
+            return product, representation
+
+        # Identical walls, a styled one and one with an opening
+        for i in range(3):
+            add_product("IfcWall", 2.0, i * 3.0)
+        _, representation = add_product("IfcWall", 2.0, 10.0)
+        ifcopenshell.api.style.assign_representation_styles(
+            ifc_file, shape_representation=representation, styles=[style]
+        )
+        wall, _ = add_product("IfcWall", 4.0, 20.0)
+        opening, _ = add_product("IfcOpeningElement", 1.0, 21.0, 1.0)
+        ifcopenshell.api.feature.add_feature(ifc_file, feature=opening, element=wall)
+        # Placed, without a shape
+        proxy = ifcopenshell.api.root.create_entity(
+            ifc_file, ifc_class="IfcBuildingElementProxy"
+        )
+        ifcopenshell.api.geometry.edit_object_placement(
+            ifc_file, product=proxy, matrix=np.eye(4), is_si=True
+        )
+
+        def read(database):
+            db = duckdb.connect(database)
+            rows = db.execute(
+                """
+                SELECT s.ifc_id, s.matrix, g.verts, g.edges, g.faces,
+                    g.material_ids, g.materials
+                FROM shape s LEFT JOIN geometry g ON s.geometry = g.id
+                ORDER BY s.ifc_id;
+                """
+            ).fetchall()
+            geometry_rows = db.execute("SELECT count(*) FROM geometry").fetchone()[0]
+            db.close()
+            return rows, geometry_rows
+
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = str(Path(tmp) / "geometry.sqlite")
+            expected, expected_geometry_rows = None, None
+            results = []
+            for i, cached in enumerate((None, cache, cache)):
+                database = str(Path(tmp) / f"geometry_{i}.duckdb")
+                # A copy with other ids still hits the cache
+                revised = ifcopenshell.file.from_string(ifc_file.to_string())
+                patcher = Patcher(
+                    revised, database=database, full_schema=False, geometry_cache=cached
+                )
+                patcher.patch()
+                results.append(
+                    (patcher.geometry_cache_hits, patcher.geometry_cache_misses)
+                )
+                rows, geometry_rows = read(database)
+                if expected is None:
+                    expected, expected_geometry_rows = rows, geometry_rows
+                    continue
+                assert [row[0] for row in rows] == [row[0] for row in expected]
+                for row, expected_row in zip(rows, expected):
+                    assert np.allclose(
+                        np.frombuffer(row[1]), np.frombuffer(expected_row[1])
+                    )
+                    assert row[2:] == expected_row[2:]
+                assert geometry_rows == expected_geometry_rows
+
+        shapes = len([e for e in ifc_file.by_type("IfcElement") if e.Representation])
+        assert results == [(0, 0), (0, shapes), (shapes, 0)]
+        # A warm run does not start the iterator with only shapeless products
+        assert "Geometry iterator failed to initialize" not in capsys.readouterr().out
+
     def test_get_permutations(self):
         """Test get_permutations method."""
         mock_file = Mock()
@@ -142,3 +985,544 @@ class TestPatcher:
         mock_attribute.type_of_attribute.return_value = "<list <string>>"
         result = patcher.is_entity_list(mock_attribute)
         assert result is False
+
+    @pytest.mark.parametrize("columnar", [True, False])
+    def test_insert_rows(self, columnar):
+        """Test both load paths produce the same table contents."""
+        import duckdb
+
+        patcher = Patcher(Mock(), should_load_columnar=columnar)
+        patcher.c = duckdb.connect().cursor()
+        patcher.c.execute(
+            "CREATE TABLE psets (ifc_id BIGINT, pset_name TEXT, name TEXT, value TEXT);"
+        )
+        rows = [
+            (1, "Pset_WallCommon", "IsExternal", True),
+            (1, "Pset_WallCommon", "ThermalTransmittance", 0.5),
+            (2, "Pset_WallCommon", "Reference", "X"),
+            (2, "Pset_WallCommon", "Status", None),
+        ]
+
+        patcher.insert_rows("psets", rows, batch_size=3)
+
+        result = patcher.c.execute("SELECT * FROM psets ORDER BY ifc_id, name").fetchall()
+        assert result == [
+            (1, "Pset_WallCommon", "IsExternal", "true"),
+            (1, "Pset_WallCommon", "ThermalTransmittance", "0.5"),
+            (2, "Pset_WallCommon", "Reference", "X"),
+            (2, "Pset_WallCommon", "Status", None),
+        ]
+
+    def test_workers_match_serial_output(self):
+        """Test parallel extraction produces the same tables as the serial path."""
+        import duckdb
+        import ifcopenshell
+
+        ifc_file = ifcopenshell.file(schema="IFC4")
+        points = [ifc_file.createIfcCartesianPoint((float(i), 0.0, 0.0)) for i in range(25)]
+        ifc_file.createIfcPolyline(points)
+
+        contents = []
+        with tempfile.TemporaryDirectory() as tmp:
+            for workers in (1, 3):
+                database = str(Path(tmp) / f"workers_{workers}.duckdb")
+                with patch("ifc2duckdb.patcher.WORKER_CHUNK_SIZE", 10):
+                    Patcher(
+                        ifc_file,
+                        database=database,
+                        full_schema=False,
+                        should_get_geometry=False,
+                        workers=workers,
+                    ).patch()
+                db = duckdb.connect(database)
+                contents.append(
+                    [
+                        db.execute(f"SELECT * FROM {t} ORDER BY ifc_id").fetchall()
+                        for t in ("id_map", "IfcCartesianPoint", "IfcPolyline")
+                    ]
+                )
+                db.close()
+
+        assert contents[0] == contents[1]
+        assert len(contents[0][1]) == 25
+
+    def test_inverses_index(self):
+        """Test inverses are stored as an edge table and a list column."""
+        import duckdb
+        import ifcopenshell
+
+        ifc_file = ifcopenshell.file(schema="IFC4")
+        points = [ifc_file.createIfcCartesianPoint((float(i), 0.0, 0.0)) for i in range(3)]
+        polyline = ifc_file.createIfcPolyline(points)
+        ifc_file.createIfcPolyline(points[:2])
+
+        with tempfile.TemporaryDirectory() as tmp:
+            database = str(Path(tmp) / "inverses.duckdb")
+            Patcher(
+                ifc_file, database=database, full_schema=False, should_get_geometry=False
+            ).patch()
+            db = duckdb.connect(database)
+            edges = db.execute(
+                "SELECT referencing_id FROM inverses WHERE ifc_id = ? ORDER BY 1",
+                [points[0].id()],
+            ).fetchall()
+            lists = db.execute(
+                "SELECT ifc_id, inverses FROM IfcCartesianPoint ORDER BY ifc_id"
+            ).fetchall()
+            polyline_inverses = db.execute(
+                "SELECT inverses FROM IfcPolyline WHERE ifc_id = ?", [polyline.id()]
+            ).fetchone()[0]
+            db.close()
+
+        expected = sorted(e.id() for e in ifc_file.get_inverse(points[0]))
+        assert [e[0] for e in edges] == expected
+        assert lists[0][1] == expected
+        assert lists[2][1] == [polyline.id()]
+        assert polyline_inverses == []
+
+    def test_inverses_skip_geometry_data(self):
+        """Test skipped geometry data classes still count as inverses."""
+        import duckdb
+
+        from benchmarks.synthetic import create_pipe_model
+
+        ifc_file = create_pipe_model(5)
+        contents = []
+        with tempfile.TemporaryDirectory() as tmp:
+            for should_skip_geometry_data in (False, True):
+                database = str(Path(tmp) / f"{should_skip_geometry_data}.duckdb")
+                Patcher(
+                    ifc_file,
+                    database=database,
+                    full_schema=False,
+                    should_get_geometry=False,
+                    should_skip_geometry_data=should_skip_geometry_data,
+                ).patch()
+                db = duckdb.connect(database)
+                classes = [
+                    row[0]
+                    for row in db.execute(
+                        "SELECT DISTINCT ifc_class FROM id_map ORDER BY 1"
+                    ).fetchall()
+                ]
+                contents.append(
+                    {
+                        ifc_class: db.execute(
+                            f'SELECT ifc_id, inverses FROM "{ifc_class}" ORDER BY 1'
+                        ).fetchall()
+                        for ifc_class in classes
+                    }
+                )
+                db.close()
+
+        full, skipped = contents
+        assert "IfcShapeRepresentation" not in skipped
+        assert skipped == {c: full[c] for c in skipped}
+        [profile] = skipped["IfcCircleProfileDef"][:1]
+        assert profile[1] == sorted(
+            e.id() for e in ifc_file.get_inverse(ifc_file.by_id(profile[0]))
+        )
+        assert profile[1]
+
+    @pytest.mark.parametrize("columnar", [True, False])
+    def test_native_types(self, columnar):
+        """Test aggregates and selects are stored as LIST and STRUCT values."""
+        import duckdb
+        import ifcopenshell
+        import ifcopenshell.guid
+
+        ifc_file = ifcopenshell.file(schema="IFC4")
+        point_list = ifc_file.createIfcCartesianPointList3D(
+            ((0.0, 0.0, 0.0), (1.0, 0.0, 0.0), (1.0, 1.0, 0.0))
+        )
+        ifc_file.createIfcIndexedPolyCurve(
+            point_list, [ifc_file.createIfcLineIndex((1, 2, 3))], False
+        )
+        storey = ifc_file.createIfcBuildingStorey(ifcopenshell.guid.new())
+        walls = [ifc_file.createIfcWall(ifcopenshell.guid.new()) for _ in range(2)]
+        ifc_file.createIfcRelContainedInSpatialStructure(
+            ifcopenshell.guid.new(), None, None, None, walls, storey
+        )
+        prop = ifc_file.createIfcPropertySingleValue(
+            "Load", None, ifc_file.createIfcReal(1.5), None
+        )
+        pset = ifc_file.createIfcPropertySet(
+            ifcopenshell.guid.new(), None, "Pset_Test", None, [prop]
+        )
+        ifc_file.createIfcRelDefinesByProperties(
+            ifcopenshell.guid.new(), None, None, None, walls, pset
+        )
+
+        with tempfile.TemporaryDirectory() as tmp:
+            database = str(Path(tmp) / "native.duckdb")
+            Patcher(
+                ifc_file,
+                database=database,
+                full_schema=False,
+                should_get_geometry=False,
+                should_load_columnar=columnar,
+                should_use_native_types=True,
+            ).patch()
+            db = duckdb.connect(database)
+            coordinates = db.execute(
+                "SELECT CoordList FROM IfcCartesianPointList3D"
+            ).fetchone()[0]
+            segments = db.execute("SELECT Segments FROM IfcIndexedPolyCurve").fetchone()[0]
+            contained = db.execute(
+                """
+                SELECT e.element_id
+                FROM IfcRelContainedInSpatialStructure rel,
+                    UNNEST(rel.RelatedElements) AS e(element_id)
+                WHERE rel.RelatingStructure = ?
+                ORDER BY 1
+                """,
+                [storey.id()],
+            ).fetchall()
+            nominal = db.execute(
+                "SELECT NominalValue FROM IfcPropertySingleValue"
+            ).fetchone()[0]
+            relating = db.execute(
+                "SELECT RelatingPropertyDefinition.ifc_id FROM IfcRelDefinesByProperties"
+            ).fetchone()[0]
+            db.close()
+
+        assert coordinates == [[0.0, 0.0, 0.0], [1.0, 0.0, 0.0], [1.0, 1.0, 0.0]]
+        assert segments == [
+            {
+                "type": "IfcLineIndex",
+                "ifc_id": None,
+                "value_num": None,
+                "value_bool": None,
+                "value_text": "[1, 2, 3]",
+            }
+        ]
+        assert contained == [(walls[0].id(),), (walls[1].id(),)]
+        assert nominal["type"] == "IfcReal"
+        assert nominal["value_num"] == 1.5
+        assert relating == pset.id()
+
+    def test_rel_edges(self):
+        """Test relationships are flattened into ordered relating/related edges."""
+        import duckdb
+        import ifcopenshell
+        import ifcopenshell.guid
+
+        ifc_file = ifcopenshell.file(schema="IFC4")
+        guid = ifcopenshell.guid.new
+        site = ifc_file.createIfcSite(guid())
+        building = ifc_file.createIfcBuilding(guid())
+        storey = ifc_file.createIfcBuildingStorey(guid())
+        walls = [ifc_file.createIfcWall(guid()) for _ in range(3)]
+        ifc_file.createIfcRelAggregates(guid(), None, None, None, site, [building])
+        ifc_file.createIfcRelAggregates(guid(), None, None, None, building, [storey])
+        containment = ifc_file.createIfcRelContainedInSpatialStructure(
+            guid(), None, None, None, walls, storey
+        )
+        psets = [
+            ifc_file.createIfcPropertySet(guid(), None, name, None, [
+                ifc_file.createIfcPropertySingleValue("P", None, None, None)
+            ])
+            for name in ("A", "B")
+        ]
+        # An IfcPropertySetDefinitionSet as the relating side
+        ifc_file.createIfcRelDefinesByProperties(
+            guid(),
+            None,
+            None,
+            None,
+            [walls[0]],
+            ifc_file.createIfcPropertySetDefinitionSet(psets),
+        )
+
+        with tempfile.TemporaryDirectory() as tmp:
+            database = str(Path(tmp) / "rel_edges.duckdb")
+            Patcher(
+                ifc_file, database=database, full_schema=False, should_get_geometry=False
+            ).patch()
+            db = duckdb.connect(database)
+            contained = db.execute(
+                """
+                SELECT rel_id, relating_id, related_id, ordinal FROM rel_edges
+                WHERE rel_class = 'IfcRelContainedInSpatialStructure'
+                """
+            ).fetchall()
+            definitions = db.execute(
+                """
+                SELECT relating_id, related_id FROM rel_edges
+                WHERE rel_class = 'IfcRelDefinesByProperties' ORDER BY 1
+                """
+            ).fetchall()
+            ancestors = db.execute(
+                """
+                WITH RECURSIVE up(ifc_id, depth) AS (
+                    SELECT ?, 0
+                    UNION ALL
+                    SELECT e.relating_id, up.depth + 1
+                    FROM up JOIN rel_edges e ON e.related_id = up.ifc_id
+                    WHERE e.rel_class IN (
+                        'IfcRelContainedInSpatialStructure', 'IfcRelAggregates'
+                    )
+                )
+                SELECT ifc_id FROM up ORDER BY depth
+                """,
+                [walls[2].id()],
+            ).fetchall()
+            db.close()
+
+        assert contained == [
+            (containment.id(), storey.id(), wall.id(), i) for i, wall in enumerate(walls)
+        ]
+        assert definitions == [(pset.id(), walls[0].id()) for pset in psets]
+        assert [a[0] for a in ancestors] == [
+            walls[2].id(),
+            storey.id(),
+            building.id(),
+            site.id(),
+        ]
+
+    def test_expand_links(self):
+        """Test entity lists are written to link tables instead of permutations."""
+        import duckdb
+        import ifcopenshell
+        import ifcopenshell.guid
+
+        ifc_file = ifcopenshell.file(schema="IFC4")
+        guid = ifcopenshell.guid.new
+        storey = ifc_file.createIfcBuildingStorey(guid())
+        walls = [ifc_file.createIfcWall(guid()) for _ in range(4)]
+        containment = ifc_file.createIfcRelContainedInSpatialStructure(
+            guid(), None, None, None, walls, storey
+        )
+        # A layer with two entity lists
+        points = [ifc_file.createIfcCartesianPoint((float(i), 0.0)) for i in range(3)]
+        shading = ifc_file.createIfcSurfaceStyleShading(
+            ifc_file.createIfcColourRgb(None, 1.0, 1.0, 1.0)
+        )
+        styles = [
+            ifc_file.createIfcSurfaceStyle(f"S{i}", "BOTH", [shading]) for i in range(2)
+        ]
+        layer = ifc_file.createIfcPresentationLayerWithStyle(
+            "Layer", None, points, None, True, False, False, styles
+        )
+
+        counts = []
+        with tempfile.TemporaryDirectory() as tmp:
+            for expand_links in (False, True):
+                database = str(Path(tmp) / f"links_{expand_links}.duckdb")
+                Patcher(
+                    ifc_file,
+                    database=database,
+                    full_schema=False,
+                    should_expand=True,
+                    should_expand_links=expand_links,
+                    should_get_geometry=False,
+                ).patch()
+                db = duckdb.connect(database)
+                counts.append(
+                    [
+                        db.execute(f"SELECT count(*) FROM {t}").fetchone()[0]
+                        for t in (
+                            "IfcRelContainedInSpatialStructure",
+                            "IfcPresentationLayerWithStyle",
+                        )
+                    ]
+                )
+                if expand_links:
+                    columns = {
+                        row[0]
+                        for row in db.execute(
+                            "DESCRIBE IfcPresentationLayerWithStyle"
+                        ).fetchall()
+                    }
+                    contained = db.execute(
+                        """
+                        SELECT * FROM IfcRelContainedInSpatialStructure_RelatedElements
+                        ORDER BY ordinal
+                        """
+                    ).fetchall()
+                    layer_styles = db.execute(
+                        """
+                        SELECT parent_id, list(child_id ORDER BY ordinal)
+                        FROM IfcPresentationLayerWithStyle_LayerStyles GROUP BY 1
+                        """
+                    ).fetchall()
+                    inverses = db.execute(
+                        "SELECT inverses FROM IfcWall ORDER BY ifc_id"
+                    ).fetchall()
+                db.close()
+
+        # Every combination of the two lists, or a single row per relationship
+        assert counts == [[4, 6], [1, 1]]
+        assert "LayerStyles" not in columns
+        assert "AssignedItems" not in columns
+        assert contained == [
+            (containment.id(), "RelatedElements", i, wall.id())
+            for i, wall in enumerate(walls)
+        ]
+        assert layer_styles == [(layer.id(), [style.id() for style in styles])]
+        assert inverses == [([containment.id()],)] * 4
+
+    def test_expand_links_chunks(self):
+        """Test link rows are loaded in chunks with the same contents."""
+        import duckdb
+        import ifcopenshell
+        import ifcopenshell.guid
+
+        ifc_file = ifcopenshell.file(schema="IFC4")
+        guid = ifcopenshell.guid.new
+        for _ in range(5):
+            ifc_file.createIfcRelContainedInSpatialStructure(
+                guid(),
+                None,
+                None,
+                None,
+                [ifc_file.createIfcWall(guid()) for _ in range(3)],
+                ifc_file.createIfcBuildingStorey(guid()),
+            )
+        rels = ifc_file.by_type("IfcRelContainedInSpatialStructure")
+
+        contents = []
+        with tempfile.TemporaryDirectory() as tmp:
+            for chunk_size in (100000, 4):
+                database = str(Path(tmp) / f"chunks_{chunk_size}.duckdb")
+                patcher = Patcher(
+                    ifc_file,
+                    database=database,
+                    full_schema=False,
+                    should_expand_links=True,
+                    should_get_geometry=False,
+                )
+                with patch("ifc2duckdb.patcher.LINK_CHUNK_SIZE", chunk_size):
+                    patcher.patch()
+                    rel_class = "IfcRelContainedInSpatialStructure"
+                    chunks = list(patcher.extract_chunks(rel_class, rels))
+                db = duckdb.connect(database)
+                contents.append(
+                    [
+                        db.execute(f"SELECT * FROM {table} ORDER BY ALL").fetchall()
+                        for table in (
+                            "IfcRelContainedInSpatialStructure",
+                            "IfcRelContainedInSpatialStructure_RelatedElements",
+                            "IfcWall",
+                        )
+                    ]
+                )
+                db.close()
+                # Each chunk is yielded once it holds at least chunk_size links
+                sizes = [
+                    len(chunk[5]["IfcRelContainedInSpatialStructure_RelatedElements"])
+                    for chunk in chunks
+                ]
+                assert sizes == ([15] if chunk_size > 15 else [6, 6, 3])
+
+        assert contents[0] == contents[1]
+        assert len(contents[0][1]) == 15
+
+    def test_insert_psets_matches_get_psets(self):
+        """Test bulk pset extraction matches ifcopenshell's get_psets."""
+        import duckdb
+        import ifcopenshell
+        import ifcopenshell.guid
+        import ifcopenshell.util.element
+
+        ifc_file = ifcopenshell.file(schema="IFC4")
+
+        def pset(name, **props):
+            return ifc_file.createIfcPropertySet(
+                ifcopenshell.guid.new(),
+                None,
+                name,
+                None,
+                [
+                    ifc_file.createIfcPropertySingleValue(k, None, v, None)
+                    for k, v in props.items()
+                ],
+            )
+
+        type_pset = pset("Pset_WallCommon", FireRating=ifc_file.createIfcLabel("2HR"))
+        wall_type = ifc_file.createIfcWallType(
+            ifcopenshell.guid.new(), None, "WT", None, None, [type_pset]
+        )
+        walls = [
+            ifc_file.createIfcWall(ifcopenshell.guid.new(), None, f"W{i}")
+            for i in range(3)
+        ]
+        ifc_file.createIfcRelDefinesByType(
+            ifcopenshell.guid.new(), None, None, None, walls, wall_type
+        )
+        shared = pset("Pset_Shared", Load=ifc_file.createIfcReal(1.5))
+        ifc_file.createIfcRelDefinesByProperties(
+            ifcopenshell.guid.new(), None, None, None, walls, shared
+        )
+        override = pset(
+            "Pset_WallCommon",
+            FireRating=ifc_file.createIfcLabel("1HR"),
+            IsExternal=ifc_file.createIfcBoolean(True),
+        )
+        ifc_file.createIfcRelDefinesByProperties(
+            ifcopenshell.guid.new(), None, None, None, [walls[0]], override
+        )
+
+        patcher = Patcher(ifc_file)
+        patcher.c = duckdb.connect().cursor()
+        patcher.create_pset_table()
+        patcher.insert_psets()
+        result = sorted(
+            patcher.c.execute("SELECT ifc_id, pset_name, name, value FROM psets")
+            .fetchall()
+        )
+
+        expected = []
+        for element in [wall_type, *walls]:
+            psets = ifcopenshell.util.element.get_psets(element)
+            for pset_name, props in psets.items():
+                for name, value in props.items():
+                    if name != "id":
+                        value = {True: "true", False: "false"}.get(value, value)
+                        expected.append((element.id(), pset_name, name, str(value)))
+        assert result == sorted(expected)
+        assert (walls[0].id(), "Pset_WallCommon", "FireRating", "1HR") in result
+
+        typed = patcher.c.execute(
+            """
+            SELECT name, value_num, value_bool, value_text, value_type
+            FROM psets WHERE ifc_id = ? ORDER BY name
+            """,
+            [walls[0].id()],
+        ).fetchall()
+        assert typed == [
+            ("FireRating", None, None, "1HR", "IfcLabel"),
+            ("IsExternal", None, True, None, "IfcBoolean"),
+            ("Load", 1.5, None, None, "IfcReal"),
+        ]
+
+    def test_insert_psets_units(self):
+        """Test properties fall back to project units, unless they have no value."""
+        import duckdb
+        import ifcopenshell.api.project
+        import ifcopenshell.api.pset
+        import ifcopenshell.api.root
+        import ifcopenshell.api.unit
+
+        ifc_file = ifcopenshell.api.project.create_file(version="IFC4")
+        ifcopenshell.api.root.create_entity(ifc_file, ifc_class="IfcProject")
+        ifcopenshell.api.unit.assign_unit(ifc_file)
+        wall = ifcopenshell.api.root.create_entity(ifc_file, ifc_class="IfcWall")
+        pset = ifcopenshell.api.pset.add_pset(ifc_file, product=wall, name="Pset_Test")
+        pset.HasProperties = [
+            ifc_file.createIfcPropertySingleValue(
+                "Width", None, ifc_file.createIfcLengthMeasure(0.2), None
+            ),
+            ifc_file.createIfcPropertySingleValue("Unset", None, None, None),
+        ]
+
+        patcher = Patcher(ifc_file)
+        patcher.c = duckdb.connect().cursor()
+        patcher.create_pset_table()
+        patcher.insert_psets()
+        assert patcher.c.execute(
+            "SELECT name, value, value_type, unit FROM psets ORDER BY name"
+        ).fetchall() == [
+            ("Unset", None, None, None),
+            ("Width", "0.2", "IfcLengthMeasure", "mm"),
+        ]
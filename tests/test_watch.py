@@ -0,0 +1,139 @@
+"""Tests for the conversion of IFC files dropped into a watched directory."""
+
+import tempfile
+import threading
+from pathlib import Path
+
+import pytest
+
+from ifc2duckdb.watch import Watcher, is_complete, read_database_version
+
+OPTIONS = {"full_schema": False, "should_get_geometry": False}
+
+
+def model_text(storeys, walls):
+    from benchmarks.synthetic import create_storey_model
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "model.ifc"
+        create_storey_model(storeys, walls, doors=1).write(str(path))
+        return path.read_bytes()
+
+
+def count_walls(database):
+    import duckdb
+
+    db = duckdb.connect(str(database), read_only=True)
+    count = db.execute('SELECT count(*) FROM "IfcWall"').fetchone()[0]
+    db.close()
+    return count
+
+
+class TestWatcher:
+    """Test cases for Watcher."""
+
+    def test_watch(self):
+        """Test complete files are converted and swapped in as new versions."""
+        import duckdb
+
+        first, second = model_text(1, 2), model_text(1, 3)
+        updates = []
+        with tempfile.TemporaryDirectory() as tmp:
+            drops = Path(tmp) / "drops"
+            (drops / "site").mkdir(parents=True)
+            watcher = Watcher(
+                drops,
+                output=Path(tmp) / "databases",
+                debounce=0,
+                options=OPTIONS,
+                on_update=updates.append,
+            )
+            watcher.start()
+            path = drops / "site" / "Shiba.ifc"
+            database = Path(tmp) / "databases" / "site" / "Shiba.duckdb"
+
+            # Still being written
+            path.write_bytes(first[: len(first) // 2])
+            assert not is_complete(path)
+            assert watcher.check() == []
+            path.write_bytes(first)
+            [update] = watcher.check()
+            assert update.database == str(database)
+            assert (update.source, update.version) == (str(path), 1)
+            assert updates == [update]
+            assert count_walls(database) == 2
+            assert read_database_version(database)["version"] == 1
+            assert not database.with_name("Shiba.partial.duckdb").exists()
+
+            # Same content
+            path.write_bytes(first)
+            assert watcher.check() == []
+
+            reader = duckdb.connect(str(database), read_only=True)
+            path.write_bytes(second)
+            [update] = watcher.check()
+            assert update.version == 2
+            assert read_database_version(database)["sha256"] == update.sha256
+            # Open connections keep reading the previous version
+            assert reader.execute('SELECT count(*) FROM "IfcWall"').fetchone()[0] == 2
+            reader.close()
+            assert count_walls(database) == 3
+
+    def test_debounce(self):
+        """Test files are only converted once unchanged for the debounce time."""
+        with tempfile.TemporaryDirectory() as tmp:
+            watcher = Watcher(tmp, debounce=60, options=OPTIONS)
+            watcher.start()
+            (Path(tmp) / "model.ifc").write_bytes(model_text(1, 2))
+            assert watcher.check() == []
+            assert list(watcher.pending) == [Path(tmp) / "model.ifc"]
+
+    def test_shared_database(self):
+        """Test only the newest file is converted into a shared database."""
+        import os
+
+        with tempfile.TemporaryDirectory() as tmp:
+            drops = Path(tmp) / "drops"
+            drops.mkdir()
+            (drops / "V.3.0.ifc").write_bytes(model_text(1, 2))
+            (drops / "V.3.1.ifc").write_bytes(model_text(1, 3))
+            os.utime(drops / "V.3.0.ifc", (1, 1))
+            database = Path(tmp) / "model.duckdb"
+            watcher = Watcher(drops, database=database, debounce=0, options=OPTIONS)
+            watcher.start()
+            [update] = watcher.check()
+            assert update.source == str(drops / "V.3.1.ifc")
+            assert count_walls(database) == 3
+
+            # A broken export keeps the previous version
+            (drops / "V.3.2.ifc").write_text("ISO-10303-21;\nEND-ISO-10303-21;\n")
+            assert watcher.check() == []
+            assert read_database_version(database)["version"] == 1
+            assert count_walls(database) == 3
+
+    @pytest.mark.parametrize("should_poll", [True, False])
+    def test_run(self, should_poll):
+        """Test the watch loop converts files until stopped."""
+        stop = threading.Event()
+        updates = []
+
+        def on_update(update):
+            updates.append(update)
+            stop.set()
+
+        with tempfile.TemporaryDirectory() as tmp:
+            (Path(tmp) / "model.ifc").write_bytes(model_text(1, 2))
+            watcher = Watcher(
+                tmp,
+                debounce=0,
+                poll_interval=0.1,
+                should_poll=should_poll,
+                options=OPTIONS,
+                on_update=on_update,
+            )
+            thread = threading.Thread(target=watcher.run, args=(stop,))
+            thread.start()
+            thread.join(120)
+            stop.set()
+            assert not thread.is_alive()
+        assert [update.version for update in updates] == [1]